@@ -1,22 +1,108 @@
 """API endpoints for HTTP-level trace ingestion."""
 
 import logging
+from typing import Any
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import Settings, get_settings
 from app.database import get_session
+from app.enums import IngestStatus
 from app.models.http_traces import HTTPTrace
-from app.schemas.http_traces import HTTPTraceCreate
-from app.schemas.traces import TraceRead
-from app.services.http_trace_parser import HTTPTraceParserService
+from app.schemas.http_traces import (
+    HTTPTraceBatchError,
+    HTTPTraceBatchResponse,
+    HTTPTraceCreate,
+    HTTPTraceIngestResponse,
+)
+from app.schemas.traces import TraceCreate, TraceRead
+from app.services.blob_store import get_blob_store
+from app.services.http_trace_ingest import get_http_trace_ingest_pool
+from app.services.http_trace_parser import (
+    HTTPTraceParserService,
+    get_http_trace_parser_service,
+)
 from app.services.traces_service import TracesService
+from app.utils.wire_format import (
+    JSON_CONTENT_TYPE,
+    MSGPACK_CONTENT_TYPE,
+    BodyTooLargeError,
+    UnsupportedEncodingError,
+    decode_body,
+    decompress_body,
+    is_msgpack,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/http-traces", tags=["http-traces"])
 
+_http_trace_batch_adapter = TypeAdapter(list[HTTPTraceCreate])
+_http_trace_batch_schema = {
+    "type": "array",
+    "items": {"$ref": "#/components/schemas/HTTPTraceCreate"},
+}
+
+
+async def read_http_trace_batch(
+    request: Request,
+    settings: Settings = Depends(get_settings),
+) -> list[HTTPTraceCreate]:
+    """Read a batch of HTTP traces in any supported wire format.
+
+    The body may be JSON (default) or MessagePack, selected by the
+    ``Content-Type`` header, and optionally gzip- or zstd-compressed as
+    declared by ``Content-Encoding``. MessagePack bodies carry raw request and
+    response bytes, so the hex-decoding fallback used for JSON is skipped.
+
+    Args:
+        request: Incoming request
+        settings: Application settings
+
+    Returns:
+        Validated HTTP trace payloads
+
+    Raises:
+        HTTPException: If the encoding is unsupported, the body is malformed or
+            too large once decompressed
+
+    """
+    content_type = request.headers.get("content-type")
+    try:
+        body = decompress_body(
+            await request.body(),
+            request.headers.get("content-encoding"),
+            settings.ingest_max_body_size,
+        )
+        data = decode_body(body, content_type)
+    except BodyTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=str(e),
+        ) from e
+    except UnsupportedEncodingError as e:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=str(e),
+        ) from e
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+
+    try:
+        return _http_trace_batch_adapter.validate_python(
+            data,
+            context={"raw_bodies": is_msgpack(content_type)},
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors()) from e
+
 
 @router.post("", response_model=TraceRead, status_code=status.HTTP_201_CREATED)
 async def create_http_trace(
@@ -43,53 +129,19 @@ async def create_http_trace(
         HTTPException: If unable to parse the trace or provider is unsupported
 
     """
-    # Convert request/response to strings if they are bytes
-    request_str = (
-        payload.request.decode("utf-8", errors="replace")
-        if isinstance(payload.request, bytes)
-        else payload.request
-    )
-    response_str = (
-        payload.response.decode("utf-8", errors="replace")
-        if isinstance(payload.response, bytes)
-        else payload.response
-    )
-
     # Create and persist HTTPTrace first
-    http_trace = HTTPTrace(
-        started_at=payload.started_at,
-        completed_at=payload.completed_at,
-        status_code=payload.status_code,
-        error=payload.error,
-        request=request_str,
-        request_headers=payload.request_headers,
-        response=response_str,
-        response_headers=payload.response_headers,
-        request_method=payload.request_method,
-        request_path=payload.request_path,
-        http_metadata=payload.metadata,
-    )
+    values = _build_http_trace_values(payload)
+    await get_blob_store().store_http_trace_bodies(session, [values])
+    http_trace = HTTPTrace(**values)
     session.add(http_trace)
     await session.commit()
 
     # Initialize parser service
-    parser_service = HTTPTraceParserService()
+    parser_service = get_http_trace_parser_service()
 
     # Parse the HTTP trace into a TraceCreate object
     try:
-        trace_create = parser_service.parse_http_trace(
-            request=payload.request,
-            request_headers=payload.request_headers,
-            response=payload.response,
-            response_headers=payload.response_headers,
-            started_at=payload.started_at,
-            completed_at=payload.completed_at,
-            status_code=payload.status_code,
-            error=payload.error,
-            metadata=payload.metadata,
-            call_path=payload.path,
-            request_path=payload.request_path,
-        )
+        trace_create = _parse_payload(parser_service, payload)
     except ValueError as e:
         # HTTPTrace is already saved, just rollback the transaction for the trace
         await session.commit()
@@ -116,3 +168,208 @@ async def create_http_trace(
     )
 
     return TraceRead.model_validate(trace)
+
+
+@router.post(
+    "/batch",
+    response_model=HTTPTraceBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON_CONTENT_TYPE: {"schema": _http_trace_batch_schema},
+                MSGPACK_CONTENT_TYPE: {"schema": _http_trace_batch_schema},
+            },
+        },
+    },
+)
+async def create_http_traces_batch(
+    background_tasks: BackgroundTasks,
+    payload: list[HTTPTraceCreate] = Depends(read_http_trace_batch),
+    session: AsyncSession = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> HTTPTraceBatchResponse:
+    """Create traces from a batch of HTTP-level request/response captures.
+
+    All raw HTTP traces, traces and their input/output items are written with
+    bulk inserts and committed in a single transaction. Traces that fail to
+    parse are still stored as raw HTTP traces and reported in ``errors``
+    instead of failing the whole batch. See ``read_http_trace_batch`` for the
+    accepted wire formats.
+
+    Args:
+        payload: List of HTTP trace data including raw request/response
+        background_tasks: Background tasks for auto-grading
+        session: Database session
+        settings: Application settings
+
+    Returns:
+        Summary with the IDs of created traces and per-item parse errors
+
+    """
+    if not payload:
+        return HTTPTraceBatchResponse(received=0, created=0)
+
+    rows = [_build_http_trace_values(item) for item in payload]
+    await get_blob_store().store_http_trace_bodies(session, rows)
+    # Render NULL blob hashes so that all rows are inserted as one batch
+    result = await session.execute(
+        insert(HTTPTrace)
+        .returning(HTTPTrace.id, sort_by_parameter_order=True)
+        .execution_options(render_nulls=True),
+        rows,
+    )
+    http_trace_ids = list(result.scalars().all())
+
+    parser_service = get_http_trace_parser_service()
+    parsed: list[tuple[TraceCreate, int | None]] = []
+    errors: list[HTTPTraceBatchError] = []
+    for index, (item, http_trace_id) in enumerate(
+        zip(payload, http_trace_ids, strict=True),
+    ):
+        try:
+            parsed.append((_parse_payload(parser_service, item), http_trace_id))
+        except ValueError as e:
+            errors.append(
+                HTTPTraceBatchError(
+                    index=index,
+                    detail=f"Failed to parse HTTP trace: {e!s}",
+                ),
+            )
+        except Exception as e:
+            logger.exception("Unexpected error parsing HTTP trace")
+            errors.append(
+                HTTPTraceBatchError(
+                    index=index,
+                    detail=f"Internal error parsing HTTP trace: {e!s}",
+                ),
+            )
+
+    traces_service = TracesService(settings)
+    trace_ids = await traces_service.create_traces_batch(
+        parsed,
+        session,
+        background_tasks=background_tasks,
+    )
+
+    return HTTPTraceBatchResponse(
+        received=len(payload),
+        created=len(trace_ids),
+        trace_ids=trace_ids,
+        errors=errors,
+    )
+
+
+@router.post(
+    "/ingest",
+    response_model=HTTPTraceIngestResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON_CONTENT_TYPE: {"schema": _http_trace_batch_schema},
+                MSGPACK_CONTENT_TYPE: {"schema": _http_trace_batch_schema},
+            },
+        },
+    },
+)
+async def ingest_http_traces(
+    payload: list[HTTPTraceCreate] = Depends(read_http_trace_batch),
+    session: AsyncSession = Depends(get_session),
+) -> HTTPTraceIngestResponse:
+    """Store a batch of HTTP-level captures and process them asynchronously.
+
+    The raw HTTP traces are committed with ``pending`` status and the request
+    returns immediately. Parsing, model canonicalization, trace creation and
+    implementation matching are done in micro-batches by the HTTP trace ingest
+    pool, which marks each HTTP trace ``processed`` or ``failed``. Accepts the
+    same wire formats as ``/batch``.
+
+    Args:
+        payload: List of HTTP trace data including raw request/response
+        session: Database session
+
+    Returns:
+        IDs of the stored HTTP traces
+
+    """
+    if not payload:
+        return HTTPTraceIngestResponse(received=0)
+
+    rows = [
+        {**_build_http_trace_values(item), "ingest_status": IngestStatus.PENDING}
+        for item in payload
+    ]
+    await get_blob_store().store_http_trace_bodies(session, rows)
+    # Render NULL blob hashes so that all rows are inserted as one batch
+    result = await session.execute(
+        insert(HTTPTrace)
+        .returning(HTTPTrace.id, sort_by_parameter_order=True)
+        .execution_options(render_nulls=True),
+        rows,
+    )
+    http_trace_ids = list(result.scalars().all())
+    await session.commit()
+
+    get_http_trace_ingest_pool().submit(http_trace_ids)
+
+    return HTTPTraceIngestResponse(
+        received=len(payload),
+        http_trace_ids=http_trace_ids,
+    )
+
+
+def _build_http_trace_values(payload: HTTPTraceCreate) -> dict[str, Any]:
+    """Build column values for an HTTPTrace row from an ingestion payload."""
+    # Convert request/response to strings if they are bytes
+    request_str = (
+        payload.request.decode("utf-8", errors="replace")
+        if isinstance(payload.request, bytes)
+        else payload.request
+    )
+    response_str = (
+        payload.response.decode("utf-8", errors="replace")
+        if isinstance(payload.response, bytes)
+        else payload.response
+    )
+
+    return {
+        "started_at": payload.started_at,
+        "completed_at": payload.completed_at,
+        "status_code": payload.status_code,
+        "error": payload.error,
+        "request_inline": request_str,
+        "request_blob_hash": None,
+        "request_blob_offset": None,
+        "request_headers": payload.request_headers,
+        "response_inline": response_str,
+        "response_blob_hash": None,
+        "response_blob_offset": None,
+        "response_headers": payload.response_headers,
+        "request_method": payload.request_method,
+        "request_path": payload.request_path,
+        "path": payload.path,
+        "http_metadata": payload.metadata,
+    }
+
+
+def _parse_payload(
+    parser_service: HTTPTraceParserService,
+    payload: HTTPTraceCreate,
+) -> TraceCreate:
+    """Parse an ingestion payload into a TraceCreate object."""
+    return parser_service.parse_http_trace(
+        request=payload.request,
+        request_headers=payload.request_headers,
+        response=payload.response,
+        response_headers=payload.response_headers,
+        started_at=payload.started_at,
+        completed_at=payload.completed_at,
+        status_code=payload.status_code,
+        error=payload.error,
+        metadata=payload.metadata,
+        call_path=payload.path,
+        request_path=payload.request_path,
+    )
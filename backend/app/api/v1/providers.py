@@ -7,13 +7,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_session
 from app.schemas.providers import (
+    CanonicalizationCacheStats,
     ModelCreate,
     ModelResponse,
     ProviderCreate,
     ProviderResponse,
     ProviderUpdate,
 )
-from app.services.provider_service import ProviderService
+from app.services.provider_service import (
+    ProviderService,
+    get_model_canonicalization_cache,
+)
 
 router = APIRouter(prefix="/providers", tags=["providers"])
 
@@ -98,6 +102,12 @@ async def list_providers_with_keys(
     ]
 
 
+@router.get("/canonicalization-cache", response_model=CanonicalizationCacheStats)
+async def get_canonicalization_cache_stats() -> CanonicalizationCacheStats:
+    """Return hit and miss counters of the model canonicalization cache."""
+    return CanonicalizationCacheStats(**get_model_canonicalization_cache().stats())
+
+
 @router.get("/{provider_id}", response_model=ProviderResponse)
 async def get_provider(
     provider_id: int,
@@ -187,6 +197,8 @@ async def create_provider(
                 )
 
     await session.commit()
+    # Lookups made between flush and commit may have cached the old catalog
+    get_model_canonicalization_cache().invalidate()
 
     # Re-fetch provider with models eagerly loaded
     provider = await service.get_provider_by_id(provider.id)
@@ -244,6 +256,8 @@ async def update_provider(
             base_url=provider_data.base_url,
         )
         await session.commit()
+        # Lookups made between flush and commit may have cached the old catalog
+        get_model_canonicalization_cache().invalidate()
 
         # Re-fetch provider with models eagerly loaded
         provider = await service.get_provider_by_id(provider_id)
@@ -296,6 +310,7 @@ async def delete_provider(
     try:
         await service.delete_provider(provider_id)
         await session.commit()
+        get_model_canonicalization_cache().invalidate()
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -363,6 +378,7 @@ async def add_model_to_provider(
             display_name=model_data.display_name,
         )
         await session.commit()
+        get_model_canonicalization_cache().invalidate()
         return ModelResponse(
             id=model.id,
             name=model.name,
@@ -396,6 +412,7 @@ async def delete_model(
     try:
         await service.delete_model(model_id)
         await session.commit()
+        get_model_canonicalization_cache().invalidate()
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
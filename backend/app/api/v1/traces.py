@@ -1,17 +1,20 @@
 """API endpoints for traces."""
 
+import base64
+import json
+import operator
 from collections.abc import Sequence
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, func, desc, asc, nulls_last
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import asc, desc, nulls_last, select, tuple_, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.database import get_session
 from app.models.http_traces import HTTPTrace
+from app.models.tasks import Implementation
 from app.models.traces import Trace
-from app.models.evaluation import Grade
 from app.schemas.http_traces import HTTPTraceRead
 from app.schemas.traces import TraceCreate, TraceRead
 from app.services.traces_service import TracesService
@@ -19,10 +22,46 @@ from app.services.traces_service import TracesService
 router = APIRouter(prefix="/traces", tags=["traces"])
 
 
+def _encode_cursor(key: object, trace_id: int) -> str:
+    """Encode the sort key and ID of a page's last trace as an opaque cursor."""
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    raw = json.dumps([key, trace_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_field: str) -> tuple[object, int]:
+    """Decode a cursor into the sort key and ID it continues after."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, trace_id = json.loads(raw)
+        if not isinstance(trace_id, int):
+            raise ValueError(trace_id)
+        if sort_field == "ai_score":
+            if key is not None and not isinstance(key, (int, float)):
+                raise ValueError(key)
+            return key, trace_id
+        return datetime.fromisoformat(key), trace_id
+    except (ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        ) from e
+
+
 @router.get("", response_model=list[TraceRead])
 async def list_traces(
+    response: Response,
     limit: int = Query(25, ge=1, le=100, description="Number of traces to return"),
-    offset: int = Query(0, ge=0, description="Number of traces to skip"),
+    cursor: str | None = Query(
+        None,
+        description="Continue after the page that returned this X-Next-Cursor",
+    ),
+    offset: int = Query(
+        0,
+        ge=0,
+        description="Number of traces to skip (deprecated, use cursor)",
+    ),
     task_id: int | None = Query(None, description="Filter by task ID"),
     implementation_id: int | None = Query(
         None,
@@ -42,61 +81,95 @@ async def list_traces(
 ) -> list[TraceRead]:
     """Return paginated traces with their associated input items.
 
-    Supports infinite scrolling with limit and offset parameters.
-    Can be filtered by task_id, implementation_id, and time range.
+    Supports infinite scrolling with keyset pagination: when more traces
+    follow, the X-Next-Cursor response header holds a cursor to pass back
+    for the next page. Traces are ordered by (started_at, id), or by
+    (ai_score, id) with unscored traces last, so a page is found through
+    the index however deep it is, unlike with offset.
+
+    Can be filtered by task_id, implementation_id, and time range. On
+    PostgreSQL a time range only reads the trace and item partitions of its
+    days.
     """
-    query = (
-        select(Trace, func.avg(Grade.score_float).label("ai_score"))
-        .outerjoin(Grade, Trace.id == Grade.trace_id)
-        .options(
-            joinedload(Trace.input_items),
-            joinedload(Trace.output_items),
-        )
-        .group_by(Trace.id)
-    )
+    ascending = sort_order == "asc"
+    direction = asc if ascending else desc
+    after = operator.gt if ascending else operator.lt
+
+    # Find the page's trace IDs first, then load just those traces
+    sort_col = Trace.ai_score if sort_field == "ai_score" else Trace.started_at
+    query = select(Trace.id, sort_col)
 
     # Apply filters if provided
     if task_id is not None:
         # Filter by task_id through implementation relationship
-        query = query.join(Trace.implementation).filter(
-            Trace.implementation.has(task_id=task_id),
+        query = query.join(Trace.implementation).where(
+            Implementation.task_id == task_id,
         )
 
     if implementation_id is not None:
-        query = query.filter(Trace.implementation_id == implementation_id)
+        query = query.where(Trace.implementation_id == implementation_id)
 
     if start_time is not None:
-        query = query.filter(Trace.started_at >= datetime.fromisoformat(start_time))
+        query = query.where(Trace.started_at >= datetime.fromisoformat(start_time))
 
     if end_time is not None:
-        query = query.filter(Trace.started_at <= datetime.fromisoformat(end_time))
+        query = query.where(Trace.started_at <= datetime.fromisoformat(end_time))
+
+    key, last_id = _decode_cursor(cursor, sort_field) if cursor else (None, None)
 
-    # Apply sorting
     if sort_field == "ai_score":
-        sort_col = func.avg(Grade.score_float)
-        if sort_order == "asc":
-            query = query.order_by(nulls_last(asc(sort_col)))
-        else:
-            query = query.order_by(nulls_last(desc(sort_col)))
+        # Scored traces come first and unscored ones last in either order.
+        # Each kind is read in (ai_score, id) index order and only as far as
+        # the page needs, which a single ORDER BY ... NULLS LAST could not do
+        # with the same index in both directions.
+        branches = []
+        if cursor is None or key is not None:
+            scored = query.where(Trace.ai_score.is_not(None))
+            if cursor is not None:
+                scored = scored.where(
+                    after(tuple_(Trace.ai_score, Trace.id), tuple_(key, last_id)),
+                )
+            branches.append(scored.order_by(direction(Trace.ai_score), direction(Trace.id)))
+        unscored = query.where(Trace.ai_score.is_(None))
+        if cursor is not None and key is None:
+            unscored = unscored.where(after(Trace.id, last_id))
+        branches.append(unscored.order_by(direction(Trace.id)))
+
+        candidates = union_all(
+            *(branch.limit(offset + limit + 1).subquery().select() for branch in branches),
+        ).subquery()
+        query = select(candidates.c.id, candidates.c.ai_score).order_by(
+            nulls_last(direction(candidates.c.ai_score)),
+            direction(candidates.c.id),
+        )
     else:
         # Default to timestamp
-        sort_col = Trace.started_at
-        if sort_order == "asc":
-            query = query.order_by(asc(sort_col))
-        else:
-            query = query.order_by(desc(sort_col))
-
-    query = query.limit(limit).offset(offset)
-
-    result = await session.execute(query)
-    rows = result.unique().all()
-
-    trace_reads = []
-    for trace, score in rows:
-        trace.ai_score = score
-        trace_reads.append(TraceRead.model_validate(trace))
-
-    return trace_reads
+        if cursor is not None:
+            query = query.where(
+                after(tuple_(Trace.started_at, Trace.id), tuple_(key, last_id)),
+            )
+        query = query.order_by(direction(Trace.started_at), direction(Trace.id))
+
+    # One extra row tells whether there is a next page
+    query = query.limit(limit + 1).offset(offset)
+    page = (await session.execute(query)).all()
+    if len(page) > limit:
+        page = page[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(page[-1][1], page[-1][0])
+    if not page:
+        return []
+
+    trace_ids = [trace_id for trace_id, _ in page]
+    result = await session.execute(
+        select(Trace)
+        .options(
+            selectinload(Trace.input_items),
+            selectinload(Trace.output_items),
+        )
+        .where(Trace.id.in_(trace_ids)),
+    )
+    traces = {trace.id: trace for trace in result.scalars()}
+    return [TraceRead.model_validate(traces[trace_id]) for trace_id in trace_ids]
 
 
 @router.post("", response_model=TraceRead, status_code=status.HTTP_201_CREATED)
@@ -32,10 +32,79 @@ class Settings(BaseSettings):
     min_cluster_size: int = 10
     # if unset, will be set to number_of_traces // 5
     min_matching_traces: int | None = None
+    # Keep each path's clustering state in the grouping worker and only fold
+    # in new traces, instead of re-clustering all unmatched traces each time
+    incremental_grouping: bool = True
+    # With incremental grouping, round the unset min_matching_traces down to
+    # a power of two, so that it only changes (and every trace has to be
+    # re-templated) when the number of unmatched traces doubles, at the cost
+    # of smaller groups
+    stable_min_matching_traces: bool = False
+    # Bound on that state in each worker: paths not grouped for
+    # grouping_cache_idle_seconds, and the least recently grouped paths once
+    # more than grouping_cache_max_traces traces are kept, are dropped and
+    # rebuilt from the database when grouped again
+    grouping_cache_max_traces: int = 100_000
+    grouping_cache_idle_seconds: float = 3600.0
+    # Opt-in, and only used with incremental_grouping off: when re-clustering,
+    # only search for templates within buckets of prompts whose shingles have
+    # at least this estimated Jaccard similarity (MinHash LSH); unset searches
+    # across all prompts of a path, which benchmarks/bench_group_strings.py
+    # shows to be faster since segments are searched with a suffix automaton
+    grouping_lsh_threshold: float | None = None
+
+    # Pool of task grouping worker processes, which claim dirty paths from
+    # the task_grouping_work table, polling it when idle. A claim is leased
+    # and renewed while the path is grouped, so work of a crashed worker is
+    # picked up once its lease expires; crashed workers are restarted by a
+    # health check that runs every grouping_health_check_interval_seconds
+    grouping_workers: int = 2
+    grouping_poll_interval_seconds: float = 1.0
+    grouping_lease_seconds: float = 300.0
+    grouping_health_check_interval_seconds: float = 5.0
+
+    # Cached model canonicalizations are dropped as soon as this process
+    # changes a provider or model; changes by other processes are checked for
+    # at most this often
+    model_canonicalization_recheck_seconds: float = 5.0
+    # Implementation matchers are dropped as soon as this process changes an
+    # implementation; changes by other processes (e.g. the grouping workers)
+    # are checked for at most this often per project and model
+    implementation_matcher_recheck_seconds: float = 1.0
 
     max_task_name_length: int = 25
     max_task_description_length: int = 150
 
+    # Maximum size in bytes of decompressed HTTP trace batch bodies (0
+    # disables); larger bodies are rejected with 413
+    ingest_max_body_size: int = 64 * 1024 * 1024
+
+    # Asynchronous HTTP trace ingest (POST /http-traces/ingest). Every
+    # ingest_sweep_interval_seconds pending HTTP traces are queued again, and
+    # claims older than ingest_claim_timeout_seconds (e.g. of a crashed or
+    # failed consumer) are released
+    ingest_consumers: int = 2
+    ingest_batch_size: int = 100
+    ingest_linger_ms: int = 50
+    ingest_sweep_interval_seconds: float = 30.0
+    ingest_claim_timeout_seconds: float = 300.0
+
+    # Content-addressed payload blobs for raw HTTP bodies and large input
+    # item contents (0 disables); unreferenced blobs are garbage collected
+    blob_min_size: int = 1024
+    blob_gc_grace_hours: float = 24.0
+    blob_gc_interval_seconds: int = 3600
+
+    # Daily partitions of the trace tables on PostgreSQL and their retention
+    # in days (0 keeps data forever); raw HTTP traces can be kept for a
+    # shorter window than traces. Expired partitions are dropped, or moved to
+    # the archive schema if one is set.
+    trace_retention_days: int = 0
+    http_trace_retention_days: int = 0
+    retention_archive_schema: str | None = None
+    partition_premake_days: int = 7
+    retention_interval_seconds: int = 3600
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -69,3 +69,12 @@ class OptimizationStatus(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+
+
+class IngestStatus(str, Enum):
+    """Processing status of a raw HTTP trace."""
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    FAILED = "failed"
@@ -1,16 +1,21 @@
 import logging
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Any
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1 import api_router
 from app.config import get_settings
-from app.database import AsyncSessionMaker
+from app.database import AsyncSessionMaker, get_session
+from app.services.blob_store import get_blob_store
+from app.services.http_trace_ingest import get_http_trace_ingest_pool
 from app.services.provider_service import load_providers_from_yaml
 from app.services.task_grouping_queue import get_task_grouping_queue
+from app.services.trace_retention import get_trace_retention_manager
 
 settings = get_settings()
 
@@ -31,11 +36,20 @@ async def lifespan(app: FastAPI):
     logger.info("Starting background workers...")
     queue_manager = get_task_grouping_queue()
     queue_manager.start_worker()
+    ingest_pool = get_http_trace_ingest_pool()
+    await ingest_pool.start()
+    blob_store = get_blob_store()
+    blob_store.start_gc()
+    retention_manager = get_trace_retention_manager()
+    retention_manager.start()
     logger.info("Background workers started")
 
     yield
 
     logger.info("Stopping background workers...")
+    await ingest_pool.stop(timeout=10.0)
+    await retention_manager.stop()
+    await blob_store.stop_gc()
     queue_manager = get_task_grouping_queue()
     queue_manager.stop_worker(timeout=10.0)
     logger.info("Background workers stopped")
@@ -56,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(api_router)
@@ -67,6 +82,21 @@ async def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/task-grouping", tags=["health"])
+async def task_grouping_health_check(
+    session: AsyncSession = Depends(get_session),
+) -> dict[str, Any]:
+    """Health and claimed paths of each task grouping worker, and pending paths."""
+    queue_manager = get_task_grouping_queue()
+    workers = await queue_manager.get_worker_status(session)
+    healthy = bool(workers) and all(worker["alive"] for worker in workers)
+    return {
+        "status": "ok" if healthy else "degraded",
+        "workers": workers,
+        "pending_paths": await queue_manager.get_queue_size(session),
+    }
+
+
 def main() -> None:
     """Entrypoint for running the app with uvicorn."""
     uvicorn.run(
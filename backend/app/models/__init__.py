@@ -1,10 +1,12 @@
 """Models package."""
 
+from app.models.blobs import PayloadBlob
 from app.models.evaluation import Grade, Grader
 from app.models.executions import ExecutionResult
 from app.models.http_traces import HTTPTrace
 from app.models.projects import Project
 from app.models.providers import Model, Provider
+from app.models.task_grouping import GroupingWork
 from app.models.tasks import Implementation, Task
 from app.models.traces import Trace, TraceInputItem
 
@@ -12,9 +14,11 @@ __all__ = [
     "ExecutionResult",
     "Grade",
     "Grader",
+    "GroupingWork",
     "HTTPTrace",
     "Implementation",
     "Model",
+    "PayloadBlob",
     "Project",
     "Provider",
     "Task",
@@ -0,0 +1,43 @@
+"""Content-addressed storage for large payloads."""
+
+from datetime import datetime
+
+import zstandard
+from sqlalchemy import DateTime, Index, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, created_at_col
+
+
+class PayloadBlob(Base):
+    """A deduplicated, zstd-compressed UTF-8 payload keyed by its SHA-256.
+
+    Rows are immutable apart from ``last_seen_at``, which writers refresh
+    when they reuse a blob so that garbage collection leaves blobs alone
+    while new references to them may still be uncommitted.
+    """
+
+    __tablename__ = "payload_blob"
+    __table_args__ = (Index("ix_payload_blob_last_seen_at", "last_seen_at"),)
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # Size of the uncompressed UTF-8 payload in bytes
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_seen_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
+
+    created_at: Mapped[created_at_col]
+
+    repr_cols = ("hash", "size")
+
+    @property
+    def text(self) -> str:
+        """Decompressed payload, decoded once per loaded instance."""
+        text = self.__dict__.get("_text")
+        if text is None:
+            text = zstandard.ZstdDecompressor().decompress(self.data).decode("utf-8")
+            self.__dict__["_text"] = text
+        return text
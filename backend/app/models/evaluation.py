@@ -104,7 +104,9 @@ class Grade(Base):
         nullable=False,
     )
 
-    # Polymorphic target: either trace_id OR execution_result_id
+    # Polymorphic target: either trace_id OR execution_result_id. There is no
+    # foreign key to the partitioned trace table on PostgreSQL, where the
+    # trace retention manager deletes the grades of expired traces
     trace_id: Mapped[int | None] = mapped_column(
         ForeignKey("trace.id", ondelete="CASCADE"),
         nullable=True,
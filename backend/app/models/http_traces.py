@@ -3,11 +3,14 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import JSON, DateTime, Index, Integer, Text
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.enums import IngestStatus
 from app.models.base import Base, created_at_col, intpk, updated_at_col
+from app.models.blobs import PayloadBlob
 
 if TYPE_CHECKING:
     from app.models.traces import Trace
@@ -17,12 +20,19 @@ JSONType = JSON().with_variant(JSONB(astext_type=Text()), "postgresql")
 
 
 class HTTPTrace(Base):
-    """HTTPTrace model capturing raw HTTP request/response data."""
+    """HTTPTrace model capturing raw HTTP request/response data.
+
+    Partitioned by day on ``started_at`` on PostgreSQL, where the primary key
+    is ``(id, started_at)``; the model keeps the ``id`` key like ``Trace``.
+    """
 
     __tablename__ = "http_trace"
     __table_args__ = (
         Index("ix_http_trace_started_at", "started_at"),
         Index("ix_http_trace_status_code", "status_code"),
+        Index("ix_http_trace_ingest_status", "ingest_status"),
+        Index("ix_http_trace_request_blob_hash", "request_blob_hash"),
+        Index("ix_http_trace_response_blob_hash", "response_blob_hash"),
     )
 
     id: Mapped[intpk]
@@ -41,14 +51,46 @@ class HTTPTrace(Base):
     status_code: Mapped[int] = mapped_column(Integer, nullable=False)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    # Raw data stored as strings
-    request: Mapped[str] = mapped_column(Text, nullable=False)
+    # Raw data stored as strings. A large part of a body (e.g. the system
+    # prompt) can be cut out into a shared payload blob, which the ``request``
+    # and ``response`` properties splice back in at the stored offset.
+    request_inline: Mapped[str] = mapped_column("request", Text, nullable=False)
+    request_blob_hash: Mapped[str | None] = mapped_column(
+        String(64),
+        ForeignKey("payload_blob.hash"),
+        nullable=True,
+    )
+    request_blob_offset: Mapped[int | None] = mapped_column(Integer, nullable=True)
     request_headers: Mapped[dict[str, str]] = mapped_column(JSONType, nullable=False)
-    response: Mapped[str] = mapped_column(Text, nullable=False)
+    response_inline: Mapped[str] = mapped_column("response", Text, nullable=False)
+    response_blob_hash: Mapped[str | None] = mapped_column(
+        String(64),
+        ForeignKey("payload_blob.hash"),
+        nullable=True,
+    )
+    response_blob_offset: Mapped[int | None] = mapped_column(Integer, nullable=True)
     response_headers: Mapped[dict[str, str]] = mapped_column(JSONType, nullable=False)
     request_method: Mapped[str | None] = mapped_column(Text, nullable=True)
     request_path: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # Call path where the request was made, kept for deferred parsing
+    path: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # Asynchronous ingest: PENDING until a consumer claims it and has created
+    # the trace
+    ingest_status: Mapped[IngestStatus] = mapped_column(
+        SQLEnum(IngestStatus, name="ingest_status"),
+        nullable=False,
+        default=IngestStatus.PROCESSED,
+        server_default=IngestStatus.PROCESSED.name,
+    )
+    ingest_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # When a consumer claimed the HTTP trace by marking it PROCESSING
+    ingest_claimed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
     # Metadata
     http_metadata: Mapped[dict[str, Any]] = mapped_column(
         JSONType,
@@ -63,5 +105,44 @@ class HTTPTrace(Base):
         uselist=False,
     )
 
+    request_blob: Mapped[PayloadBlob | None] = relationship(
+        foreign_keys=[request_blob_hash],
+        lazy="joined",
+    )
+    response_blob: Mapped[PayloadBlob | None] = relationship(
+        foreign_keys=[response_blob_hash],
+        lazy="joined",
+    )
+
     created_at: Mapped[created_at_col]
     updated_at: Mapped[updated_at_col]
+
+    @property
+    def request(self) -> str:
+        """Raw request, with its payload blob spliced back in."""
+        if self.request_blob_hash is None:
+            return self.request_inline
+        offset = self.request_blob_offset
+        inline = self.request_inline
+        return inline[:offset] + self.request_blob.text + inline[offset:]
+
+    @request.setter
+    def request(self, value: str) -> None:
+        self.request_inline = value
+        self.request_blob_hash = None
+        self.request_blob_offset = None
+
+    @property
+    def response(self) -> str:
+        """Raw response, with its payload blob spliced back in."""
+        if self.response_blob_hash is None:
+            return self.response_inline
+        offset = self.response_blob_offset
+        inline = self.response_inline
+        return inline[:offset] + self.response_blob.text + inline[offset:]
+
+    @response.setter
+    def response(self, value: str) -> None:
+        self.response_inline = value
+        self.response_blob_hash = None
+        self.response_blob_offset = None
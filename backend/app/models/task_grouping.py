@@ -0,0 +1,66 @@
+"""Work table of the background task grouping workers."""
+
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, created_at_col, intpk, updated_at_col
+
+
+class GroupingWork(Base):
+    """Pending task grouping for the unmatched traces of a project and path.
+
+    Every unmatched trace marks the row of its ``(project_id, path)`` dirty
+    and bumps ``version``, so a burst of traces collapses into a single row.
+    A worker claims a dirty row by leasing it until ``claimed_until`` under a
+    fresh ``claim_token``, and remembers the ``version`` it saw. The lease is
+    only renewed and released with that token, so a worker whose lease was
+    taken over can't touch the new claim. Once done, the row stays dirty only
+    if traces arrived in the meantime. Rows of workers that crashed are
+    claimed again once their lease expires.
+
+    Traces without a path are stored under the empty path, as NULLs would
+    not collide in the unique constraint.
+    """
+
+    __tablename__ = "task_grouping_work"
+    __table_args__ = (
+        UniqueConstraint("project_id", "path"),
+        Index("ix_task_grouping_work_dirty", "dirty", "dirty_since"),
+    )
+
+    id: Mapped[intpk]
+    project_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("project.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    path: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+
+    dirty: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    # When the row last became dirty, to claim the longest waiting rows first
+    dirty_since: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    latest_trace_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+    claim_token: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    # Index of the pool worker holding the claim, for per-worker health
+    claimed_by: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    claimed_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
+    created_at: Mapped[created_at_col]
+    updated_at: Mapped[updated_at_col]
+
+    repr_cols = ("dirty", "version")
@@ -10,15 +10,24 @@ from sqlalchemy import (
     Integer,
     String,
     Text,
+    event,
+    func,
+    inspect,
+    select,
+    update,
 )
 from sqlalchemy import (
     Enum as SQLEnum,
 )
+from sqlalchemy.engine import Connection
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, object_session, relationship
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 
 from app.enums import FinishReason, ItemType
 from app.models.base import Base, created_at_col, intpk, updated_at_col
+from app.models.blobs import PayloadBlob
 from app.models.evaluation import Grade
 
 if TYPE_CHECKING:
@@ -30,9 +39,28 @@ if TYPE_CHECKING:
 # Use JSONB for PostgreSQL, JSON for other databases
 JSONType = JSON().with_variant(JSONB(astext_type=Text()), "postgresql")
 
+_ITEMS_JOIN = (
+    "and_(Trace.id == foreign({item}.trace_id), "
+    "Trace.started_at == foreign({item}.trace_started_at))"
+)
+
 
 class Trace(Base):
-    """Trace model capturing LLM execution metadata and input history."""
+    """Trace model capturing LLM execution metadata and input history.
+
+    On PostgreSQL the trace tables are partitioned by day on the trace's
+    ``started_at`` (see ``app.services.trace_retention``), so the primary keys
+    there also include it and items carry a copy of it. Grades and the HTTP
+    trace link are not enforced by foreign keys there, as they cannot
+    reference a partitioned table by ``id`` alone.
+
+    The models deliberately keep the ``id`` primary keys and foreign keys,
+    which is the schema of the other databases and of ``create_all``: ids
+    come from a sequence and stay unique on their own, so identity and
+    ``session.get`` work by id on every database. Migrations, not the
+    models, own the partitioned schema, and autogenerate ignores the foreign
+    keys to the trace tables (see ``migrations/env.py``).
+    """
 
     __tablename__ = "trace"
     __table_args__ = (
@@ -40,7 +68,9 @@ class Trace(Base):
         Index("ix_trace_model", "model"),
         Index("ix_trace_project_id", "project_id"),
         Index("ix_trace_implementation_id", "implementation_id"),
+        Index("ix_trace_http_trace_id", "http_trace_id"),
         Index("ix_trace_finish_reason", "finish_reason"),
+        Index("ix_trace_ai_score", "ai_score", "id"),
     )
 
     id: Mapped[intpk]
@@ -112,19 +142,34 @@ class Trace(Base):
         "HTTPTrace",
         back_populates="trace",
     )  # type: ignore
+    # Items are joined on the partition key too, so that loading them only
+    # reads the partitions of the traces' days
     input_items: Mapped[list["TraceInputItem"]] = relationship(
         "TraceInputItem",
+        primaryjoin=_ITEMS_JOIN.format(item="TraceInputItem"),
         back_populates="trace",
         cascade="all, delete-orphan",
         order_by="TraceInputItem.position",
     )
     output_items: Mapped[list["TraceOutputItem"]] = relationship(
         "TraceOutputItem",
+        primaryjoin=_ITEMS_JOIN.format(item="TraceOutputItem"),
         back_populates="trace",
         cascade="all, delete-orphan",
         order_by="TraceOutputItem.position",
     )
     tools: Mapped[list[dict[str, Any]] | None] = mapped_column(JSONType, nullable=True)
+
+    # Average float score of the trace's grades and how many were averaged,
+    # kept up to date as grades are added, changed and deleted
+    ai_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    grade_count: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+
     grades: Mapped[list["Grade"]] = relationship(
         "Grade",
         foreign_keys="Grade.trace_id",
@@ -136,6 +181,64 @@ class Trace(Base):
     updated_at: Mapped[updated_at_col]
 
 
+def _refresh_trace_score(connection: Connection, grade: Grade, trace_id: int) -> None:
+    """Recompute the score aggregate of a trace in the flush's transaction.
+
+    The aggregate is recomputed from the trace's grades rather than adjusted,
+    so that it doesn't drift with rounding errors. The trace row is locked
+    first, so that the grades of concurrent transactions that updated it
+    before are committed and counted.
+    """
+    trace_table = Trace.__table__
+    grade_table = Grade.__table__
+    connection.execute(
+        select(trace_table.c.id).where(trace_table.c.id == trace_id).with_for_update(),
+    )
+    scores = select(grade_table.c.score_float).where(grade_table.c.trace_id == trace_id)
+    row = connection.execute(
+        update(trace_table)
+        .where(trace_table.c.id == trace_id)
+        .values(
+            ai_score=scores.with_only_columns(
+                func.avg(grade_table.c.score_float),
+            ).scalar_subquery(),
+            grade_count=scores.with_only_columns(
+                func.count(grade_table.c.score_float),
+            ).scalar_subquery(),
+        )
+        .returning(trace_table.c.ai_score, trace_table.c.grade_count),
+    ).first()
+    # Keep a trace already loaded in the session in step with the row
+    session = object_session(grade)
+    trace = session.identity_map.get(identity_key(Trace, trace_id)) if session else None
+    if row is not None and trace is not None:
+        set_committed_value(trace, "ai_score", row.ai_score)
+        set_committed_value(trace, "grade_count", row.grade_count)
+
+
+@event.listens_for(Grade, "after_insert")
+def _add_grade_score(mapper, connection: Connection, grade: Grade) -> None:
+    if grade.trace_id is not None and grade.score_float is not None:
+        _refresh_trace_score(connection, grade, grade.trace_id)
+
+
+@event.listens_for(Grade, "after_update")
+def _update_grade_score(mapper, connection: Connection, grade: Grade) -> None:
+    state = inspect(grade)
+    trace_history = state.attrs.trace_id.history
+    if not trace_history.has_changes() and not state.attrs.score_float.history.has_changes():
+        return
+    trace_ids = {grade.trace_id, *trace_history.deleted}
+    for trace_id in sorted(trace_id for trace_id in trace_ids if trace_id is not None):
+        _refresh_trace_score(connection, grade, trace_id)
+
+
+@event.listens_for(Grade, "after_delete")
+def _remove_grade_score(mapper, connection: Connection, grade: Grade) -> None:
+    if grade.trace_id is not None and grade.score_float is not None:
+        _refresh_trace_score(connection, grade, grade.trace_id)
+
+
 class TraceInputItem(Base):
     """Individual input item belonging to a trace."""
 
@@ -144,10 +247,12 @@ class TraceInputItem(Base):
         Index(
             "ix_trace_input_item_trace_id_position",
             "trace_id",
+            "trace_started_at",
             "position",
             unique=True,
         ),
         Index("ix_trace_input_item_type", "type"),
+        Index("ix_trace_input_item_content_blob_hash", "content_blob_hash"),
     )
 
     id: Mapped[intpk]
@@ -155,18 +260,51 @@ class TraceInputItem(Base):
         ForeignKey("trace.id", ondelete="CASCADE"),
         nullable=False,
     )
+    # Copy of the trace's started_at, the partition key on PostgreSQL
+    trace_started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
     type: Mapped[ItemType] = mapped_column(
         SQLEnum(ItemType, name="item_type"),
         nullable=False,
     )
-    data: Mapped[dict[str, Any]] = mapped_column(JSONType, nullable=False)
+    # Large string contents (e.g. system prompts) are stored as payload blobs
+    # and left as null here; the ``data`` property puts them back
+    stored_data: Mapped[dict[str, Any]] = mapped_column(
+        "data",
+        JSONType,
+        nullable=False,
+    )
+    content_blob_hash: Mapped[str | None] = mapped_column(
+        String(64),
+        ForeignKey("payload_blob.hash"),
+        nullable=True,
+    )
     position: Mapped[int] = mapped_column(Integer, nullable=False)
 
-    trace: Mapped[Trace] = relationship("Trace", back_populates="input_items")
+    trace: Mapped[Trace] = relationship(
+        "Trace",
+        primaryjoin=_ITEMS_JOIN.format(item="TraceInputItem"),
+        back_populates="input_items",
+    )
+    content_blob: Mapped[PayloadBlob | None] = relationship(lazy="joined")
 
     created_at: Mapped[created_at_col]
     updated_at: Mapped[updated_at_col]
 
+    @property
+    def data(self) -> dict[str, Any]:
+        """Item data, with the content resolved from its payload blob if any."""
+        if self.content_blob_hash is None:
+            return self.stored_data
+        return {**self.stored_data, "content": self.content_blob.text}
+
+    @data.setter
+    def data(self, value: dict[str, Any]) -> None:
+        self.stored_data = value
+        self.content_blob_hash = None
+
 
 class TraceOutputItem(Base):
     """Individual output item belonging to a trace."""
@@ -176,6 +314,7 @@ class TraceOutputItem(Base):
         Index(
             "ix_trace_output_item_trace_id_position",
             "trace_id",
+            "trace_started_at",
             "position",
             unique=True,
         ),
@@ -187,11 +326,20 @@ class TraceOutputItem(Base):
         ForeignKey("trace.id", ondelete="CASCADE"),
         nullable=False,
     )
+    # Copy of the trace's started_at, the partition key on PostgreSQL
+    trace_started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
     type: Mapped[str] = mapped_column(String(255), nullable=False)
     data: Mapped[dict[str, Any]] = mapped_column(JSONType, nullable=False)
     position: Mapped[int] = mapped_column(Integer, nullable=False)
 
-    trace: Mapped[Trace] = relationship("Trace", back_populates="output_items")
+    trace: Mapped[Trace] = relationship(
+        "Trace",
+        primaryjoin=_ITEMS_JOIN.format(item="TraceOutputItem"),
+        back_populates="output_items",
+    )
 
     created_at: Mapped[created_at_col]
     updated_at: Mapped[updated_at_col]
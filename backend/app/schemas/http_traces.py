@@ -3,7 +3,7 @@
 from datetime import datetime
 from typing import Any
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
 
 
 class HTTPTraceCreate(BaseModel):
@@ -57,8 +57,14 @@ class HTTPTraceCreate(BaseModel):
 
     @field_validator("request", "response", mode="before")
     @classmethod
-    def convert_to_string(cls, v):
-        """Convert bytes or hex-encoded strings to string."""
+    def convert_to_string(cls, v, info: ValidationInfo):
+        """Convert bytes or hex-encoded strings to string.
+
+        Hex sniffing is skipped for binary wire formats, which carry raw bytes.
+        """
+        raw_bodies = bool(info.context and info.context.get("raw_bodies"))
+        if isinstance(v, str) and raw_bodies:
+            return v
         if isinstance(v, str):
             # Try to decode as hex first
             try:
@@ -114,3 +120,35 @@ class HTTPTraceRead(BaseModel):
         default_factory=dict,
         description="Additional metadata",
     )
+
+
+class HTTPTraceBatchError(BaseModel):
+    """Schema describing an HTTP trace in a batch that could not be parsed."""
+
+    index: int = Field(..., description="Position of the item in the batch")
+    detail: str = Field(..., description="Reason the item was not converted")
+
+
+class HTTPTraceBatchResponse(BaseModel):
+    """Schema for the result of batch HTTP trace ingestion."""
+
+    received: int = Field(..., description="Number of HTTP traces received")
+    created: int = Field(..., description="Number of traces created")
+    trace_ids: list[int] = Field(
+        default_factory=list,
+        description="IDs of the created traces",
+    )
+    errors: list[HTTPTraceBatchError] = Field(
+        default_factory=list,
+        description="Items that were stored but could not be parsed",
+    )
+
+
+class HTTPTraceIngestResponse(BaseModel):
+    """Schema for the result of asynchronous HTTP trace ingestion."""
+
+    received: int = Field(..., description="Number of HTTP traces received")
+    http_trace_ids: list[int] = Field(
+        default_factory=list,
+        description="IDs of the stored HTTP traces, queued for processing",
+    )
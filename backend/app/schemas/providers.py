@@ -75,3 +75,10 @@ class ProviderResponse(ProviderBase):
 class ProviderWithModelsResponse(ProviderResponse):
     """Schema for provider response with models."""
 
+
+class CanonicalizationCacheStats(BaseModel):
+    """Schema for model canonicalization cache statistics."""
+
+    hits: int = Field(..., description="Lookups answered from the cache")
+    misses: int = Field(..., description="Lookups that queried the database")
+    size: int = Field(..., description="Number of cached model identifiers")
@@ -0,0 +1,306 @@
+"""Content-addressed storage of large payloads shared between rows."""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import zstandard
+from sqlalchemy import delete, event, exists, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.config import Settings, get_settings
+from app.database import AsyncSessionMaker
+from app.models.blobs import PayloadBlob
+from app.models.http_traces import HTTPTrace
+from app.models.traces import TraceInputItem
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "payload_blob_hashes"
+_MAX_RECENT_HASHES = 100_000
+_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+_STRING_LITERAL = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+
+
+def payload_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of a payload's UTF-8 encoding."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """Deduplicated, compressed storage for payloads repeated across rows.
+
+    ``put_many`` upserts the blobs for a batch of payloads in the caller's
+    transaction and returns their hashes, which rows store instead of the
+    payload. Hashes written by committed transactions are remembered for
+    half the garbage collection grace period, so repeated payloads (e.g. the
+    same system prompt on every trace) cost a hash and no database write.
+
+    Unreferenced blobs are removed by ``collect_garbage`` once they have not
+    been written or reused for the grace period.
+    """
+
+    def __init__(self, settings: Settings | None = None):
+        """Initialize the store.
+
+        Args:
+            settings: Application settings
+
+        """
+        self._settings = settings or get_settings()
+        self._recent: OrderedDict[str, float] = OrderedDict()
+        self._gc_task: asyncio.Task | None = None
+
+    @property
+    def min_size(self) -> int:
+        """Payloads of at least this many characters are stored as blobs."""
+        return self._settings.blob_min_size
+
+    @property
+    def grace_period(self) -> timedelta:
+        """How long an unreferenced blob is kept after its last write."""
+        return timedelta(hours=self._settings.blob_gc_grace_hours)
+
+    def should_store(self, value: Any) -> bool:
+        """Whether a value is a payload large enough to store as a blob."""
+        return (
+            self.min_size > 0 and isinstance(value, str) and len(value) >= self.min_size
+        )
+
+    async def put_many(self, session: AsyncSession, texts: Iterable[str]) -> list[str]:
+        """Store payloads as blobs in the session's transaction.
+
+        Args:
+            session: Database session; the blobs are committed with it
+            texts: Payloads to store
+
+        Returns:
+            Hash of each payload, in order
+
+        """
+        hashes = []
+        missing: dict[str, str] = {}
+        now = time.monotonic()
+        refresh_after = self.grace_period.total_seconds() / 2
+        for text in texts:
+            digest = payload_hash(text)
+            hashes.append(digest)
+            seen_at = self._recent.get(digest)
+            if seen_at is None or now - seen_at > refresh_after:
+                missing[digest] = text
+
+        if missing:
+            last_seen_at = datetime.now(UTC)
+            compressor = zstandard.ZstdCompressor()
+            rows = []
+            # Sorted so that concurrent writers lock rows in the same order
+            for digest, text in sorted(missing.items()):
+                payload = text.encode("utf-8")
+                rows.append(
+                    {
+                        "hash": digest,
+                        "data": compressor.compress(payload),
+                        "size": len(payload),
+                        "last_seen_at": last_seen_at,
+                    },
+                )
+            insert = _INSERTS[session.get_bind().dialect.name]
+            stmt = insert(PayloadBlob).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PayloadBlob.hash],
+                set_={"last_seen_at": stmt.excluded.last_seen_at},
+            )
+            await session.execute(stmt)
+            session.sync_session.info.setdefault(_PENDING_KEY, set()).update(missing)
+
+        return hashes
+
+    async def store_http_trace_bodies(
+        self,
+        session: AsyncSession,
+        rows: list[dict[str, Any]],
+    ) -> None:
+        """Move the large part of HTTP trace request and response bodies to blobs.
+
+        Bodies are almost never repeated as a whole, but the system prompt in
+        them is. The longest JSON string literal of a body is cut out into a
+        blob when it is large enough; other large bodies are stored as a blob
+        as a whole, which still compresses them.
+
+        Args:
+            session: Database session
+            rows: HTTPTrace column values, updated in place
+
+        """
+        splits = []
+        for row in rows:
+            for field in ("request", "response"):
+                split = self._split_body(row.get(f"{field}_inline"))
+                if split is not None:
+                    splits.append((row, field, *split))
+        if not splits:
+            return
+
+        hashes = await self.put_many(session, [split[4] for split in splits])
+        for (row, field, inline, offset, _), digest in zip(
+            splits,
+            hashes,
+            strict=True,
+        ):
+            row[f"{field}_inline"] = inline
+            row[f"{field}_blob_hash"] = digest
+            row[f"{field}_blob_offset"] = offset
+
+    def _split_body(self, body: Any) -> tuple[str, int, str] | None:
+        """Split a body into inline text, blob offset and blob payload."""
+        if not self.should_store(body):
+            return None
+        start = end = 0
+        for match in _STRING_LITERAL.finditer(body):
+            if match.end() - match.start() > end - start:
+                start, end = match.span()
+        # Keep the quotes inline so that the blob is the string's content
+        start, end = start + 1, end - 1
+        if end - start < self.min_size:
+            return "", 0, body
+        return body[:start] + body[end:], start, body[start:end]
+
+    async def store_item_contents(
+        self,
+        session: AsyncSession,
+        rows: list[dict[str, Any]],
+    ) -> None:
+        """Move large string contents of input item rows to blobs.
+
+        Args:
+            session: Database session
+            rows: TraceInputItem column values, updated in place
+
+        """
+        large = [row for row in rows if self.should_store(row["stored_data"].get("content"))]
+        if not large:
+            return
+        hashes = await self.put_many(
+            session,
+            [row["stored_data"]["content"] for row in large],
+        )
+        for row, digest in zip(large, hashes, strict=True):
+            row["stored_data"] = {**row["stored_data"], "content": None}
+            row["content_blob_hash"] = digest
+
+    async def collect_garbage(self, session: AsyncSession) -> int:
+        """Delete blobs that no row references and that are past the grace period.
+
+        Args:
+            session: Database session
+
+        Returns:
+            Number of deleted blobs
+
+        """
+        cutoff = datetime.now(UTC) - self.grace_period
+        result = await session.execute(
+            delete(PayloadBlob).where(
+                PayloadBlob.last_seen_at < cutoff,
+                ~exists().where(HTTPTrace.request_blob_hash == PayloadBlob.hash),
+                ~exists().where(HTTPTrace.response_blob_hash == PayloadBlob.hash),
+                ~exists().where(TraceInputItem.content_blob_hash == PayloadBlob.hash),
+            ),
+        )
+        await session.commit()
+        deleted = result.rowcount or 0
+        if deleted:
+            logger.info(f"Deleted {deleted} unreferenced payload blobs")
+        return deleted
+
+    async def stats(self, session: AsyncSession) -> dict[str, int]:
+        """Count blobs and their compressed and uncompressed sizes."""
+        result = await session.execute(
+            select(
+                func.count(PayloadBlob.hash),
+                func.coalesce(func.sum(func.length(PayloadBlob.data)), 0),
+                func.coalesce(func.sum(PayloadBlob.size), 0),
+            ),
+        )
+        count, stored_bytes, payload_bytes = result.one()
+        return {
+            "blobs": count,
+            "stored_bytes": stored_bytes,
+            "payload_bytes": payload_bytes,
+        }
+
+    def start_gc(
+        self,
+        session_maker: async_sessionmaker[AsyncSession] = AsyncSessionMaker,
+    ) -> None:
+        """Run garbage collection periodically in the background."""
+        if self._gc_task is None and self._settings.blob_gc_interval_seconds > 0:
+            self._gc_task = asyncio.create_task(
+                self._run_gc(session_maker),
+                name="payload-blob-gc",
+            )
+
+    async def stop_gc(self) -> None:
+        """Stop periodic garbage collection."""
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            await asyncio.gather(self._gc_task, return_exceptions=True)
+            self._gc_task = None
+
+    def invalidate(self) -> None:
+        """Forget which hashes were recently written."""
+        self._recent.clear()
+
+    def _remember(self, hashes: Iterable[str]) -> None:
+        now = time.monotonic()
+        for digest in hashes:
+            self._recent[digest] = now
+            self._recent.move_to_end(digest)
+        while len(self._recent) > _MAX_RECENT_HASHES:
+            self._recent.popitem(last=False)
+
+    async def _run_gc(self, session_maker: async_sessionmaker[AsyncSession]) -> None:
+        while True:
+            await asyncio.sleep(self._settings.blob_gc_interval_seconds)
+            try:
+                async with session_maker() as session:
+                    await self.collect_garbage(session)
+            except Exception:
+                logger.exception("Payload blob garbage collection failed")
+
+
+_blob_store: BlobStore | None = None
+
+
+def get_blob_store() -> BlobStore:
+    """Get or create the process-wide blob store.
+
+    Returns:
+        BlobStore instance
+
+    """
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+    return _blob_store
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed_blobs(session: Session) -> None:
+    hashes = session.info.pop(_PENDING_KEY, None)
+    if hashes:
+        get_blob_store()._remember(hashes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back_blobs(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,357 @@
+"""Asynchronous ingest pipeline for raw HTTP traces."""
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import Settings, get_settings
+from app.database import AsyncSessionMaker
+from app.enums import IngestStatus
+from app.models.http_traces import HTTPTrace
+from app.schemas.traces import TraceCreate
+from app.services.http_trace_parser import (
+    HTTPTraceParserService,
+    get_http_trace_parser_service,
+)
+from app.services.traces_service import TracesService
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPTraceIngestPool:
+    """Pool of async consumers that turn pending HTTP traces into traces.
+
+    The ingest endpoint only stores raw HTTP traces with ``PENDING`` status
+    and submits their IDs here. Consumers drain the IDs in micro-batches of up
+    to ``ingest_batch_size``, waiting at most ``ingest_linger_ms`` for a batch
+    to fill, and parse, canonicalize, persist and match each batch with
+    ``TracesService.create_traces_batch``.
+
+    A consumer first claims the HTTP traces of a batch by marking them
+    ``PROCESSING``, so that each is processed by one consumer even if several
+    pools (e.g. of multiple app processes) queued it. A sweep, run when the
+    pool starts and every ``ingest_sweep_interval_seconds``, releases claims
+    older than ``ingest_claim_timeout_seconds`` and queues pending HTTP traces
+    again, such as those of a batch that failed or of a stopped process.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession] = AsyncSessionMaker,
+        settings: Settings | None = None,
+    ):
+        """Initialize the pool without starting any consumers.
+
+        Args:
+            session_maker: Factory for the consumers' database sessions
+            settings: Application settings
+
+        """
+        self._session_maker = session_maker
+        self._settings = settings or get_settings()
+        self._queue: asyncio.Queue[int] | None = None
+        # IDs in the queue or being processed, which the sweep doesn't queue
+        self._queued: set[int] = set()
+        self._consumers: list[asyncio.Task] = []
+        self._sweeper: asyncio.Task | None = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the consumers are running."""
+        return self._queue is not None
+
+    def qsize(self) -> int:
+        """Number of HTTP trace IDs waiting for a consumer."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        """Queue pending HTTP traces and start the consumers."""
+        if self.is_running:
+            logger.warning("HTTP trace ingest pool already running")
+            return
+
+        self._queue = asyncio.Queue()
+        await self.sweep()
+
+        self._consumers = [
+            asyncio.create_task(self._consume(), name=f"http-trace-ingest-{i}")
+            for i in range(max(1, self._settings.ingest_consumers))
+        ]
+        if self._settings.ingest_sweep_interval_seconds > 0:
+            self._sweeper = asyncio.create_task(
+                self._run_sweeps(),
+                name="http-trace-ingest-sweep",
+            )
+        logger.info(
+            f"Started {len(self._consumers)} HTTP trace ingest consumers "
+            f"({self._queue.qsize()} pending)",
+        )
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Drain queued HTTP traces and stop the consumers.
+
+        Args:
+            timeout: Seconds to wait for the queue to drain. HTTP traces not
+                processed by then stay pending until the next start.
+
+        """
+        if not self.is_running:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except TimeoutError:
+            logger.warning(
+                f"Stopping HTTP trace ingest with {self._queue.qsize()} traces pending",
+            )
+
+        tasks = [*self._consumers, self._sweeper] if self._sweeper else self._consumers
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._consumers = []
+        self._sweeper = None
+        self._queue = None
+        self._queued.clear()
+
+    def submit(self, http_trace_ids: Iterable[int]) -> None:
+        """Queue stored HTTP traces for processing.
+
+        If the pool is not running the HTTP traces stay pending and are picked
+        up by a sweep once it starts. HTTP traces that are already queued are
+        skipped.
+
+        Args:
+            http_trace_ids: IDs of HTTP traces with ``PENDING`` status
+
+        """
+        if self._queue is None:
+            return
+        for http_trace_id in http_trace_ids:
+            if http_trace_id not in self._queued:
+                self._queued.add(http_trace_id)
+                self._queue.put_nowait(http_trace_id)
+
+    async def sweep(self) -> int:
+        """Release expired claims and queue pending HTTP traces again.
+
+        Returns:
+            Number of HTTP traces queued
+
+        """
+        if self._queue is None:
+            return 0
+
+        expired = datetime.now(UTC) - timedelta(
+            seconds=self._settings.ingest_claim_timeout_seconds,
+        )
+        async with self._session_maker() as session:
+            result = await session.execute(
+                update(HTTPTrace)
+                .where(
+                    HTTPTrace.ingest_status == IngestStatus.PROCESSING,
+                    HTTPTrace.ingest_claimed_at < expired,
+                )
+                .values(ingest_status=IngestStatus.PENDING, ingest_claimed_at=None)
+                .returning(HTTPTrace.id)
+                .execution_options(synchronize_session=False),
+            )
+            released = len(result.all())
+            await session.commit()
+
+            result = await session.execute(
+                select(HTTPTrace.id)
+                .where(HTTPTrace.ingest_status == IngestStatus.PENDING)
+                .order_by(HTTPTrace.id),
+            )
+            http_trace_ids = [i for i in result.scalars().all() if i not in self._queued]
+
+        if released:
+            logger.warning(f"Released {released} expired HTTP trace ingest claims")
+        self.submit(http_trace_ids)
+        return len(http_trace_ids)
+
+    async def process_batch(self, http_trace_ids: list[int]) -> list[int]:
+        """Claim and create traces for a batch of pending HTTP traces.
+
+        HTTP traces that are not pending, e.g. because another consumer
+        claimed them first, are skipped. Claimed HTTP traces whose processing
+        fails stay claimed until the claim expires.
+
+        Args:
+            http_trace_ids: IDs of HTTP traces to process
+
+        Returns:
+            IDs of the created traces
+
+        """
+        claimed_at = datetime.now(UTC)
+        async with self._session_maker() as session:
+            result = await session.execute(
+                update(HTTPTrace)
+                .where(
+                    HTTPTrace.id.in_(http_trace_ids),
+                    HTTPTrace.ingest_status == IngestStatus.PENDING,
+                )
+                .values(ingest_status=IngestStatus.PROCESSING, ingest_claimed_at=claimed_at)
+                .returning(HTTPTrace.id)
+                .execution_options(synchronize_session=False),
+            )
+            claimed = list(result.scalars().all())
+            await session.commit()
+        if not claimed:
+            return []
+
+        try:
+            return await self._create_traces(claimed, claimed_at)
+        except IntegrityError:
+            # Concurrent consumers may both try to create the same project
+            logger.debug("Retrying HTTP trace batch after integrity error")
+            return await self._create_traces(claimed, claimed_at)
+
+    async def _create_traces(
+        self,
+        http_trace_ids: list[int],
+        claimed_at: datetime,
+    ) -> list[int]:
+        """Create traces for claimed HTTP traces.
+
+        Only HTTP traces still held by this claim are processed, and locked
+        until their status updates and the new traces are committed together.
+        """
+        async with self._session_maker() as session:
+            result = await session.execute(
+                select(HTTPTrace)
+                .where(
+                    HTTPTrace.id.in_(http_trace_ids),
+                    HTTPTrace.ingest_status == IngestStatus.PROCESSING,
+                    HTTPTrace.ingest_claimed_at == claimed_at,
+                )
+                .order_by(HTTPTrace.id)
+                .with_for_update(of=HTTPTrace),
+            )
+            http_traces = list(result.scalars().all())
+            if not http_traces:
+                return []
+
+            parser_service = get_http_trace_parser_service()
+            parsed: list[tuple[TraceCreate, int | None]] = []
+            status_rows: list[dict[str, Any]] = []
+            for http_trace in http_traces:
+                try:
+                    parsed.append(
+                        (_parse_http_trace(parser_service, http_trace), http_trace.id),
+                    )
+                    status_rows.append(
+                        {
+                            "id": http_trace.id,
+                            "ingest_status": IngestStatus.PROCESSED,
+                            "ingest_error": None,
+                        },
+                    )
+                except ValueError as e:
+                    status_rows.append(
+                        {
+                            "id": http_trace.id,
+                            "ingest_status": IngestStatus.FAILED,
+                            "ingest_error": f"Failed to parse HTTP trace: {e!s}",
+                        },
+                    )
+                except Exception as e:
+                    logger.exception("Unexpected error parsing HTTP trace")
+                    status_rows.append(
+                        {
+                            "id": http_trace.id,
+                            "ingest_status": IngestStatus.FAILED,
+                            "ingest_error": f"Internal error parsing HTTP trace: {e!s}",
+                        },
+                    )
+
+            await session.execute(update(HTTPTrace), status_rows)
+
+            traces_service = TracesService(self._settings)
+            return await traces_service.create_traces_batch(parsed, session)
+
+    async def _consume(self) -> None:
+        """Process queued HTTP trace IDs in micro-batches until cancelled."""
+        loop = asyncio.get_running_loop()
+        linger = self._settings.ingest_linger_ms / 1000
+        batch_size = max(1, self._settings.ingest_batch_size)
+        queue = self._queue
+
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + linger
+            while len(batch) < batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except TimeoutError:
+                    break
+
+            try:
+                await self.process_batch(batch)
+            except Exception:
+                logger.exception(
+                    f"Failed to process {len(batch)} HTTP traces, retrying them "
+                    f"once their claim expires",
+                )
+            finally:
+                self._queued.difference_update(batch)
+                for _ in batch:
+                    queue.task_done()
+
+    async def _run_sweeps(self) -> None:
+        while True:
+            await asyncio.sleep(self._settings.ingest_sweep_interval_seconds)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Failed to sweep pending HTTP traces")
+
+
+def _parse_http_trace(
+    parser_service: HTTPTraceParserService,
+    http_trace: HTTPTrace,
+) -> TraceCreate:
+    """Parse a stored HTTP trace into a TraceCreate object."""
+    return parser_service.parse_http_trace(
+        request=http_trace.request,
+        request_headers=http_trace.request_headers,
+        response=http_trace.response,
+        response_headers=http_trace.response_headers,
+        started_at=http_trace.started_at,
+        completed_at=http_trace.completed_at,
+        status_code=http_trace.status_code,
+        error=http_trace.error,
+        metadata=http_trace.http_metadata,
+        call_path=http_trace.path,
+        request_path=http_trace.request_path,
+    )
+
+
+_ingest_pool: HTTPTraceIngestPool | None = None
+
+
+def get_http_trace_ingest_pool() -> HTTPTraceIngestPool:
+    """Get or create the HTTP trace ingest pool of the application.
+
+    Returns:
+        HTTPTraceIngestPool instance
+
+    """
+    global _ingest_pool
+    if _ingest_pool is None:
+        _ingest_pool = HTTPTraceIngestPool()
+    return _ingest_pool
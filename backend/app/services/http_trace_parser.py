@@ -9,20 +9,46 @@ from app.services.parsers import (
     AnthropicParser,
     GoogleGenAIParser,
     OpenAIParser,
+    ParserRegistry,
     ProviderParser,
+    get_parser_registry,
 )
 
 
+def _looks_like_event_stream(body: bytes | str) -> bool:
+    """Check whether a body starts like Server-Sent Events."""
+    head = body[:256].lstrip()
+    if isinstance(head, bytes):
+        return head.startswith((b"data:", b"event:"))
+    return head.startswith(("data:", "event:"))
+
+
+def _resolve_url(
+    metadata: dict[str, Any] | None,
+    request_headers: dict[str, str],
+    request_path: str | None,
+) -> str:
+    """Get the request URL from the SDK metadata or the Host header and path."""
+    url = metadata.get("url", "") if metadata else ""
+    if url:
+        return url
+    host = request_headers.get("host") or request_headers.get("Host")
+    if not host:
+        return ""
+    return f"https://{host}{request_path or ''}"
+
+
 class HTTPTraceParserService:
     """Service for parsing HTTP traces from different providers."""
 
-    def __init__(self):
-        """Initialize the parser service with all available parsers."""
-        self.parsers: list[ProviderParser] = [
-            OpenAIParser(),
-            AnthropicParser(),
-            GoogleGenAIParser(),
-        ]
+    def __init__(self, registry: ParserRegistry | None = None):
+        """Initialize the parser service.
+
+        Args:
+            registry: Parsers by host; defaults to the process-wide registry
+
+        """
+        self.registry = registry or get_parser_registry()
 
     def _extract_error_from_response(
         self,
@@ -97,8 +123,10 @@ class HTTPTraceParserService:
             completed_at: When the request completed
             status_code: HTTP status code
             error: Error message if any
-            metadata: Additional metadata
+            metadata: Additional metadata; ``url`` is the full request URL
             call_path: The call path where the request was made
+            request_path: Path of the request URL, used with the Host header
+                when the metadata has no URL
 
         Returns:
             TraceCreate object ready for database insertion
@@ -107,70 +135,35 @@ class HTTPTraceParserService:
             ValueError: If unable to parse the trace or determine the provider
 
         """
-        # Convert bytes to strings if needed
-        request_str = (
-            request.decode("utf-8", errors="replace")
-            if isinstance(request, bytes)
-            else request
-        )
-        response_str = (
-            response.decode("utf-8", errors="replace")
-            if isinstance(response, bytes)
-            else response
-        )
-        # Extract URL from request headers or reconstruct from request
-        # For now, we'll try to get it from metadata or request path
-        url = metadata.get("url", "") if metadata else ""
-
-        # If URL is not in metadata, try to parse it from the request
-        if not url:
-            # Try to extract from request line (first line of HTTP request)
-            try:
-                lines = request_str.split("\n")
-                if lines:
-                    # Parse "POST /path HTTP/1.1" format
-                    parts = lines[0].split()
-                    if len(parts) >= 2:
-                        path = parts[1]
-                        # Try to construct URL from Host header
-                        host = request_headers.get(
-                            "host",
-                            request_headers.get("Host", ""),
-                        )
-                        if host:
-                            url = f"https://{host}{path}"
-            except Exception:
-                pass
-
-        # Find the appropriate parser
-        parser = None
-        for p in self.parsers:
-            if p.can_parse(url):
-                parser = p
-                break
-
+        url = _resolve_url(metadata, request_headers, request_path)
+        parser = self.registry.resolve(url)
         if not parser:
             raise ValueError(f"No parser found for URL: {url}")
 
         # Parse request and response bodies
+        if isinstance(request, bytes):
+            request = request.decode("utf-8", errors="replace")
         try:
-            request_body = json.loads(request_str)
+            request_body = json.loads(request)
         except Exception as e:
             raise ValueError(f"Failed to parse request body: {e}")
 
         response_body = {}
         is_streaming = False
 
-        if response_str:
+        if response:
             # Check if this is a streaming response (Server-Sent Events)
             content_type = response_headers.get("content-type", "")
-            if "text/event-stream" in content_type or response_str.strip().startswith(
-                ("data:", "event:"),
+            if "text/event-stream" in content_type or _looks_like_event_stream(
+                response,
             ):
+                # Streaming parsers read the raw body, without decoding it first
                 is_streaming = True
             else:
+                if isinstance(response, bytes):
+                    response = response.decode("utf-8", errors="replace")
                 try:
-                    response_body = json.loads(response_str)
+                    response_body = json.loads(response)
                 except Exception:
                     # If response parsing fails, it's not necessarily an error
                     # (could be streaming or non-JSON response)
@@ -192,6 +185,14 @@ class HTTPTraceParserService:
             metadata=metadata,
             call_path=call_path,
             is_streaming=is_streaming,
-            streaming_response=response_str if is_streaming else None,
+            streaming_response=response if is_streaming else None,
             request_path=request_path,
         )
+
+
+_parser_service = HTTPTraceParserService()
+
+
+def get_http_trace_parser_service() -> HTTPTraceParserService:
+    """Return the process-wide HTTP trace parser service."""
+    return _parser_service
@@ -0,0 +1,200 @@
+"""In-memory index for matching system prompts to implementation templates."""
+
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.tasks import Implementation, Task
+from app.services.task_grouping import CompiledTemplate, compile_template
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _IndexedTemplate:
+    """Implementation template compiled for matching."""
+
+    implementation_id: int
+    compiled: CompiledTemplate
+
+
+class _PrefixTrie:
+    """Character trie over the literal prefixes of templates.
+
+    Each node is a dict from character to child node; templates whose prefix
+    ends at a node are stored under the empty-string key.
+    """
+
+    def __init__(self) -> None:
+        self._root: dict[str, Any] = {}
+
+    def add(self, prefix: str, value: _IndexedTemplate) -> None:
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault("", []).append(value)
+
+    def candidates(self, s: str) -> list[_IndexedTemplate]:
+        """Return templates whose prefix is a prefix of ``s``."""
+        node = self._root
+        found = list(node.get("", ()))
+        for char in s:
+            node = node.get(char)
+            if node is None:
+                break
+            found.extend(node.get("", ()))
+        return found
+
+
+class ImplementationMatcher:
+    """Matcher over the implementation templates of one project and model.
+
+    Candidates are narrowed with a trie over the fixed text before the first
+    variable before running the compiled template match, which rejects most
+    remaining candidates by length and trailing fixed text. Implementations
+    are tried in ID order, so the result is the same as checking every
+    template in turn.
+    """
+
+    def __init__(self, implementations: Iterable[tuple[int, str]]) -> None:
+        """Index implementation templates.
+
+        Args:
+            implementations: Pairs of implementation ID and prompt template
+
+        """
+        self._trie = _PrefixTrie()
+        self.size = 0
+        for implementation_id, template in implementations:
+            compiled = compile_template(template)
+            self._trie.add(
+                compiled.fixed_parts[0],
+                _IndexedTemplate(implementation_id, compiled),
+            )
+            self.size += 1
+
+    def match(self, prompt: str) -> dict[str, Any] | None:
+        """Find the first implementation whose template matches a prompt.
+
+        Args:
+            prompt: System prompt extracted from a trace
+
+        Returns:
+            Matching implementation ID and variables, or None
+
+        """
+        candidates = self._trie.candidates(prompt)
+        candidates.sort(key=lambda c: c.implementation_id)
+        for candidate in candidates:
+            matched, variables = candidate.compiled.match(prompt)
+            if matched:
+                return {
+                    "implementation_id": candidate.implementation_id,
+                    "variables": variables,
+                }
+        return None
+
+
+class ImplementationMatcherIndex:
+    """Process-wide cache of implementation matchers per project and model.
+
+    Matchers are dropped whenever an implementation is inserted, updated or
+    deleted through the ORM in this process. Implementations written by other
+    processes (e.g. the task grouping worker) are detected with a cheap
+    aggregate over the scope's implementations, checked at most once every
+    ``recheck_seconds`` per scope, so that most lookups need no query.
+    """
+
+    def __init__(self, recheck_seconds: float) -> None:
+        """Initialize an empty index.
+
+        Args:
+            recheck_seconds: How long a matcher is used before checking for
+                implementations changed by other processes
+
+        """
+        self.recheck_seconds = recheck_seconds
+        # Fingerprint, when it was checked and matcher of each scope
+        self._entries: dict[
+            tuple[int, str],
+            tuple[tuple, float, ImplementationMatcher],
+        ] = {}
+
+    async def get(
+        self,
+        session: AsyncSession,
+        project_id: int,
+        model: str,
+    ) -> ImplementationMatcher:
+        """Return an up-to-date matcher for a project and model.
+
+        Args:
+            session: Database session
+            project_id: Project the traces belong to
+            model: Canonical model name of the traces
+
+        Returns:
+            Matcher over the scope's implementations
+
+        """
+        key = (project_id, model)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[1] < self.recheck_seconds:
+            return entry[2]
+
+        scope = (Task.project_id == project_id, Implementation.model == model)
+        result = await session.execute(
+            select(
+                func.count(Implementation.id),
+                func.max(Implementation.id),
+                func.max(Implementation.updated_at),
+            )
+            .join(Task, Implementation.task_id == Task.id)
+            .where(*scope),
+        )
+        fingerprint = tuple(result.one())
+        if entry is not None and entry[0] == fingerprint:
+            self._entries[key] = (fingerprint, now, entry[2])
+            return entry[2]
+
+        result = await session.execute(
+            select(Implementation.id, Implementation.prompt)
+            .join(Task, Implementation.task_id == Task.id)
+            .where(*scope)
+            .order_by(Implementation.id),
+        )
+        matcher = ImplementationMatcher(result.all())
+        self._entries[key] = (fingerprint, now, matcher)
+        logger.debug(
+            f"Built implementation matcher for project {project_id}, "
+            f"model {model} ({matcher.size} templates)",
+        )
+        return matcher
+
+    def invalidate(self) -> None:
+        """Drop all cached matchers."""
+        self._entries.clear()
+
+
+_matcher_index = ImplementationMatcherIndex(
+    get_settings().implementation_matcher_recheck_seconds,
+)
+
+
+def get_implementation_matcher_index() -> ImplementationMatcherIndex:
+    """Return the process-wide implementation matcher index."""
+    return _matcher_index
+
+
+@event.listens_for(Implementation, "after_insert")
+@event.listens_for(Implementation, "after_update")
+@event.listens_for(Implementation, "after_delete")
+def _invalidate_matcher_index(mapper, connection, target) -> None:
+    _matcher_index.invalidate()
@@ -4,10 +4,18 @@ from app.services.parsers.anthropic import AnthropicParser
 from app.services.parsers.base import ProviderParser
 from app.services.parsers.google_genai import GoogleGenAIParser
 from app.services.parsers.openai import OpenAIParser
+from app.services.parsers.registry import (
+    ParserRegistry,
+    get_parser_registry,
+    register_parser,
+)
 
 __all__ = [
     "AnthropicParser",
     "GoogleGenAIParser",
     "OpenAIParser",
+    "ParserRegistry",
     "ProviderParser",
+    "get_parser_registry",
+    "register_parser",
 ]
@@ -1,5 +1,6 @@
 """Anthropic API parser."""
 
+import json
 from datetime import datetime
 from typing import Any
 from urllib.parse import urlparse
@@ -19,6 +20,7 @@ from app.schemas.traces import (
     TraceCreate,
 )
 from app.services.parsers.base import ProviderParser
+from app.services.parsers.sse import iter_sse_json
 
 
 class AnthropicParser(ProviderParser):
@@ -39,7 +41,7 @@ class AnthropicParser(ProviderParser):
         metadata: dict[str, Any] | None = None,
         call_path: str | None = None,
         is_streaming: bool = False,
-        streaming_response: str | None = None,
+        streaming_response: str | bytes | None = None,
         request_path: str | None = None,
     ) -> TraceCreate:
         """Parse Anthropic API request/response."""
@@ -112,6 +114,9 @@ class AnthropicParser(ProviderParser):
                 ),
             )
 
+        if is_streaming and streaming_response:
+            response_body = self._accumulate_stream(streaming_response)
+
         # Extract result from response
         result = None
         finish_reason = None
@@ -252,3 +257,51 @@ class AnthropicParser(ProviderParser):
             trace_metadata=metadata,
             max_tokens=max_tokens,
         )
+
+    def _accumulate_stream(self, streaming_response: str | bytes) -> dict[str, Any]:
+        """Rebuild a Messages API response body from its streamed events."""
+        message: dict[str, Any] = {}
+        blocks: dict[int, dict[str, Any]] = {}
+        text_parts: dict[int, list[str]] = {}
+        json_parts: dict[int, list[str]] = {}
+
+        for event_name, data in iter_sse_json(streaming_response):
+            if not isinstance(data, dict):
+                continue
+            event_type = data.get("type", event_name)
+
+            if event_type == "message_start":
+                message = dict(data.get("message") or {})
+                message["usage"] = dict(message.get("usage") or {})
+            elif event_type == "content_block_start":
+                index = data.get("index", len(blocks))
+                blocks[index] = dict(data.get("content_block") or {})
+            elif event_type == "content_block_delta":
+                index = data.get("index", 0)
+                delta = data.get("delta") or {}
+                if delta.get("type") == "text_delta":
+                    text_parts.setdefault(index, []).append(delta.get("text", ""))
+                elif delta.get("type") == "input_json_delta":
+                    json_parts.setdefault(index, []).append(
+                        delta.get("partial_json", ""),
+                    )
+            elif event_type == "message_delta":
+                delta = data.get("delta") or {}
+                if delta.get("stop_reason"):
+                    message["stop_reason"] = delta["stop_reason"]
+                message.setdefault("usage", {}).update(data.get("usage") or {})
+
+        content = []
+        for index in sorted(blocks):
+            block = blocks[index]
+            if index in text_parts:
+                block["text"] = block.get("text", "") + "".join(text_parts[index])
+            if index in json_parts:
+                try:
+                    block["input"] = json.loads("".join(json_parts[index]) or "{}")
+                except ValueError:
+                    block["input"] = {}
+            content.append(block)
+        if content:
+            message["content"] = content
+        return message
@@ -33,7 +33,7 @@ class ProviderParser(ABC):
         metadata: dict[str, Any] | None = None,
         call_path: str | None = None,
         is_streaming: bool = False,
-        streaming_response: str | None = None,
+        streaming_response: str | bytes | None = None,
         request_path: str | None = None,
     ) -> TraceCreate:
         """Parse HTTP request/response into a TraceCreate object.
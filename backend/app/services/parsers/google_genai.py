@@ -17,6 +17,7 @@ from app.schemas.traces import (
     TraceCreate,
 )
 from app.services.parsers.base import ProviderParser
+from app.services.parsers.sse import iter_sse_json
 
 
 class GoogleGenAIParser(ProviderParser):
@@ -40,7 +41,7 @@ class GoogleGenAIParser(ProviderParser):
         metadata: dict[str, Any] | None = None,
         call_path: str | None = None,
         is_streaming: bool = False,
-        streaming_response: str | None = None,
+        streaming_response: str | bytes | None = None,
         request_path: str | None = None,
     ) -> TraceCreate:
         """Parse Google GenAI API request/response."""
@@ -121,6 +122,9 @@ class GoogleGenAIParser(ProviderParser):
                     ),
                 )
 
+        if is_streaming and streaming_response:
+            response_body = self._accumulate_stream(streaming_response)
+
         # Extract result from response
         result = None
         finish_reason = None
@@ -246,3 +250,44 @@ class GoogleGenAIParser(ProviderParser):
             trace_metadata=metadata,
             max_tokens=max_tokens,
         )
+
+    def _accumulate_stream(self, streaming_response: str | bytes) -> dict[str, Any]:
+        """Merge streamed ``GenerateContentResponse`` chunks into one response.
+
+        Text of consecutive text parts is concatenated, other parts are kept
+        as they are, and the last finish reason and usage metadata win.
+        """
+        response: dict[str, Any] = {}
+        parts: list[dict[str, Any]] = []
+        text_parts: list[str] = []
+        finish_reason = None
+
+        for _, chunk in iter_sse_json(streaming_response):
+            if not isinstance(chunk, dict):
+                continue
+            for key in ("usageMetadata", "modelVersion", "responseId"):
+                if key in chunk:
+                    response[key] = chunk[key]
+
+            candidates = chunk.get("candidates") or []
+            if not candidates:
+                continue
+            candidate = candidates[0]
+            for part in (candidate.get("content") or {}).get("parts", []):
+                if "text" in part:
+                    text_parts.append(part.get("text", ""))
+                else:
+                    if text_parts:
+                        parts.append({"text": "".join(text_parts)})
+                        text_parts = []
+                    parts.append(part)
+            finish_reason = candidate.get("finishReason") or finish_reason
+
+        if text_parts:
+            parts.append({"text": "".join(text_parts)})
+        if parts or finish_reason:
+            candidate = {"content": {"role": "model", "parts": parts}}
+            if finish_reason:
+                candidate["finishReason"] = finish_reason
+            response["candidates"] = [candidate]
+        return response
@@ -8,6 +8,7 @@ from app.schemas.traces import (
     TraceCreate,
 )
 from app.services.parsers.base import ProviderParser
+from app.services.parsers.sse import iter_sse_json
 
 
 class OpenAIParser(ProviderParser):
@@ -28,7 +29,7 @@ class OpenAIParser(ProviderParser):
         metadata: dict[str, Any] | None = None,
         call_path: str | None = None,
         is_streaming: bool = False,
-        streaming_response: str | None = None,
+        streaming_response: str | bytes | None = None,
         request_path: str | None = None,
     ) -> TraceCreate:
         """Parse OpenAI API request/response.
@@ -219,30 +220,18 @@ class OpenAIParser(ProviderParser):
         system_fingerprint = response_body.get("system_fingerprint")
         return output_items, usage, finish_reason, system_fingerprint
 
-    def _parse_completions_streaming(self, streaming_response: str):
-        lines = streaming_response.strip().split("\n")
-        full_content = ""
+    def _parse_completions_streaming(self, streaming_response: str | bytes):
+        content_parts: list[str] = []
         role = "assistant"
         finish_reason = None
         system_fingerprint = None
         response_id = ""
-        tool_calls_buffer = {}  # index -> {id, type, function: {name, arguments}}
+        tool_calls_buffer = {}  # index -> {id, name_parts, argument_parts}
         usage = None
         temperature = None
 
-        for line in lines:
-            line = line.strip()
-            if not line.startswith("data: "):
-                continue
-
-            data_str = line[6:]
-            if data_str == "[DONE]":
-                break
-
+        for _, chunk in iter_sse_json(streaming_response):
             try:
-                import json
-
-                chunk = json.loads(data_str)
                 response_id = chunk.get("id", response_id)
                 system_fingerprint = (
                     chunk.get("system_fingerprint") or system_fingerprint
@@ -259,7 +248,7 @@ class OpenAIParser(ProviderParser):
                     # Handle content
                     content = delta.get("content")
                     if content:
-                        full_content += content
+                        content_parts.append(content)
 
                     if delta.get("role"):
                         role = delta.get("role")
@@ -271,7 +260,8 @@ class OpenAIParser(ProviderParser):
                             if idx not in tool_calls_buffer:
                                 tool_calls_buffer[idx] = {
                                     "id": "",
-                                    "function": {"name": "", "arguments": ""},
+                                    "name_parts": [],
+                                    "argument_parts": [],
                                 }
 
                             if tc.get("id"):
@@ -279,12 +269,12 @@ class OpenAIParser(ProviderParser):
 
                             func = tc.get("function", {})
                             if func.get("name"):
-                                tool_calls_buffer[idx]["function"]["name"] += func.get(
-                                    "name",
+                                tool_calls_buffer[idx]["name_parts"].append(
+                                    func.get("name"),
                                 )
                             if func.get("arguments"):
-                                tool_calls_buffer[idx]["function"]["arguments"] += (
-                                    func.get("arguments")
+                                tool_calls_buffer[idx]["argument_parts"].append(
+                                    func.get("arguments"),
                                 )
 
                     if choices[0].get("finish_reason"):
@@ -294,6 +284,7 @@ class OpenAIParser(ProviderParser):
             except Exception:
                 pass
 
+        full_content = "".join(content_parts)
         output_items = []
         if full_content:
             output_items.append(
@@ -313,8 +304,8 @@ class OpenAIParser(ProviderParser):
                     "type": "function_call",
                     "id": tc["id"],
                     "call_id": tc["id"],
-                    "name": tc["function"]["name"],
-                    "arguments": tc["function"]["arguments"],
+                    "name": "".join(tc["name_parts"]),
+                    "arguments": "".join(tc["argument_parts"]),
                     "status": "completed",
                 },
             )
@@ -364,24 +355,15 @@ class OpenAIParser(ProviderParser):
 
         return output_items, usage, finish_reason, system_fingerprint
 
-    def _parse_responses_streaming(self, streaming_response: str):
-        lines = streaming_response.strip().split("\n")
+    def _parse_responses_streaming(self, streaming_response: str | bytes):
         messages = {}
         tool_calls = {}  # id -> {name, arguments, status}
         usage = None
         finish_reason = None
         temperature = None
 
-        for line in lines:
-            line = line.strip()
-            if not line.startswith("data: "):
-                continue
-
-            data_str = line[6:]
+        for _, event_data in iter_sse_json(streaming_response):
             try:
-                import json
-
-                event_data = json.loads(data_str)
                 event_type = event_data.get("type")
 
                 if event_type == "response.output_item.added":
@@ -389,7 +371,7 @@ class OpenAIParser(ProviderParser):
                     if item.get("type") == "message":
                         messages[item["id"]] = {
                             "role": item.get("role"),
-                            "content": "",
+                            "content": [],
                             "status": item.get("status"),
                         }
                     elif item.get("type") == "function_call":
@@ -404,7 +386,7 @@ class OpenAIParser(ProviderParser):
                     item_id = event_data.get("item_id")
                     delta = event_data.get("delta", "")
                     if item_id in messages:
-                        messages[item_id]["content"] += delta
+                        messages[item_id]["content"].append(delta)
 
                 # Assuming similar delta events for tool calls if they exist in Responses API streaming
 
@@ -440,7 +422,9 @@ class OpenAIParser(ProviderParser):
                     "type": "message",
                     "id": msg_id,
                     "role": msg_data["role"],
-                    "content": [{"type": "text", "text": msg_data["content"]}],
+                    "content": [
+                        {"type": "text", "text": "".join(msg_data["content"])},
+                    ],
                     "status": msg_data["status"],
                 },
             )
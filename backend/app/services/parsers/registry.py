@@ -0,0 +1,134 @@
+"""Registry mapping API hosts and base URLs to provider parsers."""
+
+from collections.abc import Iterable
+from urllib.parse import urlsplit
+
+from app.services.parsers.anthropic import AnthropicParser
+from app.services.parsers.base import ProviderParser
+from app.services.parsers.google_genai import GoogleGenAIParser
+from app.services.parsers.openai import OpenAIParser
+
+_MAX_RESOLVED_HOSTS = 1024
+
+
+class ParserRegistry:
+    """Parser lookup by host, domain or base URL.
+
+    Hosts are matched on domain labels, so registering ``openai.com`` also
+    covers ``api.openai.com``; the most specific registered domain wins.
+    Base URLs (e.g. an internal gateway at ``http://llm-gateway/anthropic``)
+    take precedence over hosts and are matched by prefix, longest first.
+    Hosts without a registered domain fall back to asking each parser's
+    ``can_parse`` once; the outcome is cached per host.
+    """
+
+    def __init__(self) -> None:
+        self._parsers: list[ProviderParser] = []
+        self._hosts: dict[str, ProviderParser] = {}
+        self._base_urls: list[tuple[str, ProviderParser]] = []
+        self._resolved: dict[str, ProviderParser | None] = {}
+
+    @property
+    def parsers(self) -> list[ProviderParser]:
+        """Registered parsers in registration order."""
+        return list(self._parsers)
+
+    def register(
+        self,
+        parser: ProviderParser,
+        hosts: Iterable[str] = (),
+        base_urls: Iterable[str] = (),
+    ) -> None:
+        """Register a parser for hosts and base URLs.
+
+        Registering a host or base URL again replaces its parser.
+
+        Args:
+            parser: Parser instance, shared by all traces it handles
+            hosts: Hosts or parent domains served by the parser
+            base_urls: URL prefixes served by the parser
+
+        """
+        if parser not in self._parsers:
+            self._parsers.append(parser)
+        for host in hosts:
+            self._hosts[host.lower().strip(".")] = parser
+        for base_url in base_urls:
+            base_url = base_url.rstrip("/")
+            self._base_urls = [
+                entry for entry in self._base_urls if entry[0] != base_url
+            ]
+            self._base_urls.append((base_url, parser))
+        self._base_urls.sort(key=lambda entry: len(entry[0]), reverse=True)
+        self._resolved.clear()
+
+    def resolve(self, url: str) -> ProviderParser | None:
+        """Find the parser for a request URL.
+
+        Args:
+            url: Full request URL
+
+        Returns:
+            The parser for the URL, or None if no parser handles it
+
+        """
+        for base_url, parser in self._base_urls:
+            if url == base_url or url.startswith((f"{base_url}/", f"{base_url}?")):
+                return parser
+
+        host = urlsplit(url).hostname or ""
+        try:
+            return self._resolved[host]
+        except KeyError:
+            pass
+
+        parser = self._resolve_host(host, url)
+        if len(self._resolved) >= _MAX_RESOLVED_HOSTS:
+            self._resolved.clear()
+        self._resolved[host] = parser
+        return parser
+
+    def _resolve_host(self, host: str, url: str) -> ProviderParser | None:
+        domain = host
+        while domain:
+            parser = self._hosts.get(domain)
+            if parser is not None:
+                return parser
+            _, _, domain = domain.partition(".")
+
+        for parser in self._parsers:
+            if parser.can_parse(url):
+                return parser
+        return None
+
+
+def _default_registry() -> ParserRegistry:
+    registry = ParserRegistry()
+    registry.register(OpenAIParser(), hosts=["openai.com"])
+    registry.register(AnthropicParser(), hosts=["anthropic.com"])
+    registry.register(GoogleGenAIParser(), hosts=["googleapis.com"])
+    return registry
+
+
+_parser_registry = _default_registry()
+
+
+def get_parser_registry() -> ParserRegistry:
+    """Return the process-wide parser registry."""
+    return _parser_registry
+
+
+def register_parser(
+    parser: ProviderParser,
+    hosts: Iterable[str] = (),
+    base_urls: Iterable[str] = (),
+) -> None:
+    """Register a parser for a custom provider in the process-wide registry.
+
+    Args:
+        parser: Parser instance
+        hosts: Hosts or parent domains served by the parser
+        base_urls: URL prefixes served by the parser
+
+    """
+    _parser_registry.register(parser, hosts=hosts, base_urls=base_urls)
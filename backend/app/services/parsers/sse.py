@@ -0,0 +1,139 @@
+"""Incremental reader for Server-Sent Events captured from streamed responses."""
+
+import json
+from collections.abc import Iterator
+from typing import Any, NamedTuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional fast JSON backend
+    orjson = None
+
+_DONE = "[DONE]"
+_decoder = json.JSONDecoder()
+
+
+class SSEEvent(NamedTuple):
+    """A single ``data:`` payload of an event stream."""
+
+    event: str | None
+    data: str | bytes
+
+
+def iter_sse_events(body: bytes | bytearray | memoryview | str) -> Iterator[SSEEvent]:
+    """Yield the events of a captured event stream lazily.
+
+    The body is scanned once, jumping from one ``data:`` field to the next
+    with ``find``; it is never split into a list of lines, and payloads are
+    only copied when they are yielded. Lines are stripped before parsing,
+    ``event:`` sets the name of the following data lines until the next
+    blank line, and comments and other fields are skipped. Providers send
+    one JSON document per ``data:`` line, so each data line is yielded as
+    its own event; this also keeps captures that lost their blank separator
+    lines parseable.
+
+    Args:
+        body: Raw streamed response. Bytes payloads are yielded as bytes and
+            string payloads as strings; a memoryview is read as bytes.
+
+    Yields:
+        Event name (or None) and raw data of each ``data:`` line
+
+    """
+    if isinstance(body, memoryview):
+        body = body.tobytes()
+
+    if isinstance(body, str):
+        newline, data_field, event_field = "\n", "data:", "event:"
+        decode = str
+    else:
+        newline, data_field, event_field = b"\n", b"data:", b"event:"
+
+        def decode(value: bytes) -> str:
+            return value.decode("utf-8", errors="replace")
+
+    event_name: str | None = None
+    end = len(body)
+    pos = 0
+    while pos < end:
+        field = body.find(data_field, pos)
+        if field == -1:
+            return
+        newline_before = body.rfind(newline, pos, field)
+        line_start = pos if newline_before == -1 else newline_before + 1
+        line_end = body.find(newline, field)
+        if line_end == -1:
+            line_end = end
+
+        # Lines between the previous data line and this one: blank lines end
+        # the current event and event lines name the next one
+        if newline_before != -1:
+            for line in body[pos:newline_before].split(newline):
+                line = line.strip()
+                if not line:
+                    event_name = None
+                elif line.startswith(event_field):
+                    event_name = decode(line[6:].strip()) or None
+
+        if body[line_start:field].strip():
+            # "data:" inside another line, e.g. a comment
+            line = body[line_start:line_end].strip()
+            if line.startswith(event_field):
+                event_name = decode(line[6:].strip()) or None
+        else:
+            yield SSEEvent(event_name, body[field + 5 : line_end].strip())
+        pos = line_end + 1
+
+
+def loads_json(data: str | bytes) -> Any:
+    """Parse JSON with orjson when it is installed, else the standard library.
+
+    Payloads orjson rejects (e.g. invalid UTF-8 or ``NaN``) are retried with
+    the lenient standard library parser before giving up.
+
+    Raises:
+        ValueError: If the payload is not valid JSON
+
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8", errors="replace")
+    # Payloads are already stripped, so skip the whitespace handling of loads()
+    value, end = _decoder.raw_decode(data)
+    if end != len(data):
+        raise ValueError(f"Extra data after JSON value at position {end}")
+    return value
+
+
+def iter_sse_json(
+    body: bytes | bytearray | memoryview | str,
+) -> Iterator[tuple[str | None, Any]]:
+    """Yield the JSON payloads of an event stream.
+
+    Reading stops at the OpenAI ``[DONE]`` sentinel; payloads that are not
+    valid JSON are skipped. Bytes are handed to orjson as they are and
+    decoded once up front for the standard library parser.
+
+    Args:
+        body: Raw streamed response
+
+    Yields:
+        Event name (or None) and parsed payload of each data line
+
+    """
+    if orjson is None and not isinstance(body, str):
+        # The standard library parser is faster on str than on bytes, so
+        # decode the whole body once rather than every payload
+        body = bytes(body).decode("utf-8", errors="replace")
+
+    for event_name, data in iter_sse_events(body):
+        if data == _DONE or data == b"[DONE]":
+            return
+        try:
+            yield event_name, loads_json(data)
+        except ValueError:
+            continue
@@ -3,19 +3,104 @@
 from __future__ import annotations
 
 import logging
+import math
+import time
 from pathlib import Path
 
 import yaml
-from sqlalchemy import Select, select
+from sqlalchemy import Select, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from app.config import get_settings
 from app.models.providers import Model, Provider
 from app.services.encryption import get_encryption_service
 
 logger = logging.getLogger(__name__)
 
 
+class ModelCanonicalizationCache:
+    """Process-wide cache of model identifier to canonical name.
+
+    Unresolved and ambiguous identifiers are cached too (mapped to
+    themselves), so unknown models do not hit the database on every trace.
+    The cache is invalidated whenever providers or models are added, updated
+    or deleted in this process; a generation counter keeps lookups that
+    raced with an invalidation from storing stale results. Changes made by
+    other processes (e.g. other API workers) are detected with a cheap
+    aggregate over the catalog, checked at most once every
+    ``recheck_seconds``.
+    """
+
+    def __init__(self, maxsize: int = 10_000, recheck_seconds: float = 5.0) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of identifiers kept before the cache is reset
+            recheck_seconds: How long results are used before checking the
+                catalog for changes made by other processes
+
+        """
+        self.maxsize = maxsize
+        self.recheck_seconds = recheck_seconds
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries: dict[str, str] = {}
+        self._fingerprint: tuple | None = None
+        self._checked_at = -math.inf
+
+    def needs_check(self) -> bool:
+        """Return whether the catalog should be checked for changes."""
+        return time.monotonic() - self._checked_at >= self.recheck_seconds
+
+    def check(self, fingerprint: tuple) -> None:
+        """Invalidate the cache if the catalog's fingerprint changed."""
+        if self._fingerprint is not None and fingerprint != self._fingerprint:
+            self.generation += 1
+            self._entries.clear()
+        self._fingerprint = fingerprint
+        self._checked_at = time.monotonic()
+
+    def get(self, identifier: str) -> str | None:
+        """Return the cached canonical name, counting the hit or miss."""
+        canonical = self._entries.get(identifier)
+        if canonical is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return canonical
+
+    def put(self, identifier: str, canonical: str, generation: int) -> None:
+        """Store a result computed while the cache was at ``generation``."""
+        if generation != self.generation:
+            return
+        if len(self._entries) >= self.maxsize:
+            self._entries.clear()
+        self._entries[identifier] = canonical
+
+    def invalidate(self) -> None:
+        """Drop all cached results, checking the catalog on the next lookup."""
+        self.generation += 1
+        self._entries.clear()
+        self._fingerprint = None
+        self._checked_at = -math.inf
+
+    def stats(self) -> dict[str, int]:
+        """Return hit and miss counters and the number of cached identifiers."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+_canonicalization_cache = ModelCanonicalizationCache(
+    recheck_seconds=get_settings().model_canonicalization_recheck_seconds,
+)
+
+
+def get_model_canonicalization_cache() -> ModelCanonicalizationCache:
+    """Return the process-wide model canonicalization cache."""
+    return _canonicalization_cache
+
+
 class ProviderService:
     """Service for managing LLM providers and models."""
 
@@ -120,6 +205,7 @@ class ProviderService:
         )
         self.session.add(provider)
         await self.session.flush()
+        _canonicalization_cache.invalidate()
         return provider
 
     async def update_provider(
@@ -159,6 +245,7 @@ class ProviderService:
             provider.base_url = base_url
 
         await self.session.flush()
+        _canonicalization_cache.invalidate()
         return provider
 
     async def delete_provider(self, provider_id: int) -> None:
@@ -178,6 +265,7 @@ class ProviderService:
 
         await self.session.delete(provider)
         await self.session.flush()
+        _canonicalization_cache.invalidate()
 
     def get_decrypted_api_key(self, provider: Provider) -> str | None:
         """Get the decrypted API key for a provider.
@@ -230,6 +318,7 @@ class ProviderService:
         )
         self.session.add(model)
         await self.session.flush()
+        _canonicalization_cache.invalidate()
         return model
 
     async def list_models(self) -> list[Model]:
@@ -287,6 +376,7 @@ class ProviderService:
 
         await self.session.delete(model)
         await self.session.flush()
+        _canonicalization_cache.invalidate()
 
     async def canonicalize_model(self, model_identifier: str) -> str:
         """Return canonical ``provider/model`` identifier if available, else input.
@@ -295,13 +385,47 @@ class ProviderService:
             model_identifier: Model identifier, optionally prefixed with provider
 
         Returns:
-            Canonical provider/model string or original input if unresolved
+            Canonical provider/model string or original input if unresolved.
+            Results, including unresolved identifiers, are cached process-wide
+            until providers or models change, see ``ModelCanonicalizationCache``.
 
         """
         identifier = (model_identifier or "").strip()
         if not identifier:
             return model_identifier
 
+        if _canonicalization_cache.needs_check():
+            _canonicalization_cache.check(await self._catalog_fingerprint())
+
+        cached = _canonicalization_cache.get(model_identifier)
+        if cached is not None:
+            return cached
+
+        generation = _canonicalization_cache.generation
+        canonical = await self._canonicalize_uncached(identifier, model_identifier)
+        _canonicalization_cache.put(model_identifier, canonical, generation)
+        return canonical
+
+    async def _catalog_fingerprint(self) -> tuple:
+        """Return an aggregate over providers and models that changes with them."""
+        result = await self.session.execute(
+            select(
+                select(func.count(Provider.id)).scalar_subquery(),
+                select(func.max(Provider.id)).scalar_subquery(),
+                select(func.max(Provider.updated_at)).scalar_subquery(),
+                select(func.count(Model.id)).scalar_subquery(),
+                select(func.max(Model.id)).scalar_subquery(),
+                select(func.max(Model.updated_at)).scalar_subquery(),
+            ),
+        )
+        return tuple(result.one())
+
+    async def _canonicalize_uncached(
+        self,
+        identifier: str,
+        model_identifier: str,
+    ) -> str:
+        """Resolve a stripped model identifier against the database."""
         provider_name: str | None = None
         model_name_input = identifier
         if "/" in identifier:
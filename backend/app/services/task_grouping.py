@@ -1,5 +1,216 @@
+import functools
 import re
+import sys
 from collections import defaultdict
+from collections.abc import Iterator
+
+from datasketch import MinHash, MinHashLSH
+
+_VARIABLE_PATTERN = re.compile(r"\{\{\s*([^}]+?)\s*\}\}")
+
+# Token IDs are encoded as characters, see ``TemplateFinder._encode``
+_MAX_TOKEN_ID = sys.maxunicode
+
+# MinHash parameters for the LSH pre-clustering in ``TemplateFinder``
+_LSH_NUM_PERM = 128
+_LSH_SEED = 1
+
+
+class CompiledTemplate:
+    """A parsed template that matches strings without re-parsing it.
+
+    The first fixed part is anchored at the start of the string and the last
+    at the end. When every variable is distinct, the fixed parts in between
+    are placed at their first occurrence in a single left-to-right scan,
+    which finds a match whenever one exists and assigns each variable the
+    shortest value that allows it. Templates that repeat a variable fall back
+    to backtracking over the occurrences of each fixed part.
+    """
+
+    __slots__ = (
+        "template",
+        "fixed_parts",
+        "var_names",
+        "min_length",
+        "_repeats",
+        "_rest_length",
+    )
+
+    def __init__(self, template: str):
+        """Parse a template into fixed parts and variable names."""
+        self.template = template
+        self.var_names = [m.group(1) for m in _VARIABLE_PATTERN.finditer(template)]
+        self.fixed_parts = _VARIABLE_PATTERN.split(template)[::2]
+        self.min_length = sum(len(part) for part in self.fixed_parts)
+        self._repeats = len(set(self.var_names)) != len(self.var_names)
+
+        # Length of the middle fixed parts after part i, for pruning
+        n_vars = len(self.var_names)
+        self._rest_length = [0] * (n_vars + 1)
+        for i in range(n_vars - 2, -1, -1):
+            self._rest_length[i] = self._rest_length[i + 1] + len(self.fixed_parts[i + 1])
+
+    def match(self, s: str) -> tuple[bool, dict[str, str]]:
+        """Match a string, see ``TemplateFinder.match_template`` for the rules."""
+        if not self.var_names:
+            return (s == self.template, {})
+
+        prefix, suffix = self.fixed_parts[0], self.fixed_parts[-1]
+        if len(s) < self.min_length or not s.startswith(prefix) or not s.endswith(suffix):
+            return False, {}
+
+        tail = len(s) - len(suffix)
+        if self._repeats:
+            return self._match_backtracking(s, tail)
+        return self._match_linear(s, tail)
+
+    def _match_linear(self, s: str, tail: int) -> tuple[bool, dict[str, str]]:
+        """Place each middle fixed part at its first occurrence."""
+        pos = len(self.fixed_parts[0])
+        values = []
+        for fixed in self.fixed_parts[1:-1]:
+            found = s.find(fixed, pos, tail)
+            if found == -1:
+                return False, {}
+            values.append(s[pos:found])
+            pos = found + len(fixed)
+        values.append(s[pos:tail])
+        return True, dict(zip(self.var_names, values, strict=True))
+
+    def _match_backtracking(self, s: str, tail: int) -> tuple[bool, dict[str, str]]:
+        """Try fixed part occurrences in order until repeated variables agree."""
+        fixed_parts = self.fixed_parts
+        var_names = self.var_names
+        n_vars = len(var_names)
+        assignments: dict[str, str] = {}
+
+        def occurrences(fixed: str, start: int, end: int) -> Iterator[int]:
+            pos = s.find(fixed, start, end)
+            while pos != -1:
+                yield pos
+                pos = s.find(fixed, pos + 1, end)
+
+        def place(i: int, start: int) -> bool:
+            # Variable i - 1 starts at `start` and ends where fixed part i is placed
+            name = var_names[i - 1]
+            fixed = fixed_parts[i]
+            if i == n_vars:
+                positions = (tail,) if start <= tail else ()
+            else:
+                positions = occurrences(fixed, start, tail - self._rest_length[i])
+
+            for pos in positions:
+                value = s[start:pos]
+                bound = assignments.get(name)
+                if bound is None:
+                    assignments[name] = value
+                elif bound != value:
+                    continue
+                if i == n_vars or place(i + 1, pos + len(fixed)):
+                    return True
+                if bound is None:
+                    del assignments[name]
+            return False
+
+        if place(1, len(fixed_parts[0])):
+            return True, dict(assignments)
+        return False, {}
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_template(template: str) -> CompiledTemplate:
+    """Return the compiled form of a template, cached per template string."""
+    return CompiledTemplate(template)
+
+
+class SegmentIndex:
+    """Counts the strings that contain a token sequence.
+
+    A generalized suffix automaton over token strings encoded with
+    ``TemplateFinder._encode``. Each state stands for a set of substrings
+    that occur in exactly the same strings and records how many strings that
+    is, so the count for a segment is found by following one transition per
+    token instead of rescanning the strings.
+    """
+
+    __slots__ = ("_link", "_length", "_next", "_count", "_seen")
+
+    def __init__(self, strings: list[str]):
+        """Build the automaton over encoded strings."""
+        self._link = [-1]
+        self._length = [0]
+        self._next: list[dict[str, int]] = [{}]
+        self._count = [0]
+        self._seen = [-1]
+        for doc, s in enumerate(strings):
+            last = 0
+            prefixes = []
+            for char in s:
+                last = self._extend(last, char)
+                prefixes.append(last)
+            # Count the string once in every state of its substrings, which
+            # are the states on the suffix link paths of its prefixes
+            for state in prefixes:
+                while state > 0 and self._seen[state] != doc:
+                    self._seen[state] = doc
+                    self._count[state] += 1
+                    state = self._link[state]
+
+    def longest_prefix(self, s: str, start: int, min_count: int) -> int:
+        """Length of the longest prefix of ``s[start:]`` in ``min_count`` strings."""
+        state = 0
+        length = 0
+        for char in s[start:]:
+            state = self._next[state].get(char, 0)
+            if not state or self._count[state] < min_count:
+                break
+            length += 1
+        return length
+
+    def _new_state(self, length: int, link: int = -1, source: int | None = None) -> int:
+        self._length.append(length)
+        self._link.append(link)
+        if source is None:
+            self._next.append({})
+            self._count.append(0)
+            self._seen.append(-1)
+        else:
+            self._next.append(self._next[source].copy())
+            self._count.append(self._count[source])
+            self._seen.append(self._seen[source])
+        return len(self._length) - 1
+
+    def _clone(self, p: int, q: int, char: str) -> int:
+        """Split the shorter substrings of state q, reached from p, into a new state."""
+        clone = self._new_state(self._length[p] + 1, self._link[q], q)
+        while p != -1 and self._next[p].get(char) == q:
+            self._next[p][char] = clone
+            p = self._link[p]
+        self._link[q] = clone
+        return clone
+
+    def _extend(self, last: int, char: str) -> int:
+        q = self._next[last].get(char)
+        if q is not None:
+            # The prefix was already seen in another string
+            if self._length[q] == self._length[last] + 1:
+                return q
+            return self._clone(last, q, char)
+
+        cur = self._new_state(self._length[last] + 1)
+        p = last
+        while p != -1 and char not in self._next[p]:
+            self._next[p][char] = cur
+            p = self._link[p]
+        if p == -1:
+            self._link[cur] = 0
+        else:
+            q = self._next[p][char]
+            if self._length[p] + 1 == self._length[q]:
+                self._link[cur] = q
+            else:
+                self._link[cur] = self._clone(p, q, char)
+        return cur
 
 
 class TemplateFinder:
@@ -7,8 +218,17 @@ class TemplateFinder:
 
     Templates consist of fixed segments separated by variable placeholders.
     Example: "hello {{var_0}} world {{var_1}} test"
+
+    Tokens are interned to integer IDs and each tokenized string is encoded
+    as a string with one character per token ID, so that segments are
+    compared and searched for with string operations.
     """
 
+    def __init__(self):
+        self._token_ids: dict[str, int] = {}
+        self._segment_index: SegmentIndex | None = None
+        self._reset_match_cache()
+
     def _tokenize(self, text: str) -> list[str]:
         """Tokenize text while preserving newlines as separate tokens."""
         # Replace newlines with a special marker, split, then restore
@@ -29,6 +249,13 @@ class TemplateFinder:
 
         return parts
 
+    def _encode(self, tokens: list[str]) -> str:
+        """Encode tokens as a string of their interned IDs."""
+        token_ids = self._token_ids
+        return "".join(
+            chr(token_ids.setdefault(token, len(token_ids))) for token in tokens
+        )
+
     def match_template(self, template: str, s: str) -> tuple[bool, dict[str, str]]:
         """Match `s` against a template with placeholders {{var_name}}.
 
@@ -41,94 +268,27 @@ class TemplateFinder:
             - Repeated variables must match the same substring.
             - The entire string s must be consumed (no partial matches).
 
-        """
-        # Parse template into fixed parts + variable names
-        pattern = re.compile(r"\{\{\s*([^}]+?)\s*\}\}")
-        var_names = [m.group(1) for m in pattern.finditer(template)]
-        fixed_parts = pattern.split(template)[::2]  # fixed0, fixed1, ..., fixedN
-        n_vars = len(var_names)
-        n_fixed = len(fixed_parts)
-
-        # Quick case: no variables at all
-        if n_vars == 0:
-            return (s == template, {})
-
-        L = len(s)
-
-        # Precompute remaining fixed-part lengths for pruning
-        suffix_fixed_len = [0] * (n_fixed + 1)
-        for i in range(n_fixed - 1, -1, -1):
-            suffix_fixed_len[i] = suffix_fixed_len[i + 1] + len(fixed_parts[i])
-
-        # Occurrences of a fixed substring f in s starting at or after min_pos
-        def occurrences(f: str, min_pos: int):
-            if f == "":
-                for p in range(min_pos, L + 1):
-                    yield p
-            else:
-                pos = s.find(f, min_pos)
-                while pos != -1:
-                    yield pos
-                    pos = s.find(f, pos + 1)
-
-        # Backtracking, copies mapping on each branch to avoid backtracking complexity
-        def dfs(i: int, prev_end: int, assignments: dict[str, str]):
-            # Can remaining fixed parts even fit?
-            if suffix_fixed_len[i] > L - prev_end:
-                return False, {}
-
-            fixed = fixed_parts[i]
-            # For the very first fixed part, if nonempty, it must be placed at position 0
-            min_pos = prev_end if not (i == 0 and fixed != "") else 0
-
-            for p in occurrences(fixed, min_pos):
-                if i == 0 and fixed != "" and p != 0:
-                    continue
-
-                end = p + len(fixed)
-
-                # If this is the last fixed part, must end exactly at the end of s
-                if i == n_vars and end != L:
-                    continue
+        Templates are compiled once and cached, see ``CompiledTemplate``.
 
-                # Cannot move backwards
-                if p < prev_end:
-                    continue
-
-                new_map = assignments.copy()
-
-                # Extract variable before this fixed (except for i == 0)
-                if i > 0:
-                    var_name = var_names[i - 1]
-                    var_value = s[prev_end:p]
-
-                    if var_name in new_map:
-                        if new_map[var_name] != var_value:
-                            continue
-                    else:
-                        new_map[var_name] = var_value
-
-                if i == n_vars:  # placed last fixed part
-                    return True, new_map
-
-                ok, result = dfs(i + 1, end, new_map)
-                if ok:
-                    return True, result
-
-            return False, {}
-
-        return dfs(0, 0, {})
+        """
+        return compile_template(template).match(s)
 
     def group_strings(
         self,
         strs: list[str],
         min_segment_words: int,
         min_matching_strings,
+        lsh_threshold: float | None = None,
     ) -> dict[str, list[int]]:
         """Group strings by their templates.
 
         Args:
             strs: List of strings to analyze
+            min_segment_words: Minimum number of words in a fixed segment
+            min_matching_strings: Minimum number of strings in a group
+            lsh_threshold: If set, first partition the strings into buckets
+                of near-duplicates (see ``lsh_buckets``) and only search for
+                templates within each bucket
 
         Returns:
             Dict mapping templates to list of string indices that match
@@ -137,13 +297,96 @@ class TemplateFinder:
         if not strs or min_matching_strings < 1:
             return {}
 
-        self.tokenized = [self._tokenize(s) for s in strs]
+        tokenized = [self._tokenize(s) for s in strs]
+        if lsh_threshold is None:
+            buckets = [list(range(len(strs)))]
+        else:
+            buckets = self.lsh_buckets(tokenized, min_segment_words, lsh_threshold)
+
+        result = defaultdict(list)
+        for bucket in buckets:
+            if len(bucket) < min_matching_strings:
+                continue
+            self._token_ids = {}
+            self.tokenized = [tokenized[idx] for idx in bucket]
+            self.encoded = [self._encode(tokens) for tokens in self.tokenized]
+            groups = self._group_tokenized(min_segment_words, min_matching_strings)
+            for template, indices in groups.items():
+                result[template].extend(bucket[idx] for idx in indices)
+
+        return {template: sorted(indices) for template, indices in result.items()}
+
+    def lsh_buckets(
+        self,
+        tokenized: list[list[str]],
+        min_segment_words: int,
+        threshold: float,
+    ) -> list[list[int]]:
+        """Partition tokenized strings into buckets of near-duplicates.
+
+        Each string is summarized by a MinHash of its shingles of
+        ``min_segment_words`` tokens. Strings that MinHash LSH reports as
+        candidates for a Jaccard similarity of at least ``threshold`` end up
+        in the same bucket, transitively. Strings too short to contain a
+        segment are left out, as they can't match a template anyway.
+
+        Returns:
+            Buckets of sorted string indices, ordered by their first index
+
+        """
+        n = min_segment_words
+        shingled = {}
+        for idx, tokens in enumerate(tokenized):
+            shingles = {" ".join(tokens[i : i + n]) for i in range(len(tokens) - n + 1)}
+            if shingles:
+                shingled[idx] = [shingle.encode() for shingle in shingles]
+
+        # Hash in bulk, which shares the permutations between the MinHashes
+        minhashes = MinHash.bulk(shingled.values(), num_perm=_LSH_NUM_PERM, seed=_LSH_SEED)
+        lsh = MinHashLSH(threshold=threshold, num_perm=_LSH_NUM_PERM)
+        for idx, minhash in zip(shingled, minhashes, strict=True):
+            lsh.insert(idx, minhash, check_duplication=False)
+
+        # Union the strings that share a band in any of the LSH hash tables
+        parent: dict[int, int] = {}
+
+        def find(idx: int) -> int:
+            root = parent.setdefault(idx, idx)
+            while parent[root] != root:
+                root = parent[root]
+            while parent[idx] != root:
+                parent[idx], idx = root, parent[idx]
+            return root
+
+        for table in lsh.hashtables:
+            for band in table.keys():
+                members = iter(table.get(band))
+                root = find(next(members))
+                for idx in members:
+                    other = find(idx)
+                    if other != root:
+                        root, child = min(root, other), max(root, other)
+                        parent[child] = root
+
+        buckets = defaultdict(list)
+        for idx in sorted(parent):
+            buckets[find(idx)].append(idx)
+        return list(buckets.values())
+
+    def _group_tokenized(
+        self,
+        min_segment_words: int,
+        min_matching_strings: int,
+    ) -> dict[str, list[int]]:
+        """Group the strings in ``self.tokenized`` by their templates."""
         self._build_ngram_index(min_segment_words)
+        self._segment_index = SegmentIndex(self.encoded)
+        self._reset_match_cache()
 
         # Extract templates for each string
         string_to_template = {}
 
-        for idx in range(len(strs)):
+        for idx in range(len(self.tokenized)):
             segments, length = self._extract_best_template(
                 idx,
                 min_segment_words,
@@ -189,36 +432,36 @@ class TemplateFinder:
         self.ngram_to_strings = defaultdict(set)
         n = min_segment_words
 
-        for idx, tokens in enumerate(self.tokenized):
-            for i in range(len(tokens) - n + 1):
-                ngram = tuple(tokens[i : i + n])
-                self.ngram_to_strings[ngram].add(idx)
+        for idx, encoded in enumerate(self.encoded):
+            for i in range(len(encoded) - n + 1):
+                self.ngram_to_strings[encoded[i : i + n]].add(idx)
 
-    def _segments_to_template(self, segments: list[list[str]], string_idx: int) -> str:
+    def _segments_to_template(self, segments: list[str], string_idx: int) -> str:
         """Convert segments to template string with variable placeholders."""
         if not segments:
             return ""
 
         template_parts = []
         tokens = self.tokenized[string_idx]
+        encoded = self.encoded[string_idx]
         current_token_pos = 0
         var_counter = 0
 
-        for i, segment in enumerate(segments):
+        for segment in segments:
             # Find where this segment appears in the original string
-            seg_len = len(segment)
-            for j in range(current_token_pos, len(tokens) - seg_len + 1):
-                if tokens[j : j + seg_len] == segment:
-                    # Add variable placeholder for any gap before this segment
-                    if j > current_token_pos:
-                        template_parts.append(f"{{{{var_{var_counter}}}}}")
-                        var_counter += 1
-
-                    # Add the fixed segment, preserving newlines
-                    segment_str = self._tokens_to_string(segment)
-                    template_parts.append(segment_str)
-                    current_token_pos = j + seg_len
-                    break
+            j = encoded.find(segment, current_token_pos)
+            if j == -1:
+                continue
+
+            # Add variable placeholder for any gap before this segment
+            if j > current_token_pos:
+                template_parts.append(f"{{{{var_{var_counter}}}}}")
+                var_counter += 1
+
+            # Add the fixed segment, preserving newlines
+            segment_str = self._tokens_to_string(tokens[j : j + len(segment)])
+            template_parts.append(segment_str)
+            current_token_pos = j + len(segment)
 
         # Add trailing variable if there are tokens after the last segment
         if current_token_pos < len(tokens):
@@ -243,107 +486,252 @@ class TemplateFinder:
 
         return "".join(result)
 
-    def _matches_segments(self, sentence: list[str], segments: list[list[str]]) -> bool:
-        """Check if sentence contains all segments in order."""
-        if not segments:
-            return True
-
-        start_idx = 0
-        for segment in segments:
-            seg_len = len(segment)
-            found = False
-            for i in range(start_idx, len(sentence) - seg_len + 1):
-                if sentence[i : i + seg_len] == segment:
-                    start_idx = i + seg_len
-                    found = True
-                    break
-            if not found:
-                return False
-        return True
-
-    def _get_candidate_matches(
+    def _max_segment_length(
         self,
-        segment: list[str],
+        string_idx: int,
+        pos: int,
         min_segment_words: int,
-    ) -> set[int]:
-        """Quickly find candidate strings that might contain this segment."""
-        if len(segment) < min_segment_words:
-            return set(range(len(self.tokenized)))
-
-        # Use n-gram index for fast filtering
-        ngram = tuple(segment[:min_segment_words])
-        return self.ngram_to_strings.get(ngram, set())
+        min_matching_strings: int,
+    ) -> int:
+        """Upper bound on the length of a segment starting at ``pos``.
 
-    def _get_matching_indices(
+        Only counts strings containing the segment, regardless of the
+        segments before it. Uses the segment index when one is built and
+        the n-gram index otherwise.
+        """
+        encoded = self.encoded[string_idx]
+        if self._segment_index is not None:
+            return self._segment_index.longest_prefix(encoded, pos, min_matching_strings)
+        ngram = encoded[pos : pos + min_segment_words]
+        if len(self.ngram_to_strings.get(ngram, ())) < min_matching_strings:
+            return 0
+        return len(encoded) - pos
+
+    def _reset_match_cache(self) -> None:
+        """Forget cached segment matches, after the strings change."""
+        self._match_cache: dict[tuple[int, str], dict[int, int] | None] = {}
+        self._prefix_ids: dict[tuple[int, str], int] = {}
+
+    def _segment_matches(
         self,
-        segments: list[list[str]],
+        prefix: int,
+        matches: dict[int, int] | None,
+        segment: str,
         min_segment_words: int,
-    ) -> list[int]:
-        """Get all string indices that match the given segments."""
-        if not segments:
-            return list(range(len(self.tokenized)))
+        min_matching_strings: int,
+    ) -> dict[int, int] | None:
+        """Find the strings that contain a segment after the segments before it.
 
-        # Start with candidates from first segment
-        candidates = self._get_candidate_matches(segments[0], min_segment_words)
+        Args:
+            prefix: ID of the segments before, 0 for none
+            matches: Where the matches of the segments before end in each
+                string that contains them, None for all strings
+            segment: Encoded segment to find
 
-        # Filter candidates that match all segments
-        matching = []
+        Returns:
+            Where the segment's match ends in each string that contains it,
+            or None if fewer than ``min_matching_strings`` strings do. Strings
+            of the same template probe the same segments after the same
+            prefixes, so results are cached per prefix and segment.
+
+        """
+        key = (prefix, segment)
+        if key in self._match_cache:
+            return self._match_cache[key]
+
+        encoded = self.encoded
+        candidates = self.ngram_to_strings.get(segment[:min_segment_words], ())
+        if matches is not None and len(matches) < len(candidates):
+            candidates = matches
+
+        segment_matches = {}
         for idx in candidates:
-            if self._matches_segments(self.tokenized[idx], segments):
-                matching.append(idx)
-        return matching
+            start = 0 if matches is None else matches.get(idx)
+            if start is None:
+                continue
+            found = encoded[idx].find(segment, start)
+            if found != -1:
+                segment_matches[idx] = found + len(segment)
+
+        result = segment_matches if len(segment_matches) >= min_matching_strings else None
+        self._match_cache[key] = result
+        return result
 
     def _extract_best_template(
         self,
         string_idx: int,
         min_segment_words: int,
         min_matching_strings: int,
-    ) -> tuple[list[list[str]], int]:
+    ) -> tuple[list[str], int]:
         """Extract the longest valid template from a string using optimized greedy approach.
-        Returns (segments, total_length).
+
+        Segments are taken greedily from left to right, each the longest that
+        enough strings contain after their matches of the segments before it.
+        Returns (encoded segments, total_length).
         """
-        tokens = self.tokenized[string_idx]
+        text = self.encoded[string_idx]
         segments = []
         current_pos = 0
         total_len = 0
         n = min_segment_words
+        # Strings containing the segments so far, mapped to where their
+        # match ends; None while there are no segments. ``prefix`` is the ID
+        # of the segments so far, see ``_segment_matches``.
+        matches: dict[int, int] | None = None
+        prefix = 0
 
-        while current_pos <= len(tokens) - n:
+        while current_pos <= len(text) - n:
             # Find the longest segment starting at current_pos
-            best_seg = None
             best_seg_len = 0
+            best_matches = None
 
             # Binary search for maximum valid segment length
-            left, right = n, len(tokens) - current_pos
-
+            left = n
+            right = self._max_segment_length(
+                string_idx,
+                current_pos,
+                min_segment_words,
+                min_matching_strings,
+            )
             while left <= right:
                 mid = (left + right) // 2
-                candidate_seg = tokens[current_pos : current_pos + mid]
-                test_segments = segments + [candidate_seg]
-
-                # Quick check using n-gram index
-                candidates = self._get_candidate_matches(
-                    candidate_seg,
+                candidate_matches = self._segment_matches(
+                    prefix,
+                    matches,
+                    text[current_pos : current_pos + mid],
                     min_segment_words,
-                )
-                match_count = sum(
-                    1
-                    for idx in candidates
-                    if self._matches_segments(self.tokenized[idx], test_segments)
+                    min_matching_strings,
                 )
 
-                if match_count >= min_matching_strings:
-                    best_seg = candidate_seg
+                if candidate_matches is not None:
                     best_seg_len = mid
+                    best_matches = candidate_matches
                     left = mid + 1  # Try longer
                 else:
                     right = mid - 1  # Try shorter
 
-            if best_seg:
-                segments.append(best_seg)
-                total_len += len(best_seg)
-                current_pos += len(best_seg)
+            if best_seg_len:
+                segment = text[current_pos : current_pos + best_seg_len]
+                segments.append(segment)
+                matches = best_matches
+                prefix = self._prefix_ids.setdefault(
+                    (prefix, segment),
+                    len(self._prefix_ids) + 1,
+                )
+                total_len += best_seg_len
+                current_pos += best_seg_len
             else:
                 current_pos += 1
 
         return segments, total_len
+
+
+class IncrementalTemplateFinder(TemplateFinder):
+    """Groups a changing set of strings without re-templating all of them.
+
+    Keeps the tokenized strings, the n-gram index and the template found for
+    each string between calls to ``group``. A string's template only depends
+    on the strings that share one of its n-grams, so adding or removing a
+    string only marks those for re-templating. ``group`` returns the same
+    groups as ``group_strings`` over the current strings, in key order.
+    """
+
+    def __init__(self, min_segment_words: int):
+        """Initialize an empty finder.
+
+        Args:
+            min_segment_words: Minimum number of words in a fixed segment
+
+        """
+        super().__init__()
+        self.min_segment_words = min_segment_words
+        self.tokenized: dict[int, list[str]] = {}
+        self.encoded: dict[int, str] = {}
+        self.ngram_to_strings: dict[str, set[int]] = defaultdict(set)
+        self._templates: dict[int, str | None] = {}
+        self._dirty: set[int] = set()
+        self._min_matching_strings: int | None = None
+
+    def __len__(self) -> int:
+        return len(self.tokenized)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.tokenized
+
+    def add(self, key: int, s: str) -> None:
+        """Add a string under a key, which must not be in the finder."""
+        tokens = self._tokenize(s)
+        if len(self._token_ids) + len(tokens) > _MAX_TOKEN_ID:
+            self._reintern()
+        self.tokenized[key] = tokens
+        self.encoded[key] = self._encode(tokens)
+        self._dirty.add(key)
+        for ngram in self._ngrams(self.encoded[key]):
+            strings = self.ngram_to_strings[ngram]
+            strings.add(key)
+            self._dirty |= strings
+
+    def remove(self, key: int) -> None:
+        """Remove the string with a key, if any."""
+        if self.tokenized.pop(key, None) is None:
+            return
+        encoded = self.encoded.pop(key)
+        self._templates.pop(key, None)
+        self._dirty.discard(key)
+        for ngram in self._ngrams(encoded):
+            strings = self.ngram_to_strings[ngram]
+            strings.discard(key)
+            self._dirty |= strings
+            if not strings:
+                del self.ngram_to_strings[ngram]
+
+    def group(self, min_matching_strings: int) -> dict[str, list[int]]:
+        """Group the current strings by their templates.
+
+        Args:
+            min_matching_strings: Minimum number of strings in a group
+
+        Returns:
+            Dict mapping templates to the keys of the strings that match
+
+        """
+        if min_matching_strings < 1:
+            return {}
+        if min_matching_strings != self._min_matching_strings:
+            # Every template depends on the threshold
+            self._min_matching_strings = min_matching_strings
+            self._dirty = set(self.tokenized)
+
+        n = self.min_segment_words
+        self._reset_match_cache()
+        for key in self._dirty:
+            segments, length = self._extract_best_template(key, n, min_matching_strings)
+            if segments and length >= n:
+                self._templates[key] = self._segments_to_template(segments, key)
+            else:
+                self._templates[key] = None
+        self._dirty.clear()
+
+        result = defaultdict(list)
+        for key in sorted(self._templates):
+            template = self._templates[key]
+            if template is not None:
+                result[template].append(key)
+        return {
+            template: keys
+            for template, keys in result.items()
+            if len(keys) >= min_matching_strings
+        }
+
+    def _ngrams(self, encoded: str) -> set[str]:
+        n = self.min_segment_words
+        return {encoded[i : i + n] for i in range(len(encoded) - n + 1)}
+
+    def _reintern(self) -> None:
+        """Intern only the tokens of the current strings, freeing unused IDs."""
+        self._token_ids = {}
+        self.encoded = {key: self._encode(tokens) for key, tokens in self.tokenized.items()}
+        self.ngram_to_strings = defaultdict(set)
+        for key, encoded in self.encoded.items():
+            for ngram in self._ngrams(encoded):
+                self.ngram_to_strings[ngram].add(key)
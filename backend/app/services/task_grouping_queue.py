@@ -3,28 +3,53 @@
 import logging
 import multiprocessing as mp
 import threading
-import time
+import uuid
+from collections.abc import Iterable
 from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.task_grouping import GroupingWork
 
 logger = logging.getLogger(__name__)
 
+_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+class ClaimLostError(Exception):
+    """Raised when another worker took over the claim of a grouping request."""
+
 
 @dataclass
 class GroupingRequest:
     """Request to perform task grouping."""
 
     project_id: int
-    path: str
+    path: str | None
     trace_id: int
     timestamp: float
+    # Claimed work table row, the version it had when claimed and the token
+    # of the claim
+    work_id: int | None = None
+    version: int = 0
+    claim_token: str | None = None
 
 
 class TaskGroupingQueue:
-    """Manages queue for background task grouping operations.
+    """Manages the work table and workers for background task grouping.
 
-    This is a singleton that maintains a multiprocessing queue for sending
-    grouping requests to a background worker process. It tracks pending
-    requests to enable throttling.
+    Grouping requests are recorded in the ``task_grouping_work`` table, one
+    row per ``(project_id, path)``, so that bursts of requests collapse into
+    one grouping run per path and no request is lost when the app restarts.
+    This is a singleton that also maintains a pool of background worker
+    processes, which claim dirty rows with ``SKIP LOCKED``, and a monitor
+    thread that restarts workers that crash.
 
     Thread-safe for use in FastAPI's async environment.
     """
@@ -47,190 +72,453 @@ class TaskGroupingQueue:
             return
 
         self._initialized = True
-        self._queue: mp.Queue | None = None
-        self._worker_process: mp.Process | None = None
-        self._pending_requests: dict[tuple[int, str], GroupingRequest] = {}
-        self._pending_lock = threading.Lock()
+        self._worker_processes: list[mp.Process] = []
+        self._restarts: list[int] = []
+        self._workers_lock = threading.Lock()
         self._shutdown_event: mp.Event | None = None
+        self._monitor_thread: threading.Thread | None = None
+        self._monitor_stop = threading.Event()
 
     def start_worker(self) -> None:
-        """Start the background worker process."""
-        if self._worker_process is not None and self._worker_process.is_alive():
-            logger.warning("Worker process already running")
+        """Start the pool of background worker processes and its monitor."""
+        if self.is_worker_alive():
+            logger.warning("Worker processes already running")
             return
 
-        # Create queue and shutdown event
-        self._queue = mp.Queue(maxsize=1000)
+        settings = get_settings()
+        num_workers = max(1, settings.grouping_workers)
+
         self._shutdown_event = mp.Event()
+        self._restarts = [0] * num_workers
+        self._worker_processes = [self._spawn_worker(i) for i in range(num_workers)]
 
+        self._monitor_stop.clear()
+        self._monitor_thread = threading.Thread(
+            target=self._monitor_workers,
+            args=(settings.grouping_health_check_interval_seconds,),
+            daemon=True,
+            name="TaskGroupingMonitor",
+        )
+        self._monitor_thread.start()
+
+    def _spawn_worker(self, index: int) -> mp.Process:
+        """Start a worker process."""
         # Import here to avoid circular imports
         from app.workers.task_grouping_worker import run_worker
 
-        # Start worker process
-        self._worker_process = mp.Process(
+        process = mp.Process(
             target=run_worker,
-            args=(self._queue, self._shutdown_event),
+            args=(self._shutdown_event, index),
             daemon=True,
-            name="TaskGroupingWorker",
+            name=f"TaskGroupingWorker-{index}",
         )
-        self._worker_process.start()
-        logger.info(f"Started task grouping worker (PID: {self._worker_process.pid})")
+        process.start()
+        logger.info(f"Started task grouping worker {index} (PID: {process.pid})")
+        return process
+
+    def _monitor_workers(self, interval: float) -> None:
+        """Check the workers every ``interval`` seconds until stopped."""
+        while not self._monitor_stop.wait(interval):
+            try:
+                self.check_workers()
+            except Exception as e:
+                logger.error(f"Failed to check task grouping workers: {e}", exc_info=True)
+
+    def check_workers(self) -> int:
+        """Restart crashed workers.
+
+        The work a crashed worker had claimed is claimed again once its
+        lease expires.
+
+        Returns:
+            Number of workers restarted
+
+        """
+        restarted = 0
+        with self._workers_lock:
+            if self._shutdown_event is None or self._shutdown_event.is_set():
+                return 0
+            for index, process in enumerate(self._worker_processes):
+                if process.is_alive():
+                    continue
+                logger.error(
+                    f"Task grouping worker {index} died (exit code {process.exitcode}), "
+                    f"restarting",
+                )
+                self._worker_processes[index] = self._spawn_worker(index)
+                self._restarts[index] += 1
+                restarted += 1
+        return restarted
 
     def stop_worker(self, timeout: float = 5.0) -> None:
-        """Stop the background worker process gracefully.
+        """Stop the background worker processes gracefully.
 
         Args:
-            timeout: Maximum time to wait for worker to stop (seconds)
+            timeout: Maximum time to wait for each worker to stop (seconds)
 
         """
-        if self._worker_process is None:
+        if not self._worker_processes:
             logger.warning("No worker process to stop")
             return
 
-        if not self._worker_process.is_alive():
-            logger.warning("Worker process already stopped")
-            return
+        # Stop the monitor first, so that it doesn't restart stopping workers
+        self._monitor_stop.set()
+        if self._monitor_thread is not None:
+            self._monitor_thread.join(timeout=timeout)
+            self._monitor_thread = None
 
-        logger.info("Stopping task grouping worker...")
+        with self._workers_lock:
+            if not self.is_worker_alive():
+                logger.warning("Worker process already stopped")
+            else:
+                logger.info("Stopping task grouping workers...")
 
-        # Signal shutdown
-        if self._shutdown_event:
-            self._shutdown_event.set()
+                # Signal shutdown, which also wakes up idle workers
+                if self._shutdown_event:
+                    self._shutdown_event.set()
 
-        # Send sentinel value to unblock queue.get()
-        try:
-            if self._queue:
-                self._queue.put(None, timeout=1.0)
-        except Exception as e:
-            logger.warning(f"Failed to send shutdown signal to queue: {e}")
+                # Wait for processes to terminate
+                for process in self._worker_processes:
+                    self._join_worker(process, timeout)
 
-        # Wait for process to terminate
-        self._worker_process.join(timeout=timeout)
+                logger.info("Task grouping workers stopped")
 
-        if self._worker_process.is_alive():
-            logger.warning("Worker did not stop gracefully, terminating...")
-            self._worker_process.terminate()
-            self._worker_process.join(timeout=2.0)
+            self._worker_processes = []
 
-            if self._worker_process.is_alive():
-                logger.error("Worker did not terminate, killing...")
-                self._worker_process.kill()
-                self._worker_process.join()
+    @staticmethod
+    def _join_worker(process: mp.Process, timeout: float) -> None:
+        process.join(timeout=timeout)
 
-        logger.info("Task grouping worker stopped")
-        self._worker_process = None
+        if process.is_alive():
+            logger.warning(f"Worker {process.name} did not stop gracefully, terminating...")
+            process.terminate()
+            process.join(timeout=2.0)
 
-    def enqueue_grouping(
+            if process.is_alive():
+                logger.error(f"Worker {process.name} did not terminate, killing...")
+                process.kill()
+                process.join()
+
+    async def enqueue_grouping(
         self,
+        session: AsyncSession,
         project_id: int,
         path: str | None,
         trace_id: int,
     ) -> None:
         """Enqueue a task grouping request.
 
-        This tracks the latest request for each (project_id, path) combination
-        to enable throttling. Multiple rapid requests for the same path will
-        result in only the latest being processed.
+        See ``enqueue_groupings``.
 
         Args:
+            session: Database session
             project_id: Project ID for the trace
             path: Trace path (e.g., "/api/chat")
             trace_id: ID of the trace that triggered grouping
 
         """
-        if self._queue is None:
-            logger.error("Queue not initialized, cannot enqueue grouping request")
-            return
+        await self.enqueue_groupings(session, [(trace_id, path, project_id)])
 
-        if not self._worker_process or not self._worker_process.is_alive():
-            logger.error("Worker process not running, cannot enqueue grouping request")
-            return
+    async def enqueue_groupings(
+        self,
+        session: AsyncSession,
+        requests: Iterable[tuple[int, str | None, int]],
+    ) -> None:
+        """Enqueue task grouping requests and commit them.
 
-        request = GroupingRequest(
-            project_id=project_id,
-            path=path,
-            trace_id=trace_id,
-            timestamp=time.time(),
-        )
+        Marks the work table row of each (project_id, path) combination
+        dirty, creating it if needed. Multiple rapid requests for the same
+        path result in a single grouping run, which sees all of their
+        traces. Requests are recorded even while no worker is running and
+        processed once one is.
+
+        Args:
+            session: Database session
+            requests: Tuples of (trace ID, trace path, project ID)
 
-        # Update pending requests (for throttling)
-        key = (project_id, path)
-        with self._pending_lock:
-            self._pending_requests[key] = request
+        """
+        latest: dict[tuple[int, str], int] = {}
+        counts: dict[tuple[int, str], int] = {}
+        for trace_id, path, project_id in requests:
+            key = (project_id, path or "")
+            latest[key] = max(latest.get(key, trace_id), trace_id)
+            counts[key] = counts.get(key, 0) + 1
+        if not latest:
+            return
 
-        # Add to queue
+        now = datetime.now(UTC)
+        rows = [
+            {
+                "project_id": project_id,
+                "path": path,
+                "dirty": True,
+                "dirty_since": now,
+                "latest_trace_id": latest[project_id, path],
+                "version": counts[project_id, path],
+            }
+            # Sorted so that concurrent writers lock rows in the same order
+            for project_id, path in sorted(latest)
+        ]
+        insert = _INSERTS[session.get_bind().dialect.name]
+        stmt = insert(GroupingWork).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GroupingWork.project_id, GroupingWork.path],
+            set_={
+                "dirty": True,
+                "dirty_since": case(
+                    (GroupingWork.dirty, GroupingWork.dirty_since),
+                    else_=stmt.excluded.dirty_since,
+                ),
+                "latest_trace_id": stmt.excluded.latest_trace_id,
+                "version": GroupingWork.version + stmt.excluded.version,
+                "updated_at": func.now(),
+            },
+        )
         try:
-            self._queue.put(request, timeout=1.0)
+            await session.execute(stmt)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Failed to enqueue grouping requests: {e}")
+            return
+
+        for (project_id, path), trace_id in latest.items():
             logger.info(
                 f"Enqueued grouping request for trace {trace_id} "
-                f"(project={project_id}, path={path})",
+                f"(project={project_id}, path={path or None})",
             )
-        except Exception as e:
-            logger.error(f"Failed to enqueue grouping request: {e}")
 
-    def get_pending_request(
+    async def claim_grouping(
         self,
-        project_id: int,
-        path: str,
+        session: AsyncSession,
+        lease_seconds: float,
+        worker: int | None = None,
     ) -> GroupingRequest | None:
-        """Get the latest pending request for a (project_id, path) combination.
+        """Claim the dirty path that has waited the longest.
 
-        This is used by the worker to check if a newer request exists before
-        processing, enabling throttling.
+        Rows that are locked by another worker's claim are skipped, and a
+        claimed row is leased, so that each path is grouped by one worker
+        at a time.
 
         Args:
-            project_id: Project ID
-            path: Trace path
+            session: Database session
+            lease_seconds: How long the claim lasts unless renewed
+            worker: Index of the pool worker claiming the path, if any
 
         Returns:
-            Latest pending request, or None if no pending request
+            The claimed request, or None if there is no unclaimed dirty path
 
         """
-        key = (project_id, path)
-        with self._pending_lock:
-            return self._pending_requests.get(key)
+        now = datetime.now(UTC)
+        unclaimed = or_(
+            GroupingWork.claimed_until.is_(None),
+            GroupingWork.claimed_until < now,
+        )
+        work = (
+            await session.execute(
+                select(GroupingWork)
+                .where(GroupingWork.dirty)
+                .where(unclaimed)
+                .order_by(GroupingWork.dirty_since, GroupingWork.id)
+                .limit(1)
+                .with_for_update(skip_locked=True),
+            )
+        ).scalar_one_or_none()
+        if work is None:
+            await session.rollback()
+            return None
+
+        # Only take the lease if no other worker took it first, for databases
+        # without row locks
+        claim_token = str(uuid.uuid4())
+        result = await session.execute(
+            update(GroupingWork)
+            .where(GroupingWork.id == work.id)
+            .where(unclaimed)
+            .values(
+                claimed_until=now + timedelta(seconds=lease_seconds),
+                claim_token=claim_token,
+                claimed_by=worker,
+            )
+            .returning(GroupingWork.version)
+            .execution_options(synchronize_session=False),
+        )
+        version = result.scalar_one_or_none()
+        await session.commit()
+        if version is None:
+            return None
+
+        return GroupingRequest(
+            project_id=work.project_id,
+            path=work.path or None,
+            trace_id=work.latest_trace_id,
+            timestamp=work.dirty_since.timestamp(),
+            work_id=work.id,
+            version=version,
+            claim_token=claim_token,
+        )
+
+    async def renew_grouping(
+        self,
+        session: AsyncSession,
+        request: GroupingRequest,
+        lease_seconds: float,
+    ) -> bool:
+        """Extend the lease of a claimed request that is still being processed.
+
+        The session is committed only if the request still holds its claim,
+        and rolled back otherwise, so that work done under the claim in the
+        same session is committed together with the renewal.
+
+        Returns:
+            Whether the request still held its claim
+
+        """
+        result = await session.execute(
+            update(GroupingWork)
+            .where(GroupingWork.id == request.work_id)
+            .where(GroupingWork.claim_token == request.claim_token)
+            .values(claimed_until=datetime.now(UTC) + timedelta(seconds=lease_seconds))
+            .returning(GroupingWork.id)
+            .execution_options(synchronize_session=False),
+        )
+        if result.scalar_one_or_none() is None:
+            await session.rollback()
+            return False
+        await session.commit()
+        return True
+
+    async def complete_grouping(
+        self,
+        session: AsyncSession,
+        request: GroupingRequest,
+    ) -> bool:
+        """Release a processed request.
+
+        The path stays dirty if requests for it arrived while it was being
+        processed, so that another run picks up their traces.
+
+        Returns:
+            Whether the request still held its claim, otherwise the claim of
+            whichever worker took over is left alone
+
+        """
+        result = await session.execute(
+            update(GroupingWork)
+            .where(GroupingWork.id == request.work_id)
+            .where(GroupingWork.claim_token == request.claim_token)
+            .values(
+                dirty=GroupingWork.version != request.version,
+                claimed_until=None,
+                claim_token=None,
+                claimed_by=None,
+            )
+            .returning(GroupingWork.id)
+            .execution_options(synchronize_session=False),
+        )
+        released = result.scalar_one_or_none() is not None
+        await session.commit()
+        return released
 
-    def clear_pending_request(self, project_id: int, path: str) -> None:
-        """Clear pending request after processing.
+    async def get_pending_request(
+        self,
+        session: AsyncSession,
+        project_id: int,
+        path: str | None,
+    ) -> GroupingRequest | None:
+        """Get the pending request for a (project_id, path) combination.
 
         Args:
+            session: Database session
             project_id: Project ID
             path: Trace path
 
+        Returns:
+            Pending request with the latest trace, or None if the path is not dirty
+
         """
-        key = (project_id, path)
-        with self._pending_lock:
-            self._pending_requests.pop(key, None)
+        work = (
+            await session.execute(
+                select(GroupingWork)
+                .where(GroupingWork.project_id == project_id)
+                .where(GroupingWork.path == (path or ""))
+                .where(GroupingWork.dirty),
+            )
+        ).scalar_one_or_none()
+        if work is None:
+            return None
+        return GroupingRequest(
+            project_id=work.project_id,
+            path=work.path or None,
+            trace_id=work.latest_trace_id,
+            timestamp=work.dirty_since.timestamp(),
+            work_id=work.id,
+            version=work.version,
+        )
 
-    def get_queue_size(self) -> int:
-        """Get approximate size of the queue.
+    async def get_pending_keys(self, session: AsyncSession) -> list[tuple[int, str | None]]:
+        """Get list of all pending (project_id, path) keys.
 
         Returns:
-            Number of pending requests in queue
+            List of (project_id, path) tuples with pending requests
 
         """
-        if self._queue is None:
-            return 0
-        return self._queue.qsize()
+        result = await session.execute(
+            select(GroupingWork.project_id, GroupingWork.path)
+            .where(GroupingWork.dirty)
+            .order_by(GroupingWork.dirty_since, GroupingWork.id),
+        )
+        return [(project_id, path or None) for project_id, path in result.all()]
 
-    def get_pending_keys(self) -> list[tuple[int, str]]:
-        """Get list of all pending (project_id, path) keys.
+    async def get_queue_size(self, session: AsyncSession) -> int:
+        """Get the number of pending paths.
 
         Returns:
-            List of (project_id, path) tuples with pending requests
+            Number of dirty paths, including those being processed
 
         """
-        with self._pending_lock:
-            return list(self._pending_requests.keys())
+        result = await session.execute(
+            select(func.count()).select_from(GroupingWork).where(GroupingWork.dirty),
+        )
+        return result.scalar_one()
 
     def is_worker_alive(self) -> bool:
-        """Check if worker process is alive.
+        """Check if any worker process is alive.
+
+        Returns:
+            True if a worker is running, False otherwise
+
+        """
+        return any(process.is_alive() for process in self._worker_processes)
+
+    async def get_worker_status(self, session: AsyncSession) -> list[dict[str, Any]]:
+        """Get the health of each worker.
+
+        Args:
+            session: Database session
 
         Returns:
-            True if worker is running, False otherwise
+            For each worker, whether it is alive, its PID, how often it was
+            restarted and the number of paths it holds an unexpired claim on
 
         """
-        return self._worker_process is not None and self._worker_process.is_alive()
+        result = await session.execute(
+            select(GroupingWork.claimed_by, func.count())
+            .where(GroupingWork.claimed_by.is_not(None))
+            .where(GroupingWork.claimed_until >= datetime.now(UTC))
+            .group_by(GroupingWork.claimed_by),
+        )
+        claimed_paths = dict(result.all())
+        return [
+            {
+                "worker": index,
+                "alive": process.is_alive(),
+                "pid": process.pid,
+                "restarts": self._restarts[index] if index < len(self._restarts) else 0,
+                "claimed_paths": claimed_paths.get(index, 0),
+            }
+            for index, process in enumerate(self._worker_processes)
+        ]
 
 
 # Singleton instance
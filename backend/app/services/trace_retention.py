@@ -0,0 +1,435 @@
+"""Daily partitions and retention of the trace tables."""
+
+import asyncio
+import logging
+import re
+from datetime import UTC, date, datetime, time, timedelta
+
+from sqlalchemy import (
+    Select,
+    Table,
+    TableClause,
+    column,
+    delete,
+    select,
+    table,
+    text,
+    true,
+    union,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import Settings, get_settings
+from app.database import AsyncSessionMaker
+from app.models.blobs import PayloadBlob
+from app.models.evaluation import Grade
+from app.models.http_traces import HTTPTrace
+from app.models.traces import Trace, TraceInputItem, TraceOutputItem
+
+logger = logging.getLogger(__name__)
+
+# Partitioned tables and their partition key, items before their traces
+PARTITIONED_TABLES = {
+    "http_trace": "started_at",
+    "trace_input_item": "trace_started_at",
+    "trace_output_item": "trace_started_at",
+    "trace": "started_at",
+}
+_TRACE_TABLES = ("trace_input_item", "trace_output_item", "trace")
+_BLOB_COLUMNS = {
+    "http_trace": ("request_blob_hash", "response_blob_hash"),
+    "trace_input_item": ("content_blob_hash",),
+}
+_LOCK_KEY = 0x72347574726163  # "r4utrac"
+
+
+def partition_name(table: str, day: date) -> str:
+    """Name of a table's partition for a day."""
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def partition_day(table: str, name: str) -> date | None:
+    """Day of a daily partition of a table, or None for other partitions."""
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{8}})", name)
+    if match is None:
+        return None
+    return datetime.strptime(match.group(1), "%Y%m%d").date()
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time(), UTC)
+
+
+class TraceRetentionManager:
+    """Maintains the daily trace partitions and deletes expired traces.
+
+    On PostgreSQL the ``http_trace``, ``trace``, ``trace_input_item`` and
+    ``trace_output_item`` tables are partitioned by day. Each run creates the
+    partitions for the next ``partition_premake_days`` days, and removes the
+    partitions of days older than the retention window, items before their
+    traces: expiring a day is a catalog operation instead of a delete of its
+    rows. Removed partitions are dropped, or detached and moved to
+    ``retention_archive_schema`` with the grades and payload blobs they use.
+
+    Expired rows outside the daily partitions (in the default partition, or
+    on databases without partitions such as SQLite) are deleted row by row.
+    A run holds an advisory lock, so only one process maintains partitions
+    at a time.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession] = AsyncSessionMaker,
+        settings: Settings | None = None,
+    ):
+        """Initialize the manager without starting the periodic task.
+
+        Args:
+            session_maker: Factory for the task's database sessions
+            settings: Application settings
+
+        """
+        self._session_maker = session_maker
+        self._settings = settings or get_settings()
+        self._task: asyncio.Task | None = None
+
+    async def run(
+        self,
+        session: AsyncSession,
+        now: datetime | None = None,
+    ) -> list[str]:
+        """Create upcoming partitions and expire old traces.
+
+        Args:
+            session: Database session; the changes are committed
+            now: Current time, for tests
+
+        Returns:
+            Names of the removed partitions
+
+        """
+        now = now or datetime.now(UTC)
+        partitioned = await self._is_partitioned(session)
+        if partitioned:
+            locked = await session.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"),
+                {"key": _LOCK_KEY},
+            )
+            if not locked:
+                logger.info("Trace partitions are maintained by another process")
+                await session.rollback()
+                return []
+            await self.ensure_partitions(
+                session,
+                now.date() - timedelta(days=1),
+                now.date() + timedelta(days=self._settings.partition_premake_days),
+            )
+
+        archive = None
+        if session.get_bind().dialect.name == "postgresql":
+            archive = self._settings.retention_archive_schema
+
+        removed = []
+        if self._settings.http_trace_retention_days > 0:
+            cutoff = now.date() - timedelta(days=self._settings.http_trace_retention_days)
+            removed += await self._expire_http_traces(
+                session,
+                cutoff,
+                partitioned=partitioned,
+                archive=archive,
+            )
+        if self._settings.trace_retention_days > 0:
+            cutoff = now.date() - timedelta(days=self._settings.trace_retention_days)
+            removed += await self._expire_traces(
+                session,
+                cutoff,
+                partitioned=partitioned,
+                archive=archive,
+            )
+        await session.commit()
+        if removed:
+            logger.info(f"Removed {len(removed)} expired trace partitions")
+        return removed
+
+    async def ensure_partitions(
+        self,
+        session: AsyncSession,
+        first_day: date,
+        last_day: date,
+    ) -> list[str]:
+        """Create the missing daily partitions of a range of days.
+
+        A partition cannot be created while the default partition holds rows
+        of its day; such days are logged and skipped.
+
+        Args:
+            session: Database session
+            first_day: First day to create partitions for
+            last_day: Last day to create partitions for
+
+        Returns:
+            Names of the created partitions
+
+        """
+        created = []
+        for parent in PARTITIONED_TABLES:
+            existing = await self._partitions(session, parent)
+            day = first_day
+            while day <= last_day:
+                name = partition_name(parent, day)
+                if name not in existing:
+                    try:
+                        async with session.begin_nested():
+                            await session.execute(
+                                text(
+                                    f"CREATE TABLE {self._quote(session, name)} "
+                                    f"PARTITION OF {self._quote(session, parent)} "
+                                    f"FOR VALUES FROM ('{_day_start(day).isoformat()}') "
+                                    f"TO ('{_day_start(day + timedelta(days=1)).isoformat()}')",
+                                ),
+                            )
+                        created.append(name)
+                    except DBAPIError:
+                        logger.warning(f"Could not create partition {name}", exc_info=True)
+                day += timedelta(days=1)
+        return created
+
+    async def _expire_http_traces(
+        self,
+        session: AsyncSession,
+        cutoff: date,
+        *,
+        partitioned: bool,
+        archive: str | None,
+    ) -> list[str]:
+        removed = []
+        if partitioned:
+            for name, day in (await self._partitions(session, "http_trace")).items():
+                if day is None or day >= cutoff:
+                    continue
+                partition = table(name, column("id"))
+                # Dropping a partition does not apply ON DELETE SET NULL
+                await self._unlink_http_traces(session, select(partition.c.id))
+                await self._remove_partition(session, "http_trace", name, archive)
+                removed.append(name)
+
+        expired = HTTPTrace.started_at < _day_start(cutoff)
+        if archive:
+            await self._archive_rows(session, HTTPTrace.__table__, expired, archive)
+        await self._unlink_http_traces(session, select(HTTPTrace.id).where(expired))
+        await self._delete_rows(session, HTTPTrace.__table__, expired)
+        return removed
+
+    async def _expire_traces(
+        self,
+        session: AsyncSession,
+        cutoff: date,
+        *,
+        partitioned: bool,
+        archive: str | None,
+    ) -> list[str]:
+        removed = []
+        if partitioned:
+            partitions = {name: await self._partitions(session, name) for name in _TRACE_TABLES}
+            for name, day in partitions["trace"].items():
+                if day is None or day >= cutoff:
+                    continue
+                # Grades do not reference the partitioned traces by a foreign key
+                expired_grades = Grade.trace_id.in_(select(table(name, column("id")).c.id))
+                if archive:
+                    await self._archive_rows(session, Grade.__table__, expired_grades, archive)
+                await self._delete_rows(session, Grade.__table__, expired_grades)
+                for parent in _TRACE_TABLES:
+                    if partition_name(parent, day) in partitions[parent]:
+                        await self._remove_partition(
+                            session,
+                            parent,
+                            partition_name(parent, day),
+                            archive,
+                        )
+                        removed.append(partition_name(parent, day))
+
+        expired_traces = select(Trace.id).where(Trace.started_at < _day_start(cutoff))
+        expired = {
+            Grade.__table__: Grade.trace_id.in_(expired_traces),
+            TraceInputItem.__table__: TraceInputItem.trace_started_at < _day_start(cutoff),
+            TraceOutputItem.__table__: TraceOutputItem.trace_started_at < _day_start(cutoff),
+            Trace.__table__: Trace.started_at < _day_start(cutoff),
+        }
+        for rows, where in expired.items():
+            if archive:
+                await self._archive_rows(session, rows, where, archive)
+            await self._delete_rows(session, rows, where)
+        return removed
+
+    async def _unlink_http_traces(self, session: AsyncSession, http_trace_ids: Select) -> None:
+        await session.execute(
+            update(Trace)
+            .where(Trace.http_trace_id.in_(http_trace_ids))
+            .values(http_trace_id=None)
+            .execution_options(synchronize_session=False),
+        )
+
+    async def _delete_rows(self, session: AsyncSession, rows: Table, where) -> None:
+        result = await session.execute(
+            delete(rows).where(where).execution_options(synchronize_session=False),
+        )
+        if result.rowcount:
+            logger.info(f"Deleted {result.rowcount} expired rows from {rows.name}")
+
+    async def _remove_partition(
+        self,
+        session: AsyncSession,
+        parent: str,
+        name: str,
+        archive: str | None,
+    ) -> None:
+        partition = self._quote(session, name)
+        await session.execute(
+            text(f"ALTER TABLE {self._quote(session, parent)} DETACH PARTITION {partition}"),
+        )
+        if not archive:
+            await session.execute(text(f"DROP TABLE {partition}"))
+            return
+
+        if parent in _BLOB_COLUMNS:
+            columns = _BLOB_COLUMNS[parent]
+            source = table(name, *(column(blob_column) for blob_column in columns))
+            await self._archive_blobs(session, source, columns, true(), archive)
+        # The archived table must not hold on to live traces or blobs
+        constraints = await session.scalars(
+            text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = to_regclass(:name) AND contype = 'f'",
+            ),
+            {"name": name},
+        )
+        for constraint in constraints.all():
+            await session.execute(
+                text(
+                    f"ALTER TABLE {partition} "
+                    f"DROP CONSTRAINT {self._quote(session, constraint)}",
+                ),
+            )
+        schema = self._quote(session, archive)
+        await session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+        await session.execute(text(f"ALTER TABLE {partition} SET SCHEMA {schema}"))
+
+    async def _archive_rows(
+        self,
+        session: AsyncSession,
+        rows: Table,
+        where,
+        archive: str,
+    ) -> None:
+        """Copy the rows of a table that match a condition to the archive schema."""
+        target = await self._archive_table(session, rows, archive)
+        await session.execute(
+            postgresql_insert(target)
+            .from_select([c.name for c in rows.columns], select(rows).where(where))
+            .on_conflict_do_nothing(),
+        )
+        if rows.name in _BLOB_COLUMNS:
+            await self._archive_blobs(session, rows, _BLOB_COLUMNS[rows.name], where, archive)
+
+    async def _archive_blobs(
+        self,
+        session: AsyncSession,
+        rows: TableClause,
+        columns: tuple[str, ...],
+        where,
+        archive: str,
+    ) -> None:
+        """Copy the payload blobs that archived rows use to the archive schema."""
+        blobs = PayloadBlob.__table__
+        target = await self._archive_table(session, blobs, archive)
+        selects = [select(rows.c[name]).where(where) for name in columns]
+        hashes = selects[0] if len(selects) == 1 else union(*selects)
+        await session.execute(
+            postgresql_insert(target)
+            .from_select(
+                [c.name for c in blobs.columns],
+                select(blobs).where(blobs.c.hash.in_(hashes)),
+            )
+            .on_conflict_do_nothing(),
+        )
+
+    async def _archive_table(self, session: AsyncSession, rows: Table, archive: str):
+        """Create a table's copy in the archive schema if it does not exist yet."""
+        schema = self._quote(session, archive)
+        await session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+        await session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {schema}.{self._quote(session, rows.name)} "
+                f"(LIKE {self._quote(session, rows.name)} INCLUDING INDEXES)",
+            ),
+        )
+        return table(rows.name, *(column(c.name) for c in rows.columns), schema=archive)
+
+    async def _is_partitioned(self, session: AsyncSession) -> bool:
+        if session.get_bind().dialect.name != "postgresql":
+            return False
+        return bool(
+            await session.scalar(
+                text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                    "WHERE partrelid = to_regclass('trace'))",
+                ),
+            ),
+        )
+
+    async def _partitions(self, session: AsyncSession, table: str) -> dict[str, date | None]:
+        """Partitions of a table and their day (None for the default partition)."""
+        result = await session.scalars(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = to_regclass(:table)",
+            ),
+            {"table": table},
+        )
+        return {name: partition_day(table, name) for name in result.all()}
+
+    @staticmethod
+    def _quote(session: AsyncSession, name: str) -> str:
+        return session.get_bind().dialect.identifier_preparer.quote(name)
+
+    def start(self) -> None:
+        """Maintain partitions and retention periodically in the background."""
+        if self._task is None and self._settings.retention_interval_seconds > 0:
+            self._task = asyncio.create_task(self._run_periodically(), name="trace-retention")
+
+    async def stop(self) -> None:
+        """Stop the periodic task."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run_periodically(self) -> None:
+        while True:
+            try:
+                async with self._session_maker() as session:
+                    await self.run(session)
+            except Exception:
+                logger.exception("Trace partition maintenance failed")
+            await asyncio.sleep(self._settings.retention_interval_seconds)
+
+
+_trace_retention_manager: TraceRetentionManager | None = None
+
+
+def get_trace_retention_manager() -> TraceRetentionManager:
+    """Get or create the process-wide trace retention manager.
+
+    Returns:
+        TraceRetentionManager instance
+
+    """
+    global _trace_retention_manager
+    if _trace_retention_manager is None:
+        _trace_retention_manager = TraceRetentionManager()
+    return _trace_retention_manager
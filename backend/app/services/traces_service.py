@@ -5,7 +5,7 @@ import random
 from typing import Any
 
 from fastapi import BackgroundTasks
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
@@ -14,8 +14,12 @@ from app.models.projects import Project
 from app.models.tasks import Implementation
 from app.models.traces import Trace, TraceInputItem, TraceOutputItem
 from app.schemas.traces import TraceCreate
+from app.services.blob_store import get_blob_store
+from app.services.implementation_matcher import (
+    ImplementationMatcher,
+    get_implementation_matcher_index,
+)
 from app.services.provider_service import ProviderService
-from app.services.task_grouping import TemplateFinder
 from app.services.task_grouping_queue import get_task_grouping_queue
 
 logger = logging.getLogger(__name__)
@@ -56,53 +60,18 @@ class TracesService:
         provider_service = ProviderService(session)
         trace_data.model = await provider_service.canonicalize_model(trace_data.model)
         trace = Trace(
-            project_id=project.id,
-            http_trace_id=http_trace_id,
-            model=trace_data.model,
-            error=trace_data.error,
-            started_at=trace_data.started_at,
-            completed_at=trace_data.completed_at,
-            path=trace_data.path,
-            implementation_id=trace_data.implementation_id,
-            tools=self._serialize_tools(trace_data.tools),
-            instructions=trace_data.instructions,
-            prompt=trace_data.prompt,
-            temperature=trace_data.temperature,
-            tool_choice=self._serialize_tool_choice(trace_data.tool_choice),
-            prompt_tokens=trace_data.prompt_tokens,
-            completion_tokens=trace_data.completion_tokens,
-            total_tokens=trace_data.total_tokens,
-            cached_tokens=trace_data.cached_tokens,
-            reasoning_tokens=trace_data.reasoning_tokens,
-            finish_reason=trace_data.finish_reason,
-            system_fingerprint=trace_data.system_fingerprint,
-            reasoning=self._serialize_reasoning(trace_data.reasoning),
-            response_schema=trace_data.response_schema,
-            trace_metadata=trace_data.trace_metadata,
+            **self._build_trace_values(trace_data, project.id, http_trace_id),
         )
 
         # Add input items
-        for position, item in enumerate(trace_data.input):
-            item_data = item.model_dump(mode="json", exclude={"type"})
-            trace.input_items.append(
-                TraceInputItem(
-                    type=item.type,
-                    data=item_data,
-                    position=position,
-                ),
-            )
+        input_values = self._build_input_item_values(trace_data.input)
+        await get_blob_store().store_item_contents(session, input_values)
+        for item_values in input_values:
+            trace.input_items.append(TraceInputItem(**item_values))
 
         # Add output items if present
-        if trace_data.output:
-            for position, item in enumerate(trace_data.output):
-                item_data = item.model_dump(mode="json", exclude={"type"})
-                trace.output_items.append(
-                    TraceOutputItem(
-                        type=item.type,
-                        data=item_data,
-                        position=position,
-                    ),
-                )
+        for item_values in self._build_item_values(trace_data.output or []):
+            trace.output_items.append(TraceOutputItem(**item_values))
 
         # Save trace
         session.add(trace)
@@ -130,6 +99,106 @@ class TracesService:
         # Reload trace with relationships
         return await self._load_trace_with_relationships(trace.id, session)
 
+    async def create_traces_batch(
+        self,
+        items: list[tuple[TraceCreate, int | None]],
+        session: AsyncSession,
+        background_tasks: BackgroundTasks | None = None,
+    ) -> list[int]:
+        """Create many traces with bulk inserts in a single transaction.
+
+        Projects and canonical model names are resolved once per distinct
+        value, and the trace, input item and output item rows are written with
+        one multi-row INSERT per table. Implementation matching runs after the
+        commit, using the cached implementation matcher of each project and
+        model.
+
+        Args:
+            items: Pairs of trace creation data and optional HTTP trace ID to link
+            session: Database session (may hold pending rows, e.g. HTTP traces)
+            background_tasks: Optional background tasks for auto-grading
+
+        Returns:
+            IDs of the created traces, in the order of ``items``
+
+        """
+        if not items:
+            await session.commit()
+            return []
+
+        projects: dict[str, Project] = {}
+        for project_name in {trace_data.project for trace_data, _ in items}:
+            projects[project_name] = await self._get_or_create_project(
+                project_name,
+                session,
+            )
+
+        provider_service = ProviderService(session)
+        canonical_models: dict[str, str] = {}
+        for model in {trace_data.model for trace_data, _ in items}:
+            canonical_models[model] = await provider_service.canonicalize_model(model)
+
+        trace_rows = []
+        for trace_data, http_trace_id in items:
+            trace_data.model = canonical_models[trace_data.model]
+            trace_rows.append(
+                self._build_trace_values(
+                    trace_data,
+                    projects[trace_data.project].id,
+                    http_trace_id,
+                ),
+            )
+
+        result = await session.execute(
+            insert(Trace).returning(Trace.id, sort_by_parameter_order=True),
+            trace_rows,
+        )
+        trace_ids = list(result.scalars().all())
+
+        input_rows = []
+        output_rows = []
+        for trace_id, trace_row, (trace_data, _) in zip(
+            trace_ids,
+            trace_rows,
+            items,
+            strict=True,
+        ):
+            trace_key = {
+                "trace_id": trace_id,
+                "trace_started_at": trace_row["started_at"],
+            }
+            input_rows.extend(
+                {**trace_key, **values}
+                for values in self._build_input_item_values(trace_data.input)
+            )
+            output_rows.extend(
+                {**trace_key, **values}
+                for values in self._build_item_values(trace_data.output or [])
+            )
+
+        if input_rows:
+            await get_blob_store().store_item_contents(session, input_rows)
+            # Render NULL blob hashes so rows with and without one are still
+            # inserted as a single batch
+            await session.execute(
+                insert(TraceInputItem).execution_options(render_nulls=True),
+                input_rows,
+            )
+        if output_rows:
+            await session.execute(insert(TraceOutputItem), output_rows)
+        await session.commit()
+
+        await self._auto_match_implementations_batch(
+            [
+                (trace_id, trace_data, projects[trace_data.project].id)
+                for trace_id, (trace_data, _) in zip(trace_ids, items, strict=True)
+            ],
+            session=session,
+            background_tasks=background_tasks,
+        )
+
+        return trace_ids
+
     async def list_traces(
         self,
         session: AsyncSession,
@@ -207,6 +276,7 @@ class TracesService:
             matching = await self._find_matching_implementation(
                 input_items=input_items,
                 model=trace_data.model,
+                project_id=project_id,
                 session=session,
             )
 
@@ -224,7 +294,8 @@ class TracesService:
 
                 # Queue task grouping in background instead of processing synchronously
                 queue_manager = get_task_grouping_queue()
-                queue_manager.enqueue_grouping(
+                await queue_manager.enqueue_grouping(
+                    session,
                     project_id=project_id,
                     path=trace.path,
                     trace_id=trace.id,
@@ -237,6 +308,81 @@ class TracesService:
                 exc_info=True,
             )
 
+    async def _auto_match_implementations_batch(
+        self,
+        traces: list[tuple[int, TraceCreate, int]],
+        session: AsyncSession,
+        background_tasks: BackgroundTasks | None = None,
+    ) -> None:
+        """Auto-match a batch of freshly inserted traces to implementations.
+
+        Args:
+            traces: Tuples of (trace ID, trace creation data, project ID)
+            session: Database session
+            background_tasks: Optional background tasks for auto-grading
+
+        """
+        pending = [
+            (trace_id, trace_data, project_id)
+            for trace_id, trace_data, project_id in traces
+            if not trace_data.implementation_id
+        ]
+        if not pending:
+            return
+
+        try:
+            matcher_index = get_implementation_matcher_index()
+            matchers: dict[tuple[int, str], ImplementationMatcher] = {}
+
+            matched_rows = []
+            unmatched = []
+            for trace_id, trace_data, project_id in pending:
+                input_items = [
+                    item.model_dump(mode="json") for item in trace_data.input
+                ]
+                system_prompt = await self._extract_system_prompt_from_trace(
+                    input_items,
+                )
+                matching = None
+                if system_prompt:
+                    key = (project_id, trace_data.model)
+                    if key not in matchers:
+                        matchers[key] = await matcher_index.get(session, *key)
+                    matching = matchers[key].match(system_prompt)
+                if matching:
+                    matched_rows.append(
+                        {
+                            "id": trace_id,
+                            "implementation_id": matching["implementation_id"],
+                            "prompt_variables": matching["variables"],
+                        },
+                    )
+                else:
+                    unmatched.append((trace_id, trace_data.path, project_id))
+
+            if matched_rows:
+                await session.execute(update(Trace), matched_rows)
+                await session.commit()
+                logger.info(f"Auto-matched {len(matched_rows)} traces in batch")
+
+            queue_manager = get_task_grouping_queue()
+            await queue_manager.enqueue_groupings(session, unmatched)
+        except Exception as e:
+            # Log but don't fail trace creation if matching fails
+            logger.warning(f"Failed to auto-match trace batch: {e}", exc_info=True)
+            return
+
+        # Trigger auto-grading for matched traces
+        if not self.settings:
+            return
+        for row in matched_rows:
+            if background_tasks:
+                background_tasks.add_task(self._run_auto_grading_background, row["id"])
+            else:
+                trace = await session.get(Trace, row["id"])
+                if trace:
+                    await self._trigger_auto_grading(trace, session)
+
     async def _run_auto_grading_background(self, trace_id: int) -> None:
         """Run auto-grading in a background task with its own session.
 
@@ -349,6 +495,88 @@ class TracesService:
         result = await session.execute(query)
         return result.unique().scalar_one()
 
+    def _build_trace_values(
+        self,
+        trace_data: TraceCreate,
+        project_id: int,
+        http_trace_id: int | None,
+    ) -> dict[str, Any]:
+        """Build column values for a trace row.
+
+        Args:
+            trace_data: Trace creation data (with canonicalized model)
+            project_id: Project ID
+            http_trace_id: Optional HTTP trace ID to link
+
+        Returns:
+            Mapping of Trace attribute names to values
+
+        """
+        return {
+            "project_id": project_id,
+            "http_trace_id": http_trace_id,
+            "model": trace_data.model,
+            "error": trace_data.error,
+            "started_at": trace_data.started_at,
+            "completed_at": trace_data.completed_at,
+            "path": trace_data.path,
+            "implementation_id": trace_data.implementation_id,
+            "tools": self._serialize_tools(trace_data.tools),
+            "instructions": trace_data.instructions,
+            "prompt": trace_data.prompt,
+            "temperature": trace_data.temperature,
+            "tool_choice": self._serialize_tool_choice(trace_data.tool_choice),
+            "prompt_tokens": trace_data.prompt_tokens,
+            "completion_tokens": trace_data.completion_tokens,
+            "total_tokens": trace_data.total_tokens,
+            "cached_tokens": trace_data.cached_tokens,
+            "reasoning_tokens": trace_data.reasoning_tokens,
+            "finish_reason": trace_data.finish_reason,
+            "system_fingerprint": trace_data.system_fingerprint,
+            "reasoning": self._serialize_reasoning(trace_data.reasoning),
+            "response_schema": trace_data.response_schema,
+            "trace_metadata": trace_data.trace_metadata,
+        }
+
+    def _build_item_values(self, items: list[Any]) -> list[dict[str, Any]]:
+        """Build column values for input or output item rows.
+
+        Args:
+            items: Input or output item schemas
+
+        Returns:
+            List of mappings with type, data and position
+
+        """
+        return [
+            {
+                "type": item.type,
+                "data": item.model_dump(mode="json", exclude={"type"}),
+                "position": position,
+            }
+            for position, item in enumerate(items)
+        ]
+
+    def _build_input_item_values(self, items: list[Any]) -> list[dict[str, Any]]:
+        """Build column values for input item rows.
+
+        Args:
+            items: Input item schemas
+
+        Returns:
+            List of mappings with type, stored data, content blob hash and position
+
+        """
+        return [
+            {
+                "type": values["type"],
+                "stored_data": values["data"],
+                "content_blob_hash": None,
+                "position": values["position"],
+            }
+            for values in self._build_item_values(items)
+        ]
+
     def _serialize_tools(
         self,
         tools: list[Any] | None,
@@ -410,6 +638,7 @@ class TracesService:
         self,
         input_items: list[dict[str, Any]],
         model: str,
+        project_id: int,
         session: AsyncSession,
     ) -> dict[str, Any] | None:
         """Find a matching implementation based on input items and model.
@@ -428,28 +657,12 @@ class TracesService:
         if not system_prompt:
             return None
 
-        query = select(Implementation)
-        result = await session.execute(query)
-        implementations = result.scalars().all()
-
-        if not implementations:
-            return None
-
-        # Try to match the system prompt against each implementation's prompt template
-        template_finder = TemplateFinder()
-
-        for impl in implementations:
-            match, variables = template_finder.match_template(
-                impl.prompt,
-                system_prompt,
-            )
-            if match:
-                return {
-                    "implementation_id": impl.id,
-                    "variables": variables,
-                }
-
-        return None
+        matcher = await get_implementation_matcher_index().get(
+            session,
+            project_id,
+            model,
+        )
+        return matcher.match(system_prompt)
 
     async def _extract_system_prompt_from_trace(
         self,
@@ -0,0 +1,160 @@
+"""Decoding of request bodies sent in the SDK wire formats.
+
+The SDK sends traces as JSON by default. Clients may opt into MessagePack,
+where raw request/response bodies travel as binary fields instead of JSON
+strings, and may compress either format with gzip or zstd. The format is
+declared with the ``Content-Type`` header and the compression with
+``Content-Encoding``.
+"""
+
+import json
+import zlib
+from typing import Any
+
+import msgpack
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+_MSGPACK_CONTENT_TYPES = {
+    MSGPACK_CONTENT_TYPE,
+    "application/x-msgpack",
+    "application/vnd.msgpack",
+}
+
+# Output produced per decompression step, so that the size limit is checked
+# before much more than it is held in memory
+_CHUNK_SIZE = 64 * 1024
+
+
+class UnsupportedEncodingError(ValueError):
+    """Raised when a body uses a content encoding the backend cannot decode."""
+
+
+class BodyTooLargeError(ValueError):
+    """Raised when a decompressed body exceeds the maximum size."""
+
+
+def is_msgpack(content_type: str | None) -> bool:
+    """Check whether a Content-Type header declares MessagePack.
+
+    Args:
+        content_type: Value of the Content-Type header
+
+    Returns:
+        True if the body is MessagePack-encoded
+
+    """
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in _MSGPACK_CONTENT_TYPES
+
+
+def decompress_body(
+    body: bytes,
+    content_encoding: str | None,
+    max_size: int = 0,
+) -> bytes:
+    """Decompress a request body according to its Content-Encoding.
+
+    Compressed bodies are decompressed in chunks, so that a small body
+    expanding to more than ``max_size`` bytes is rejected without being
+    decompressed in full.
+
+    Args:
+        body: Raw request body
+        content_encoding: Value of the Content-Encoding header
+        max_size: Maximum size of the decompressed body in bytes (0 disables)
+
+    Returns:
+        Decompressed body
+
+    Raises:
+        UnsupportedEncodingError: If the encoding is not supported
+        BodyTooLargeError: If the decompressed body exceeds ``max_size``
+        ValueError: If the body cannot be decompressed
+
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        _check_size(len(body), max_size)
+        return body
+    if encoding == "gzip":
+        try:
+            return _gunzip(body, max_size)
+        except zlib.error as e:
+            raise ValueError(f"Invalid gzip body: {e}") from e
+    if encoding == "zstd":
+        if zstandard is None:
+            raise UnsupportedEncodingError("zstd encoding is not available")
+        try:
+            return _unzstd(body, max_size)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Invalid zstd body: {e}") from e
+    raise UnsupportedEncodingError(f"Unsupported content encoding: {encoding}")
+
+
+def _check_size(size: int, max_size: int) -> None:
+    if max_size and size > max_size:
+        raise BodyTooLargeError(
+            f"Decompressed body exceeds the maximum size of {max_size} bytes",
+        )
+
+
+def _gunzip(body: bytes, max_size: int) -> bytes:
+    """Decompress a gzip body of one or more members."""
+    out = bytearray()
+    data = body
+    while data:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        while not decompressor.eof:
+            chunk = decompressor.decompress(data, _CHUNK_SIZE)
+            data = decompressor.unconsumed_tail
+            if not chunk and not data:
+                raise ValueError("Invalid gzip body: truncated stream")
+            out += chunk
+            _check_size(len(out), max_size)
+        data = decompressor.unused_data
+    return bytes(out)
+
+
+def _unzstd(body: bytes, max_size: int) -> bytes:
+    """Decompress a zstd body of one or more frames."""
+    out = bytearray()
+    reader = zstandard.ZstdDecompressor().stream_reader(body, read_across_frames=True)
+    while chunk := reader.read(_CHUNK_SIZE):
+        out += chunk
+        _check_size(len(out), max_size)
+    return bytes(out)
+
+
+def decode_body(body: bytes, content_type: str | None) -> Any:
+    """Decode a (decompressed) request body according to its Content-Type.
+
+    Args:
+        body: Decompressed request body
+        content_type: Value of the Content-Type header
+
+    Returns:
+        The decoded Python object
+
+    Raises:
+        ValueError: If the body cannot be decoded
+
+    """
+    if is_msgpack(content_type):
+        try:
+            return msgpack.unpackb(body, raw=False)
+        except (msgpack.UnpackException, ValueError) as e:
+            raise ValueError(f"Invalid MessagePack body: {e}") from e
+
+    try:
+        return json.loads(body)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON body: {e}") from e
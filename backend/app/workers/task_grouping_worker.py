@@ -5,17 +5,23 @@ import logging
 import multiprocessing as mp
 import sys
 import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from typing import Any
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.config import get_settings
 from app.models.traces import Trace
 from app.schemas.tasks import ImplementationCreate, TaskCreate
-from app.services.task_grouping import TemplateFinder
-from app.services.task_grouping_queue import GroupingRequest
+from app.services.task_grouping import IncrementalTemplateFinder, TemplateFinder
+from app.services.task_grouping_queue import (
+    ClaimLostError,
+    GroupingRequest,
+    get_task_grouping_queue,
+)
 from app.services.task_service import TaskService
 
 # Configure logging for worker process
@@ -27,20 +33,54 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+_LOAD_BATCH_SIZE = 500
+
+
+@dataclass
+class _PathClusters:
+    """Unmatched traces of a path that the worker has already seen."""
+
+    finder: IncrementalTemplateFinder
+    prompts: dict[int, str] = field(default_factory=dict)
+    # Traces without a prompt, so that they are not loaded again
+    no_prompt: set[int] = field(default_factory=set)
+    last_used: float = field(default_factory=time.monotonic)
+
+    def __len__(self) -> int:
+        return len(self.prompts) + len(self.no_prompt)
+
+    @property
+    def trace_ids(self) -> set[int]:
+        return self.prompts.keys() | self.no_prompt
+
+    def add(self, trace_id: int, prompt: str | None) -> None:
+        if prompt:
+            self.prompts[trace_id] = prompt
+            self.finder.add(trace_id, prompt)
+        else:
+            self.no_prompt.add(trace_id)
+
+    def forget(self, trace_id: int) -> None:
+        if self.prompts.pop(trace_id, None) is not None:
+            self.finder.remove(trace_id)
+        self.no_prompt.discard(trace_id)
+
+
 class TaskGroupingWorker:
     """Worker that processes task grouping requests in background."""
 
-    def __init__(self, queue: mp.Queue, shutdown_event: mp.Event):
+    def __init__(self, shutdown_event: mp.Event, index: int | None = None):
         """Initialize worker.
 
         Args:
-            queue: Queue to receive grouping requests
             shutdown_event: Event to signal shutdown
+            index: Index of the worker in the pool, recorded on its claims
 
         """
-        self.queue = queue
         self.shutdown_event = shutdown_event
+        self.index = index
         self.settings = get_settings()
+        self.queue = get_task_grouping_queue()
 
         # Create database engine for this process
         self.engine = create_async_engine(
@@ -56,8 +96,9 @@ class TaskGroupingWorker:
             expire_on_commit=False,
         )
 
-        # Track which requests we've seen to enable throttling
-        self._pending_requests: dict[tuple[int, str], GroupingRequest] = {}
+        # Clustering state of the unmatched traces of each (project_id, path),
+        # least recently grouped first
+        self._clusters: OrderedDict[tuple[int, str], _PathClusters] = OrderedDict()
 
     async def run(self) -> None:
         """Main worker loop."""
@@ -66,60 +107,53 @@ class TaskGroupingWorker:
         try:
             while not self.shutdown_event.is_set():
                 try:
-                    # Get next request (blocking with timeout)
-                    request = self.queue.get(timeout=1.0)
+                    # Claim the next dirty path
+                    async with self.SessionLocal() as session:
+                        request = await self.queue.claim_grouping(
+                            session,
+                            self.settings.grouping_lease_seconds,
+                            worker=self.index,
+                        )
 
-                    # Check for shutdown sentinel
                     if request is None:
-                        logger.info("Received shutdown signal")
-                        break
+                        # Nothing to do, wait for new requests or shutdown
+                        await self._wait()
+                        continue
 
                     # Process request
                     await self._process_request(request)
 
-                except mp.queues.Empty:
-                    # Timeout, check shutdown event and continue
-                    continue
                 except Exception as e:
                     logger.error(f"Error in worker loop: {e}", exc_info=True)
-                    # Continue processing despite errors
+                    # Continue processing despite errors, e.g. once the
+                    # database is reachable again
+                    await self._wait()
 
         finally:
             logger.info("Shutting down worker...")
             await self.engine.dispose()
             logger.info("Worker shut down complete")
 
+    async def _wait(self) -> None:
+        """Wait for the poll interval, or less if shutting down."""
+        await asyncio.to_thread(
+            self.shutdown_event.wait,
+            self.settings.grouping_poll_interval_seconds,
+        )
+
     async def _process_request(self, request: GroupingRequest) -> None:
-        """Process a single grouping request.
+        """Process a single claimed grouping request.
+
+        The claim is renewed while grouping, and released afterwards. If
+        grouping fails, the claim is kept until its lease expires, after
+        which the path is retried. If the lease expired and another worker
+        took over the claim, grouping is abandoned without committing.
 
         Args:
             request: Grouping request to process
 
         """
-        key = (request.project_id, request.path)
-
-        # Update tracking
-        if key in self._pending_requests:
-            existing = self._pending_requests[key]
-            if existing.trace_id > request.trace_id:
-                logger.info(
-                    f"Skipping grouping for trace {request.trace_id} "
-                    f"(newer trace {existing.trace_id} pending for same path)",
-                )
-                return
-
-        self._pending_requests[key] = request
-
-        # Check if this is the latest request
-        latest = self._pending_requests.get(key)
-        if latest and latest.trace_id != request.trace_id:
-            logger.info(
-                f"Skipping grouping for trace {request.trace_id} "
-                f"(trace {latest.trace_id} is newer)",
-            )
-            return
-
-        # Process the grouping
+        renewal = asyncio.create_task(self._renew_claim(request))
         try:
             logger.info(
                 f"Processing grouping for trace {request.trace_id} "
@@ -132,6 +166,7 @@ class TaskGroupingWorker:
                     request.project_id,
                     request.path,
                     session,
+                    request=request,
                 )
 
             elapsed = time.time() - start_time
@@ -148,21 +183,48 @@ class TaskGroupingWorker:
                     f"(insufficient traces) in {elapsed:.2f}s",
                 )
 
-            # Clear from pending after successful processing
-            if self._pending_requests.get(key) == request:
-                del self._pending_requests[key]
-
+        except ClaimLostError:
+            logger.warning(
+                f"Abandoned grouping for trace {request.trace_id}, "
+                f"whose claim was taken over by another worker",
+            )
+            return
         except Exception as e:
             logger.error(
                 f"Failed to process grouping for trace {request.trace_id}: {e}",
                 exc_info=True,
             )
+            return
+        finally:
+            renewal.cancel()
+
+        # Release the path, which stays dirty if newer traces arrived
+        async with self.SessionLocal() as session:
+            await self.queue.complete_grouping(session, request)
+
+    async def _renew_claim(self, request: GroupingRequest) -> None:
+        """Renew the lease of a claim until cancelled or lost."""
+        lease_seconds = self.settings.grouping_lease_seconds
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            try:
+                async with self.SessionLocal() as session:
+                    if not await self.queue.renew_grouping(session, request, lease_seconds):
+                        logger.warning(
+                            f"Lost grouping claim of trace {request.trace_id}",
+                        )
+                        return
+            except Exception as e:
+                logger.warning(
+                    f"Failed to renew grouping claim of trace {request.trace_id}: {e}",
+                )
 
     async def _perform_grouping(
         self,
         project_id: int,
         path: str,
         session: AsyncSession,
+        request: GroupingRequest | None = None,
     ) -> dict[str, Any] | None:
         """Perform task grouping for a specific project and path.
 
@@ -172,79 +234,118 @@ class TaskGroupingWorker:
             project_id: Project ID
             path: Trace path
             session: Database session
+            request: Claimed request being processed, whose claim is checked
+                before committing
+
+        Raises:
+            ClaimLostError: If another worker took over the request's claim
 
         Returns:
             Dict with results (tasks_created, traces_grouped) or None if no grouping
 
         """
+        key = (project_id, path)
+        if not self.settings.incremental_grouping:
+            self._clusters.pop(key, None)
+        self._evict_clusters()
+        clusters = self._clusters.get(key)
+        if clusters is None:
+            clusters = self._clusters[key] = _PathClusters(
+                IncrementalTemplateFinder(self.settings.min_segment_words),
+            )
+        else:
+            self._clusters.move_to_end(key)
+            clusters.last_used = time.monotonic()
+
         # Find all unmatched traces for this project and path
-        traces_query = (
-            select(Trace)
+        ids_query = (
+            select(Trace.id)
             .where(Trace.project_id == project_id)
             .where(Trace.path == path)
             .where(Trace.implementation_id.is_(None))
-            .options(joinedload(Trace.input_items))
-            .options(joinedload(Trace.project))
         )
-        result = await session.execute(traces_query)
-        unmatched_traces = result.unique().scalars().all()
-
-        if len(unmatched_traces) < self.settings.min_cluster_size:
+        unmatched_ids = set((await session.execute(ids_query)).scalars())
+
+        # Forget traces matched or deleted since the last run, and fold in
+        # the prompts of only the traces that arrived since
+        for trace_id in clusters.trace_ids - unmatched_ids:
+            clusters.forget(trace_id)
+        new_ids = sorted(unmatched_ids - clusters.trace_ids)
+        for start in range(0, len(new_ids), _LOAD_BATCH_SIZE):
+            traces_query = (
+                select(Trace)
+                .where(Trace.id.in_(new_ids[start : start + _LOAD_BATCH_SIZE]))
+                .options(selectinload(Trace.input_items))
+            )
+            for trace in (await session.execute(traces_query)).scalars():
+                trace_input_items = [
+                    {"type": item.type.value, **item.data} for item in trace.input_items
+                ]
+                prompt = await self._extract_system_prompt_from_trace(trace_input_items)
+                clusters.add(trace.id, prompt)
+
+        if len(unmatched_ids) < self.settings.min_cluster_size:
             logger.debug(
-                f"Only {len(unmatched_traces)} unmatched traces with path '{path}', "
+                f"Only {len(unmatched_ids)} unmatched traces with path '{path}', "
                 f"need {self.settings.min_cluster_size} to create implementation",
             )
             return None
 
-        # Extract prompts from traces
-        prompts = []
-        trace_map = {}  # Map index to trace
-
-        for trace in unmatched_traces:
-            trace_input_items = [
-                {"type": item.type.value, **item.data} for item in trace.input_items
-            ]
-            prompt = await self._extract_system_prompt_from_trace(trace_input_items)
-            if prompt:
-                prompts.append(prompt)
-                trace_map[len(prompts) - 1] = trace
-
-        if len(prompts) < self.settings.min_cluster_size:
+        template_finder = clusters.finder
+        if len(template_finder) < self.settings.min_cluster_size:
             logger.debug(
-                f"Only {len(prompts)} traces with valid prompts, "
+                f"Only {len(template_finder)} traces with valid prompts, "
                 f"need {self.settings.min_cluster_size} to create implementation",
             )
             return None
 
         logger.info(
-            f"Found {len(prompts)} unmatched traces with prompts, "
-            f"attempting to create task/implementation groups",
+            f"Found {len(template_finder)} unmatched traces with prompts "
+            f"({len(new_ids)} new), attempting to create task/implementation groups",
         )
 
-        # Use TemplateFinder to group similar prompts
-        min_matching_traces = self.settings.min_matching_traces or (len(prompts) // 5)
-        template_finder = TemplateFinder()
-
-        # Group prompts into templates
-        groups = template_finder.group_strings(
-            prompts,
-            self.settings.min_segment_words,
-            min_matching_traces,
-        )
+        min_matching_traces = self._min_matching_traces(len(template_finder))
+        if self.settings.incremental_grouping:
+            # Group prompts into templates, re-templating only the prompts
+            # that the new and forgotten traces can affect
+            groups = template_finder.group(min_matching_traces)
+        else:
+            # Re-cluster all prompts, searching for templates only within
+            # buckets of near-duplicate prompts if an LSH threshold is set
+            trace_ids = sorted(clusters.prompts)
+            index_groups = TemplateFinder().group_strings(
+                [clusters.prompts[trace_id] for trace_id in trace_ids],
+                self.settings.min_segment_words,
+                min_matching_traces,
+                lsh_threshold=self.settings.grouping_lsh_threshold,
+            )
+            groups = {
+                template: [trace_ids[idx] for idx in indices]
+                for template, indices in index_groups.items()
+            }
 
         if not groups:
             logger.debug(f"Could not create any groups for path '{path}'")
             return None
 
+        grouped_ids = [trace_id for trace_ids in groups.values() for trace_id in trace_ids]
+        traces_query = (
+            select(Trace)
+            .where(Trace.id.in_(grouped_ids))
+            .options(joinedload(Trace.project))
+        )
+        trace_map = {
+            trace.id: trace for trace in (await session.execute(traces_query)).scalars()
+        }
+
         # Create task and implementation for each group
         task_service = TaskService(session)
         tasks_created = 0
         traces_grouped = 0
 
-        for template, prompt_indices in groups.items():
+        for template, trace_ids in groups.items():
             # Get sample trace for model and settings
-            sample_idx = prompt_indices[0]
-            sample_trace = trace_map[sample_idx]
+            sample_trace = trace_map[trace_ids[0]]
 
             # Create implementation data
             impl_data = ImplementationCreate(
@@ -268,7 +369,9 @@ class TaskGroupingWorker:
                 implementation=impl_data,
             )
 
-            # Create task with auto-generated name and description
+            # Create task with auto-generated name and description, which
+            # commits the session
+            await self._commit_claimed(session, request)
             task = await task_service.create_task(task_data)
 
             # Get the implementation ID from production_version_id
@@ -282,12 +385,12 @@ class TaskGroupingWorker:
 
             # Assign traces to this implementation and extract variables
             group_traces = 0
-            for idx in prompt_indices:
-                if idx in trace_map:
-                    trace = trace_map[idx]
+            for trace_id in trace_ids:
+                if trace_id in trace_map:
+                    trace = trace_map[trace_id]
                     _, variables = template_finder.match_template(
                         template,
-                        prompts[idx],
+                        clusters.prompts[trace_id],
                     )
                     trace.implementation_id = impl_id
                     trace.prompt_variables = variables
@@ -302,13 +405,84 @@ class TaskGroupingWorker:
             traces_grouped += group_traces
 
         # Commit all changes
-        await session.commit()
+        await self._commit_claimed(session, request)
+
+        # Grouped traces are matched now
+        for trace_id in grouped_ids:
+            clusters.forget(trace_id)
+        if not clusters.trace_ids:
+            del self._clusters[key]
 
         return {
             "tasks_created": tasks_created,
             "traces_grouped": traces_grouped,
         }
 
+    async def _commit_claimed(
+        self,
+        session: AsyncSession,
+        request: GroupingRequest | None,
+    ) -> None:
+        """Commit the session if the request still holds its claim.
+
+        The claim is renewed in the same transaction, so that another worker
+        can't take it over before the commit.
+
+        Raises:
+            ClaimLostError: If another worker took over the claim, after
+                rolling back the session
+
+        """
+        if request is None:
+            await session.commit()
+        elif not await self.queue.renew_grouping(
+            session,
+            request,
+            self.settings.grouping_lease_seconds,
+        ):
+            raise ClaimLostError(
+                f"Lost grouping claim of project {request.project_id}, path {request.path}",
+            )
+
+    def _evict_clusters(self) -> None:
+        """Drop the clustering state of idle and least recently grouped paths.
+
+        Paths not grouped for ``grouping_cache_idle_seconds`` are dropped, and
+        then the least recently grouped ones until at most
+        ``grouping_cache_max_traces`` traces are kept.
+        """
+        idle_since = time.monotonic() - self.settings.grouping_cache_idle_seconds
+        kept = sum(len(clusters) for clusters in self._clusters.values())
+        while self._clusters:
+            key, clusters = next(iter(self._clusters.items()))
+            if (
+                clusters.last_used >= idle_since
+                and kept <= self.settings.grouping_cache_max_traces
+            ):
+                break
+            kept -= len(clusters)
+            del self._clusters[key]
+            logger.debug(f"Dropped clustering state of {len(clusters)} traces of {key}")
+
+    def _min_matching_traces(self, num_traces: int) -> int:
+        """Get the minimum number of traces that a template must match.
+
+        Unless configured, a fifth of the traces. Templates depend on this
+        threshold, so the incremental finder re-templates every trace when it
+        changes; with ``stable_min_matching_traces`` it is rounded down to a
+        power of two, so that this only happens when the traces double.
+        """
+        if self.settings.min_matching_traces:
+            return self.settings.min_matching_traces
+        fifth = num_traces // 5
+        if (
+            fifth
+            and self.settings.incremental_grouping
+            and self.settings.stable_min_matching_traces
+        ):
+            return 1 << (fifth.bit_length() - 1)
+        return fifth
+
     async def _extract_system_prompt_from_trace(
         self,
         input_items: list[dict[str, Any]],
@@ -353,16 +527,16 @@ class TaskGroupingWorker:
         return None
 
 
-def run_worker(queue: mp.Queue, shutdown_event: mp.Event) -> None:
+def run_worker(shutdown_event: mp.Event, index: int | None = None) -> None:
     """Entry point for worker process.
 
     Args:
-        queue: Queue to receive grouping requests
         shutdown_event: Event to signal shutdown
+        index: Index of the worker in the pool
 
     """
     try:
-        worker = TaskGroupingWorker(queue, shutdown_event)
+        worker = TaskGroupingWorker(shutdown_event, index)
         asyncio.run(worker.run())
     except Exception as e:
         logger.error(f"Worker process crashed: {e}", exc_info=True)
@@ -0,0 +1,182 @@
+"""Storage benchmark for deduplicated payload blobs.
+
+Ingests OpenAI chat traces that share a few dozen multi-KB system prompts
+through the batch HTTP trace endpoint into a SQLite file, once with payload
+blobs disabled (every row stores the full bodies and prompt) and once with
+them enabled, and compares the bytes stored for request bodies and input
+items, the database file size and the ingest time.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_blob_storage
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from datetime import UTC, datetime
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import Text, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.services.blob_store as blob_store_module
+from app.config import Settings
+from app.database import get_session
+from app.main import app
+from app.models.base import Base
+from app.models.blobs import PayloadBlob
+from app.models.http_traces import HTTPTrace
+from app.models.projects import Project
+from app.models.traces import TraceInputItem
+from app.services.blob_store import BlobStore
+
+N_PROMPTS = 30
+N_TRACES = 3000
+BATCH_SIZE = 100
+
+
+def build_prompts(rng: random.Random) -> list[str]:
+    """Build distinct system prompts of 2-8 KB."""
+    words = "analyse the customer ticket and answer in JSON with a short summary".split()
+    prompts = []
+    for i in range(N_PROMPTS):
+        size = rng.randint(2048, 8192)
+        body = []
+        while sum(len(word) + 1 for word in body) < size:
+            body.append(rng.choice(words))
+        prompts.append(f"You are assistant #{i}.\n" + " ".join(body))
+    return prompts
+
+
+def build_payload(rng: random.Random, prompts: list[str], i: int) -> dict:
+    """Build an HTTP trace payload with a shared prompt and unique question."""
+    request = {
+        "model": "gpt-4o",
+        "messages": [
+            {"role": "system", "content": rng.choice(prompts)},
+            {"role": "user", "content": f"Ticket {i}: my order {rng.getrandbits(64):x} is late."},
+        ],
+    }
+    response = {
+        "id": f"chatcmpl-{i}",
+        "model": "gpt-4o",
+        "choices": [
+            {
+                "message": {"role": "assistant", "content": f"Summary of ticket {i}."},
+                "finish_reason": "stop",
+            },
+        ],
+        "usage": {"prompt_tokens": 1500, "completion_tokens": 12, "total_tokens": 1512},
+    }
+    now = datetime.now(UTC).isoformat()
+    return {
+        "started_at": now,
+        "completed_at": now,
+        "status_code": 200,
+        "request": json.dumps(request),
+        "request_headers": {"host": "api.openai.com"},
+        "response": json.dumps(response),
+        "response_headers": {"content-type": "application/json"},
+        "metadata": {"url": "https://api.openai.com/v1/chat/completions"},
+    }
+
+
+async def ingest(blob_min_size: int) -> dict[str, float]:
+    """Ingest the traces into a fresh database and measure what was stored."""
+    rng = random.Random(0)
+    prompts = build_prompts(rng)
+    payloads = [build_payload(rng, prompts, i) for i in range(N_TRACES)]
+    blob_store_module._blob_store = BlobStore(Settings(blob_min_size=blob_min_size))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_maker() as session:
+            session.add(Project(name="Default Project"))
+            await session.commit()
+
+        async def override_get_session():
+            async with session_maker() as session:
+                yield session
+
+        app.dependency_overrides[get_session] = override_get_session
+        transport = ASGITransport(app=app)
+        start = time.perf_counter()
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            for offset in range(0, N_TRACES, BATCH_SIZE):
+                response = await client.post(
+                    "/v1/http-traces/batch",
+                    json=payloads[offset : offset + BATCH_SIZE],
+                )
+                response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        app.dependency_overrides.clear()
+
+        async with session_maker() as session:
+            bodies = (
+                await session.execute(
+                    select(
+                        func.sum(
+                            func.length(HTTPTrace.request_inline)
+                            + func.length(HTTPTrace.response_inline),
+                        ),
+                    ),
+                )
+            ).scalar_one()
+            items = (
+                await session.execute(
+                    select(func.sum(func.length(func.cast(TraceInputItem.stored_data, Text)))),
+                )
+            ).scalar_one()
+            blobs = (
+                await session.execute(
+                    select(func.coalesce(func.sum(func.length(PayloadBlob.data)), 0)),
+                )
+            ).scalar_one()
+        await engine.dispose()
+        file_size = os.path.getsize(path)
+
+    return {
+        "rows": bodies + items + blobs,
+        "file": file_size,
+        "seconds": elapsed,
+    }
+
+
+async def run() -> None:
+    results = {
+        "inline": await ingest(blob_min_size=0),
+        "blobs": await ingest(blob_min_size=1024),
+    }
+    print(f"{N_TRACES} traces sharing {N_PROMPTS} system prompts of 2-8 KB")
+    print(f"{'':>8} {'payload bytes':>14} {'db file':>12} {'ingest':>10}")
+    for label, result in results.items():
+        print(
+            f"{label:>8} {result['rows'] / 1e6:>12.2f}MB {result['file'] / 1e6:>10.2f}MB "
+            f"{result['seconds']:>9.2f}s",
+        )
+    inline, blobs = results["inline"], results["blobs"]
+    print(
+        f"{'ratio':>8} {inline['rows'] / blobs['rows']:>13.1f}x "
+        f"{inline['file'] / blobs['file']:>11.1f}x",
+    )
+
+
+def main() -> None:
+    # Traces are ingested without the app lifespan, so the grouping queue
+    # complains about not being started
+    logging.disable(logging.CRITICAL)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
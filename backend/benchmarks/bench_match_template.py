@@ -0,0 +1,128 @@
+"""Microbenchmark for prompt template matching.
+
+Compares ``TemplateFinder.match_template`` (compiled, cached templates) with
+the previous parse-per-call backtracking matcher on large system prompts
+(10-50 KB) with many variables, for matching and non-matching prompts and
+for a template that repeats variables. The last case has adjacent
+variables, where the old matcher tried every split point of a failing
+prompt.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_match_template
+"""
+
+from __future__ import annotations
+
+import re
+import timeit
+
+from app.services.task_grouping import TemplateFinder
+
+PROMPT_SIZES_KB = (10, 25, 50)
+N_VARS = (20, 40)
+
+
+def legacy_match_template(template: str, s: str) -> tuple[bool, dict[str, str]]:
+    """The previous implementation, kept for comparison."""
+    pattern = re.compile(r"\{\{\s*([^}]+?)\s*\}\}")
+    var_names = [m.group(1) for m in pattern.finditer(template)]
+    fixed_parts = pattern.split(template)[::2]
+    n_vars = len(var_names)
+    n_fixed = len(fixed_parts)
+    if n_vars == 0:
+        return (s == template, {})
+    L = len(s)
+    suffix_fixed_len = [0] * (n_fixed + 1)
+    for i in range(n_fixed - 1, -1, -1):
+        suffix_fixed_len[i] = suffix_fixed_len[i + 1] + len(fixed_parts[i])
+
+    def occurrences(f: str, min_pos: int):
+        if f == "":
+            yield from range(min_pos, L + 1)
+        else:
+            pos = s.find(f, min_pos)
+            while pos != -1:
+                yield pos
+                pos = s.find(f, pos + 1)
+
+    def dfs(i: int, prev_end: int, assignments: dict[str, str]):
+        if suffix_fixed_len[i] > L - prev_end:
+            return False, {}
+        fixed = fixed_parts[i]
+        min_pos = prev_end if not (i == 0 and fixed != "") else 0
+        for p in occurrences(fixed, min_pos):
+            if i == 0 and fixed != "" and p != 0:
+                continue
+            end = p + len(fixed)
+            if i == n_vars and end != L:
+                continue
+            if p < prev_end:
+                continue
+            new_map = assignments.copy()
+            if i > 0:
+                var_name = var_names[i - 1]
+                var_value = s[prev_end:p]
+                if var_name in new_map:
+                    if new_map[var_name] != var_value:
+                        continue
+                else:
+                    new_map[var_name] = var_value
+            if i == n_vars:
+                return True, new_map
+            ok, result = dfs(i + 1, end, new_map)
+            if ok:
+                return True, result
+        return False, {}
+
+    return dfs(0, 0, {})
+
+
+def build_case(size_kb: int, n_vars: int, repeat: bool = False) -> tuple[str, str, str]:
+    """Build a template, a matching prompt and a prompt that fails at the end."""
+    section_size = size_kb * 1024 // n_vars
+    filler = ("Follow the instructions carefully and answer in JSON. " * 40)[:section_size]
+    template_parts = ["You are a meticulous assistant.\n"]
+    prompt_parts = ["You are a meticulous assistant.\n"]
+    for i in range(n_vars):
+        name = f"var_{i % (n_vars // 2)}" if repeat else f"var_{i}"
+        value = f"value of {name}"
+        template_parts.append(f"## Section {i}\n{filler}\n{{{{{name}}}}}\n")
+        prompt_parts.append(f"## Section {i}\n{filler}\n{value}\n")
+    template_parts.append("Respond now.")
+    prompt_parts.append("Respond now.")
+    prompt = "".join(prompt_parts)
+    return "".join(template_parts), prompt, prompt.replace("## Section 1\n", "## Section X\n")
+
+
+def main() -> None:
+    finder = TemplateFinder()
+    print(f"{'case':>24} {'legacy':>12} {'compiled':>12}")
+    cases = [(kb, n, False) for kb in PROMPT_SIZES_KB for n in N_VARS]
+    cases.append((50, 40, True))
+    for size_kb, n_vars, repeat in cases:
+        template, matching, failing = build_case(size_kb, n_vars, repeat)
+        assert finder.match_template(template, matching) == legacy_match_template(
+            template,
+            matching,
+        )
+        for label, prompt in (("match", matching), ("miss", failing)):
+            timings = []
+            for func, number in ((legacy_match_template, 5), (finder.match_template, 50)):
+                seconds = min(
+                    timeit.repeat(lambda: func(template, prompt), number=number, repeat=3),
+                )
+                timings.append(seconds / number * 1e3)
+            name = f"{size_kb}KB/{n_vars}v{'/rep' if repeat else ''}/{label}"
+            print(f"{name:>24} " + " ".join(f"{value:>10.3f}ms" for value in timings))
+
+    template = "Context: {{a}}{{b}}{{c}} Answer:"
+    prompt = "Context: " + "x" * 1024 + " Answer?"
+    timings = []
+    for func, number in ((legacy_match_template, 1), (finder.match_template, 1000)):
+        seconds = min(timeit.repeat(lambda: func(template, prompt), number=number, repeat=3))
+        timings.append(seconds / number * 1e3)
+    print(f"{'1KB/adjacent/miss':>24} " + " ".join(f"{value:>10.3f}ms" for value in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Benchmark for parsing streamed (SSE) responses.
+
+Compares the OpenAI streaming parser built on the shared incremental SSE
+reader with the previous implementation, which decoded the captured body,
+split it into a list of lines and grew the output with string
+concatenation (the captured body is decoded first, as the parser service
+used to do). Streams are Chat Completions chunks of a few tokens each,
+sized from 1 to 16 MB; the time and the peak memory allocated while
+parsing are reported. The JSON backend in use (orjson or the standard
+library) is printed first.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_sse_parse
+"""
+
+from __future__ import annotations
+
+import json
+import timeit
+import tracemalloc
+
+from app.services.parsers import OpenAIParser, sse
+
+STREAM_SIZES_MB = (1, 4, 16)
+
+
+def legacy_parse_completions_streaming(streaming_response: bytes):
+    """The previous implementation, kept for comparison."""
+    streaming_response = streaming_response.decode("utf-8", errors="replace")
+    lines = streaming_response.strip().split("\n")
+    full_content = ""
+    role = "assistant"
+    finish_reason = None
+    system_fingerprint = None
+    response_id = ""
+    tool_calls_buffer = {}  # index -> {id, type, function: {name, arguments}}
+    usage = None
+    temperature = None
+
+    for line in lines:
+        line = line.strip()
+        if not line.startswith("data: "):
+            continue
+
+        data_str = line[6:]
+        if data_str == "[DONE]":
+            break
+
+        try:
+            import json
+
+            chunk = json.loads(data_str)
+            response_id = chunk.get("id", response_id)
+            system_fingerprint = (
+                chunk.get("system_fingerprint") or system_fingerprint
+            )
+
+            # Check for temperature in chunk (unlikely but possible in some custom proxies or future API)
+            if chunk.get("temperature"):
+                temperature = chunk.get("temperature")
+
+            choices = chunk.get("choices", [])
+            if choices:
+                delta = choices[0].get("delta", {})
+
+                # Handle content
+                content = delta.get("content")
+                if content:
+                    full_content += content
+
+                if delta.get("role"):
+                    role = delta.get("role")
+
+                # Handle tool calls
+                if delta.get("tool_calls"):
+                    for tc in delta.get("tool_calls"):
+                        idx = tc.get("index")
+                        if idx not in tool_calls_buffer:
+                            tool_calls_buffer[idx] = {
+                                "id": "",
+                                "function": {"name": "", "arguments": ""},
+                            }
+
+                        if tc.get("id"):
+                            tool_calls_buffer[idx]["id"] = tc.get("id")
+
+                        func = tc.get("function", {})
+                        if func.get("name"):
+                            tool_calls_buffer[idx]["function"]["name"] += func.get(
+                                "name",
+                            )
+                        if func.get("arguments"):
+                            tool_calls_buffer[idx]["function"]["arguments"] += (
+                                func.get("arguments")
+                            )
+
+                if choices[0].get("finish_reason"):
+                    finish_reason = choices[0].get("finish_reason")
+            if chunk.get("usage"):
+                usage = chunk.get("usage")
+        except Exception:
+            pass
+
+    output_items = []
+    if full_content:
+        output_items.append(
+            {
+                "type": "message",
+                "id": response_id,
+                "role": role,
+                "content": [{"type": "text", "text": full_content}],
+                "status": "completed",
+            },
+        )
+
+    for idx in sorted(tool_calls_buffer.keys()):
+        tc = tool_calls_buffer[idx]
+        output_items.append(
+            {
+                "type": "function_call",
+                "id": tc["id"],
+                "call_id": tc["id"],
+                "name": tc["function"]["name"],
+                "arguments": tc["function"]["arguments"],
+                "status": "completed",
+            },
+        )
+
+    return output_items, usage, finish_reason, system_fingerprint, temperature
+
+
+def build_stream(size_mb: int) -> tuple[bytes, str]:
+    """Build a Chat Completions event stream of roughly ``size_mb`` megabytes."""
+    events = []
+    pieces = []
+    size = 0
+    i = 0
+    while size < size_mb * 1024 * 1024:
+        piece = f" token{i}"
+        chunk = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": 1761564674,
+            "model": "gpt-4o-mini",
+            "system_fingerprint": "fp_bench",
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"content": piece},
+                    "logprobs": None,
+                    "finish_reason": None,
+                },
+            ],
+        }
+        event = f"data: {json.dumps(chunk)}\n\n"
+        events.append(event)
+        pieces.append(piece)
+        size += len(event)
+        i += 1
+    events.append("data: [DONE]\n\n")
+    return "".join(events).encode(), "".join(pieces)
+
+
+def main() -> None:
+    parser = OpenAIParser()
+    backend = "orjson" if sse.orjson is not None else "json"
+    print(f"JSON backend: {backend}")
+    print(
+        f"{'stream':>8} {'chunks':>8} {'legacy':>12} {'reader':>12}"
+        f" {'legacy peak':>12} {'reader peak':>12}",
+    )
+    for size_mb in STREAM_SIZES_MB:
+        body, expected = build_stream(size_mb)
+        output = parser._parse_completions_streaming(body)[0]
+        assert output[0]["content"][0]["text"] == expected
+        assert legacy_parse_completions_streaming(body)[0] == output
+
+        timings = []
+        peaks = []
+        for func in (
+            legacy_parse_completions_streaming,
+            parser._parse_completions_streaming,
+        ):
+            seconds = min(timeit.repeat(lambda: func(body), number=1, repeat=7))
+            timings.append(seconds * 1e3)
+            tracemalloc.start()
+            func(body)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 2**20)
+            tracemalloc.stop()
+        chunks = body.count(b"\n\n") - 1
+        print(
+            f"{size_mb:>6}MB {chunks:>8} "
+            + " ".join(f"{value:>10.1f}ms" for value in timings)
+            + " "
+            + " ".join(f"{value:>10.1f}MB" for value in peaks),
+        )
+
+if __name__ == "__main__":
+    main()
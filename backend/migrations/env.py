@@ -1,4 +1,5 @@
 import asyncio
+import re
 from logging.config import fileConfig
 
 from alembic import context
@@ -26,6 +27,23 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = base.Base.metadata
 
+# Tables partitioned by day on PostgreSQL (revision 3d8b5f1a6c27), where the
+# foreign keys to them include the partition key or are left out. The models
+# keep the id-only keys, so autogenerate must not try to restore them, nor
+# drop the partitions that the trace retention manager maintains.
+PARTITIONED_TABLES = {"http_trace", "trace", "trace_input_item", "trace_output_item"}
+PARTITION_NAME = re.compile(rf"({'|'.join(PARTITIONED_TABLES)})_(p\d{{8}}|default)")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "foreign_key_constraint":
+        referred = object.referred_table.name
+        return referred not in PARTITIONED_TABLES and not PARTITION_NAME.fullmatch(referred)
+    if type_ == "table":
+        return not PARTITION_NAME.fullmatch(name)
+    table = getattr(object, "table", None)
+    return table is None or not PARTITION_NAME.fullmatch(table.name)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -48,6 +66,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -57,7 +76,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection):
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
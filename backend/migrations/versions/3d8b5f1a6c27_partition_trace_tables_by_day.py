@@ -0,0 +1,159 @@
+"""Partition trace tables by day
+
+Rebuilds http_trace, trace, trace_input_item and trace_output_item as tables
+range-partitioned by day on started_at (items get a copy of their trace's
+started_at as trace_started_at), with daily partitions for the existing rows
+and the next week plus a default partition. The rows are copied, so the
+tables are locked for the duration of the migration.
+
+Primary keys include the partition key, and foreign keys to the partitioned
+tables need it too: items reference (trace.id, trace.started_at), while
+grade.trace_id and trace.http_trace_id lose their foreign keys. The trace
+retention manager unlinks and deletes those rows when it removes partitions.
+
+Revision ID: 3d8b5f1a6c27
+Revises: 7f3a2c9d1b64
+Create Date: 2025-12-05 14:02:51.264193
+
+"""
+from datetime import UTC, datetime, time, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d8b5f1a6c27'
+down_revision: Union[str, Sequence[str], None] = '7f3a2c9d1b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITION_KEYS = {
+    'http_trace': 'started_at',
+    'trace': 'started_at',
+    'trace_input_item': 'trace_started_at',
+    'trace_output_item': 'trace_started_at',
+}
+PREMAKE_DAYS = 7
+
+
+def _drop_foreign_keys_to(*tables: str) -> None:
+    """Drop every foreign key that references one of the tables.
+
+    The copies of a partitioned table's foreign keys on its partitions go
+    with it, and cannot be dropped on their own.
+    """
+    referenced = ', '.join(f"'{table}'::regclass" for table in tables)
+    op.execute(f"""
+        DO $$
+        DECLARE r record;
+        BEGIN
+            FOR r IN
+                SELECT conrelid::regclass AS tbl, conname FROM pg_constraint
+                WHERE contype = 'f' AND conparentid = 0 AND confrelid IN ({referenced})
+            LOOP
+                EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', r.tbl, r.conname);
+            END LOOP;
+        END $$
+    """)
+
+
+def _day_start(day) -> str:
+    return datetime.combine(day, time(), UTC).isoformat()
+
+
+def _partition(table: str, key: str) -> None:
+    """Replace a table with a copy partitioned by day on a column."""
+    first = op.get_bind().execute(sa.text(f'SELECT min({key}) FROM {table}')).scalar()
+    today = datetime.now(UTC).date()
+    day = min(first.astimezone(UTC).date(), today) if first else today
+    day -= timedelta(days=1)
+
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+    op.execute(f'CREATE TABLE {table}_partitioned (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE ({key})')
+    while day <= today + timedelta(days=PREMAKE_DAYS):
+        op.execute(
+            f"CREATE TABLE {table}_p{day:%Y%m%d} PARTITION OF {table}_partitioned "
+            f"FOR VALUES FROM ('{_day_start(day)}') TO ('{_day_start(day + timedelta(days=1))}')"
+        )
+        day += timedelta(days=1)
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table}_partitioned DEFAULT')
+    op.execute(f'INSERT INTO {table}_partitioned SELECT * FROM {table}')
+    op.execute(f'DROP TABLE {table}')
+    op.execute(f'ALTER TABLE {table}_partitioned RENAME TO {table}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    op.create_primary_key(op.f(f'pk_{table}'), table, ['id', key])
+
+
+def _unpartition(table: str) -> None:
+    """Replace a partitioned table with a plain copy."""
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+    op.execute(f'CREATE TABLE {table}_unpartitioned (LIKE {table} INCLUDING DEFAULTS)')
+    op.execute(f'INSERT INTO {table}_unpartitioned SELECT * FROM {table}')
+    op.execute(f'DROP TABLE {table}')
+    op.execute(f'ALTER TABLE {table}_unpartitioned RENAME TO {table}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    op.create_primary_key(op.f(f'pk_{table}'), table, ['id'])
+
+
+def _create_indexes(item_key: list[str]) -> None:
+    op.create_index('ix_http_trace_started_at', 'http_trace', ['started_at'], unique=False)
+    op.create_index('ix_http_trace_status_code', 'http_trace', ['status_code'], unique=False)
+    op.create_index('ix_http_trace_ingest_status', 'http_trace', ['ingest_status'], unique=False)
+    op.create_index('ix_http_trace_request_blob_hash', 'http_trace', ['request_blob_hash'], unique=False)
+    op.create_index('ix_http_trace_response_blob_hash', 'http_trace', ['response_blob_hash'], unique=False)
+    op.create_index('ix_trace_started_at', 'trace', ['started_at'], unique=False)
+    op.create_index('ix_trace_model', 'trace', ['model'], unique=False)
+    op.create_index('ix_trace_project_id', 'trace', ['project_id'], unique=False)
+    op.create_index('ix_trace_implementation_id', 'trace', ['implementation_id'], unique=False)
+    op.create_index('ix_trace_finish_reason', 'trace', ['finish_reason'], unique=False)
+    op.create_index('ix_trace_input_item_trace_id_position', 'trace_input_item', [*item_key, 'position'], unique=True)
+    op.create_index('ix_trace_input_item_type', 'trace_input_item', ['type'], unique=False)
+    op.create_index('ix_trace_input_item_content_blob_hash', 'trace_input_item', ['content_blob_hash'], unique=False)
+    op.create_index('ix_trace_output_item_trace_id_position', 'trace_output_item', [*item_key, 'position'], unique=True)
+    op.create_index('ix_trace_output_item_type', 'trace_output_item', ['type'], unique=False)
+
+
+def _create_foreign_keys(trace_key: list[str]) -> None:
+    item_key = ['trace_id', 'trace_started_at'] if len(trace_key) > 1 else ['trace_id']
+    op.create_foreign_key(op.f('fk_http_trace_request_blob_hash_payload_blob'), 'http_trace', 'payload_blob', ['request_blob_hash'], ['hash'])
+    op.create_foreign_key(op.f('fk_http_trace_response_blob_hash_payload_blob'), 'http_trace', 'payload_blob', ['response_blob_hash'], ['hash'])
+    op.create_foreign_key(op.f('fk_trace_project_id_project'), 'trace', 'project', ['project_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key(op.f('fk_trace_implementation_id_implementation'), 'trace', 'implementation', ['implementation_id'], ['id'], ondelete='SET NULL')
+    op.create_foreign_key(op.f('fk_trace_input_item_trace_id_trace'), 'trace_input_item', 'trace', item_key, trace_key, ondelete='CASCADE')
+    op.create_foreign_key(op.f('fk_trace_input_item_content_blob_hash_payload_blob'), 'trace_input_item', 'payload_blob', ['content_blob_hash'], ['hash'])
+    op.create_foreign_key(op.f('fk_trace_output_item_trace_id_trace'), 'trace_output_item', 'trace', item_key, trace_key, ondelete='CASCADE')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('trace_input_item', 'trace_output_item'):
+        op.add_column(table, sa.Column('trace_started_at', sa.DateTime(timezone=True), nullable=True))
+        op.execute(
+            f'UPDATE {table} SET trace_started_at = trace.started_at '
+            f'FROM trace WHERE trace.id = {table}.trace_id'
+        )
+        op.alter_column(table, 'trace_started_at', existing_type=sa.DateTime(timezone=True), nullable=False)
+
+    _drop_foreign_keys_to('trace', 'http_trace')
+    for table, key in PARTITION_KEYS.items():
+        _partition(table, key)
+
+    _create_indexes(['trace_id', 'trace_started_at'])
+    op.create_index('ix_trace_http_trace_id', 'trace', ['http_trace_id'], unique=False)
+    _create_foreign_keys(['id', 'started_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _drop_foreign_keys_to('trace', 'http_trace')
+    for table in PARTITION_KEYS:
+        _unpartition(table)
+    for table in ('trace_input_item', 'trace_output_item'):
+        op.drop_column(table, 'trace_started_at')
+
+    _create_indexes(['trace_id'])
+    _create_foreign_keys(['id'])
+    op.create_foreign_key(op.f('fk_trace_http_trace_id_http_trace'), 'trace', 'http_trace', ['http_trace_id'], ['id'], ondelete='SET NULL')
+    op.create_foreign_key(op.f('fk_grade_trace_id_trace'), 'grade', 'trace', ['trace_id'], ['id'], ondelete='CASCADE')
@@ -0,0 +1,49 @@
+"""Add task grouping work table
+
+Replaces the in-memory task grouping queue with one row per project and
+path that unmatched traces mark dirty and grouping workers claim.
+
+Revision ID: 4c7d2e1f9a36
+Revises: 9b2e4d7c1a58
+Create Date: 2025-12-09 14:12:48.391027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7d2e1f9a36'
+down_revision: Union[str, Sequence[str], None] = '9b2e4d7c1a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'task_grouping_work',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(length=255), nullable=False),
+        sa.Column('dirty', sa.Boolean(), nullable=False),
+        sa.Column('dirty_since', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('latest_trace_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('claimed_version', sa.Integer(), nullable=True),
+        sa.Column('claimed_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['project.id'], name=op.f('fk_task_grouping_work_project_id_project'), ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_task_grouping_work')),
+        sa.UniqueConstraint('project_id', 'path', name=op.f('uq_task_grouping_work_project_id')),
+    )
+    op.create_index('ix_task_grouping_work_dirty', 'task_grouping_work', ['dirty', 'dirty_since'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_grouping_work_dirty', table_name='task_grouping_work')
+    op.drop_table('task_grouping_work')
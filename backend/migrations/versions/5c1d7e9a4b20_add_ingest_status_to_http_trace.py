@@ -0,0 +1,38 @@
+"""Add ingest status and call path to http_trace
+
+Revision ID: 5c1d7e9a4b20
+Revises: 2e10e12d3f5b
+Create Date: 2025-12-02 10:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1d7e9a4b20'
+down_revision: Union[str, Sequence[str], None] = '2e10e12d3f5b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ingest_status = sa.Enum('PENDING', 'PROCESSED', 'FAILED', name='ingest_status')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    ingest_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('http_trace', sa.Column('path', sa.Text(), nullable=True))
+    op.add_column('http_trace', sa.Column('ingest_status', ingest_status, server_default='PROCESSED', nullable=False))
+    op.add_column('http_trace', sa.Column('ingest_error', sa.Text(), nullable=True))
+    op.create_index('ix_http_trace_ingest_status', 'http_trace', ['ingest_status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_http_trace_ingest_status', table_name='http_trace')
+    op.drop_column('http_trace', 'ingest_error')
+    op.drop_column('http_trace', 'ingest_status')
+    op.drop_column('http_trace', 'path')
+    ingest_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,106 @@
+"""Add content-addressed payload blobs
+
+Revision ID: 7f3a2c9d1b64
+Revises: 5c1d7e9a4b20
+Create Date: 2025-12-04 09:27:13.804112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import zstandard
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3a2c9d1b64'
+down_revision: Union[str, Sequence[str], None] = '5c1d7e9a4b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'payload_blob',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('hash', name=op.f('pk_payload_blob')),
+    )
+    op.create_index('ix_payload_blob_last_seen_at', 'payload_blob', ['last_seen_at'], unique=False)
+
+    op.add_column('http_trace', sa.Column('request_blob_hash', sa.String(length=64), nullable=True))
+    op.add_column('http_trace', sa.Column('request_blob_offset', sa.Integer(), nullable=True))
+    op.add_column('http_trace', sa.Column('response_blob_hash', sa.String(length=64), nullable=True))
+    op.add_column('http_trace', sa.Column('response_blob_offset', sa.Integer(), nullable=True))
+    op.create_foreign_key(op.f('fk_http_trace_request_blob_hash_payload_blob'), 'http_trace', 'payload_blob', ['request_blob_hash'], ['hash'])
+    op.create_foreign_key(op.f('fk_http_trace_response_blob_hash_payload_blob'), 'http_trace', 'payload_blob', ['response_blob_hash'], ['hash'])
+    op.create_index('ix_http_trace_request_blob_hash', 'http_trace', ['request_blob_hash'], unique=False)
+    op.create_index('ix_http_trace_response_blob_hash', 'http_trace', ['response_blob_hash'], unique=False)
+
+    op.add_column('trace_input_item', sa.Column('content_blob_hash', sa.String(length=64), nullable=True))
+    op.create_foreign_key(op.f('fk_trace_input_item_content_blob_hash_payload_blob'), 'trace_input_item', 'payload_blob', ['content_blob_hash'], ['hash'])
+    op.create_index('ix_trace_input_item_content_blob_hash', 'trace_input_item', ['content_blob_hash'], unique=False)
+
+
+def _inline_item_contents() -> None:
+    """Write blob payloads back into the content of input items."""
+    bind = op.get_bind()
+    items = sa.table('trace_input_item', sa.column('id'), sa.column('data', sa.JSON()), sa.column('content_blob_hash'))
+    blobs = sa.table('payload_blob', sa.column('hash'), sa.column('data', sa.LargeBinary()))
+    rows = bind.execute(
+        sa.select(items.c.id, items.c.data, blobs.c.data)
+        .join(blobs, blobs.c.hash == items.c.content_blob_hash)
+    ).all()
+    decompressor = zstandard.ZstdDecompressor()
+    for row_id, stored, data in rows:
+        content = decompressor.decompress(data).decode('utf-8')
+        bind.execute(items.update().where(items.c.id == row_id).values(data={**stored, 'content': content}))
+
+
+def _inline_http_trace_bodies(column: str) -> None:
+    """Splice blob payloads back into an HTTP trace body column."""
+    bind = op.get_bind()
+    traces = sa.table(
+        'http_trace',
+        sa.column('id'),
+        sa.column(column, sa.Text()),
+        sa.column(f'{column}_blob_hash'),
+        sa.column(f'{column}_blob_offset'),
+    )
+    blobs = sa.table('payload_blob', sa.column('hash'), sa.column('data', sa.LargeBinary()))
+    rows = bind.execute(
+        sa.select(traces.c.id, traces.c[column], traces.c[f'{column}_blob_offset'], blobs.c.data)
+        .join(blobs, blobs.c.hash == traces.c[f'{column}_blob_hash'])
+    ).all()
+    decompressor = zstandard.ZstdDecompressor()
+    for row_id, inline, offset, data in rows:
+        payload = decompressor.decompress(data).decode('utf-8')
+        body = inline[:offset] + payload + inline[offset:]
+        bind.execute(traces.update().where(traces.c.id == row_id).values({column: body}))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _inline_item_contents()
+    _inline_http_trace_bodies('request')
+    _inline_http_trace_bodies('response')
+
+    op.drop_index('ix_trace_input_item_content_blob_hash', table_name='trace_input_item')
+    op.drop_constraint(op.f('fk_trace_input_item_content_blob_hash_payload_blob'), 'trace_input_item', type_='foreignkey')
+    op.drop_column('trace_input_item', 'content_blob_hash')
+
+    op.drop_index('ix_http_trace_response_blob_hash', table_name='http_trace')
+    op.drop_index('ix_http_trace_request_blob_hash', table_name='http_trace')
+    op.drop_constraint(op.f('fk_http_trace_response_blob_hash_payload_blob'), 'http_trace', type_='foreignkey')
+    op.drop_constraint(op.f('fk_http_trace_request_blob_hash_payload_blob'), 'http_trace', type_='foreignkey')
+    op.drop_column('http_trace', 'response_blob_offset')
+    op.drop_column('http_trace', 'response_blob_hash')
+    op.drop_column('http_trace', 'request_blob_offset')
+    op.drop_column('http_trace', 'request_blob_hash')
+
+    op.drop_index('ix_payload_blob_last_seen_at', table_name='payload_blob')
+    op.drop_table('payload_blob')
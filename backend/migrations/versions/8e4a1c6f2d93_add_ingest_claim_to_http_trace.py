@@ -0,0 +1,37 @@
+"""Add ingest claim to http_trace
+
+Consumers of the HTTP trace ingest pool claim pending HTTP traces by marking
+them PROCESSING, and release claims that expired.
+
+Revision ID: 8e4a1c6f2d93
+Revises: 4c7d2e1f9a36
+Create Date: 2025-12-10 09:41:27.206315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4a1c6f2d93'
+down_revision: Union[str, Sequence[str], None] = '4c7d2e1f9a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        # New enum values can't be added inside a transaction on older servers
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE ingest_status ADD VALUE IF NOT EXISTS 'PROCESSING' AFTER 'PENDING'")
+    op.add_column('http_trace', sa.Column('ingest_claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # PostgreSQL can't drop enum values, so PROCESSING is left in the type
+    op.execute("UPDATE http_trace SET ingest_status = 'PENDING' WHERE ingest_status = 'PROCESSING'")
+    op.drop_column('http_trace', 'ingest_claimed_at')
@@ -0,0 +1,47 @@
+"""Store trace AI score aggregate
+
+Adds the average float score of a trace's grades and the number of grades
+averaged to the trace, backfilled from the existing grades and indexed for
+sorting traces by score.
+
+Revision ID: 9b2e4d7c1a58
+Revises: 3d8b5f1a6c27
+Create Date: 2025-12-08 10:41:37.512806
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2e4d7c1a58'
+down_revision: Union[str, Sequence[str], None] = '3d8b5f1a6c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('trace', sa.Column('ai_score', sa.Float(), nullable=True))
+    op.add_column('trace', sa.Column('grade_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE trace
+        SET ai_score = scores.ai_score, grade_count = scores.grade_count
+        FROM (
+            SELECT trace_id, avg(score_float) AS ai_score, count(*) AS grade_count
+            FROM grade
+            WHERE trace_id IS NOT NULL AND score_float IS NOT NULL
+            GROUP BY trace_id
+        ) AS scores
+        WHERE trace.id = scores.trace_id
+    """)
+    op.create_index('ix_trace_ai_score', 'trace', ['ai_score', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_trace_ai_score', table_name='trace')
+    op.drop_column('trace', 'grade_count')
+    op.drop_column('trace', 'ai_score')
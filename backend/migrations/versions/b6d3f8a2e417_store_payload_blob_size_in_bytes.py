@@ -0,0 +1,55 @@
+"""Store payload blob size in bytes
+
+The size of payload blobs was their number of characters, while their stats
+compare it with compressed sizes in bytes.
+
+Revision ID: b6d3f8a2e417
+Revises: 8e4a1c6f2d93
+Create Date: 2025-12-10 11:06:52.734180
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import zstandard
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d3f8a2e417'
+down_revision: Union[str, Sequence[str], None] = '8e4a1c6f2d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+blobs = sa.table('payload_blob', sa.column('hash'), sa.column('data', sa.LargeBinary()), sa.column('size'))
+
+
+def _update_sizes(size_of) -> None:
+    """Set the size of every blob whose size changes."""
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(blobs.c.hash, blobs.c.data, blobs.c.size)).all()
+    for digest, data, size in rows:
+        new_size = size_of(data)
+        if new_size != size:
+            bind.execute(blobs.update().where(blobs.c.hash == digest).values(size=new_size))
+
+
+def _payload_bytes(data: bytes) -> int:
+    size = zstandard.frame_content_size(data)
+    if size < 0:
+        size = len(zstandard.ZstdDecompressor().decompress(data))
+    return size
+
+
+def _payload_chars(data: bytes) -> int:
+    return len(zstandard.ZstdDecompressor().decompress(data).decode('utf-8'))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _update_sizes(_payload_bytes)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _update_sizes(_payload_chars)
@@ -0,0 +1,38 @@
+"""Add task grouping claim token
+
+Workers renew and release their claims on task grouping work by a token
+unique to each claim instead of by the version they claimed, so that a
+worker whose lease was taken over can't renew or release the new claim.
+
+Revision ID: d41f7b3e9c58
+Revises: b6d3f8a2e417
+Create Date: 2025-12-11 10:23:41.562093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f7b3e9c58'
+down_revision: Union[str, Sequence[str], None] = 'b6d3f8a2e417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task_grouping_work', sa.Column('claim_token', sa.String(length=36), nullable=True))
+    # Outstanding claims have no token to renew them with, so let them be
+    # claimed again
+    work = sa.table('task_grouping_work', sa.column('claimed_until', sa.DateTime(timezone=True)))
+    op.execute(work.update().values(claimed_until=None))
+    op.drop_column('task_grouping_work', 'claimed_version')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('task_grouping_work', sa.Column('claimed_version', sa.Integer(), nullable=True))
+    op.drop_column('task_grouping_work', 'claim_token')
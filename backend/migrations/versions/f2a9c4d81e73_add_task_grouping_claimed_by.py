@@ -0,0 +1,31 @@
+"""Add task grouping claimed by
+
+Records which pool worker holds each task grouping claim, so that the task
+grouping health check can report the paths each worker is grouping.
+
+Revision ID: f2a9c4d81e73
+Revises: d41f7b3e9c58
+Create Date: 2025-12-11 15:42:07.118364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c4d81e73'
+down_revision: Union[str, Sequence[str], None] = 'd41f7b3e9c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task_grouping_work', sa.Column('claimed_by', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('task_grouping_work', 'claimed_by')
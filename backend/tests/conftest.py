@@ -1,5 +1,6 @@
 """Pytest configuration and fixtures."""
 
+import os
 from collections.abc import AsyncGenerator
 
 import pytest
@@ -18,11 +19,33 @@ from app.models.evaluation import Grade, Grader  # noqa: F401
 from app.models.executions import ExecutionResult  # noqa: F401
 from app.models.optimizations import Optimization  # noqa: F401
 from app.models.projects import Project  # noqa: F401
+from app.models.task_grouping import GroupingWork  # noqa: F401
 from app.models.tasks import Implementation, Task  # noqa: F401
 from app.models.traces import Trace, TraceInputItem  # noqa: F401
+from app.services.blob_store import get_blob_store
+from app.services.implementation_matcher import get_implementation_matcher_index
+from app.services.provider_service import get_model_canonicalization_cache
 from app.services.task_grouping_queue import get_task_grouping_queue
 
 
+def pytest_configure(config):
+    """Register the markers of the test suite."""
+    config.addinivalue_line(
+        "markers",
+        "postgres: needs an empty PostgreSQL database at TEST_POSTGRES_URL",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the PostgreSQL tests unless a database is configured."""
+    if os.environ.get("TEST_POSTGRES_URL"):
+        return
+    skip = pytest.mark.skip(reason="TEST_POSTGRES_URL is not set")
+    for item in items:
+        if "postgres" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest_asyncio.fixture(scope="function")
 async def test_engine():
     """Create a test database engine for each test."""
@@ -77,6 +100,14 @@ async def client(test_session: AsyncSession) -> AsyncGenerator[AsyncClient, None
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(autouse=True)
+def clear_process_wide_caches():
+    """Start each test with empty in-memory caches (each test has its own DB)."""
+    get_model_canonicalization_cache().invalidate()
+    get_implementation_matcher_index().invalidate()
+    get_blob_store().invalidate()
+
+
 @pytest.fixture(scope="session", autouse=True)
 def cleanup_background_workers():
     """Ensure background workers are stopped after all tests complete."""
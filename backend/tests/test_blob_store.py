@@ -0,0 +1,193 @@
+"""Tests for content-addressed payload blobs."""
+
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.blobs import PayloadBlob
+from app.models.http_traces import HTTPTrace
+from app.models.projects import Project
+from app.models.traces import TraceInputItem
+from app.services.blob_store import get_blob_store, payload_hash
+
+SYSTEM_PROMPT = "You are a meticulous assistant. " * 100
+
+
+def _openai_payload(question: str) -> dict:
+    request = {
+        "model": "gpt-4",
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": question},
+        ],
+    }
+    response = {
+        "id": "chatcmpl-1",
+        "choices": [
+            {
+                "message": {"role": "assistant", "content": "Answer"},
+                "finish_reason": "stop",
+            },
+        ],
+    }
+    now = datetime.now(UTC).isoformat()
+    return {
+        "started_at": now,
+        "completed_at": now,
+        "status_code": 200,
+        "request": json.dumps(request),
+        "request_headers": {"host": "api.openai.com"},
+        "response": json.dumps(response),
+        "response_headers": {"content-type": "application/json"},
+        "metadata": {"url": "https://api.openai.com/v1/chat/completions"},
+    }
+
+
+async def _blob_count(session: AsyncSession) -> int:
+    return (await session.execute(select(func.count(PayloadBlob.hash)))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_repeated_system_prompts_share_blobs(
+    client: AsyncClient,
+    test_session: AsyncSession,
+):
+    """Large bodies and input contents are stored once and resolved on read."""
+    test_session.add(Project(name="Default Project"))
+    await test_session.commit()
+
+    payloads = [_openai_payload(f"Question {i}?") for i in range(3)]
+    response = await client.post("/v1/http-traces/batch", json=payloads)
+    assert response.status_code == 201
+    trace_ids = response.json()["trace_ids"]
+    response = await client.post("/v1/http-traces", json=_openai_payload("Question 3?"))
+    assert response.status_code == 201
+    trace_ids.append(response.json()["id"])
+    assert response.json()["input"][0]["data"]["content"] == SYSTEM_PROMPT
+
+    # The prompt needs no JSON escaping, so the request bodies and the input
+    # items share a single blob
+    assert await _blob_count(test_session) == 1
+    items = (
+        (
+            await test_session.execute(
+                select(TraceInputItem).where(TraceInputItem.position == 0),
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert len(items) == 4
+    assert {item.content_blob_hash for item in items} == {payload_hash(SYSTEM_PROMPT)}
+    assert all(item.stored_data["content"] is None for item in items)
+    assert all(item.data["content"] == SYSTEM_PROMPT for item in items)
+
+    http_trace = (await test_session.execute(select(HTTPTrace).limit(1))).scalar_one()
+    assert SYSTEM_PROMPT not in http_trace.request_inline
+    assert http_trace.request_blob.text == SYSTEM_PROMPT
+    assert http_trace.request == payloads[0]["request"]
+    assert http_trace.response_blob_hash is None
+    assert http_trace.response == payloads[0]["response"]
+
+    response = await client.get("/v1/traces")
+    assert sorted(trace["id"] for trace in response.json()) == sorted(trace_ids)
+    for trace in response.json():
+        assert trace["input"][0]["data"]["content"] == SYSTEM_PROMPT
+    for trace_id in trace_ids:
+        response = await client.get(f"/v1/traces/{trace_id}/http-trace")
+        assert json.loads(response.json()["request"])["messages"][0]["content"] == (
+            SYSTEM_PROMPT
+        )
+
+
+@pytest.mark.asyncio
+async def test_recent_blobs_are_not_rewritten(test_session: AsyncSession):
+    """Committed hashes skip the database; rolled back ones are written again."""
+    store = get_blob_store()
+    digest = payload_hash(SYSTEM_PROMPT)
+
+    await store.put_many(test_session, [SYSTEM_PROMPT])
+    await test_session.rollback()
+    assert await _blob_count(test_session) == 0
+
+    await store.put_many(test_session, [SYSTEM_PROMPT, SYSTEM_PROMPT])
+    await test_session.commit()
+    assert await _blob_count(test_session) == 1
+
+    await test_session.execute(update(PayloadBlob).values(size=-1))
+    await test_session.commit()
+    assert await store.put_many(test_session, [SYSTEM_PROMPT]) == [digest]
+    await test_session.commit()
+    blob = await test_session.get(PayloadBlob, digest)
+    assert blob.size == -1
+    assert blob.text == SYSTEM_PROMPT
+
+
+@pytest.mark.asyncio
+async def test_stats_count_payload_bytes(test_session: AsyncSession):
+    """Blob sizes are in bytes, like the compressed sizes they're compared with."""
+    store = get_blob_store()
+    text = "Réponds en français, s'il te plaît. " * 50
+
+    [digest] = await store.put_many(test_session, [text])
+    await test_session.commit()
+
+    blob = await test_session.get(PayloadBlob, digest)
+    assert blob.size == len(text.encode("utf-8")) > len(text)
+    stats = await store.stats(test_session)
+    assert stats["blobs"] == 1
+    assert stats["payload_bytes"] == blob.size
+    assert stats["stored_bytes"] == len(blob.data)
+
+
+@pytest.mark.asyncio
+async def test_collect_garbage(test_session: AsyncSession):
+    """Only unreferenced blobs past the grace period are deleted."""
+    store = get_blob_store()
+    referenced, orphan, fresh = await store.put_many(
+        test_session,
+        ["referenced " * 200, "orphan " * 200, "fresh " * 200],
+    )
+    test_session.add(
+        HTTPTrace(
+            started_at=datetime.now(UTC),
+            completed_at=datetime.now(UTC),
+            status_code=200,
+            request="",
+            request_blob_hash=referenced,
+            request_blob_offset=0,
+            request_headers={},
+            response="{}",
+            response_headers={},
+        ),
+    )
+    await test_session.commit()
+    await test_session.execute(
+        update(PayloadBlob)
+        .where(PayloadBlob.hash != fresh)
+        .values(last_seen_at=datetime.now(UTC) - store.grace_period - timedelta(hours=1)),
+    )
+    await test_session.commit()
+
+    assert await store.collect_garbage(test_session) == 1
+    remaining = (await test_session.execute(select(PayloadBlob.hash))).scalars().all()
+    assert set(remaining) == {referenced, fresh}
+    assert orphan not in remaining
+
+
+def test_split_body_round_trips():
+    """Bodies are split around their longest string literal, or kept whole."""
+    store = get_blob_store()
+    escaped = json.dumps({"a": "short", "b": 'say "hi"\n' * 200, "c": "x"})
+    inline, offset, payload = store._split_body(escaped)
+    assert payload == ('say \\"hi\\"\\n' * 200)
+    assert inline == '{"a": "short", "b": "", "c": "x"}'
+    assert inline[:offset] + payload + inline[offset:] == escaped
+
+    stream = "data: {}\n\n" * 200
+    assert store._split_body(stream) == ("", 0, stream)
+    assert store._split_body("{}") is None
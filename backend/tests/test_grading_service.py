@@ -335,6 +335,8 @@ async def test_execute_grading_trace_success(grading_service, test_session):
     assert grade.total_tokens == 80
     assert grade.system_fingerprint == "fp-test"
     assert grade.error is None
+    assert trace.ai_score == 0.8
+    assert trace.grade_count == 1
 
 
 @pytest.mark.asyncio
@@ -746,3 +748,71 @@ async def test_delete_grade(grading_service, test_session):
     # Verify grade is deleted
     with pytest.raises(NotFoundError):
         await grading_service.get_grade(test_session, grade.id)
+    assert trace.ai_score is None
+    assert trace.grade_count == 0
+
+
+@pytest.mark.asyncio
+async def test_trace_ai_score_follows_grades(grading_service, test_session):
+    """Test that a trace's score aggregate is updated as grades change."""
+    project = Project(name="Test Project")
+    test_session.add(project)
+    await test_session.flush()
+
+    grader = await grading_service.create_grader(
+        session=test_session,
+        project_id=project.id,
+        name="accuracy",
+        prompt="Test prompt",
+        score_type=ScoreType.FLOAT,
+        model="gpt-4",
+        max_output_tokens=500)
+
+    trace = Trace(
+        project_id=project.id,
+        model="gpt-4", started_at=datetime.now(UTC),
+        completed_at=datetime.now(UTC))
+    test_session.add(trace)
+    await test_session.flush()
+
+    grades = [
+        Grade(
+            grader_id=grader.id,
+            trace_id=trace.id,
+            score_float=score,
+            grading_started_at=datetime.now(UTC))
+        for score in (0.2, 0.6, None, 1.0)
+    ]
+    test_session.add_all(grades)
+    await test_session.commit()
+    assert trace.ai_score == pytest.approx(0.6)
+    assert trace.grade_count == 3
+
+    await grading_service.delete_grade(test_session, grades[3].id)
+    await grading_service.delete_grade(test_session, grades[2].id)
+    await test_session.refresh(trace)
+    assert trace.ai_score == pytest.approx(0.4)
+    assert trace.grade_count == 2
+
+    # Recomputed rather than adjusted, so no rounding errors accumulate
+    await grading_service.delete_grade(test_session, grades[0].id)
+    await test_session.refresh(trace)
+    assert trace.ai_score == 0.6
+    assert trace.grade_count == 1
+
+    # Changed scores and grades moved to another trace are followed
+    other = Trace(
+        project_id=project.id,
+        model="gpt-4", started_at=datetime.now(UTC),
+        completed_at=datetime.now(UTC))
+    test_session.add(other)
+    await test_session.flush()
+    grades[1].score_float = 0.4
+    await test_session.commit()
+    assert trace.ai_score == 0.4
+    grades[1].trace_id = other.id
+    await test_session.commit()
+    await test_session.refresh(trace)
+    await test_session.refresh(other)
+    assert (trace.ai_score, trace.grade_count) == (None, 0)
+    assert (other.ai_score, other.grade_count) == (0.4, 1)
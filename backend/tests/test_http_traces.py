@@ -1,13 +1,26 @@
 """Test HTTP trace ingestion."""
 
+import asyncio
+import gzip
 import json
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
 
+import msgpack
 import pytest
+import zstandard
 from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession
-
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from app.config import Settings, get_settings
+from app.enums import IngestStatus
+from app.main import app
+from app.models.http_traces import HTTPTrace
 from app.models.projects import Project
+from app.models.traces import Trace
+from app.services.http_trace_ingest import HTTPTraceIngestPool
 
 
 @pytest.mark.asyncio
@@ -828,6 +841,209 @@ async def test_create_openai_streaming_responses_api_trace(
     assert data["input"][0]["data"]["role"] == "user"
 
 
+@pytest.mark.asyncio
+async def test_create_anthropic_streaming_trace(
+    client: AsyncClient,
+    test_session: AsyncSession,
+):
+    """Test creating a trace from a streamed Anthropic Messages API response."""
+    project = Project(name="Default Project")
+    test_session.add(project)
+    await test_session.commit()
+
+    request_data = {
+        "model": "claude-3-5-sonnet-20241022",
+        "max_tokens": 1024,
+        "messages": [{"role": "user", "content": "Weather in Paris?"}],
+        "stream": True,
+    }
+    events = [
+        (
+            "message_start",
+            {
+                "type": "message_start",
+                "message": {
+                    "id": "msg_stream",
+                    "type": "message",
+                    "role": "assistant",
+                    "content": [],
+                    "model": "claude-3-5-sonnet-20241022",
+                    "usage": {"input_tokens": 25, "output_tokens": 1},
+                },
+            },
+        ),
+        (
+            "content_block_start",
+            {
+                "type": "content_block_start",
+                "index": 0,
+                "content_block": {"type": "text", "text": ""},
+            },
+        ),
+        ("ping", {"type": "ping"}),
+        (
+            "content_block_delta",
+            {
+                "type": "content_block_delta",
+                "index": 0,
+                "delta": {"type": "text_delta", "text": "Let me "},
+            },
+        ),
+        (
+            "content_block_delta",
+            {
+                "type": "content_block_delta",
+                "index": 0,
+                "delta": {"type": "text_delta", "text": "check."},
+            },
+        ),
+        ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        (
+            "content_block_start",
+            {
+                "type": "content_block_start",
+                "index": 1,
+                "content_block": {
+                    "type": "tool_use",
+                    "id": "toolu_1",
+                    "name": "get_weather",
+                    "input": {},
+                },
+            },
+        ),
+        (
+            "content_block_delta",
+            {
+                "type": "content_block_delta",
+                "index": 1,
+                "delta": {"type": "input_json_delta", "partial_json": '{"city": "Pa'},
+            },
+        ),
+        (
+            "content_block_delta",
+            {
+                "type": "content_block_delta",
+                "index": 1,
+                "delta": {"type": "input_json_delta", "partial_json": 'ris"}'},
+            },
+        ),
+        ("content_block_stop", {"type": "content_block_stop", "index": 1}),
+        (
+            "message_delta",
+            {
+                "type": "message_delta",
+                "delta": {"stop_reason": "tool_use"},
+                "usage": {"output_tokens": 30},
+            },
+        ),
+        ("message_stop", {"type": "message_stop"}),
+    ]
+    streaming_response = "".join(
+        f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events
+    )
+
+    started_at = datetime.now(UTC)
+    payload = {
+        "started_at": started_at.isoformat(),
+        "completed_at": started_at.isoformat(),
+        "status_code": 200,
+        "error": None,
+        "request": json.dumps(request_data).encode("utf-8").hex(),
+        "request_headers": {"host": "api.anthropic.com"},
+        "response": streaming_response.encode("utf-8").hex(),
+        "response_headers": {"content-type": "text/event-stream"},
+        "metadata": {
+            "url": "https://api.anthropic.com/v1/messages",
+            "method": "POST",
+        },
+    }
+
+    response = await client.post("/v1/http-traces", json=payload)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["model"] == "claude-3-5-sonnet-20241022"
+    assert [item["type"] for item in data["output"]] == ["message", "function_call"]
+    assert data["output"][0]["data"]["content"][0]["text"] == "Let me check."
+    assert data["output"][1]["data"]["name"] == "get_weather"
+    assert json.loads(data["output"][1]["data"]["arguments"]) == {"city": "Paris"}
+    assert data["finish_reason"] == "tool_calls"
+    assert data["prompt_tokens"] == 25
+    assert data["completion_tokens"] == 30
+    assert data["total_tokens"] == 55
+
+
+@pytest.mark.asyncio
+async def test_create_google_genai_streaming_trace(
+    client: AsyncClient,
+    test_session: AsyncSession,
+):
+    """Test creating a trace from a streamed Google GenAI response."""
+    project = Project(name="Default Project")
+    test_session.add(project)
+    await test_session.commit()
+
+    request_data = {
+        "contents": [{"role": "user", "parts": [{"text": "Say hello"}]}],
+    }
+    chunks = [
+        {
+            "candidates": [
+                {"content": {"role": "model", "parts": [{"text": "Hello"}]}},
+            ],
+            "usageMetadata": {"promptTokenCount": 3, "totalTokenCount": 3},
+        },
+        {
+            "candidates": [
+                {"content": {"role": "model", "parts": [{"text": ", world!"}]}},
+            ],
+        },
+        {
+            "candidates": [
+                {
+                    "content": {"role": "model", "parts": [{"text": ""}]},
+                    "finishReason": "STOP",
+                },
+            ],
+            "usageMetadata": {
+                "promptTokenCount": 3,
+                "candidatesTokenCount": 4,
+                "totalTokenCount": 7,
+            },
+        },
+    ]
+    streaming_response = "".join(f"data: {json.dumps(c)}\r\n\r\n" for c in chunks)
+
+    started_at = datetime.now(UTC)
+    payload = {
+        "started_at": started_at.isoformat(),
+        "completed_at": started_at.isoformat(),
+        "status_code": 200,
+        "error": None,
+        "request": json.dumps(request_data).encode("utf-8").hex(),
+        "request_headers": {"host": "generativelanguage.googleapis.com"},
+        "response": streaming_response.encode("utf-8").hex(),
+        "response_headers": {"content-type": "text/event-stream"},
+        "metadata": {
+            "url": "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:streamGenerateContent?alt=sse",
+            "method": "POST",
+            "model": "gemini-pro",
+        },
+    }
+
+    response = await client.post("/v1/http-traces", json=payload)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["model"] == "gemini-pro"
+    assert len(data["output"]) == 1
+    assert data["output"][0]["data"]["content"][0]["text"] == "Hello, world!"
+    assert data["finish_reason"] == "stop"
+    assert data["prompt_tokens"] == 3
+    assert data["completion_tokens"] == 4
+    assert data["total_tokens"] == 7
+
+
 @pytest.mark.asyncio
 async def test_openai_error_response_400(
     client: AsyncClient,
@@ -1247,3 +1463,383 @@ async def test_google_genai_error_response_429(
     assert data["error"] is not None
     assert "exhausted" in data["error"]
     assert data["model"] == "gemini-pro"
+
+
+def _openai_payload(content: str, model: str = "gpt-4") -> dict:
+    """Build a minimal OpenAI chat completions HTTP trace payload."""
+    request_data = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": content},
+        ],
+    }
+    response_data = {
+        "id": "chatcmpl-123",
+        "object": "chat.completion",
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": f"Echo: {content}"},
+                "finish_reason": "stop",
+            },
+        ],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8},
+    }
+    now = datetime.now(UTC).isoformat()
+    return {
+        "started_at": now,
+        "completed_at": now,
+        "status_code": 200,
+        "error": None,
+        "request": json.dumps(request_data),
+        "request_headers": {"content-type": "application/json"},
+        "response": json.dumps(response_data),
+        "response_headers": {"content-type": "application/json"},
+        "metadata": {"url": "https://api.openai.com/v1/chat/completions"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_http_traces_batch(
+    client: AsyncClient,
+    test_session: AsyncSession,
+):
+    """Test batch ingestion creates all traces and their items."""
+    payload = [_openai_payload(f"Question {i}") for i in range(3)]
+
+    response = await client.post("/v1/http-traces/batch", json=payload)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["received"] == 3
+    assert data["created"] == 3
+    assert data["errors"] == []
+    assert len(data["trace_ids"]) == 3
+
+    http_traces = (await test_session.execute(select(HTTPTrace))).scalars().all()
+    assert len(http_traces) == 3
+    traces = (await test_session.execute(select(Trace))).scalars().all()
+    assert {t.http_trace_id for t in traces} == {t.id for t in http_traces}
+
+    result = await test_session.execute(
+        select(Trace)
+        .options(selectinload(Trace.input_items), selectinload(Trace.output_items))
+        .where(Trace.id.in_(data["trace_ids"]))
+        .order_by(Trace.id),
+    )
+    for i, trace in enumerate(result.scalars().all()):
+        assert trace.model == "gpt-4"
+        assert len(trace.input_items) == 2
+        assert trace.input_items[1].data["content"] == f"Question {i}"
+        assert len(trace.output_items) == 1
+        assert trace.output_items[0].data["content"][0]["text"] == f"Echo: Question {i}"
+
+
+@pytest.mark.asyncio
+async def test_create_http_traces_batch_reports_parse_errors(
+    client: AsyncClient,
+    test_session: AsyncSession,
+):
+    """Test unparseable items are stored as raw HTTP traces and reported."""
+    bad = _openai_payload("ignored")
+    bad["metadata"] = {"url": "https://unsupported-provider.com/v1/api"}
+    payload = [_openai_payload("first"), bad, _openai_payload("last")]
+
+    response = await client.post("/v1/http-traces/batch", json=payload)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["received"] == 3
+    assert data["created"] == 2
+    assert len(data["errors"]) == 1
+    assert data["errors"][0]["index"] == 1
+    assert "No parser found" in data["errors"][0]["detail"]
+
+    http_traces = (await test_session.execute(select(HTTPTrace))).scalars().all()
+    assert len(http_traces) == 3
+    traces = (await test_session.execute(select(Trace))).scalars().all()
+    assert len(traces) == 2
+
+
+@pytest.mark.asyncio
+async def test_create_http_traces_batch_empty(client: AsyncClient):
+    """Test an empty batch is accepted and creates nothing."""
+    response = await client.post("/v1/http-traces/batch", json=[])
+
+    assert response.status_code == 201
+    assert response.json() == {
+        "received": 0,
+        "created": 0,
+        "trace_ids": [],
+        "errors": [],
+    }
+
+
+def _msgpack_item(content: str) -> dict:
+    """Build an OpenAI HTTP trace item with raw byte bodies for MessagePack."""
+    item = _openai_payload(content)
+    item["request"] = item["request"].encode("utf-8")
+    item["response"] = item["response"].encode("utf-8")
+    return item
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content_encoding", [None, "gzip", "zstd"])
+async def test_create_http_traces_batch_msgpack(
+    client: AsyncClient,
+    test_session: AsyncSession,
+    content_encoding: str | None,
+):
+    """Test batch ingestion of MessagePack bodies with optional compression."""
+    body = msgpack.packb(
+        [_msgpack_item("first"), _msgpack_item("second")],
+        use_bin_type=True,
+    )
+    headers = {"Content-Type": "application/msgpack"}
+    if content_encoding == "gzip":
+        body = gzip.compress(body)
+        headers["Content-Encoding"] = "gzip"
+    elif content_encoding == "zstd":
+        body = zstandard.ZstdCompressor().compress(body)
+        headers["Content-Encoding"] = "zstd"
+
+    response = await client.post(
+        "/v1/http-traces/batch",
+        content=body,
+        headers=headers,
+    )
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 2
+    assert data["errors"] == []
+
+    http_traces = (
+        (await test_session.execute(select(HTTPTrace).order_by(HTTPTrace.id)))
+        .scalars()
+        .all()
+    )
+    assert json.loads(http_traces[0].request)["messages"][1]["content"] == "first"
+    assert json.loads(http_traces[1].request)["messages"][1]["content"] == "second"
+
+
+@pytest.mark.asyncio
+async def test_create_http_traces_batch_msgpack_skips_hex_decoding(
+    client: AsyncClient,
+    test_session: AsyncSession,
+):
+    """Test string bodies in MessagePack are stored verbatim, not hex-decoded."""
+    item = _openai_payload("hex")
+    item["response"] = "cafe"
+    body = msgpack.packb([item], use_bin_type=True)
+
+    response = await client.post(
+        "/v1/http-traces/batch",
+        content=body,
+        headers={"Content-Type": "application/msgpack"},
+    )
+
+    assert response.status_code == 201
+    http_trace = (await test_session.execute(select(HTTPTrace))).scalar_one()
+    assert http_trace.response == "cafe"
+
+
+@pytest.mark.asyncio
+async def test_create_http_traces_batch_gzip_json(client: AsyncClient):
+    """Test gzip-compressed JSON batches are accepted."""
+    body = gzip.compress(json.dumps([_openai_payload("compressed")]).encode())
+
+    response = await client.post(
+        "/v1/http-traces/batch",
+        content=body,
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 201
+    assert response.json()["created"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content_encoding", ["gzip", "zstd"])
+async def test_create_http_traces_batch_rejects_oversized_body(
+    client: AsyncClient,
+    content_encoding: str,
+):
+    """Test bodies expanding beyond the maximum size are rejected with 413."""
+    app.dependency_overrides[get_settings] = lambda: Settings(ingest_max_body_size=1 << 20)
+    body = json.dumps([_openai_payload("x" * (2 << 20))]).encode()
+    if content_encoding == "gzip":
+        body = gzip.compress(body)
+    else:
+        body = zstandard.ZstdCompressor().compress(body)
+    assert len(body) < 64 * 1024
+
+    response = await client.post(
+        "/v1/http-traces/batch",
+        content=body,
+        headers={"Content-Type": "application/json", "Content-Encoding": content_encoding},
+    )
+
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_create_http_traces_batch_invalid_gzip(client: AsyncClient):
+    """Test truncated gzip bodies are rejected with 400."""
+    body = gzip.compress(json.dumps([_openai_payload("truncated")]).encode())
+
+    response = await client.post(
+        "/v1/http-traces/batch",
+        content=body[:-12],
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_create_http_traces_batch_unsupported_encoding(client: AsyncClient):
+    """Test unknown content encodings are rejected with 415."""
+    response = await client.post(
+        "/v1/http-traces/batch",
+        content=b"[]",
+        headers={"Content-Type": "application/json", "Content-Encoding": "br"},
+    )
+
+    assert response.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_create_http_traces_batch_invalid_items(client: AsyncClient):
+    """Test items missing required fields are rejected with 422."""
+    response = await client.post("/v1/http-traces/batch", json=[{"status_code": 200}])
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_ingest_http_traces_accepts_and_stores_pending(
+    client: AsyncClient,
+    test_session: AsyncSession,
+):
+    """Test the ingest endpoint stores raw HTTP traces and returns 202."""
+    payload = [_openai_payload(f"Question {i}") for i in range(2)]
+    payload[0]["path"] = "app.py::main"
+
+    response = await client.post("/v1/http-traces/ingest", json=payload)
+
+    assert response.status_code == 202
+    data = response.json()
+    assert data["received"] == 2
+    assert len(data["http_trace_ids"]) == 2
+
+    http_traces = (await test_session.execute(select(HTTPTrace))).scalars().all()
+    assert {t.id for t in http_traces} == set(data["http_trace_ids"])
+    assert all(t.ingest_status == IngestStatus.PENDING for t in http_traces)
+    assert http_traces[0].path == "app.py::main"
+    assert (await test_session.execute(select(Trace))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_ingest_pool_processes_pending_http_traces(
+    client: AsyncClient,
+    test_engine,
+    test_session: AsyncSession,
+):
+    """Test the ingest pool creates traces and records parse failures."""
+    bad = _openai_payload("ignored")
+    bad["metadata"] = {"url": "https://unsupported-provider.com/v1/api"}
+    payload = [_openai_payload("first"), bad, _openai_payload("last")]
+    response = await client.post("/v1/http-traces/ingest", json=payload)
+    http_trace_ids = response.json()["http_trace_ids"]
+
+    pool = HTTPTraceIngestPool(
+        async_sessionmaker(test_engine, expire_on_commit=False),
+        Settings(ingest_consumers=1, ingest_batch_size=2, ingest_linger_ms=1),
+    )
+    await pool.start()
+    assert pool.qsize() == 3
+    await pool.stop(timeout=5.0)
+    assert not pool.is_running
+
+    test_session.expire_all()
+    http_traces = (
+        (await test_session.execute(select(HTTPTrace).order_by(HTTPTrace.id)))
+        .scalars()
+        .all()
+    )
+    assert [t.ingest_status for t in http_traces] == [
+        IngestStatus.PROCESSED,
+        IngestStatus.FAILED,
+        IngestStatus.PROCESSED,
+    ]
+    assert "No parser found" in http_traces[1].ingest_error
+
+    traces = (await test_session.execute(select(Trace))).scalars().all()
+    assert {t.http_trace_id for t in traces} == {http_trace_ids[0], http_trace_ids[2]}
+    assert all(t.model == "gpt-4" for t in traces)
+
+    # Already processed HTTP traces are not processed twice
+    assert await pool.process_batch(http_trace_ids) == []
+
+
+@pytest.mark.asyncio
+async def test_ingest_pool_claims_http_traces_once(
+    client: AsyncClient,
+    test_engine,
+    test_session: AsyncSession,
+):
+    """Test HTTP traces queued by several pools are processed by one of them."""
+    response = await client.post("/v1/http-traces/ingest", json=[_openai_payload("once")])
+    http_trace_ids = response.json()["http_trace_ids"]
+
+    session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    pools = [HTTPTraceIngestPool(session_maker, Settings()) for _ in range(2)]
+    results = await asyncio.gather(*(pool.process_batch(http_trace_ids) for pool in pools))
+    assert sorted(len(trace_ids) for trace_ids in results) == [0, 1]
+
+    traces = (await test_session.execute(select(Trace))).scalars().all()
+    assert [t.http_trace_id for t in traces] == http_trace_ids
+
+
+@pytest.mark.asyncio
+async def test_ingest_pool_sweep_releases_expired_claims(
+    client: AsyncClient,
+    test_engine,
+    test_session: AsyncSession,
+):
+    """Test HTTP traces of a failed batch are processed once their claim expires."""
+    response = await client.post("/v1/http-traces/ingest", json=[_openai_payload("retry")])
+    http_trace_ids = response.json()["http_trace_ids"]
+
+    pool = HTTPTraceIngestPool(
+        async_sessionmaker(test_engine, expire_on_commit=False),
+        Settings(ingest_claim_timeout_seconds=60, ingest_sweep_interval_seconds=0),
+    )
+    with patch.object(pool, "_create_traces", side_effect=RuntimeError("database gone")):
+        with pytest.raises(RuntimeError):
+            await pool.process_batch(http_trace_ids)
+
+    # Still claimed, so neither processed nor queued again
+    http_trace = await test_session.get(HTTPTrace, http_trace_ids[0])
+    assert http_trace.ingest_status == IngestStatus.PROCESSING
+    assert await pool.process_batch(http_trace_ids) == []
+    await pool.start()
+    assert pool.qsize() == 0
+
+    # The claim expires
+    await test_session.execute(
+        update(HTTPTrace).values(
+            ingest_claimed_at=datetime.now(UTC) - timedelta(minutes=2),
+        ),
+    )
+    await test_session.commit()
+    assert await pool.sweep() == 1
+    await pool.stop(timeout=5.0)
+
+    test_session.expire_all()
+    http_trace = await test_session.get(HTTPTrace, http_trace_ids[0])
+    assert http_trace.ingest_status == IngestStatus.PROCESSED
+    assert (await test_session.execute(select(Trace))).scalar_one().http_trace_id == http_trace.id
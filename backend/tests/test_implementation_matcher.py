@@ -0,0 +1,131 @@
+"""Tests for the implementation matcher index."""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.projects import Project
+from app.models.tasks import Implementation, Task
+from app.services.implementation_matcher import (
+    ImplementationMatcher,
+    ImplementationMatcherIndex,
+    get_implementation_matcher_index,
+)
+from app.services.task_grouping import TemplateFinder
+
+
+class TestImplementationMatcher:
+    """Test matching prompts against indexed templates."""
+
+    def test_matches_like_linear_scan(self):
+        """The index returns the same implementation as trying every template in ID order."""
+        templates = [
+            (1, "You are a helpful assistant."),
+            (2, "Translate {{text}} to {{language}}."),
+            (3, "Translate {{text}} to French."),
+            (4, "{{persona}} Answer briefly."),
+            (5, "Summarize: {{document}}"),
+            (6, "{{anything}}"),
+        ]
+        prompts = [
+            "You are a helpful assistant.",
+            "Translate hello to French.",
+            "Translate hello to German.",
+            "You are a pirate. Answer briefly.",
+            "Summarize: a long article",
+            "Something else entirely",
+            "",
+        ]
+        matcher = ImplementationMatcher(reversed(templates))
+        finder = TemplateFinder()
+
+        for prompt in prompts:
+            expected = None
+            for implementation_id, template in templates:
+                matched, variables = finder.match_template(template, prompt)
+                if matched:
+                    expected = {
+                        "implementation_id": implementation_id,
+                        "variables": variables,
+                    }
+                    break
+            assert matcher.match(prompt) == expected, prompt
+
+    def test_no_match(self):
+        """Prompts that share no prefix with any template do not match."""
+        matcher = ImplementationMatcher([(1, "Hello {{name}}!"), (2, "Bye")])
+
+        assert matcher.match("Goodbye") is None
+        assert matcher.match("Hello Bob") is None
+
+
+@pytest.mark.asyncio
+async def test_matcher_index_scoped_and_invalidated(test_session: AsyncSession):
+    """Matchers are per project and model and see implementation changes."""
+    project = Project(name="Matcher Project")
+    other_project = Project(name="Other Project")
+    test_session.add_all([project, other_project])
+    await test_session.flush()
+    task = Task(name="Task", description="Task", project_id=project.id)
+    test_session.add(task)
+    await test_session.flush()
+    impl = Implementation(
+        task_id=task.id,
+        prompt="Hello {{name}}!",
+        model="gpt-4",
+        max_output_tokens=100,
+    )
+    test_session.add(impl)
+    await test_session.commit()
+
+    index = get_implementation_matcher_index()
+    matcher = await index.get(test_session, project.id, "gpt-4")
+    assert matcher.match("Hello Bob!")["implementation_id"] == impl.id
+    assert await index.get(test_session, project.id, "gpt-4") is matcher
+    assert (await index.get(test_session, project.id, "gpt-5")).match("Hello Bob!") is None
+    assert (await index.get(test_session, other_project.id, "gpt-4")).match("Hello Bob!") is None
+
+    impl.prompt = "Hi {{name}}!"
+    await test_session.commit()
+    matcher = await index.get(test_session, project.id, "gpt-4")
+    assert matcher.match("Hello Bob!") is None
+    assert matcher.match("Hi Bob!") == {
+        "implementation_id": impl.id,
+        "variables": {"name": "Bob"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_matcher_index_rechecks_other_processes_changes(test_session: AsyncSession):
+    """Implementations written by other processes are seen once the matcher is rechecked."""
+    project = Project(name="Matcher Project")
+    test_session.add(project)
+    await test_session.flush()
+    task = Task(name="Task", description="Task", project_id=project.id)
+    test_session.add(task)
+    await test_session.commit()
+    project_id, task_id = project.id, task.id
+
+    index = ImplementationMatcherIndex(recheck_seconds=60)
+    matcher = await index.get(test_session, project_id, "gpt-4")
+    assert matcher.match("Hello Bob!") is None
+
+    # A Core insert bypasses the ORM events, like a write by another process
+    await test_session.execute(
+        insert(Implementation).values(
+            task_id=task_id,
+            prompt="Hello {{name}}!",
+            model="gpt-4",
+            max_output_tokens=100,
+        ),
+    )
+    await test_session.commit()
+    with patch.object(test_session, "execute", wraps=test_session.execute) as execute:
+        assert await index.get(test_session, project_id, "gpt-4") is matcher
+    execute.assert_not_called()
+
+    index.recheck_seconds = 0
+    matcher = await index.get(test_session, project_id, "gpt-4")
+    assert matcher.match("Hello Bob!")["variables"] == {"name": "Bob"}
@@ -0,0 +1,117 @@
+"""Tests for the provider parser registry."""
+
+import json
+from datetime import UTC, datetime
+from urllib.parse import urlparse
+
+import pytest
+
+from app.services.http_trace_parser import HTTPTraceParserService
+from app.services.parsers import (
+    AnthropicParser,
+    GoogleGenAIParser,
+    OpenAIParser,
+    ParserRegistry,
+    get_parser_registry,
+)
+
+
+class _GatewayParser(OpenAIParser):
+    """OpenAI-compatible parser for a custom gateway."""
+
+    def can_parse(self, url: str) -> bool:
+        return urlparse(url).netloc.endswith(".gateway.internal")
+
+
+class TestParserRegistry:
+    """Test resolving parsers from request URLs."""
+
+    @pytest.mark.parametrize(
+        ("url", "parser_type"),
+        [
+            ("https://api.openai.com/v1/chat/completions", OpenAIParser),
+            ("https://API.OpenAI.com/v1/responses", OpenAIParser),
+            ("https://api.anthropic.com/v1/messages", AnthropicParser),
+            (
+                "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent",
+                GoogleGenAIParser,
+            ),
+        ],
+    )
+    def test_default_hosts(self, url, parser_type):
+        """The built-in providers are found by host and parent domain."""
+        assert isinstance(get_parser_registry().resolve(url), parser_type)
+
+    def test_unknown_host(self):
+        """Unknown hosts and empty URLs have no parser."""
+        registry = get_parser_registry()
+
+        assert registry.resolve("https://api.unknown-provider.com/v1/chat") is None
+        assert registry.resolve("") is None
+
+    def test_custom_hosts_and_base_urls(self):
+        """Custom parsers are registered by host or base URL."""
+        registry = ParserRegistry()
+        openai = OpenAIParser()
+        anthropic = AnthropicParser()
+        registry.register(openai, hosts=["openai.com", "llm.example.com"])
+        registry.register(anthropic, base_urls=["https://llm.example.com/anthropic/"])
+
+        assert registry.resolve("https://llm.example.com/v1/chat/completions") is openai
+        assert registry.resolve("https://llm.example.com/anthropic/v1/messages") is anthropic
+        assert registry.resolve("https://llm.example.com/anthropic-v2/x") is openai
+        assert registry.parsers == [openai, anthropic]
+
+    def test_can_parse_fallback(self):
+        """Hosts without a registered domain fall back to ``can_parse``."""
+        registry = ParserRegistry()
+        gateway = _GatewayParser()
+        registry.register(gateway)
+
+        assert registry.resolve("https://eu.gateway.internal/v1/chat") is gateway
+        assert registry.resolve("https://eu.gateway.internal/v1/chat") is gateway
+        assert registry.resolve("https://other.internal/v1/chat") is None
+
+        # Registering clears results cached for unknown hosts
+        other = OpenAIParser()
+        registry.register(other, hosts=["other.internal"])
+        assert registry.resolve("https://other.internal/v1/chat") is other
+
+
+def test_parse_http_trace_url_from_host_and_path():
+    """Without a URL in the metadata, the Host header and request path are used."""
+    service = HTTPTraceParserService()
+    now = datetime.now(UTC)
+    request = {"model": "gpt-4", "messages": [{"role": "user", "content": "Hi"}]}
+    response = {
+        "id": "chatcmpl-1",
+        "choices": [
+            {"message": {"role": "assistant", "content": "Hello"}, "finish_reason": "stop"},
+        ],
+    }
+
+    trace = service.parse_http_trace(
+        request=json.dumps(request).encode(),
+        request_headers={"host": "api.openai.com"},
+        response=json.dumps(response).encode(),
+        response_headers={"content-type": "application/json"},
+        started_at=now,
+        completed_at=now,
+        status_code=200,
+        metadata={},
+        request_path="/v1/chat/completions",
+    )
+
+    assert trace.model == "gpt-4"
+    assert trace.output[0].content[0].text == "Hello"
+
+    with pytest.raises(ValueError, match="No parser found"):
+        service.parse_http_trace(
+            request=json.dumps(request),
+            request_headers={},
+            response=json.dumps(response),
+            response_headers={},
+            started_at=now,
+            completed_at=now,
+            status_code=200,
+        )
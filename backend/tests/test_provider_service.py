@@ -1,9 +1,13 @@
 """Tests for ProviderService provider/model utilities."""
 
 import pytest
+from sqlalchemy import insert
 
 from app.models.providers import Model, Provider
-from app.services.provider_service import ProviderService
+from app.services.provider_service import (
+    ProviderService,
+    get_model_canonicalization_cache,
+)
 
 
 @pytest.mark.asyncio
@@ -80,3 +84,53 @@ async def test_list_canonical_model_names(test_session):
         "google/gemini-2.5-pro",
     ]
 
+
+@pytest.mark.asyncio
+async def test_canonicalize_model_cache(test_session):
+    """Results, including unresolved identifiers, are cached until the catalog changes."""
+    service = ProviderService(test_session)
+    provider = await service.create_provider(name="openai", display_name="OpenAI")
+    await service.add_model_to_provider(provider.id, name="gpt-5", display_name="GPT-5")
+    await test_session.commit()
+
+    cache = get_model_canonicalization_cache()
+    hits, misses = cache.hits, cache.misses
+
+    assert await service.canonicalize_model("gpt-5") == "openai/gpt-5"
+    assert await service.canonicalize_model("gpt-5") == "openai/gpt-5"
+    assert await service.canonicalize_model("gpt-6") == "gpt-6"
+    assert await service.canonicalize_model("gpt-6") == "gpt-6"
+    assert (cache.hits - hits, cache.misses - misses) == (2, 2)
+
+    # Adding a model drops the cached negative result
+    await service.add_model_to_provider(provider.id, name="gpt-6", display_name="GPT-6")
+    await test_session.commit()
+    assert cache.stats()["size"] == 0
+    assert await service.canonicalize_model("gpt-6") == "openai/gpt-6"
+
+
+@pytest.mark.asyncio
+async def test_canonicalize_model_cache_sees_other_processes_changes(test_session, monkeypatch):
+    """Provider updates drop the cache, and other processes' changes are rechecked."""
+    service = ProviderService(test_session)
+    provider = await service.create_provider(name="openai", display_name="OpenAI")
+    await test_session.commit()
+    provider_id = provider.id
+
+    cache = get_model_canonicalization_cache()
+    monkeypatch.setattr(cache, "recheck_seconds", 60)
+    assert await service.canonicalize_model("gpt-6") == "gpt-6"
+    await service.update_provider(provider_id, display_name="OpenAI Inc.")
+    await test_session.commit()
+    assert cache.stats()["size"] == 0
+    assert await service.canonicalize_model("gpt-6") == "gpt-6"
+
+    # A Core insert skips this process' invalidation, like another process
+    await test_session.execute(
+        insert(Model).values(provider_id=provider_id, name="gpt-6", display_name="GPT-6"),
+    )
+    await test_session.commit()
+    assert await service.canonicalize_model("gpt-6") == "gpt-6"
+
+    monkeypatch.setattr(cache, "recheck_seconds", 0)
+    assert await service.canonicalize_model("gpt-6") == "openai/gpt-6"
@@ -3,6 +3,7 @@
 import pytest
 
 from app.models.providers import Model, Provider
+from app.services.provider_service import ProviderService
 
 
 @pytest.mark.asyncio
@@ -34,3 +35,28 @@ async def test_list_all_models_endpoint_only_with_api_keys(client, test_session)
     assert "openai/gpt-5" in models
     assert "anthropic/claude-sonnet-4" not in models
 
+
+@pytest.mark.asyncio
+async def test_canonicalization_cache_invalidated_by_providers_api(client, test_session):
+    """Adding and deleting models through the API refreshes cached canonical names."""
+    service = ProviderService(test_session)
+    assert await service.canonicalize_model("my-model") == "my-model"
+
+    response = await client.post(
+        "/v1/providers",
+        json={"name": "custom", "display_name": "Custom", "models": ["my-model"]},
+    )
+    assert response.status_code == 201
+    response = await client.get(f"/v1/providers/{response.json()['id']}/models")
+    model_id = response.json()[0]["id"]
+    assert await service.canonicalize_model("my-model") == "custom/my-model"
+
+    response = await client.delete(f"/v1/providers/models/{model_id}")
+    assert response.status_code == 204
+    assert await service.canonicalize_model("my-model") == "my-model"
+
+    response = await client.get("/v1/providers/canonicalization-cache")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["misses"] >= 3
+    assert stats["size"] == 1
@@ -0,0 +1,43 @@
+"""Tests for the Server-Sent Events reader."""
+
+from app.services.parsers.sse import SSEEvent, iter_sse_events, iter_sse_json
+
+
+class TestIterSSEEvents:
+    """Test reading events from captured streams."""
+
+    def test_bytes_str_and_memoryview(self):
+        """All body types yield the same events, with payloads of the body's type."""
+        body = 'event: start\ndata: {"a": 1}\n\n: comment\ndata:{"b": 2}\n\n'
+
+        assert list(iter_sse_events(body)) == [
+            SSEEvent("start", '{"a": 1}'),
+            SSEEvent(None, '{"b": 2}'),
+        ]
+        expected = [SSEEvent("start", b'{"a": 1}'), SSEEvent(None, b'{"b": 2}')]
+        assert list(iter_sse_events(body.encode())) == expected
+        assert list(iter_sse_events(memoryview(body.encode()))) == expected
+
+    def test_crlf_indentation_and_missing_separators(self):
+        """Lines are stripped and each data line is its own event."""
+        body = b'  event: delta\r\n  data: "x"\r\ndata: "y"\r\n\r\ndata: "z"'
+
+        assert list(iter_sse_events(body)) == [
+            SSEEvent("delta", b'"x"'),
+            SSEEvent("delta", b'"y"'),
+            SSEEvent(None, b'"z"'),
+        ]
+
+    def test_is_lazy(self):
+        """Events are produced while scanning, not after reading the whole body."""
+        events = iter_sse_events(b"data: 1\n\n" * 1000)
+
+        assert next(events) == SSEEvent(None, b"1")
+
+
+def test_iter_sse_json_skips_invalid_and_stops_at_done():
+    """Invalid payloads are skipped and ``[DONE]`` ends the stream."""
+    body = 'data: {"a": 1}\n\ndata: {not json\n\ndata: [DONE]\n\ndata: {"b": 2}\n\n'
+
+    assert list(iter_sse_json(body)) == [(None, {"a": 1})]
+    assert list(iter_sse_json(body.encode())) == [(None, {"a": 1})]
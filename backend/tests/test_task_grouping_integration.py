@@ -103,41 +103,23 @@ async def test_trace_creation_enqueues_grouping(
     sample_trace_data,
 ):
     """Test that creating a trace enqueues a grouping request."""
-    # Mock the queue manager to avoid starting actual worker
     queue_manager = get_task_grouping_queue()
 
-    # Track enqueued requests
-    enqueued_requests = []
-
-    original_enqueue = queue_manager.enqueue_grouping
-
-    def mock_enqueue(project_id, path, trace_id):
-        enqueued_requests.append(
-            {
-                "project_id": project_id,
-                "path": path,
-                "trace_id": trace_id,
-            },
-        )
-        # Don't actually enqueue (no worker running)
-
-    queue_manager.enqueue_grouping = mock_enqueue
-
-    try:
-        traces_service = TracesService()
-        trace_data = sample_trace_data("Test instruction")
-
-        trace = await traces_service.create_trace(trace_data, test_session)
+    traces_service = TracesService()
+    trace_data = sample_trace_data("Test instruction")
 
-        # Should have enqueued a request
-        assert len(enqueued_requests) == 1
-        assert enqueued_requests[0]["project_id"] == project.id
-        assert enqueued_requests[0]["path"] == "/api/chat"
-        assert enqueued_requests[0]["trace_id"] == trace.id
+    trace = await traces_service.create_trace(trace_data, test_session)
 
-    finally:
-        # Restore original method
-        queue_manager.enqueue_grouping = original_enqueue
+    # Should have enqueued a request, although no worker is running
+    pending = await queue_manager.get_pending_request(
+        test_session,
+        project.id,
+        "/api/chat",
+    )
+    assert pending is not None
+    assert pending.project_id == project.id
+    assert pending.path == "/api/chat"
+    assert pending.trace_id == trace.id
 
 
 @pytest.mark.asyncio
@@ -147,41 +129,28 @@ async def test_throttling_behavior(
     sample_trace_data,
 ):
     """Test that multiple rapid traces result in throttling."""
-    import multiprocessing as mp
-    from unittest.mock import Mock
-
     queue_manager = get_task_grouping_queue()
+    traces_service = TracesService()
+
+    # Create multiple traces rapidly for same path
+    trace_ids = []
+    for i in range(5):
+        trace_data = sample_trace_data(f"Instruction {i}")
+        trace = await traces_service.create_trace(trace_data, test_session)
+        trace_ids.append(trace.id)
 
-    # Mock worker to be alive
-    mock_process = Mock()
-    mock_process.is_alive.return_value = True
-    queue_manager._worker_process = mock_process
-    test_queue = mp.Queue()
-    queue_manager._queue = test_queue
-
-    try:
-        traces_service = TracesService()
-
-        # Create multiple traces rapidly for same path
-        trace_ids = []
-        for i in range(5):
-            trace_data = sample_trace_data(f"Instruction {i}")
-            trace = await traces_service.create_trace(trace_data, test_session)
-            trace_ids.append(trace.id)
-
-        # Should have enqueued 5 requests
-        assert queue_manager.get_queue_size() == 5
-
-        # But pending should only have the last one
-        pending = queue_manager.get_pending_request(project.id, "/api/chat")
-        assert pending is not None
-        assert pending.trace_id == trace_ids[-1]  # Last trace
-    finally:
-        # Cleanup - properly close the queue
-        queue_manager._worker_process = None
-        queue_manager._queue = None
-        test_queue.close()
-        test_queue.join_thread()
+    # Should have collapsed into one pending path
+    assert await queue_manager.get_queue_size(test_session) == 1
+
+    # With the last trace
+    pending = await queue_manager.get_pending_request(
+        test_session,
+        project.id,
+        "/api/chat",
+    )
+    assert pending is not None
+    assert pending.trace_id == trace_ids[-1]  # Last trace
+    assert pending.version == 5
 
 
 @pytest.mark.asyncio
@@ -191,53 +160,35 @@ async def test_different_paths_not_throttled_together(
     sample_trace_data,
 ):
     """Test that traces with different paths don't throttle each other."""
-    import multiprocessing as mp
-    from unittest.mock import Mock
-
     queue_manager = get_task_grouping_queue()
+    traces_service = TracesService()
 
-    # Mock worker
-    mock_process = Mock()
-    mock_process.is_alive.return_value = True
-    queue_manager._worker_process = mock_process
-    test_queue = mp.Queue()
-    queue_manager._queue = test_queue
-
-    try:
-        traces_service = TracesService()
-
-        # Create traces for different paths
-        paths = ["/api/chat", "/api/summarize", "/api/translate"]
-        for path in paths:
-            trace_data = TraceCreate(
-                project=project.name,
-                model="gpt-4",
-                path=path,
-                instructions="Test instruction",
-                started_at=datetime.now(),
-                input=[
-                    MessageItem(
-                        type=ItemType.MESSAGE,
-                        role=MessageRole.SYSTEM,
-                        content="Test instruction",
-                    ),
-                ],
-                temperature=0.7,
-            )
-            await traces_service.create_trace(trace_data, test_session)
-
-        # Should have 3 pending requests (one per path)
-        pending_keys = queue_manager.get_pending_keys()
-        assert len(pending_keys) == 3
-        assert (project.id, "/api/chat") in pending_keys
-        assert (project.id, "/api/summarize") in pending_keys
-        assert (project.id, "/api/translate") in pending_keys
-    finally:
-        # Cleanup - properly close the queue
-        queue_manager._worker_process = None
-        queue_manager._queue = None
-        test_queue.close()
-        test_queue.join_thread()
+    # Create traces for different paths
+    paths = ["/api/chat", "/api/summarize", "/api/translate"]
+    for path in paths:
+        trace_data = TraceCreate(
+            project=project.name,
+            model="gpt-4",
+            path=path,
+            instructions="Test instruction",
+            started_at=datetime.now(),
+            input=[
+                MessageItem(
+                    type=ItemType.MESSAGE,
+                    role=MessageRole.SYSTEM,
+                    content="Test instruction",
+                ),
+            ],
+            temperature=0.7,
+        )
+        await traces_service.create_trace(trace_data, test_session)
+
+    # Should have 3 pending requests (one per path)
+    pending_keys = await queue_manager.get_pending_keys(test_session)
+    assert len(pending_keys) == 3
+    assert (project.id, "/api/chat") in pending_keys
+    assert (project.id, "/api/summarize") in pending_keys
+    assert (project.id, "/api/translate") in pending_keys
 
 
 def test_grouping_request_ordering():
@@ -263,3 +214,311 @@ def test_grouping_request_ordering():
     # req2 should be newer
     assert req2.timestamp > req1.timestamp
     assert req2.trace_id > req1.trace_id
+
+
+@pytest.mark.asyncio
+async def test_worker_folds_in_new_traces(
+    test_session: AsyncSession,
+    project,
+    sample_trace_data,
+):
+    """Test that the worker keeps clustering state and only loads new traces."""
+    from unittest.mock import AsyncMock, MagicMock, patch
+
+    from app.config import Settings
+    from app.workers.task_grouping_worker import TaskGroupingWorker
+
+    worker = TaskGroupingWorker(shutdown_event=None)
+    worker.settings = Settings(
+        min_segment_words=2,
+        min_cluster_size=4,
+        min_matching_traces=3,
+    )
+    traces_service = TracesService()
+
+    async def create(instructions: list[str]) -> list[int]:
+        ids = []
+        for instr in instructions:
+            trace = await traces_service.create_trace(sample_trace_data(instr), test_session)
+            ids.append(trace.id)
+        return ids
+
+    first = await create(
+        [
+            "Translate hello to Spanish please",
+            "Translate goodbye to Spanish please",
+            "Summarize this article about cats",
+        ],
+    )
+    assert await worker._perform_grouping(project.id, "/api/chat", test_session) is None
+    clusters = worker._clusters[(project.id, "/api/chat")]
+    assert set(clusters.prompts) == set(first)
+
+    second = await create(["Translate thanks to Spanish please"])
+    mock_response = MagicMock()
+    mock_response.output_parsed.name = "Translate"
+    mock_response.output_parsed.description = "Translate words to Spanish"
+    with (
+        patch("app.services.task_service.get_async_openai_client") as mock_client,
+        patch.object(
+            worker,
+            "_extract_system_prompt_from_trace",
+            wraps=worker._extract_system_prompt_from_trace,
+        ) as extract,
+    ):
+        mock_client.return_value.responses.parse = AsyncMock(return_value=mock_response)
+        result = await worker._perform_grouping(project.id, "/api/chat", test_session)
+
+    # Only the new trace's prompt was extracted
+    assert extract.call_count == 1
+    assert result == {"tasks_created": 1, "traces_grouped": 3}
+
+    grouped = [first[0], first[1], second[0]]
+    for trace_id in grouped:
+        trace = await test_session.get(Trace, trace_id)
+        await test_session.refresh(trace)
+        assert trace.implementation_id is not None
+    assert set(clusters.prompts) == {first[2]}
+    assert first[2] in clusters.finder
+
+
+@pytest.mark.asyncio
+async def test_worker_drops_least_recently_grouped_paths(
+    test_session: AsyncSession,
+    project,
+    sample_trace_data,
+):
+    """Test that the worker bounds its clustering state and rebuilds it cold."""
+    from unittest.mock import patch
+
+    from app.config import Settings
+    from app.workers.task_grouping_worker import TaskGroupingWorker
+
+    worker = TaskGroupingWorker(shutdown_event=None)
+    worker.settings = Settings(
+        min_segment_words=2,
+        min_matching_traces=3,
+        grouping_cache_max_traces=2,
+    )
+    traces_service = TracesService()
+    for path in ("/api/a", "/api/b"):
+        for instr in ["Summarize this article about cats", "Write a poem about dogs"]:
+            await traces_service.create_trace(sample_trace_data(instr, path), test_session)
+        assert await worker._perform_grouping(project.id, path, test_session) is None
+    assert list(worker._clusters) == [(project.id, "/api/a"), (project.id, "/api/b")]
+
+    # Over budget, so the least recently grouped path is rebuilt from the database
+    with patch.object(
+        worker,
+        "_extract_system_prompt_from_trace",
+        wraps=worker._extract_system_prompt_from_trace,
+    ) as extract:
+        assert await worker._perform_grouping(project.id, "/api/a", test_session) is None
+    assert extract.call_count == 2
+    assert list(worker._clusters) == [(project.id, "/api/b"), (project.id, "/api/a")]
+
+    # Idle paths are dropped too
+    worker.settings = Settings(
+        min_segment_words=2,
+        min_matching_traces=3,
+        grouping_cache_idle_seconds=60,
+    )
+    worker._clusters[(project.id, "/api/b")].last_used -= 120
+    assert await worker._perform_grouping(project.id, "/api/a", test_session) is None
+    assert list(worker._clusters) == [(project.id, "/api/a")]
+
+
+@pytest.mark.asyncio
+async def test_worker_regroups_within_lsh_buckets(
+    test_session: AsyncSession,
+    project,
+    sample_trace_data,
+):
+    """Test that the non-incremental worker groups traces within LSH buckets."""
+    from unittest.mock import AsyncMock, MagicMock, patch
+
+    from app.config import Settings
+    from app.workers.task_grouping_worker import TaskGroupingWorker
+
+    worker = TaskGroupingWorker(shutdown_event=None)
+    worker.settings = Settings(
+        min_segment_words=2,
+        min_cluster_size=4,
+        min_matching_traces=3,
+        incremental_grouping=False,
+        grouping_lsh_threshold=0.3,
+    )
+    traces_service = TracesService()
+    for instr in [
+        "You are a translator, translate hello to Spanish and reply with one word",
+        "You are a translator, translate goodbye to Spanish and reply with one word",
+        "You are a translator, translate thanks to Spanish and reply with one word",
+        "Summarize this article about cats",
+    ]:
+        await traces_service.create_trace(sample_trace_data(instr), test_session)
+
+    mock_response = MagicMock()
+    mock_response.output_parsed.name = "Translate"
+    mock_response.output_parsed.description = "Translate words to Spanish"
+    with patch("app.services.task_service.get_async_openai_client") as mock_client:
+        mock_client.return_value.responses.parse = AsyncMock(return_value=mock_response)
+        result = await worker._perform_grouping(project.id, "/api/chat", test_session)
+
+    assert result == {"tasks_created": 1, "traces_grouped": 3}
+
+
+@pytest.mark.asyncio
+async def test_worker_releases_claimed_path(
+    test_engine,
+    test_session: AsyncSession,
+    project,
+    sample_trace_data,
+):
+    """Test that the worker releases a path once grouped, but not if grouping fails."""
+    from unittest.mock import AsyncMock, patch
+
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.workers.task_grouping_worker import TaskGroupingWorker
+
+    project_id = project.id
+    queue_manager = get_task_grouping_queue()
+    worker = TaskGroupingWorker(shutdown_event=None)
+    worker.SessionLocal = async_sessionmaker(
+        test_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+    await TracesService().create_trace(sample_trace_data("Test instruction"), test_session)
+
+    request = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+    with patch.object(worker, "_perform_grouping", AsyncMock(side_effect=RuntimeError)):
+        await worker._process_request(request)
+
+    # Still claimed, so it is retried once the lease expires
+    assert await queue_manager.get_queue_size(test_session) == 1
+    assert await queue_manager.claim_grouping(test_session, lease_seconds=60) is None
+
+    with patch.object(worker, "_perform_grouping", AsyncMock(return_value=None)) as perform:
+        await worker._process_request(request)
+
+    perform.assert_awaited_once()
+    assert perform.await_args.args[:2] == (project_id, "/api/chat")
+    assert await queue_manager.get_queue_size(test_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_abandons_taken_over_claim(
+    test_session: AsyncSession,
+    project,
+    sample_trace_data,
+):
+    """Test that grouping isn't committed once another worker took over its claim."""
+    from datetime import UTC, timedelta
+    from unittest.mock import AsyncMock, MagicMock, patch
+
+    from sqlalchemy import update
+
+    from app.config import Settings
+    from app.models.task_grouping import GroupingWork
+    from app.models.tasks import Task
+    from app.services.task_grouping_queue import ClaimLostError
+    from app.workers.task_grouping_worker import TaskGroupingWorker
+
+    project_id = project.id
+    queue_manager = get_task_grouping_queue()
+    worker = TaskGroupingWorker(shutdown_event=None)
+    worker.settings = Settings(
+        min_segment_words=2,
+        min_cluster_size=4,
+        min_matching_traces=3,
+    )
+    traces_service = TracesService()
+    for instr in [
+        "Translate hello to Spanish please",
+        "Translate goodbye to Spanish please",
+        "Translate thanks to Spanish please",
+        "Summarize this article about cats",
+    ]:
+        await traces_service.create_trace(sample_trace_data(instr), test_session)
+
+    stale = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+    await test_session.execute(
+        update(GroupingWork).values(claimed_until=datetime.now(UTC) - timedelta(seconds=1)),
+    )
+    await test_session.commit()
+    request = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+
+    mock_response = MagicMock()
+    mock_response.output_parsed.name = "Translate"
+    mock_response.output_parsed.description = "Translate words to Spanish"
+    with patch("app.services.task_service.get_async_openai_client") as mock_client:
+        mock_client.return_value.responses.parse = AsyncMock(return_value=mock_response)
+        with pytest.raises(ClaimLostError):
+            await worker._perform_grouping(
+                project_id,
+                "/api/chat",
+                test_session,
+                request=stale,
+            )
+        assert (await test_session.execute(select(Task))).first() is None
+
+        result = await worker._perform_grouping(
+            project_id,
+            "/api/chat",
+            test_session,
+            request=request,
+        )
+    assert result == {"tasks_created": 1, "traces_grouped": 3}
+
+
+def test_default_min_matching_traces():
+    """Test that the default threshold is a fifth of the traces."""
+    from app.config import Settings
+    from app.workers.task_grouping_worker import TaskGroupingWorker
+
+    counts = (4, 10, 15, 19, 20, 39, 40, 100)
+    worker = TaskGroupingWorker(shutdown_event=None)
+    for settings in (
+        Settings(min_matching_traces=None),
+        Settings(min_matching_traces=None, incremental_grouping=False),
+        Settings(
+            min_matching_traces=None,
+            incremental_grouping=False,
+            stable_min_matching_traces=True,
+        ),
+    ):
+        worker.settings = settings
+        thresholds = [worker._min_matching_traces(n) for n in counts]
+        assert thresholds == [0, 2, 3, 3, 4, 7, 8, 20]
+    worker.settings = Settings(min_matching_traces=3)
+    assert worker._min_matching_traces(100) == 3
+
+
+def test_stable_min_matching_traces_changes_when_traces_double():
+    """Test that the stable threshold keeps incremental templates valid."""
+    from unittest.mock import patch
+
+    from app.config import Settings
+    from app.services.task_grouping import IncrementalTemplateFinder
+    from app.workers.task_grouping_worker import TaskGroupingWorker
+
+    worker = TaskGroupingWorker(shutdown_event=None)
+    worker.settings = Settings(min_matching_traces=None, stable_min_matching_traces=True)
+    thresholds = [worker._min_matching_traces(n) for n in (4, 10, 15, 19, 20, 39, 40, 100)]
+    assert thresholds == [0, 2, 2, 2, 4, 4, 8, 16]
+
+    # Adding traces below the next doubling only re-templates affected ones
+    finder = IncrementalTemplateFinder(min_segment_words=2)
+    for i in range(24):
+        finder.add(i, f"Translate word number {i} to Spanish please")
+    finder.group(worker._min_matching_traces(len(finder)))
+    finder.add(24, "Summarize this article about cats")
+    with patch.object(
+        finder,
+        "_extract_best_template",
+        wraps=finder._extract_best_template,
+    ) as extract:
+        groups = finder.group(worker._min_matching_traces(len(finder)))
+    assert extract.call_count == 1
+    assert list(groups.values()) == [list(range(24))]
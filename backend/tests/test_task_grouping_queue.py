@@ -2,10 +2,17 @@
 
 import multiprocessing as mp
 import time
+from datetime import UTC, datetime, timedelta
 from unittest.mock import Mock, patch
 
 import pytest
+import pytest_asyncio
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import Settings
+from app.models.projects import Project
+from app.models.task_grouping import GroupingWork
 from app.services.task_grouping_queue import (
     GroupingRequest,
     TaskGroupingQueue,
@@ -23,14 +30,16 @@ def queue_manager():
     # Cleanup
     if manager.is_worker_alive():
         manager.stop_worker()
-    # Properly close and cleanup any queues
-    if manager._queue is not None:
-        try:
-            manager._queue.close()
-            manager._queue.join_thread()
-        except Exception:
-            pass
-        manager._queue = None
+    manager._worker_processes = []
+
+
+@pytest_asyncio.fixture
+async def projects(test_session: AsyncSession):
+    """Create two test projects."""
+    projects = [Project(name="Project 1"), Project(name="Project 2")]
+    test_session.add_all(projects)
+    await test_session.commit()
+    return [project.id for project in projects]
 
 
 def test_singleton_pattern():
@@ -51,134 +60,157 @@ def test_get_task_grouping_queue():
     assert isinstance(manager1, TaskGroupingQueue)
 
 
-def test_enqueue_without_worker(queue_manager):
+@pytest.mark.asyncio
+async def test_enqueue_without_worker(queue_manager, test_session, projects):
     """Test enqueuing when worker is not started."""
-    # Should not raise, but should log error
-    queue_manager.enqueue_grouping(
-        project_id=1,
-        path="/test",
+    await queue_manager.enqueue_grouping(
+        test_session,
+        project_id=projects[0],
+        path="/api/chat",
         trace_id=100,
     )
-    # Queue should be None
-    assert queue_manager._queue is None
 
+    # Should be pending until a worker claims it
+    assert await queue_manager.get_queue_size(test_session) == 1
+    request = await queue_manager.get_pending_request(test_session, projects[0], "/api/chat")
+    assert request is not None
+    assert request.project_id == projects[0]
+    assert request.path == "/api/chat"
+    assert request.trace_id == 100
 
-def test_enqueue_with_worker(queue_manager):
-    """Test enqueuing when worker is running."""
-    # Mock the worker process to avoid actually starting it
-    mock_process = Mock()
-    mock_process.is_alive.return_value = True
-    mock_process.pid = 12345
 
-    test_queue = mp.Queue()
-    queue_manager._queue = test_queue
-    queue_manager._worker_process = mock_process
-
-    try:
-        # Enqueue a request
-        queue_manager.enqueue_grouping(
-            project_id=1,
-            path="/api/chat",
-            trace_id=100,
-        )
-
-        # Should be in queue
-        assert queue_manager.get_queue_size() == 1
-
-        # Should be in pending requests
-        request = queue_manager.get_pending_request(1, "/api/chat")
-        assert request is not None
-        assert request.project_id == 1
-        assert request.path == "/api/chat"
-        assert request.trace_id == 100
-    finally:
-        queue_manager._queue = None
-        queue_manager._worker_process = None
-        test_queue.close()
-        test_queue.join_thread()
-
-
-def test_throttling_updates_pending_request(queue_manager):
+@pytest.mark.asyncio
+async def test_throttling_updates_pending_request(queue_manager, test_session, projects):
     """Test that multiple enqueues update the pending request."""
-    mock_process = Mock()
-    mock_process.is_alive.return_value = True
-
-    test_queue = mp.Queue()
-    queue_manager._queue = test_queue
-    queue_manager._worker_process = mock_process
-
-    try:
-        # Enqueue multiple requests for same project/path
-        queue_manager.enqueue_grouping(1, "/test", 100)
-        queue_manager.enqueue_grouping(1, "/test", 101)
-        queue_manager.enqueue_grouping(1, "/test", 102)
-
-        # Latest request should be in pending
-        request = queue_manager.get_pending_request(1, "/test")
-        assert request.trace_id == 102
+    await queue_manager.enqueue_grouping(test_session, projects[0], "/test", 100)
+    await queue_manager.enqueue_grouping(test_session, projects[0], "/test", 101)
+    await queue_manager.enqueue_groupings(
+        test_session,
+        [(102, "/test", projects[0]), (103, "/test", projects[0])],
+    )
 
-        # All 3 should be in queue though
-        assert queue_manager.get_queue_size() == 3
-    finally:
-        queue_manager._queue = None
-        queue_manager._worker_process = None
-        test_queue.close()
-        test_queue.join_thread()
+    # A single pending request with the latest trace
+    request = await queue_manager.get_pending_request(test_session, projects[0], "/test")
+    assert request.trace_id == 103
+    assert request.version == 4
+    assert await queue_manager.get_queue_size(test_session) == 1
 
 
-def test_different_paths_tracked_separately(queue_manager):
+@pytest.mark.asyncio
+async def test_different_paths_tracked_separately(queue_manager, test_session, projects):
     """Test that different paths are tracked separately."""
-    mock_process = Mock()
-    mock_process.is_alive.return_value = True
+    await queue_manager.enqueue_grouping(test_session, projects[0], "/path1", 100)
+    await queue_manager.enqueue_grouping(test_session, projects[0], "/path2", 200)
+    await queue_manager.enqueue_grouping(test_session, projects[1], "/path1", 300)
+    await queue_manager.enqueue_grouping(test_session, projects[1], None, 400)
+
+    # Each should be tracked separately
+    for project_id, path, trace_id in [
+        (projects[0], "/path1", 100),
+        (projects[0], "/path2", 200),
+        (projects[1], "/path1", 300),
+        (projects[1], None, 400),
+    ]:
+        request = await queue_manager.get_pending_request(test_session, project_id, path)
+        assert request.trace_id == trace_id
+
+    # Should have 4 pending keys, oldest first
+    keys = await queue_manager.get_pending_keys(test_session)
+    assert keys == [
+        (projects[0], "/path1"),
+        (projects[0], "/path2"),
+        (projects[1], "/path1"),
+        (projects[1], None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_claim_and_complete(queue_manager, test_session, projects):
+    """Test that a completed path is no longer pending."""
+    await queue_manager.enqueue_grouping(test_session, projects[0], "/test", 100)
+
+    request = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+    assert request is not None
+    assert (request.project_id, request.path, request.trace_id) == (projects[0], "/test", 100)
+
+    # A claimed path isn't claimed again, but is still pending
+    assert await queue_manager.claim_grouping(test_session, lease_seconds=60) is None
+    assert await queue_manager.get_queue_size(test_session) == 1
+
+    await queue_manager.complete_grouping(test_session, request)
+    assert await queue_manager.get_pending_request(test_session, projects[0], "/test") is None
+    assert await queue_manager.claim_grouping(test_session, lease_seconds=60) is None
+
+
+@pytest.mark.asyncio
+async def test_enqueue_while_claimed_keeps_path_dirty(queue_manager, test_session, projects):
+    """Test that traces arriving during grouping trigger another run."""
+    await queue_manager.enqueue_grouping(test_session, projects[0], "/test", 100)
+    request = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+
+    await queue_manager.enqueue_grouping(test_session, projects[0], "/test", 101)
+    await queue_manager.complete_grouping(test_session, request)
+
+    request = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+    assert request is not None
+    assert request.trace_id == 101
+    await queue_manager.complete_grouping(test_session, request)
+    assert await queue_manager.get_queue_size(test_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_expired_claim_is_claimed_again(queue_manager, test_session, projects):
+    """Test that the path of a crashed worker is claimed once its lease expires."""
+    await queue_manager.enqueue_grouping(test_session, projects[0], "/path1", 100)
+    await queue_manager.enqueue_grouping(test_session, projects[1], "/path2", 200)
+
+    first = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+    second = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+    assert (first.trace_id, second.trace_id) == (100, 200)
+    assert await queue_manager.claim_grouping(test_session, lease_seconds=60) is None
+
+    # The first worker's lease expires
+    await test_session.execute(
+        update(GroupingWork)
+        .where(GroupingWork.id == first.work_id)
+        .values(claimed_until=datetime.now(UTC) - timedelta(seconds=1)),
+    )
+    await test_session.commit()
 
-    test_queue = mp.Queue()
-    queue_manager._queue = test_queue
-    queue_manager._worker_process = mock_process
-
-    try:
-        # Enqueue for different paths
-        queue_manager.enqueue_grouping(1, "/path1", 100)
-        queue_manager.enqueue_grouping(1, "/path2", 200)
-        queue_manager.enqueue_grouping(2, "/path1", 300)
-
-        # Each should be tracked separately
-        assert queue_manager.get_pending_request(1, "/path1").trace_id == 100
-        assert queue_manager.get_pending_request(1, "/path2").trace_id == 200
-        assert queue_manager.get_pending_request(2, "/path1").trace_id == 300
-
-        # Should have 3 pending keys
-        keys = queue_manager.get_pending_keys()
-        assert len(keys) == 3
-        assert (1, "/path1") in keys
-        assert (1, "/path2") in keys
-        assert (2, "/path1") in keys
-    finally:
-        queue_manager._queue = None
-        queue_manager._worker_process = None
-        test_queue.close()
-        test_queue.join_thread()
-
-
-def test_clear_pending_request(queue_manager):
-    """Test clearing a pending request."""
-    mock_process = Mock()
-    mock_process.is_alive.return_value = True
+    request = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+    assert request.work_id == first.work_id
+    assert request.trace_id == 100
 
-    test_queue = mp.Queue()
-    queue_manager._queue = test_queue
-    queue_manager._worker_process = mock_process
 
-    try:
-        queue_manager.enqueue_grouping(1, "/test", 100)
-        assert queue_manager.get_pending_request(1, "/test") is not None
+@pytest.mark.asyncio
+async def test_taken_over_claim_is_not_renewed_or_released(
+    queue_manager,
+    test_session,
+    projects,
+):
+    """Test that a worker whose lease was taken over can't touch the new claim."""
+    await queue_manager.enqueue_grouping(test_session, projects[0], "/path1", 100)
+    stale = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+    assert await queue_manager.renew_grouping(test_session, stale, lease_seconds=60)
+
+    await test_session.execute(
+        update(GroupingWork)
+        .where(GroupingWork.id == stale.work_id)
+        .values(claimed_until=datetime.now(UTC) - timedelta(seconds=1)),
+    )
+    await test_session.commit()
+    request = await queue_manager.claim_grouping(test_session, lease_seconds=60)
+    assert request.work_id == stale.work_id
+    assert request.claim_token != stale.claim_token
+
+    assert not await queue_manager.renew_grouping(test_session, stale, lease_seconds=60)
+    assert not await queue_manager.complete_grouping(test_session, stale)
+    # Still claimed by the new worker
+    assert await queue_manager.claim_grouping(test_session, lease_seconds=60) is None
+    assert await queue_manager.get_queue_size(test_session) == 1
 
-        queue_manager.clear_pending_request(1, "/test")
-        assert queue_manager.get_pending_request(1, "/test") is None
-    finally:
-        queue_manager._queue = None
-        queue_manager._worker_process = None
-        test_queue.close()
-        test_queue.join_thread()
+    assert await queue_manager.complete_grouping(test_session, request)
+    assert await queue_manager.get_queue_size(test_session) == 0
 
 
 def test_grouping_request_dataclass():
@@ -204,7 +236,7 @@ def test_worker_alive_status(queue_manager):
     # Mock a live worker
     mock_process = Mock()
     mock_process.is_alive.return_value = True
-    queue_manager._worker_process = mock_process
+    queue_manager._worker_processes = [mock_process]
 
     assert queue_manager.is_worker_alive()
 
@@ -223,7 +255,7 @@ def test_stop_worker_when_already_stopped(queue_manager):
     """Test stopping worker that's already stopped."""
     mock_process = Mock()
     mock_process.is_alive.return_value = False
-    queue_manager._worker_process = mock_process
+    queue_manager._worker_processes = [mock_process]
 
     # Should not raise
     queue_manager.stop_worker()
@@ -237,23 +269,28 @@ def test_start_worker(mock_process_class, queue_manager):
     mock_process.pid = 12345
     mock_process_class.return_value = mock_process
 
-    queue_manager.start_worker()
+    with patch("app.services.task_grouping_queue.get_settings") as mock_settings:
+        mock_settings.return_value = Settings(grouping_workers=3)
+        queue_manager.start_worker()
 
-    # Should create process
-    mock_process_class.assert_called_once()
+    # Should create a process per worker
+    assert mock_process_class.call_count == 3
 
-    # Should start it
-    mock_process.start.assert_called_once()
+    # Should start them
+    assert mock_process.start.call_count == 3
 
     # Should be alive
     assert queue_manager.is_worker_alive()
+    assert [call.kwargs["args"] for call in mock_process_class.call_args_list] == [
+        (queue_manager._shutdown_event, index) for index in range(3)
+    ]
 
 
 def test_start_worker_when_already_running(queue_manager):
     """Test starting worker when it's already running."""
     mock_process = Mock()
     mock_process.is_alive.return_value = True
-    queue_manager._worker_process = mock_process
+    queue_manager._worker_processes = [mock_process]
 
     # Should not start another
     queue_manager.start_worker()
@@ -262,53 +299,49 @@ def test_start_worker_when_already_running(queue_manager):
     mock_process.start.assert_not_called()
 
 
-def test_get_queue_size_when_no_queue(queue_manager):
-    """Test getting queue size when queue doesn't exist."""
-    assert queue_manager.get_queue_size() == 0
-
-
-def test_thread_safety_of_pending_requests(queue_manager):
-    """Test that pending requests are thread-safe."""
-    import threading
-
-    mock_process = Mock()
-    mock_process.is_alive.return_value = True
-    test_queue = mp.Queue()
-    queue_manager._queue = test_queue
-    queue_manager._worker_process = mock_process
-
-    results = []
-
-    def enqueue_many(start_id):
-        for i in range(100):
-            queue_manager.enqueue_grouping(1, "/test", start_id + i)
-            results.append(start_id + i)
-
-    try:
-        # Run multiple threads enqueueing
-        threads = [
-            threading.Thread(target=enqueue_many, args=(i * 100,)) for i in range(5)
-        ]
-
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join()
-
-        # Should have last enqueued value
-        request = queue_manager.get_pending_request(1, "/test")
-        assert request.trace_id in results
-
-        # All should be in queue
-        assert queue_manager.get_queue_size() == 500
-    finally:
-        # Drain the queue before closing to prevent hanging
-        try:
-            while not test_queue.empty():
-                test_queue.get_nowait()
-        except Exception:
-            pass
-        queue_manager._queue = None
-        queue_manager._worker_process = None
-        test_queue.close()
-        test_queue.join_thread()
+@pytest.mark.asyncio
+@patch("app.services.task_grouping_queue.mp.Process")
+async def test_check_workers_restarts_crashed_worker(
+    mock_process_class,
+    queue_manager,
+    test_session,
+    projects,
+):
+    """Test that the health check restarts dead workers and reports them."""
+    crashed = Mock(pid=1, exitcode=1)
+    crashed.is_alive.return_value = False
+    running = Mock(pid=2)
+    running.is_alive.return_value = True
+    replacement = Mock(pid=3)
+    replacement.is_alive.return_value = True
+    mock_process_class.return_value = replacement
+
+    queue_manager._shutdown_event = mp.Event()
+    queue_manager._worker_processes = [crashed, running]
+    queue_manager._restarts = [0, 0]
+
+    assert queue_manager.check_workers() == 1
+    replacement.start.assert_called_once()
+    assert queue_manager._worker_processes == [replacement, running]
+    assert queue_manager.check_workers() == 0
+
+    # Each worker reports the paths it is grouping
+    await queue_manager.enqueue_grouping(test_session, projects[0], "/path1", 100)
+    await queue_manager.enqueue_grouping(test_session, projects[1], "/path2", 200)
+    request = await queue_manager.claim_grouping(test_session, lease_seconds=60, worker=1)
+    status = await queue_manager.get_worker_status(test_session)
+    assert [
+        (s["worker"], s["alive"], s["pid"], s["restarts"], s["claimed_paths"]) for s in status
+    ] == [
+        (0, True, 3, 1, 0),
+        (1, True, 2, 0, 1),
+    ]
+    await queue_manager.complete_grouping(test_session, request)
+    status = await queue_manager.get_worker_status(test_session)
+    assert [s["claimed_paths"] for s in status] == [0, 0]
+
+    # Workers aren't restarted once the pool is shutting down
+    queue_manager._shutdown_event.set()
+    replacement.is_alive.return_value = False
+    assert queue_manager.check_workers() == 0
+    queue_manager._worker_processes = []
@@ -1,6 +1,13 @@
+import random
+
 import pytest
 
-from app.services.task_grouping import TemplateFinder
+from app.services.task_grouping import (
+    IncrementalTemplateFinder,
+    SegmentIndex,
+    TemplateFinder,
+    compile_template,
+)
 
 
 class TestTemplateFinder:
@@ -167,3 +174,127 @@ class TestTemplateFinder:
         match, variables = finder.match_template(template, s)
         assert match is True
         assert variables == {"var_0": "Alice", "var_1": "sushi"}
+
+    def test_match_template_repeated_variables(self):
+        finder = TemplateFinder()
+        template = "{{a}}-{{b}}-{{a}}"
+        assert finder.match_template(template, "x-y-z-x-y") == (
+            True,
+            {"a": "x-y", "b": "z"},
+        )
+        assert finder.match_template(template, "x-y-z") == (False, {})
+        # Repeated leading variables must cover the start of the string
+        assert finder.match_template("{{x}}{{x}}", "aabab") == (False, {})
+        assert finder.match_template("{{x}}{{x}}", "abab") == (True, {"x": "ab"})
+
+    def test_match_template_many_variables_large_prompt(self):
+        finder = TemplateFinder()
+        sections = [f"Section {i}:\n{{{{var_{i}}}}}\n" for i in range(30)]
+        template = "You are an assistant.\n" + "".join(sections) + "End."
+        values = {f"var_{i}": ("lorem ipsum " * 50) + str(i) for i in range(30)}
+        s = template
+        for name, value in values.items():
+            s = s.replace("{{" + name + "}}", value)
+
+        assert finder.match_template(template, s) == (True, values)
+        assert finder.match_template(template, s[:-1]) == (False, {})
+
+    def test_compile_template_is_cached(self):
+        assert compile_template("Hello {{name}}") is compile_template("Hello {{name}}")
+
+    def test_incremental_grouping_matches_full_grouping(self):
+        """Test that incremental grouping gives the same groups as re-grouping."""
+        rng = random.Random(0)
+        names = ["Alice", "Bob", "Carol", "Dave"]
+        templates = [
+            "Order {} for {} and deliver it today",
+            "Cancel the {} order placed by {}",
+            "Summarize the {} report for {} in bullet points",
+        ]
+        strings = {
+            i: rng.choice(templates).format(rng.choice(["pizza", "sushi"]), rng.choice(names))
+            for i in range(60)
+        }
+
+        finder = IncrementalTemplateFinder(min_segment_words=2)
+        present: list[int] = []
+        for key, s in strings.items():
+            finder.add(key, s)
+            present.append(key)
+            if rng.random() < 0.3:
+                removed = present.pop(rng.randrange(len(present)))
+                finder.remove(removed)
+            if key % 7 == 0:
+                min_matching = max(2, len(present) // 5)
+                full = TemplateFinder().group_strings(
+                    [strings[k] for k in sorted(present)],
+                    min_segment_words=2,
+                    min_matching_strings=min_matching,
+                )
+                keys = sorted(present)
+                expected = {t: [keys[i] for i in idxs] for t, idxs in full.items()}
+                assert finder.group(min_matching) == expected
+        assert len(finder) == len(present)
+
+    def test_lsh_buckets_separate_unrelated_strings(self):
+        """Test that LSH puts near-duplicates together and unrelated strings apart."""
+        strs = [
+            "You are a helpful assistant that translates hello into Spanish",
+            "You are a helpful assistant that translates goodbye into Spanish",
+            "Summarize the following quarterly report in three bullet points",
+            "Summarize the following annual report in three bullet points",
+            "You are a helpful assistant that translates thanks into Spanish",
+            "ok",
+        ]
+        finder = TemplateFinder()
+        tokenized = [finder._tokenize(s) for s in strs]
+
+        buckets = finder.lsh_buckets(tokenized, min_segment_words=2, threshold=0.3)
+
+        assert buckets == [[0, 1, 4], [2, 3]]
+
+    def test_group_strings_with_lsh_matches_full_search(self):
+        """Test that LSH pre-clustering finds the same groups for distinct templates."""
+        rng = random.Random(0)
+        templates = [
+            "You are a support agent for {} and answer questions about {} politely",
+            "Write a short poem about {} in the style of {} with four lines",
+            "Extract every date and amount from the {} invoice sent by {}",
+        ]
+        words = ["acme", "globex", "initech", "umbrella", "hooli", "vandelay"]
+        strs = [
+            rng.choice(templates).format(rng.choice(words), rng.choice(words))
+            for _ in range(60)
+        ]
+        finder = TemplateFinder()
+
+        full = finder.group_strings(strs, min_segment_words=3, min_matching_strings=5)
+        with_lsh = finder.group_strings(
+            strs,
+            min_segment_words=3,
+            min_matching_strings=5,
+            lsh_threshold=0.3,
+        )
+
+        assert full
+        assert with_lsh == full
+
+    def test_segment_index_counts_strings_containing_segment(self):
+        """Test that the segment index agrees with scanning the strings."""
+        rng = random.Random(0)
+        finder = TemplateFinder()
+        encoded = [
+            finder._encode(rng.choices("abcd", k=rng.randint(0, 12))) for _ in range(40)
+        ]
+        index = SegmentIndex(encoded)
+
+        for s in encoded:
+            for start in range(len(s)):
+                for min_count in (1, 3, 10):
+                    expected = 0
+                    while start + expected < len(s) and (
+                        sum(s[start : start + expected + 1] in other for other in encoded)
+                        >= min_count
+                    ):
+                        expected += 1
+                    assert index.longest_prefix(s, start, min_count) == expected
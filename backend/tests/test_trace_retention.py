@@ -0,0 +1,313 @@
+"""Tests for trace partition maintenance and retention."""
+
+import asyncio
+import json
+import os
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from httpx import AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import Settings, get_settings
+from app.enums import ItemType, ScoreType
+from app.models.evaluation import Grade, Grader
+from app.models.http_traces import HTTPTrace
+from app.models.projects import Project
+from app.models.traces import Trace, TraceInputItem
+from app.services.trace_retention import (
+    TraceRetentionManager,
+    partition_day,
+    partition_name,
+)
+
+NOW = datetime(2026, 3, 20, 12, 0, tzinfo=UTC)
+ALEMBIC_INI = Path(__file__).parents[1] / "alembic.ini"
+ITEMS_WITH_TRACES = (
+    "SELECT count(*) FROM trace_input_item JOIN trace ON trace.id = trace_input_item.trace_id"
+)
+
+
+def _openai_payload(started_at: datetime) -> dict:
+    request = {
+        "model": "gpt-4",
+        "messages": [{"role": "user", "content": f"Sent at {started_at}"}],
+    }
+    response = {
+        "id": "chatcmpl-1",
+        "choices": [
+            {
+                "message": {"role": "assistant", "content": "Answer"},
+                "finish_reason": "stop",
+            },
+        ],
+    }
+    return {
+        "started_at": started_at.isoformat(),
+        "completed_at": started_at.isoformat(),
+        "status_code": 200,
+        "request": json.dumps(request),
+        "request_headers": {"host": "api.openai.com"},
+        "response": json.dumps(response),
+        "response_headers": {"content-type": "application/json"},
+        "metadata": {"url": "https://api.openai.com/v1/chat/completions"},
+    }
+
+
+def test_partition_names():
+    """Daily partition names round-trip; other partitions have no day."""
+    name = partition_name("trace", date(2026, 3, 1))
+    assert name == "trace_p20260301"
+    assert partition_day("trace", name) == date(2026, 3, 1)
+    assert partition_day("trace", "trace_default") is None
+    assert partition_day("trace", "trace_input_item_p20260301") is None
+
+
+@pytest.mark.asyncio
+async def test_retention_without_partitions(
+    client: AsyncClient,
+    test_session: AsyncSession,
+):
+    """Expired rows are deleted row by row when tables are not partitioned."""
+    trace_ids = {}
+    for age in (40, 10, 1):
+        response = await client.post(
+            "/v1/http-traces",
+            json=_openai_payload(NOW - timedelta(days=age)),
+        )
+        assert response.status_code == 201
+        trace_ids[age] = response.json()["id"]
+
+    old_trace = await test_session.get(Trace, trace_ids[40])
+    grader = Grader(
+        project_id=old_trace.project_id,
+        name="Grader",
+        prompt="Grade this",
+        score_type=ScoreType.FLOAT,
+        model="gpt-4",
+        max_output_tokens=100,
+    )
+    test_session.add(grader)
+    await test_session.flush()
+    test_session.add(
+        Grade(
+            grader_id=grader.id,
+            trace_id=old_trace.id,
+            score_float=0.5,
+            grading_started_at=NOW,
+        ),
+    )
+    await test_session.commit()
+
+    manager = TraceRetentionManager(
+        settings=Settings(trace_retention_days=30, http_trace_retention_days=7),
+    )
+    assert await manager.run(test_session, now=NOW) == []
+    test_session.expire_all()
+
+    traces = (await test_session.execute(select(Trace))).unique().scalars().all()
+    assert {trace.id: trace.http_trace_id is not None for trace in traces} == {
+        trace_ids[10]: False,
+        trace_ids[1]: True,
+    }
+    http_traces = (await test_session.execute(select(HTTPTrace))).unique().scalars().all()
+    assert [http_trace.started_at.day for http_trace in http_traces] == [
+        (NOW - timedelta(days=1)).day,
+    ]
+    items = (await test_session.execute(select(TraceInputItem.trace_id))).scalars().all()
+    assert sorted(items) == sorted([trace_ids[10], trace_ids[1]])
+    assert (await test_session.execute(select(Grade))).scalars().all() == []
+
+    response = await client.get("/v1/traces")
+    assert sorted(trace["id"] for trace in response.json()) == sorted(
+        [trace_ids[10], trace_ids[1]],
+    )
+
+
+def _execute(url: str, *statements: str) -> list:
+    """Run SQL statements in one transaction and return the rows of the last one."""
+
+    async def execute():
+        engine = create_async_engine(url)
+        try:
+            async with engine.begin() as connection:
+                for statement in statements:
+                    result = await connection.execute(text(statement))
+                return result.all() if result.returns_rows else []
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(execute())
+
+
+def _is_partitioned(url: str, table: str) -> bool:
+    return _execute(
+        url,
+        f"SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        f"WHERE partrelid = to_regclass('{table}'))",
+    )[0][0]
+
+
+def _primary_key(url: str, table: str) -> list[str]:
+    rows = _execute(
+        url,
+        f"SELECT a.attname FROM pg_index i "
+        f"JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+        f"WHERE i.indrelid = '{table}'::regclass AND i.indisprimary ORDER BY a.attname",
+    )
+    return [row[0] for row in rows]
+
+
+@pytest.fixture
+def postgres_alembic(monkeypatch):
+    """Alembic config for the emptied database at TEST_POSTGRES_URL."""
+    url = os.environ["TEST_POSTGRES_URL"]
+    _execute(
+        url,
+        "DROP SCHEMA IF EXISTS public CASCADE",
+        "DROP SCHEMA IF EXISTS trace_archive CASCADE",
+        "CREATE SCHEMA public",
+    )
+    monkeypatch.setenv("DATABASE_URL", url)
+    get_settings.cache_clear()
+    yield Config(str(ALEMBIC_INI))
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+def postgres_url(postgres_alembic) -> str:
+    """URL of a database migrated to the latest revision."""
+    command.upgrade(postgres_alembic, "head")
+    return os.environ["TEST_POSTGRES_URL"]
+
+
+@pytest.mark.postgres
+def test_partition_migration_round_trip(postgres_alembic):
+    """The partitioning migration can be downgraded and upgraded again."""
+    url = os.environ["TEST_POSTGRES_URL"]
+    command.upgrade(postgres_alembic, "head")
+    assert _is_partitioned(url, "trace")
+    assert _primary_key(url, "trace") == ["id", "started_at"]
+    # The models keep id-only keys, which autogenerate doesn't try to restore
+    command.check(postgres_alembic)
+
+    started_at = datetime.now(UTC).isoformat()
+    _execute(
+        url,
+        "INSERT INTO project (name) VALUES ('Project')",
+        f"INSERT INTO trace (project_id, model, started_at) "
+        f"SELECT id, 'gpt-4', '{started_at}' FROM project",
+        f"INSERT INTO trace_input_item (trace_id, trace_started_at, type, data, position) "
+        f"SELECT id, started_at, 'MESSAGE', '{{}}', 0 FROM trace",
+    )
+
+    command.downgrade(postgres_alembic, "7f3a2c9d1b64")
+    for table in ("http_trace", "trace", "trace_input_item", "trace_output_item"):
+        assert not _is_partitioned(url, table)
+        assert _primary_key(url, table) == ["id"]
+    assert _execute(url, ITEMS_WITH_TRACES)[0][0] == 1
+
+    command.upgrade(postgres_alembic, "head")
+    for table in ("http_trace", "trace"):
+        assert _is_partitioned(url, table)
+        assert _primary_key(url, table) == ["id", "started_at"]
+    for table in ("trace_input_item", "trace_output_item"):
+        assert _is_partitioned(url, table)
+        assert _primary_key(url, table) == ["id", "trace_started_at"]
+    assert _execute(url, ITEMS_WITH_TRACES)[0][0] == 1
+    command.check(postgres_alembic)
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_retention_drops_postgres_partitions(postgres_url: str):
+    """Expired days are removed as partitions, with the grades of their traces."""
+    engine = create_async_engine(postgres_url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    ages = (40, 10, 1)
+    try:
+        async with session_maker() as session:
+            manager = TraceRetentionManager(
+                session_maker,
+                Settings(trace_retention_days=30, http_trace_retention_days=7),
+            )
+            for age in ages:
+                day = (NOW - timedelta(days=age)).date()
+                await manager.ensure_partitions(session, day, day)
+
+            project = Project(name="Project")
+            traces = {}
+            for age in ages:
+                started_at = NOW - timedelta(days=age)
+                traces[age] = Trace(
+                    project=project,
+                    model="gpt-4",
+                    started_at=started_at,
+                    http_trace=HTTPTrace(
+                        started_at=started_at,
+                        completed_at=started_at,
+                        status_code=200,
+                        request="{}",
+                        request_headers={},
+                        response="{}",
+                        response_headers={},
+                    ),
+                    input_items=[
+                        TraceInputItem(
+                            type=ItemType.MESSAGE,
+                            data={"role": "user", "content": "Hello"},
+                            position=0,
+                        ),
+                    ],
+                )
+            session.add_all(traces.values())
+            grader = Grader(
+                project=project,
+                name="Grader",
+                prompt="Grade this",
+                score_type=ScoreType.FLOAT,
+                model="gpt-4",
+                max_output_tokens=100,
+            )
+            session.add(grader)
+            await session.flush()
+            session.add(
+                Grade(
+                    grader_id=grader.id,
+                    trace_id=traces[40].id,
+                    score_float=0.5,
+                    grading_started_at=NOW,
+                ),
+            )
+            await session.commit()
+            trace_ids = {age: trace.id for age, trace in traces.items()}
+
+            removed = await manager.run(session, now=NOW)
+            expired_day = (NOW - timedelta(days=40)).date()
+            assert sorted(removed) == sorted(
+                [
+                    partition_name("http_trace", expired_day),
+                    partition_name("http_trace", (NOW - timedelta(days=10)).date()),
+                    partition_name("trace", expired_day),
+                    partition_name("trace_input_item", expired_day),
+                    partition_name("trace_output_item", expired_day),
+                ],
+            )
+            for name in removed:
+                assert await session.scalar(text(f"SELECT to_regclass('{name}')")) is None
+
+            session.expire_all()
+            rows = await session.execute(select(Trace.id, Trace.http_trace_id))
+            assert {trace_id: link is not None for trace_id, link in rows} == {
+                trace_ids[10]: False,
+                trace_ids[1]: True,
+            }
+            items = await session.scalars(select(TraceInputItem.trace_id))
+            assert sorted(items.all()) == sorted([trace_ids[10], trace_ids[1]])
+            assert (await session.scalars(select(Grade.id))).all() == []
+    finally:
+        await engine.dispose()
@@ -112,3 +112,84 @@ async def test_list_traces_with_ai_score_and_sorting(
     assert data[0]["id"] == trace2.id
     assert data[1]["id"] == trace1.id
     assert data[2]["id"] == trace3.id
+
+
+@pytest.mark.asyncio
+async def test_list_traces_cursor_pagination(
+    client: AsyncClient,
+    test_session: AsyncSession,
+):
+    project = Project(name="Test Project")
+    test_session.add(project)
+    await test_session.flush()
+
+    grader = Grader(
+        project_id=project.id,
+        name="Test Grader",
+        prompt="Grade this",
+        score_type=ScoreType.FLOAT,
+        model="gpt-4",
+        max_output_tokens=100,
+    )
+    test_session.add(grader)
+    await test_session.flush()
+
+    # Two traces share each timestamp and score, and every third is unscored
+    traces = []
+    for i in range(9):
+        trace = Trace(
+            project_id=project.id,
+            model="gpt-4",
+            started_at=datetime(2025, 10, 15, 10, i // 2, 0),
+            input_items=[],
+            output_items=[],
+        )
+        test_session.add(trace)
+        await test_session.flush()
+        if i % 3:
+            test_session.add(
+                Grade(
+                    grader_id=grader.id,
+                    trace_id=trace.id,
+                    score_float=(i % 2) / 2,
+                    grading_started_at=datetime.now(),
+                ),
+            )
+        traces.append(trace)
+    await test_session.commit()
+
+    async def collect(params: str) -> list[dict]:
+        pages, cursor = [], None
+        while True:
+            url = f"/v1/traces?limit=2&{params}"
+            if cursor:
+                url += f"&cursor={cursor}"
+            response = await client.get(url)
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if cursor is None:
+                break
+        assert all(len(page) == 2 for page in pages[:-1])
+        return [trace for page in pages for trace in page]
+
+    by_time = await collect("sort_order=desc")
+    assert [t["id"] for t in by_time] == [
+        trace.id
+        for trace in sorted(traces, key=lambda t: (t.started_at, t.id), reverse=True)
+    ]
+    assert [t["id"] for t in await collect("sort_order=asc")] == [
+        t["id"] for t in reversed(by_time)
+    ]
+
+    for order in ("asc", "desc"):
+        by_score = await collect(f"sort_field=ai_score&sort_order={order}")
+        scored = [(t["ai_score"], t["id"]) for t in by_score if t["ai_score"] is not None]
+        unscored = [t["id"] for t in by_score if t["ai_score"] is None]
+        assert len(by_score) == len(traces)
+        assert scored == sorted(scored, reverse=order == "desc")
+        assert unscored == sorted(unscored, reverse=order == "desc")
+        assert [t["ai_score"] for t in by_score[-len(unscored) :]] == [None] * 3
+
+    response = await client.get("/v1/traces?cursor=not-a-cursor")
+    assert response.status_code == 400
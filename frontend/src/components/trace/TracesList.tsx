@@ -34,6 +34,7 @@ export const TracesList = ({ taskId, implementationId, className }: TracesListPr
     const [timePeriod, setTimePeriod] = useState<TimePeriod>("all");
     const [isLoading, setIsLoading] = useState(false);
     const [hasMore, setHasMore] = useState(true);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [sortField, setSortField] = useState<SortField>("timestamp");
     const [sortDirection, setSortDirection] = useState<SortDirection>("desc");
 
@@ -103,9 +104,8 @@ export const TracesList = ({ taskId, implementationId, className }: TracesListPr
             setIsLoading(true);
             try {
                 const { start_time, end_time } = getTimeRange(timePeriod);
-                const fetchedTraces = await tracesApi.fetchTraces({
+                const page = await tracesApi.fetchTracesPage({
                     limit: ITEMS_PER_LOAD,
-                    offset: 0,
                     start_time,
                     end_time,
                     sort_field: sortField,
@@ -113,9 +113,10 @@ export const TracesList = ({ taskId, implementationId, className }: TracesListPr
                     task_id: taskId,
                     implementation_id: implementationId,
                 });
-                console.log("Fetched traces from API:", fetchedTraces.length);
-                setTraces(fetchedTraces);
-                setHasMore(fetchedTraces.length === ITEMS_PER_LOAD);
+                console.log("Fetched traces from API:", page.traces.length);
+                setTraces(page.traces);
+                setNextCursor(page.nextCursor);
+                setHasMore(page.nextCursor !== null);
                 // Reset selection when filters change
                 setSelectedTrace(null);
             } catch (error) {
@@ -137,14 +138,14 @@ export const TracesList = ({ taskId, implementationId, className }: TracesListPr
 
     // Load more traces function
     const loadMoreTraces = useCallback(async () => {
-        if (isLoading || !hasMore) return;
+        if (isLoading || !hasMore || !nextCursor) return;
 
         setIsLoading(true);
         try {
             const { start_time, end_time } = getTimeRange(timePeriod);
-            const fetchedTraces = await tracesApi.fetchTraces({
+            const page = await tracesApi.fetchTracesPage({
                 limit: ITEMS_PER_LOAD,
-                offset: traces.length,
+                cursor: nextCursor,
                 start_time,
                 end_time,
                 sort_field: sortField,
@@ -153,17 +154,16 @@ export const TracesList = ({ taskId, implementationId, className }: TracesListPr
                 implementation_id: implementationId,
             });
 
-            if (fetchedTraces.length < ITEMS_PER_LOAD) {
-                setHasMore(false);
-            }
+            setNextCursor(page.nextCursor);
+            setHasMore(page.nextCursor !== null);
 
-            setTraces((prev) => [...prev, ...fetchedTraces]);
+            setTraces((prev) => [...prev, ...page.traces]);
         } catch (error) {
             console.error("Failed to load more traces:", error);
         } finally {
             setIsLoading(false);
         }
-    }, [isLoading, hasMore, traces.length, timePeriod, sortField, sortDirection, taskId, implementationId]);
+    }, [isLoading, hasMore, nextCursor, timePeriod, sortField, sortDirection, taskId, implementationId]);
 
     // Handle sorting
     const handleSort = (field: SortField) => {
@@ -6,6 +6,7 @@ export interface ApiResponse<T> {
     data: T;
     message?: string;
     status: number;
+    headers?: Headers;
 }
 
 export interface ApiError {
@@ -94,6 +95,7 @@ class ApiClient {
             return {
                 data,
                 status: response.status,
+                headers: response.headers,
             };
         } catch (error) {
             if (error instanceof Error) {
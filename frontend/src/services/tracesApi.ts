@@ -46,6 +46,7 @@ export interface BackendTrace {
 export interface FetchTracesParams {
     limit?: number;
     offset?: number;
+    cursor?: string | null;
     task_id?: number;
     implementation_id?: number;
     start_time?: string;
@@ -54,6 +55,12 @@ export interface FetchTracesParams {
     sort_order?: "asc" | "desc";
 }
 
+export interface TracesPage {
+    traces: Trace[];
+    // Pass back as `cursor` to fetch the next page; null on the last page
+    nextCursor: string | null;
+}
+
 // Map backend trace to frontend trace format
 const mapBackendTraceToFrontend = (backendTrace: BackendTrace): Trace => {
     console.log("Mapping backend trace:", {
@@ -185,13 +192,25 @@ export const tracesApi = {
      * Fetch traces with pagination support
      */
     async fetchTraces(params: FetchTracesParams = {}): Promise<Trace[]> {
-        const { limit = 25, offset = 0, task_id, implementation_id, start_time, end_time, sort_field, sort_order } = params;
+        const page = await this.fetchTracesPage(params);
+        return page.traces;
+    },
+
+    /**
+     * Fetch a page of traces along with the cursor of the next page
+     */
+    async fetchTracesPage(params: FetchTracesParams = {}): Promise<TracesPage> {
+        const { limit = 25, offset = 0, cursor, task_id, implementation_id, start_time, end_time, sort_field, sort_order } = params;
 
         const queryParams = new URLSearchParams({
             limit: limit.toString(),
             offset: offset.toString(),
         });
 
+        if (cursor) {
+            queryParams.append("cursor", cursor);
+        }
+
         if (task_id !== undefined) {
             queryParams.append("task_id", task_id.toString());
         }
@@ -223,7 +242,10 @@ export const tracesApi = {
             `/v1/traces?${queryParams.toString()}`,
         );
 
-        return response.data.map(mapBackendTraceToFrontend);
+        return {
+            traces: response.data.map(mapBackendTraceToFrontend),
+            nextCursor: response.headers?.get("X-Next-Cursor") ?? null,
+        };
     },
 
     /**
@@ -0,0 +1,101 @@
+"""Microbenchmark for call path extraction.
+
+Compares ``extract_call_path`` with the previous ``inspect.stack()`` based
+implementation at several stack depths. The innermost frames are compiled
+with a standard library filename so both versions have to walk past them.
+
+Usage:
+    python benchmarks/bench_call_path.py
+"""
+
+from __future__ import annotations
+
+import inspect
+import os
+import site
+import sysconfig
+import timeit
+from pathlib import Path
+
+from r4u.utils import extract_call_path
+
+DEPTHS = (20, 100, 300)
+LIBRARY_FRAMES = 15
+
+
+def legacy_extract_call_path(max_depth: int = 100) -> tuple[str, int] | None:
+    """The previous implementation, kept for comparison."""
+    stack = [frame for frame in inspect.stack() if frame.filename]
+
+    library_paths = set()
+    for path in site.getsitepackages():
+        library_paths.add(Path(path).resolve())
+    user_site = site.getusersitepackages()
+    if user_site:
+        library_paths.add(Path(user_site).resolve())
+    library_paths.add(Path(sysconfig.get_path("stdlib")).resolve())
+
+    for frame_info in stack[1 : max_depth + 1]:
+        file_path = frame_info.filename
+        resolved_path = Path(file_path).resolve()
+        is_library = False
+        for lib_path in library_paths:
+            try:
+                resolved_path.relative_to(lib_path)
+                is_library = True
+                break
+            except ValueError:
+                continue
+        if is_library or "site-packages" in file_path:
+            continue
+        if file_path.startswith("<") or file_path == "__main__":
+            continue
+        try:
+            relative_path = Path(file_path).relative_to(Path.cwd())
+            call_path = f"{relative_path}::{frame_info.function}"
+        except ValueError:
+            call_path = f"{file_path}::{frame_info.function}"
+        return (call_path, frame_info.lineno)
+    return None
+
+
+# Recursion through a "library" file, like an HTTP client calling the tracer
+_LIBRARY_SOURCE = """
+def library_frames(depth, func):
+    if depth == 0:
+        return func()
+    return library_frames(depth - 1, func)
+"""
+_namespace: dict = {}
+exec(
+    compile(_LIBRARY_SOURCE, os.path.join(sysconfig.get_path("stdlib"), "bench_lib.py"), "exec"),
+    _namespace,
+)
+library_frames = _namespace["library_frames"]
+
+
+def application_frames(depth: int, func):
+    if depth == 0:
+        return library_frames(LIBRARY_FRAMES, func)
+    return application_frames(depth - 1, func)
+
+
+def measure(func, depth: int, number: int) -> float:
+    """Return the mean time per call in microseconds at the given stack depth."""
+    app_depth = max(depth - LIBRARY_FRAMES, 0)
+    seconds = min(
+        timeit.repeat(lambda: application_frames(app_depth, func), number=number, repeat=3),
+    )
+    return seconds / number * 1e6
+
+
+def main() -> None:
+    print(f"{'depth':>6} {'inspect.stack':>16} {'_getframe':>12} {'speedup':>9}")
+    for depth in DEPTHS:
+        legacy = measure(legacy_extract_call_path, depth, number=20)
+        current = measure(extract_call_path, depth, number=2000)
+        print(f"{depth:>6} {legacy:>14.1f}us {current:>10.1f}us {legacy / current:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
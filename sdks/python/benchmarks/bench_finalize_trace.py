@@ -0,0 +1,75 @@
+"""Microbenchmark for the per-request cost of finalizing a trace.
+
+Compares building a validated, redacted ``HTTPTrace`` on the request path
+with building a ``RawHTTPTrace`` record whose validation is deferred to the
+sender thread.
+
+Usage:
+    python benchmarks/bench_finalize_trace.py
+"""
+
+from __future__ import annotations
+
+import timeit
+from datetime import datetime, timezone
+
+import httpx
+
+from r4u.client import HTTPTrace, RawHTTPTrace
+from r4u.utils import redact_headers
+
+REQUEST = httpx.Request(
+    "POST",
+    "https://api.openai.com/v1/chat/completions",
+    headers={"Authorization": "Bearer sk-test", "Content-Type": "application/json"},
+    content=b'{"model":"gpt-4o-mini","messages":[]}' * 20,
+)
+RESPONSE = httpx.Response(
+    200,
+    headers={"Content-Type": "application/json", "x-request-id": "req_123"},
+    content=b'{"choices":[{"message":{"content":"hi"}}]}' * 50,
+    request=REQUEST,
+)
+STARTED_AT = datetime.now(timezone.utc)
+
+
+def validated() -> HTTPTrace:
+    return HTTPTrace(
+        url=str(REQUEST.url),
+        method="POST",
+        started_at=STARTED_AT,
+        completed_at=datetime.now(timezone.utc),
+        status_code=RESPONSE.status_code,
+        request=REQUEST.content,
+        request_headers=redact_headers(dict(REQUEST.headers)),
+        request_method="POST",
+        request_path=REQUEST.url.path,
+        response=RESPONSE.content,
+        response_headers=redact_headers(dict(RESPONSE.headers)),
+    )
+
+
+def raw() -> RawHTTPTrace:
+    return RawHTTPTrace(
+        url=str(REQUEST.url),
+        method="POST",
+        started_at=STARTED_AT,
+        completed_at=datetime.now(timezone.utc),
+        status_code=RESPONSE.status_code,
+        request=REQUEST.content,
+        request_headers=REQUEST.headers,
+        request_method="POST",
+        response=RESPONSE.content,
+        response_headers=RESPONSE.headers,
+    )
+
+
+def main() -> None:
+    number = 20000
+    for name, func in (("HTTPTrace + redaction", validated), ("RawHTTPTrace", raw)):
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        print(f"{name:>22}: {seconds / number * 1e6:.2f}us per trace")
+
+
+if __name__ == "__main__":
+    main()
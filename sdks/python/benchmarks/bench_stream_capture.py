@@ -0,0 +1,67 @@
+"""Microbenchmark for streaming response capture.
+
+Compares the capture overhead of ``BodyCapture`` with the previous
+``bytes +=`` accumulation as the number of streamed SSE chunks grows.
+
+Usage:
+    python benchmarks/bench_stream_capture.py
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from r4u.tracing.http.capture import BodyCapture
+
+CHUNK = b'data: {"choices":[{"delta":{"content":"token "}}]}\n\n'
+STREAM_LENGTHS = (100, 1_000, 10_000, 50_000)
+
+
+def concat_bytes(chunks: list[bytes]) -> bytes:
+    collected = b""
+    for chunk in chunks:
+        collected += chunk
+    return collected
+
+
+def concat_text(lines: list[str]) -> bytes:
+    collected = b""
+    for line in lines:
+        collected += line.encode("utf-8") + b"\n"
+    return collected
+
+
+def capture_bytes(chunks: list[bytes]) -> bytes:
+    body = BodyCapture()
+    for chunk in chunks:
+        body.append(chunk)
+    return body.getvalue()
+
+
+def capture_text(lines: list[str]) -> bytes:
+    body = BodyCapture()
+    for line in lines:
+        body.append_line(line)
+    return body.getvalue()
+
+
+def best_of(func, data, repeat: int = 3) -> float:
+    return min(timeit.repeat(lambda: func(data), number=1, repeat=repeat))
+
+
+def main() -> None:
+    print(f"{'chunks':>8} {'size':>10} {'bytes +=':>12} {'capture':>12} {'text +=':>12} {'capture':>12}")
+    for length in STREAM_LENGTHS:
+        chunks = [CHUNK] * length
+        lines = [CHUNK.decode().rstrip("\n")] * length
+        print(
+            f"{length:>8} {len(CHUNK) * length:>10} "
+            f"{best_of(concat_bytes, chunks) * 1e3:>10.2f}ms "
+            f"{best_of(capture_bytes, chunks) * 1e3:>10.2f}ms "
+            f"{best_of(concat_text, lines) * 1e3:>10.2f}ms "
+            f"{best_of(capture_text, lines) * 1e3:>10.2f}ms",
+        )
+
+
+if __name__ == "__main__":
+    main()
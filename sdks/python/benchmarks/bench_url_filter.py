@@ -0,0 +1,84 @@
+"""Microbenchmark for URL filtering.
+
+Compares ``URLFilter.should_trace`` with the previous fnmatch loop as the
+deny list grows, both on a cold decision cache and on repeated URLs.
+
+Usage:
+    python benchmarks/bench_url_filter.py
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import timeit
+from urllib.parse import urlparse
+
+from r4u.tracing.http.filters import URLFilter
+
+DENY_SIZES = (0, 10, 100, 500)
+URLS = [
+    "https://api.openai.com/v1/chat/completions",
+    "https://api.anthropic.com/v1/messages",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini:generateContent",
+    "https://internal.example.com/health",
+]
+
+
+def legacy_matches_any_pattern(url: str, patterns: set[str]) -> bool:
+    """The previous implementation, kept for comparison."""
+    if not patterns:
+        return False
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    path = parsed.path
+    url_variations = [
+        url,
+        f"{parsed.scheme}://{host}{path}",
+        f"{parsed.scheme}://{host}/*",
+        host,
+        f"{host}/*",
+    ]
+    for pattern in patterns:
+        for variation in url_variations:
+            if fnmatch.fnmatch(variation.lower(), pattern.lower()):
+                return True
+    return False
+
+
+def deny_patterns(count: int) -> list[str]:
+    patterns = [f"https://blocked-{i}.example.com/*" for i in range(count - count // 10)]
+    patterns += [f"*.tenant-{i}.example.net/*" for i in range(count // 10)]
+    return patterns
+
+
+def main() -> None:
+    print(f"{'deny':>6} {'fnmatch':>12} {'index':>12} {'cached':>12}")
+    for size in DENY_SIZES:
+        deny = deny_patterns(size)
+        allow = URLFilter().get_allow_urls()
+        allow_set, deny_set = set(allow), set(deny)
+        cold = URLFilter(deny_urls=deny, decision_cache_size=0)
+        warm = URLFilter(deny_urls=deny)
+
+        def legacy():
+            for url in URLS:
+                if not legacy_matches_any_pattern(url, deny_set):
+                    legacy_matches_any_pattern(url, allow_set)
+
+        def indexed():
+            for url in URLS:
+                cold.should_trace(url)
+
+        def cached():
+            for url in URLS:
+                warm.should_trace(url)
+
+        per_call = []
+        for func, number in ((legacy, 20), (indexed, 2000), (cached, 20000)):
+            seconds = min(timeit.repeat(func, number=number, repeat=3))
+            per_call.append(seconds / number / len(URLS) * 1e6)
+        print(f"{size:>6} " + " ".join(f"{value:>10.2f}us" for value in per_call))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Bounded in-memory buffer for traces waiting to be sent."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import random
+import threading
+from collections import deque
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+SAMPLE = "sample"
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, SAMPLE)
+
+# Rough per-trace overhead for URL, headers, timestamps and metadata
+_TRACE_OVERHEAD_BYTES = 512
+
+
+def estimate_trace_size(trace: Any) -> int:
+    """Estimate the memory held by a trace, dominated by its bodies.
+
+    Args:
+        trace: Trace object with ``request`` and ``response`` bodies
+
+    Returns:
+        Approximate size in bytes
+
+    """
+    size = _TRACE_OVERHEAD_BYTES
+    for attr in ("request", "response"):
+        body = getattr(trace, attr, None)
+        if body:
+            size += len(body)
+    return size
+
+
+class TraceBuffer:
+    """Thread-safe trace queue bounded by item count and total bytes.
+
+    When a new trace does not fit, the drop policy decides what is discarded:
+
+    - ``drop_oldest``: evict the oldest queued traces to make room
+    - ``drop_newest``: discard the incoming trace
+    - ``sample``: keep a uniform random sample (reservoir sampling) of all
+      traces offered since the last drain
+
+    Dropped traces are counted and exposed through :meth:`stats`.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        drop_policy: str = DROP_OLDEST,
+    ):
+        """Initialize the buffer.
+
+        Args:
+            max_items: Maximum number of queued traces
+            max_bytes: Maximum estimated size of queued traces in bytes
+            drop_policy: One of ``drop_oldest``, ``drop_newest`` or ``sample``
+
+        Raises:
+            ValueError: If a limit is not positive or the policy is unknown
+
+        """
+        if max_items <= 0 or max_bytes <= 0:
+            raise ValueError("Queue limits must be positive")
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(
+                f"Unknown drop policy {drop_policy!r}, expected one of {DROP_POLICIES}",
+            )
+
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.drop_policy = drop_policy
+
+        self._items: deque[tuple[Any, int]] = deque()
+        self._bytes = 0
+        self._offered_since_drain = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._interrupted = False
+
+        self.dropped_count = 0
+        self.dropped_bytes = 0
+        self._warned = False
+
+    def put(self, trace: Any) -> bool:
+        """Add a trace, applying the drop policy when the buffer is full.
+
+        Args:
+            trace: Trace to queue
+
+        Returns:
+            True if the trace was queued, False if it was dropped
+
+        """
+        size = estimate_trace_size(trace)
+        with self._lock:
+            self._offered_since_drain += 1
+
+            if size > self.max_bytes:
+                self._record_drop(size)
+                return False
+
+            if not self._fits(size):
+                if self.drop_policy == DROP_NEWEST:
+                    self._record_drop(size)
+                    return False
+
+                if self.drop_policy == SAMPLE:
+                    # Reservoir sampling: keep the new trace with probability k/n
+                    keep = random.random() < len(self._items) / self._offered_since_drain  # noqa: S311
+                    if not keep:
+                        self._record_drop(size)
+                        return False
+                    while self._items and not self._fits(size):
+                        index = random.randrange(len(self._items))  # noqa: S311
+                        _, evicted_size = self._items[index]
+                        del self._items[index]
+                        self._bytes -= evicted_size
+                        self._record_drop(evicted_size)
+                else:
+                    while self._items and not self._fits(size):
+                        _, evicted_size = self._items.popleft()
+                        self._bytes -= evicted_size
+                        self._record_drop(evicted_size)
+
+            self._items.append((trace, size))
+            self._bytes += size
+            self._not_empty.notify()
+            return True
+
+    def put_nowait(self, trace: Any) -> bool:
+        """Alias of :meth:`put`; the buffer never blocks."""
+        return self.put(trace)
+
+    def get_nowait(self) -> Any:
+        """Remove and return the oldest trace.
+
+        Raises:
+            queue.Empty: If the buffer is empty
+
+        """
+        with self._lock:
+            if not self._items:
+                raise queue.Empty
+            trace, size = self._items.popleft()
+            self._bytes -= size
+            return trace
+
+    def drain(self, max_items: int | None = None) -> list[Any]:
+        """Remove and return queued traces, oldest first.
+
+        Args:
+            max_items: Optional maximum number of traces to return
+
+        Returns:
+            The removed traces
+
+        """
+        with self._lock:
+            count = len(self._items)
+            if max_items is not None:
+                count = min(count, max_items)
+            traces = []
+            for _ in range(count):
+                trace, size = self._items.popleft()
+                self._bytes -= size
+                traces.append(trace)
+            self._offered_since_drain = len(self._items)
+            self._warned = False
+            return traces
+
+    def wait(self, min_items: int, timeout: float | None = None) -> bool:
+        """Block until enough traces are queued, the timeout expires, or interrupted.
+
+        Args:
+            min_items: Number of queued traces that ends the wait early
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if at least ``min_items`` traces are queued
+
+        """
+        with self._not_empty:
+            self._not_empty.wait_for(
+                lambda: self._interrupted or len(self._items) >= min_items,
+                timeout=timeout,
+            )
+            self._interrupted = False
+            return len(self._items) >= min_items
+
+    def interrupt(self) -> None:
+        """Wake up a thread blocked in :meth:`wait`."""
+        with self._not_empty:
+            self._interrupted = True
+            self._not_empty.notify_all()
+
+    def qsize(self) -> int:
+        """Return the number of queued traces."""
+        return len(self._items)
+
+    def empty(self) -> bool:
+        """Return True if no traces are queued."""
+        return not self._items
+
+    @property
+    def size_bytes(self) -> int:
+        """Estimated size of the queued traces in bytes."""
+        return self._bytes
+
+    def stats(self) -> dict[str, int]:
+        """Return queue depth and drop counters."""
+        with self._lock:
+            return {
+                "queued": len(self._items),
+                "queued_bytes": self._bytes,
+                "dropped": self.dropped_count,
+                "dropped_bytes": self.dropped_bytes,
+            }
+
+    def _fits(self, size: int) -> bool:
+        return (
+            len(self._items) < self.max_items and self._bytes + size <= self.max_bytes
+        )
+
+    def _record_drop(self, size: int) -> None:
+        self.dropped_count += 1
+        self.dropped_bytes += size
+        if not self._warned:
+            self._warned = True
+            logger.warning(
+                f"R4U trace queue is full, dropping traces ({self.drop_policy})",
+            )
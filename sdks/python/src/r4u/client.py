@@ -3,19 +3,42 @@
 import atexit
 import logging
 import os
-import queue
+import random
 import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import lru_cache
-from time import sleep
 from typing import Any
+from urllib.parse import urlparse
 
 import httpx
 from pydantic import BaseModel, ConfigDict, Field
 
+from r4u.buffer import DROP_OLDEST, TraceBuffer
+from r4u.encoding import JSON_FORMAT, encode_traces, validate_wire_options
+from r4u.spool import TraceSpool
+from r4u.utils import redact_headers
+
 logger = logging.getLogger(__name__)
 
+# Backoff for retried batch sends: full jitter over base * 2**attempt, capped
+_RETRY_BASE_DELAY = 0.5
+_RETRY_MAX_DELAY = 10.0
+
+# Minimum seconds between attempts to replay the disk spool after a failure
+_SPOOL_REPLAY_INTERVAL = 5.0
+
+# Ingest modes and the endpoint each sends batches to: "sync" waits for the
+# server to create the traces, "async" returns once the raw traces are stored
+SYNC_INGEST = "sync"
+ASYNC_INGEST = "async"
+_INGEST_PATHS = {
+    SYNC_INGEST: "/v1/http-traces/batch",
+    ASYNC_INGEST: "/v1/http-traces/ingest",
+}
+
 
 class HTTPTrace(BaseModel):
     """Schema for HTTP trace creation (provider-agnostic)."""
@@ -68,6 +91,82 @@ class HTTPTrace(BaseModel):
     model_config = ConfigDict(extra="allow")
 
 
+class RawHTTPTrace:
+    """Unvalidated trace record captured by the HTTP wrappers.
+
+    Holds references to the captured data as-is (header objects of the HTTP
+    library, unredacted) so that creating it on the request path is cheap.
+    Redaction and validation happen in :meth:`to_http_trace`.
+    """
+
+    __slots__ = (
+        "url",
+        "method",
+        "path",
+        "started_at",
+        "completed_at",
+        "status_code",
+        "error",
+        "request",
+        "request_headers",
+        "request_method",
+        "request_path",
+        "response",
+        "response_headers",
+    )
+
+    def __init__(
+        self,
+        url: str,
+        method: str,
+        started_at: datetime,
+        completed_at: datetime,
+        status_code: int,
+        request: bytes,
+        request_headers: Any,
+        response: bytes,
+        response_headers: Any,
+        path: str | None = None,
+        error: str | None = None,
+        request_method: str | None = None,
+        request_path: str | None = None,
+    ):
+        self.url = url
+        self.method = method
+        self.path = path
+        self.started_at = started_at
+        self.completed_at = completed_at
+        self.status_code = status_code
+        self.error = error
+        self.request = request
+        self.request_headers = request_headers
+        self.request_method = request_method
+        self.request_path = request_path
+        self.response = response
+        self.response_headers = response_headers
+
+    def to_http_trace(self) -> HTTPTrace:
+        """Redact the headers and validate the record into an HTTPTrace."""
+        request_path = self.request_path
+        if request_path is None:
+            request_path = urlparse(self.url).path
+        return HTTPTrace(
+            url=self.url,
+            method=self.method,
+            path=self.path,
+            started_at=self.started_at,
+            completed_at=self.completed_at,
+            status_code=self.status_code,
+            error=self.error,
+            request=self.request,
+            request_headers=redact_headers(dict(self.request_headers or {})),
+            request_method=self.request_method,
+            request_path=request_path,
+            response=self.response,
+            response_headers=redact_headers(dict(self.response_headers or {})),
+        )
+
+
 class AbstractTracer(ABC):
     """Abstract base class for HTTP request tracing."""
 
@@ -81,6 +180,18 @@ class AbstractTracer(ABC):
         """
         raise NotImplementedError
 
+    def log_raw(self, record: RawHTTPTrace) -> None:
+        """Log a trace record captured by the HTTP wrappers.
+
+        Validates the record and passes it to :meth:`log`. Tracers that can do
+        this later, off the request path, override this method.
+
+        Args:
+            record: Raw trace record to log.
+
+        """
+        self.log(record.to_http_trace())
+
 
 class ConsoleTracer(AbstractTracer):
     """Tracer for printing HTTP traces to the console."""
@@ -103,20 +214,135 @@ class R4UClient(AbstractTracer):
         api_url: str = "http://localhost:8000",
         api_key: str | None = None,
         timeout: float = 30.0,
+        wire_format: str | None = None,
+        compression: str | None = None,
+        max_queue_size: int | None = None,
+        max_queue_bytes: int | None = None,
+        drop_policy: str | None = None,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+        http2: bool | None = None,
+        spool_dir: str | None = None,
+        spool_max_bytes: int | None = None,
+        spool_max_age: float | None = None,
+        ingest_mode: str | None = None,
     ):
         """Initialize the R4U tracer.
 
         Args:
             api_url: Base URL for the R4U Server
             timeout: HTTP request timeout in seconds
+            wire_format: Encoding of trace batches, ``"json"`` (default) or
+                ``"msgpack"``. Defaults to the ``R4U_WIRE_FORMAT`` env var.
+            compression: Optional ``"gzip"`` or ``"zstd"`` compression of trace
+                batches. Defaults to the ``R4U_COMPRESSION`` env var.
+            max_queue_size: Maximum number of traces held in memory. Defaults
+                to the ``R4U_MAX_QUEUE_SIZE`` env var or 10000.
+            max_queue_bytes: Maximum estimated size of queued traces in bytes.
+                Defaults to the ``R4U_MAX_QUEUE_BYTES`` env var or 64 MiB.
+            drop_policy: What to discard when the queue is full:
+                ``"drop_oldest"`` (default), ``"drop_newest"`` or ``"sample"``.
+                Defaults to the ``R4U_DROP_POLICY`` env var.
+            batch_size: Maximum traces per request; a flush starts as soon as
+                this many are queued. Defaults to ``R4U_BATCH_SIZE`` or 100.
+            flush_interval: Maximum seconds a trace waits before being flushed.
+                Defaults to ``R4U_FLUSH_INTERVAL`` or 1.0.
+            max_concurrency: Number of batches sent in parallel. Values above 1
+                send from a thread pool sharing one connection pool. Defaults
+                to ``R4U_MAX_CONCURRENCY`` or 1.
+            max_retries: Retries for connection errors and 5xx/429 responses,
+                with jittered exponential backoff. Defaults to
+                ``R4U_MAX_RETRIES`` or 3.
+            http2: Use HTTP/2 (requires ``pip install r4u[http2]``). Defaults
+                to the ``R4U_HTTP2`` env var.
+            spool_dir: Optional directory where batches that could not be sent
+                are written and replayed from once the server is reachable.
+                Defaults to the ``R4U_SPOOL_DIR`` env var; disabled if unset.
+            spool_max_bytes: Maximum size of the spool in bytes. Defaults to
+                ``R4U_SPOOL_MAX_BYTES`` or 256 MiB.
+            spool_max_age: Seconds after which spooled batches are discarded.
+                Defaults to ``R4U_SPOOL_MAX_AGE`` or 7 days.
+            ingest_mode: ``"sync"`` (default) sends batches to
+                ``/v1/http-traces/batch``, which creates the traces before
+                responding; ``"async"`` sends them to ``/v1/http-traces/ingest``,
+                which stores the raw traces and processes them in the
+                background. Defaults to the ``R4U_INGEST_MODE`` env var.
 
         """
+        self.wire_format = wire_format or os.getenv("R4U_WIRE_FORMAT", JSON_FORMAT)
+        self.compression = compression or os.getenv("R4U_COMPRESSION") or None
+        validate_wire_options(self.wire_format, self.compression)
+        self.ingest_mode = ingest_mode or os.getenv("R4U_INGEST_MODE", SYNC_INGEST)
+        if self.ingest_mode not in _INGEST_PATHS:
+            raise ValueError(
+                f"Unknown ingest mode {self.ingest_mode!r}, "
+                f"expected one of {tuple(_INGEST_PATHS)}",
+            )
+
+        self.batch_size = batch_size or int(os.getenv("R4U_BATCH_SIZE", "100"))
+        self.flush_interval = flush_interval or float(
+            os.getenv("R4U_FLUSH_INTERVAL", "1.0"),
+        )
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("R4U_MAX_CONCURRENCY", "1"),
+        )
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else int(os.getenv("R4U_MAX_RETRIES", "3"))
+        )
+        if http2 is None:
+            http2 = os.getenv("R4U_HTTP2", "").lower() in ("1", "true", "yes")
+
         self.api_url = api_url.rstrip("/")
-        self._sync_client = httpx.Client(base_url=self.api_url, timeout=timeout)
+        self._sync_client = httpx.Client(
+            base_url=self.api_url,
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+        )
         self.api_key = api_key
 
         # Queue-based processing
-        self._trace_queue: queue.Queue = queue.Queue()
+        self._trace_queue = TraceBuffer(
+            max_items=max_queue_size or int(os.getenv("R4U_MAX_QUEUE_SIZE", "10000")),
+            max_bytes=max_queue_bytes
+            or int(os.getenv("R4U_MAX_QUEUE_BYTES", str(64 * 1024 * 1024))),
+            drop_policy=drop_policy or os.getenv("R4U_DROP_POLICY", DROP_OLDEST),
+        )
+        self._sent_count = 0
+        self._failed_count = 0
+        self._spooled_count = 0
+        self._replayed_count = 0
+        self._counters_lock = threading.Lock()
+
+        # Optional disk spool for batches that could not be delivered
+        self._spool: TraceSpool | None = None
+        self._next_replay_at = 0.0
+        spool_dir = spool_dir or os.getenv("R4U_SPOOL_DIR")
+        if spool_dir:
+            self._spool = TraceSpool(
+                spool_dir,
+                max_bytes=spool_max_bytes
+                or int(os.getenv("R4U_SPOOL_MAX_BYTES", str(256 * 1024 * 1024))),
+                max_age=spool_max_age
+                or float(os.getenv("R4U_SPOOL_MAX_AGE", str(7 * 24 * 3600))),
+            )
+
+        # Parallel senders, bounded so a slow backend backs up into the queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._sender_slots = threading.BoundedSemaphore(self.max_concurrency)
+        if self.max_concurrency > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="r4u-sender",
+            )
+
         self._worker_thread: threading.Thread | None = None
         self._stop_worker = threading.Event()
         self._start_worker_thread()
@@ -125,12 +351,51 @@ class R4UClient(AbstractTracer):
     def log(self, trace: HTTPTrace) -> None:
         """Log a trace entry.
 
+        The trace is dropped according to the drop policy if the queue is full.
+
         Args:
             trace: HTTP trace to log.
 
         """
         self._trace_queue.put(trace)
 
+    def log_raw(self, record: RawHTTPTrace) -> None:
+        """Queue a raw trace record without validating it.
+
+        Redaction, validation and encoding happen on the sender thread.
+
+        Args:
+            record: Raw trace record to log.
+
+        """
+        self._trace_queue.put(record)
+
+    @property
+    def dropped_traces(self) -> int:
+        """Number of traces dropped because the queue was full."""
+        return self._trace_queue.dropped_count
+
+    def stats(self) -> dict[str, int]:
+        """Return queue depth and delivery counters.
+
+        Returns:
+            Dict with ``queued``, ``queued_bytes``, ``dropped``,
+            ``dropped_bytes``, ``sent``, ``failed``, ``spooled``, ``replayed``
+            and, when a spool is configured, ``spool_bytes`` and
+            ``spool_discarded``.
+
+        """
+        stats = self._trace_queue.stats()
+        with self._counters_lock:
+            stats["sent"] = self._sent_count
+            stats["failed"] = self._failed_count
+            stats["spooled"] = self._spooled_count
+            stats["replayed"] = self._replayed_count
+        if self._spool:
+            stats["spool_bytes"] = self._spool.size_bytes()
+            stats["spool_discarded"] = self._spool.discarded_count
+        return stats
+
     def _start_worker_thread(self) -> None:
         """Start the worker thread for processing trace queue."""
         if self._worker_thread is None or not self._worker_thread.is_alive():
@@ -142,73 +407,218 @@ class R4UClient(AbstractTracer):
             self._worker_thread.start()
 
     def _worker_loop(self) -> None:
-        """Worker thread loop that processes trace queue every 5 seconds."""
+        """Worker thread loop that flushes the queue by size or by time.
+
+        A flush starts when ``batch_size`` traces are queued or when
+        ``flush_interval`` has elapsed, whichever comes first. Remaining
+        traces are flushed once more when the worker is stopped.
+        """
         while not self._stop_worker.is_set():
             try:
-                # Collect all traces in queue
-                traces_to_send = []
-                while True:
-                    try:
-                        trace = self._trace_queue.get_nowait()
-                        traces_to_send.append(trace)
-                    except queue.Empty:
-                        break
-
-                # Send all traces if any exist
-                if traces_to_send:
-                    self._send_traces_batch(traces_to_send)
-
-                # Wait 1 seconds or until stop event is set
-                self._stop_worker.wait(1.0)
+                self._trace_queue.wait(self.batch_size, timeout=self.flush_interval)
+                self._flush()
+                self._replay_spool()
             except Exception:
                 # Log error but continue processing
                 logger.exception("Error in worker thread")
 
-    def _send_traces_batch(self, traces: list[HTTPTrace]) -> None:
-        """Send a batch of traces to the server.
+        try:
+            self._flush()
+        except Exception:
+            logger.exception("Error flushing traces on shutdown")
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    def _flush(self) -> None:
+        """Send everything currently queued in batches of ``batch_size``."""
+        while True:
+            traces_to_send = self._trace_queue.drain(max_items=self.batch_size)
+            if not traces_to_send:
+                return
+            self._dispatch(traces_to_send)
+
+    def _dispatch(self, traces: list[HTTPTrace | RawHTTPTrace]) -> None:
+        """Send a batch inline or on the sender pool, waiting for a free slot."""
+        if self._executor is None:
+            self._send_traces_batch(traces)
+            return
+
+        self._sender_slots.acquire()
+        try:
+            future = self._executor.submit(self._send_traces_batch, traces)
+        except RuntimeError:
+            # Executor already shut down
+            self._sender_slots.release()
+            self._send_traces_batch(traces)
+            return
+        future.add_done_callback(lambda _: self._sender_slots.release())
+
+    def _send_traces_batch(self, traces: list[HTTPTrace | RawHTTPTrace]) -> None:
+        """Send a batch of traces to the server in a single request.
+
+        Raw records are redacted and validated here, on the sender thread.
 
         Args:
             traces: List of traces to send.
 
         """
-        headers = {
-            "Content-Type": "application/json",
-        }
-        if self.api_key:
-            headers["X_API_KEY"] = self.api_key
+        traces = self._materialize(traces)
+        if not traces:
+            return
+        try:
+            body, headers = encode_traces(
+                traces,
+                wire_format=self.wire_format,
+                compression=self.compression,
+            )
+        except Exception as e:
+            with self._counters_lock:
+                self._failed_count += len(traces)
+            logger.debug(f"Failed to encode {len(traces)} traces: {e}")
+            return
 
         try:
-            for trace in traces:
+            self._post_with_retries(body, headers, self.max_retries)
+        except Exception as e:
+            if self._spool and _is_retriable(e):
+                self._spool_batch(body, headers, len(traces))
+                return
+            with self._counters_lock:
+                self._failed_count += len(traces)
+            logger.debug(f"Failed to send {len(traces)} traces: {e}")
+            return
+
+        with self._counters_lock:
+            self._sent_count += len(traces)
+
+    def _materialize(self, traces: list[HTTPTrace | RawHTTPTrace]) -> list[HTTPTrace]:
+        """Convert raw records to HTTPTrace, counting invalid ones as failed."""
+        materialized = []
+        for trace in traces:
+            if isinstance(trace, RawHTTPTrace):
+                try:
+                    trace = trace.to_http_trace()
+                except Exception as e:
+                    with self._counters_lock:
+                        self._failed_count += 1
+                    logger.debug(f"Dropping invalid trace for {trace.url}: {e}")
+                    continue
+            materialized.append(trace)
+        return materialized
+
+    def _spool_batch(self, body: bytes, headers: dict[str, str], count: int) -> None:
+        """Write an undeliverable batch to the disk spool."""
+        try:
+            self._spool.append(body, headers, count)
+        except OSError as e:
+            with self._counters_lock:
+                self._failed_count += count
+            logger.debug(f"Failed to spool {count} traces: {e}")
+            return
+
+        with self._counters_lock:
+            self._spooled_count += count
+        # Give the backend some time before replaying
+        self._next_replay_at = time.monotonic() + _SPOOL_REPLAY_INTERVAL
+
+    def _replay_spool(self) -> None:
+        """Resend spooled batches if the spool is due for a replay attempt."""
+        if not self._spool or time.monotonic() < self._next_replay_at:
+            return
+        if not self._spool.has_pending():
+            return
+
+        def send(body: bytes, headers: dict[str, str], count: int) -> bool:
+            try:
+                self._post_with_retries(body, headers, retries=0)
+            except Exception as e:
+                if _is_retriable(e):
+                    return False
+                # Rejected by the server, replaying again will not help
+                with self._counters_lock:
+                    self._failed_count += count
+                return True
+            return True
+
+        replayed = self._spool.replay(send)
+        with self._counters_lock:
+            self._replayed_count += replayed
+        if self._spool.has_pending():
+            self._next_replay_at = time.monotonic() + _SPOOL_REPLAY_INTERVAL
+
+    def _post_with_retries(
+        self,
+        body: bytes,
+        headers: dict[str, str],
+        retries: int,
+    ) -> None:
+        """POST a batch, retrying transient failures with exponential backoff.
+
+        Connection errors, timeouts, 429 and 5xx responses are retried up to
+        ``retries`` times with full jitter. Other 4xx responses are raised
+        immediately.
+        """
+        if self.api_key:
+            headers = {**headers, "X_API_KEY": self.api_key}
+
+        attempt = 0
+        while True:
+            try:
                 response = self._sync_client.post(
-                    f"{self.api_url}/v1/http-traces",
-                    json=trace.model_dump(mode="json", by_alias=True),
+                    f"{self.api_url}{_INGEST_PATHS[self.ingest_mode]}",
+                    content=body,
                     headers=headers,
                 )
                 response.raise_for_status()
-        except Exception:
-            # logger.exception("Error sending trace")
-            pass
+                return
+            except Exception as e:
+                if not _is_retriable(e) or attempt >= retries:
+                    raise
+
+            delay = random.uniform(  # noqa: S311
+                0,
+                min(_RETRY_MAX_DELAY, _RETRY_BASE_DELAY * 2**attempt),
+            )
+            attempt += 1
+            # Retries are cut short when the client is shutting down
+            self._stop_worker.wait(delay)
+
+    def stop_worker(self, timeout: float = 5.0) -> None:
+        """Stop the worker thread after it flushes the remaining traces.
+
+        Args:
+            timeout: Maximum time to wait for the final flush in seconds
 
-    def stop_worker(self) -> None:
-        """Stop the worker thread."""
+        """
         self._stop_worker.set()
+        self._trace_queue.interrupt()
         if self._worker_thread and self._worker_thread.is_alive():
-            self._worker_thread.join(timeout=1.0)
+            self._worker_thread.join(timeout=timeout)
 
     def close(self):
-        """Close HTTP clients and stop worker thread."""
-        sleep(1)
+        """Flush pending traces, stop the worker thread and close HTTP clients."""
         self.stop_worker()
         if self._sync_client:
             self._sync_client.close()
 
     def __del__(self):
         """Cleanup on deletion."""
+        if not hasattr(self, "_stop_worker"):
+            # __init__ failed before the worker was set up
+            return
         self.stop_worker()
         if self._sync_client:
             self._sync_client.close()
 
 
+def _is_retriable(error: Exception) -> bool:
+    """Return True for connection errors, timeouts, 429 and 5xx responses."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        return status_code == 429 or status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
 @lru_cache(maxsize=1)
 def get_r4u_client() -> AbstractTracer:
     """Get the R4U client."""
@@ -0,0 +1,124 @@
+"""Wire formats for sending traces to the R4U backend.
+
+Traces are sent as JSON by default. The MessagePack format keeps raw request
+and response bodies as binary fields instead of JSON strings, and either
+format can be compressed with gzip or zstd. The backend selects the decoder
+from the ``Content-Type`` and ``Content-Encoding`` headers.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+JSON_FORMAT = "json"
+MSGPACK_FORMAT = "msgpack"
+WIRE_FORMATS = (JSON_FORMAT, MSGPACK_FORMAT)
+COMPRESSIONS = ("gzip", "zstd")
+
+_CONTENT_TYPES = {
+    JSON_FORMAT: "application/json",
+    MSGPACK_FORMAT: "application/msgpack",
+}
+
+
+def validate_wire_options(wire_format: str, compression: str | None) -> None:
+    """Check that a wire format and compression are known and available.
+
+    Args:
+        wire_format: One of ``"json"`` or ``"msgpack"``
+        compression: One of ``"gzip"``, ``"zstd"`` or None
+
+    Raises:
+        ValueError: If the format or compression is unknown
+        ImportError: If the optional package backing it is not installed
+
+    """
+    if wire_format not in WIRE_FORMATS:
+        raise ValueError(
+            f"Unknown wire format {wire_format!r}, expected one of {WIRE_FORMATS}",
+        )
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(
+            f"Unknown compression {compression!r}, expected one of {COMPRESSIONS}",
+        )
+    if wire_format == MSGPACK_FORMAT:
+        _import_msgpack()
+    if compression == "zstd":
+        _import_zstandard()
+
+
+def encode_traces(
+    traces: list[BaseModel],
+    wire_format: str = JSON_FORMAT,
+    compression: str | None = None,
+) -> tuple[bytes, dict[str, str]]:
+    """Encode a batch of traces for the backend batch endpoint.
+
+    Args:
+        traces: Traces to encode
+        wire_format: One of ``"json"`` or ``"msgpack"``
+        compression: One of ``"gzip"``, ``"zstd"`` or None
+
+    Returns:
+        A tuple of (body, headers) where headers carry the Content-Type and,
+        when compressed, the Content-Encoding
+
+    """
+    if wire_format == MSGPACK_FORMAT:
+        msgpack = _import_msgpack()
+        body = msgpack.packb(
+            [trace.model_dump(mode="python", by_alias=True) for trace in traces],
+            default=_msgpack_default,
+            use_bin_type=True,
+        )
+    else:
+        body = json.dumps(
+            [trace.model_dump(mode="json", by_alias=True) for trace in traces],
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    headers = {"Content-Type": _CONTENT_TYPES[wire_format]}
+    if compression == "gzip":
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    elif compression == "zstd":
+        zstandard = _import_zstandard()
+        body = zstandard.ZstdCompressor().compress(body)
+        headers["Content-Encoding"] = "zstd"
+
+    return body, headers
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """Serialize values MessagePack has no native type for."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError(
+            "The msgpack wire format requires msgpack. "
+            "Install it with: pip install r4u[msgpack]",
+        ) from e
+    return msgpack
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstd compression requires zstandard. "
+            "Install it with: pip install r4u[zstd]",
+        ) from e
+    return zstandard
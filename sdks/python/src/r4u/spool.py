@@ -0,0 +1,208 @@
+"""Disk-backed spool for trace batches that could not be delivered.
+
+Batches are appended, already encoded, to segment files in a spool directory.
+Each record is framed as two big-endian 32-bit lengths followed by a JSON
+metadata block (request headers, trace count) and the encoded body, so a
+segment can be scanned sequentially or memory-mapped without parsing the
+payloads. The active segment is rotated once it exceeds ``segment_bytes``.
+
+Replay sends records from the oldest segment first and deletes a segment
+once all its records are delivered, giving at-least-once delivery across
+backend outages and process restarts. Total size and age are capped: the
+oldest segments are discarded first when a cap is exceeded.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_FRAME_HEADER = struct.Struct(">II")
+_SEGMENT_PREFIX = "segment-"
+_SEGMENT_SUFFIX = ".r4u"
+
+SpoolRecord = tuple[bytes, dict[str, str], int]
+
+
+class TraceSpool:
+    """Append-only, size- and age-capped spool of encoded trace batches.
+
+    A spool directory should be used by a single process at a time.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age: float = 7 * 24 * 3600,
+        segment_bytes: int = 8 * 1024 * 1024,
+    ):
+        """Initialize the spool, creating the directory if needed.
+
+        Args:
+            directory: Directory holding the segment files
+            max_bytes: Maximum total size of all segments in bytes
+            max_age: Maximum age of a segment in seconds before it is discarded
+            segment_bytes: Size after which the active segment is rotated
+
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.segment_bytes = segment_bytes
+
+        self._lock = threading.Lock()
+        self._active: Path | None = None
+        self._sequence = 0
+
+        self.discarded_count = 0
+
+    def append(self, body: bytes, headers: dict[str, str], count: int) -> None:
+        """Append an encoded batch to the active segment.
+
+        Args:
+            body: Encoded (and possibly compressed) batch body
+            headers: Content headers needed to send the body
+            count: Number of traces in the batch
+
+        """
+        meta = json.dumps({"headers": headers, "count": count}).encode("utf-8")
+        with self._lock:
+            if self._active is None or (
+                self._active.exists()
+                and self._active.stat().st_size >= self.segment_bytes
+            ):
+                self._active = self._new_segment_path()
+            with self._active.open("ab") as f:
+                f.write(_FRAME_HEADER.pack(len(meta), len(body)))
+                f.write(meta)
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            self._enforce_limits()
+
+    def has_pending(self) -> bool:
+        """Return True if any spooled batches are waiting to be replayed."""
+        return bool(self._segments())
+
+    def size_bytes(self) -> int:
+        """Return the total size of all segments in bytes."""
+        return sum(self._size(path) for path in self._segments())
+
+    def replay(self, send: Callable[[bytes, dict[str, str], int], bool]) -> int:
+        """Replay spooled batches, oldest first, until one fails.
+
+        Args:
+            send: Callback receiving ``(body, headers, count)``. It returns True
+                when the record is done with (delivered or permanently
+                rejected) and False to stop replaying and keep the record.
+
+        Returns:
+            Number of traces in records that were handed off successfully
+
+        """
+        with self._lock:
+            self._enforce_limits()
+            # Seal the active segment so appends during replay go to a new one
+            self._active = None
+            segments = self._segments()
+
+        replayed = 0
+        for path in segments:
+            records = self._read_segment(path)
+            for index, (body, headers, count) in enumerate(records):
+                if not send(body, headers, count):
+                    if index:
+                        self._rewrite_segment(path, records[index:])
+                    return replayed
+                replayed += count
+            path.unlink(missing_ok=True)
+        return replayed
+
+    def _new_segment_path(self) -> Path:
+        self._sequence += 1
+        name = f"{_SEGMENT_PREFIX}{time.time_ns():020d}-{os.getpid()}-{self._sequence:06d}{_SEGMENT_SUFFIX}"
+        return self.directory / name
+
+    def _segments(self) -> list[Path]:
+        return sorted(self.directory.glob(f"{_SEGMENT_PREFIX}*{_SEGMENT_SUFFIX}"))
+
+    def _enforce_limits(self) -> None:
+        """Discard segments beyond the age and size caps, oldest first."""
+        segments = self._segments()
+        now = time.time()
+        sizes = {path: self._size(path) for path in segments}
+        total = sum(sizes.values())
+        for path in segments:
+            expired = now - self._mtime(path, now) > self.max_age
+            if not expired and total <= self.max_bytes:
+                break
+            self.discarded_count += self._count_traces(path)
+            total -= sizes[path]
+            path.unlink(missing_ok=True)
+            if path == self._active:
+                self._active = None
+            logger.warning(f"Discarded spooled trace segment {path.name}")
+
+    def _read_segment(self, path: Path) -> list[SpoolRecord]:
+        """Read all complete records of a segment, ignoring a truncated tail."""
+        try:
+            data = memoryview(path.read_bytes())
+        except FileNotFoundError:
+            return []
+
+        records = []
+        offset = 0
+        while offset + _FRAME_HEADER.size <= len(data):
+            meta_len, body_len = _FRAME_HEADER.unpack_from(data, offset)
+            start = offset + _FRAME_HEADER.size
+            end = start + meta_len + body_len
+            if end > len(data):
+                break
+            try:
+                meta = json.loads(bytes(data[start : start + meta_len]))
+            except ValueError:
+                break
+            body = bytes(data[start + meta_len : end])
+            records.append((body, meta.get("headers", {}), meta.get("count", 0)))
+            offset = end
+        return records
+
+    def _rewrite_segment(self, path: Path, records: list[SpoolRecord]) -> None:
+        """Atomically replace a segment with its not yet delivered records."""
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("wb") as f:
+            for body, headers, count in records:
+                meta = json.dumps({"headers": headers, "count": count}).encode("utf-8")
+                f.write(_FRAME_HEADER.pack(len(meta), len(body)))
+                f.write(meta)
+                f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(path)
+
+    def _count_traces(self, path: Path) -> int:
+        return sum(count for _, _, count in self._read_segment(path))
+
+    @staticmethod
+    def _size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _mtime(path: Path, default: float) -> float:
+        try:
+            return path.stat().st_mtime
+        except FileNotFoundError:
+            return default
@@ -8,11 +8,10 @@ from datetime import datetime, timezone
 
 import aiohttp
 
-from urllib.parse import urlparse
-
-from r4u.client import AbstractTracer, HTTPTrace
-from r4u.tracing.http.filters import should_trace_url
-from r4u.utils import extract_call_path, redact_headers
+from r4u.client import AbstractTracer, RawHTTPTrace
+from r4u.tracing.http.capture import BodyCapture
+from r4u.tracing.http.filters import SKIP, TRACE, is_error_status, sample_url
+from r4u.utils import extract_call_path
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +27,7 @@ class StreamingResponseWrapper:
     ):
         self._response = response
         self._trace_ctx = trace_ctx
-        self._content_collected = b""
+        self._capture = BodyCapture()
         self._is_streaming_complete = False
         self._error = None
         self._tracer = tracer
@@ -42,7 +41,7 @@ class StreamingResponseWrapper:
         """Iterate over response content in chunks."""
         try:
             async for chunk in self._response.content.iter_chunked(chunk_size):
-                self._content_collected += chunk
+                self._capture.append(chunk)
                 yield chunk
         except Exception as e:
             self._error = str(e)
@@ -54,7 +53,7 @@ class StreamingResponseWrapper:
         """Iterate over response content in any available chunks."""
         try:
             async for chunk in self._response.content.iter_any():
-                self._content_collected += chunk
+                self._capture.append(chunk)
                 yield chunk
         except Exception as e:
             self._error = str(e)
@@ -66,7 +65,7 @@ class StreamingResponseWrapper:
         """Iterate over response content line by line."""
         try:
             async for line in self._response.content.iter_line():
-                self._content_collected += line + b"\n"
+                self._capture.append_line(line)
                 yield line
         except Exception as e:
             self._error = str(e)
@@ -78,7 +77,7 @@ class StreamingResponseWrapper:
         """Read all response content."""
         try:
             content = await self._response.read()
-            self._content_collected = content
+            self._capture.replace(content)
             return content
         except Exception as e:
             self._error = str(e)
@@ -90,7 +89,7 @@ class StreamingResponseWrapper:
         """Read response content as text."""
         try:
             content = await self._response.text()
-            self._content_collected = content.encode("utf-8")
+            self._capture.replace(content)
             return content
         except Exception as e:
             self._error = str(e)
@@ -104,7 +103,7 @@ class StreamingResponseWrapper:
             content = await self._response.json()
             # For JSON, we need to get the raw content
             raw_content = await self._response.read()
-            self._content_collected = raw_content
+            self._capture.replace(raw_content)
             return content
         except Exception as e:
             self._error = str(e)
@@ -126,7 +125,7 @@ class StreamingResponseWrapper:
 
         self._is_streaming_complete = True
 
-        # Build and send final HTTPTrace
+        # Build and send final trace record
         self._finalize_and_send_trace()
 
     def _finalize_and_send_trace(self):
@@ -135,10 +134,10 @@ class StreamingResponseWrapper:
         self._trace_ctx["completed_at"] = completed_at
         self._trace_ctx["status_code"] = self._response.status
         self._trace_ctx["error"] = self._error
-        self._trace_ctx["response_bytes"] = self._content_collected
-        self._trace_ctx["response_headers"] = redact_headers(dict(self._response.headers))
+        self._trace_ctx["response_bytes"] = self._capture.getvalue()
+        self._trace_ctx["response_headers"] = self._response.headers
 
-        trace = HTTPTrace(
+        trace = RawHTTPTrace(
             url=self._trace_ctx.get("url", ""),
             method=self._trace_ctx.get("method", ""),
             path=self._trace_ctx.get("path"),
@@ -154,7 +153,7 @@ class StreamingResponseWrapper:
             response_headers=self._trace_ctx.get("response_headers", {}),
         )
         try:
-            self._tracer.log(trace)
+            self._tracer.log_raw(trace)
         except Exception:
             # Log error but don't fail the request
             logger.exception("Failed to create HTTP trace")
@@ -173,6 +172,35 @@ def _is_streaming_request(kwargs: dict) -> bool:
     return True  # Always wrap responses to handle both streaming and non-streaming
 
 
+def _build_trace_context(
+    method: str,
+    url: str,
+    kwargs: dict,
+    started_at: datetime | None = None,
+) -> dict:
+    """Build initial trace context from aiohttp request arguments."""
+    started_at = started_at or datetime.now(timezone.utc)
+    request_payload = kwargs.get("data") or kwargs.get("json") or b""
+    if isinstance(request_payload, str):
+        request_payload = request_payload.encode("utf-8")
+    elif not isinstance(request_payload, bytes):
+        request_payload = b""
+
+    call_path_and_no = extract_call_path(is_async=True)
+
+    # Headers are redacted and the request path parsed when the trace is
+    # validated, off the request path
+    return {
+        "method": str(method).upper(),
+        "url": str(url),
+        "started_at": started_at,
+        "request_bytes": request_payload,
+        "request_headers": kwargs.get("headers") or {},
+        "path": call_path_and_no[0] if call_path_and_no else None,
+        "request_method": str(method).upper(),
+    }
+
+
 def _create_async_wrapper(original: Callable, tracer: AbstractTracer):
     """Create wrapper for aiohttp session methods like _request."""
 
@@ -182,46 +210,36 @@ def _create_async_wrapper(original: Callable, tracer: AbstractTracer):
         method = args[0] if len(args) > 0 else kwargs.get("method", "GET")
         url = args[1] if len(args) > 1 else kwargs.get("url")
 
-        # Check if we should trace this URL
-        if not should_trace_url(str(url)):
+        # Check if we should trace this URL and whether it is sampled
+        decision = sample_url(str(url), is_async=True)
+        if decision == SKIP:
             return await original(*args, **kwargs)
 
+        # Unsampled requests only build a trace context if they fail
         started_at = datetime.now(timezone.utc)
-        request_payload = kwargs.get("data") or kwargs.get("json") or b""
-        if isinstance(request_payload, str):
-            request_payload = request_payload.encode("utf-8")
-        elif not isinstance(request_payload, bytes):
-            request_payload = b""
-
-        call_path_and_no = extract_call_path(is_async=True)
-
-        parsed_url = urlparse(str(url))
-        request_path = parsed_url.path
-
-        trace_ctx = {
-            "method": str(method).upper(),
-            "url": str(url),
-            "started_at": started_at,
-            "request_bytes": request_payload,
-            "request_headers": redact_headers(dict(kwargs.get("headers", {}))),
-            "path": call_path_and_no[0] if call_path_and_no else None,
-            "request_method": str(method).upper(),
-            "request_path": request_path,
-        }
+        trace_ctx = None
+        if decision == TRACE:
+            trace_ctx = _build_trace_context(method, url, kwargs, started_at=started_at)
 
         response = None
         error = None
         try:
             response = await original(*args, **kwargs)
+            if trace_ctx is None:
+                if not is_error_status(response.status):
+                    return response
+                trace_ctx = _build_trace_context(method, url, kwargs, started_at=started_at)
 
             # Always wrap the response to handle both streaming and non-streaming
             return StreamingResponseWrapper(response, trace_ctx, tracer)
 
         except Exception as e:
             error = str(e)
+            if trace_ctx is None:
+                trace_ctx = _build_trace_context(method, url, kwargs, started_at=started_at)
             # For errors, we still need to send a trace
             completed_at = datetime.now(timezone.utc)
-            trace = HTTPTrace(
+            trace = RawHTTPTrace(
                 url=trace_ctx.get("url", ""),
                 method=trace_ctx.get("method", ""),
                 path=trace_ctx.get("path"),
@@ -237,7 +255,7 @@ def _create_async_wrapper(original: Callable, tracer: AbstractTracer):
                 response_headers={},
             )
             try:
-                tracer.log(trace)
+                tracer.log_raw(trace)
             except Exception:
                 # Log error but don't fail the request
                 logger.exception("Failed to create HTTP trace")
@@ -9,13 +9,20 @@ from contextlib import suppress
 from async_trace import disable_tracing, enable_tracing
 
 from r4u.client import AbstractTracer, get_r4u_client
-from r4u.tracing.http.filters import URLFilter, get_global_filter, set_global_filter
+from r4u.tracing.http.filters import (
+    SamplingRule,
+    URLFilter,
+    get_global_filter,
+    set_global_filter,
+)
 
 
 def trace_all_http(
     tracer: AbstractTracer | None = None,
     allow_urls: list[str] | None = None,
     deny_urls: list[str] | None = None,
+    sampling: dict[str, SamplingRule | float] | None = None,
+    keep_errors: bool = True,
 ) -> None:
     """Enable automatic tracing for all supported HTTP libraries.
 
@@ -26,6 +33,8 @@ def trace_all_http(
         tracer: Optional tracer instance. If None, uses the default R4U client.
         allow_urls: Optional list of URL patterns to allow. If provided, extends default AI provider patterns.
         deny_urls: Optional list of URL patterns to deny. Takes precedence over allow patterns.
+        sampling: Optional mapping of URL patterns to a SamplingRule or a sample rate.
+        keep_errors: If True, failed requests are traced even when not sampled.
 
     Example:
         >>> from r4u.tracing.http.auto import trace_all_http
@@ -52,11 +61,18 @@ def trace_all_http(
     tracer = tracer or get_r4u_client()
 
     # Configure URL filter if patterns are provided
-    if allow_urls is not None or deny_urls is not None:
+    if (
+        allow_urls is not None
+        or deny_urls is not None
+        or sampling is not None
+        or not keep_errors
+    ):
         configure_url_filter(
             allow_urls=allow_urls,
             deny_urls=deny_urls,
             extend_defaults=True,  # Always extend defaults when called from trace_all_http
+            sampling=sampling,
+            keep_errors=keep_errors,
         )
 
     with suppress(Exception):
@@ -96,6 +112,8 @@ def configure_url_filter(
     allow_urls: list[str] | None = None,
     deny_urls: list[str] | None = None,
     extend_defaults: bool = True,
+    sampling: dict[str, SamplingRule | float] | None = None,
+    keep_errors: bool = True,
 ) -> None:
     """Configure the global URL filter for HTTP tracing.
 
@@ -103,6 +121,10 @@ def configure_url_filter(
         allow_urls: List of URL patterns to allow. If None, uses default AI provider patterns.
         deny_urls: List of URL patterns to deny. Takes precedence over allow patterns.
         extend_defaults: If True and allow_urls is provided, extends default patterns instead of replacing them.
+        sampling: Mapping of URL patterns to a SamplingRule or a sample rate between 0 and 1.
+            When extending, these rules take precedence over the existing ones.
+        keep_errors: If True, requests that were not sampled are still traced when they fail
+            or return an error status.
 
     Example:
         >>> from r4u.tracing.http.auto import configure_url_filter
@@ -110,10 +132,19 @@ def configure_url_filter(
         ...     allow_urls=["https://api.openai.com/*", "https://api.anthropic.com/*"],
         ...     deny_urls=["https://api.openai.com/v1/models"]
         ... )
+        >>>
+        >>> # Trace 10% of embeddings calls, at most 5 per second
+        >>> configure_url_filter(
+        ...     sampling={
+        ...         "https://api.openai.com/v1/embeddings": SamplingRule(rate=0.1, rate_limit=5),
+        ...     },
+        ... )
 
     """
     # If extending defaults and we have an existing filter, extend from it
-    if extend_defaults and (allow_urls is not None or deny_urls is not None):
+    if extend_defaults and (
+        allow_urls is not None or deny_urls is not None or sampling is not None
+    ):
         try:
             current_filter = get_global_filter()
             # Extend existing allow patterns
@@ -130,10 +161,17 @@ def configure_url_filter(
             else:
                 new_deny = current_filter.get_deny_urls()
 
+            # New sampling rules are matched before the existing ones
+            new_sampling = dict(sampling or {})
+            for pattern, rule in current_filter.get_sampling().items():
+                new_sampling.setdefault(pattern, rule)
+
             filter_instance = URLFilter(
                 allow_urls=new_allow,
                 deny_urls=new_deny,
                 extend_defaults=False,  # Don't extend again since we already did
+                sampling=new_sampling,
+                keep_errors=keep_errors,
             )
         except Exception:
             # If no existing filter or error, create new one
@@ -141,12 +179,16 @@ def configure_url_filter(
                 allow_urls=allow_urls,
                 deny_urls=deny_urls,
                 extend_defaults=extend_defaults,
+                sampling=sampling,
+                keep_errors=keep_errors,
             )
     else:
         filter_instance = URLFilter(
             allow_urls=allow_urls,
             deny_urls=deny_urls,
             extend_defaults=extend_defaults,
+            sampling=sampling,
+            keep_errors=keep_errors,
         )
 
     set_global_filter(filter_instance)
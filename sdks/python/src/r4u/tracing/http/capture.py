@@ -0,0 +1,131 @@
+"""Response body capture for streaming HTTP responses.
+
+Streamed chunks are kept in a list and joined once when the trace is
+finalized, so capturing a stream costs linear time in its length. Text
+chunks are kept as ``str`` and encoded in one pass at the end instead of
+per chunk. Each capture is capped at a configurable number of bytes; the
+remainder of the stream is still passed through to the caller but only
+counted, and a truncation marker is appended to the captured body.
+"""
+
+from __future__ import annotations
+
+import os
+
+DEFAULT_MAX_CAPTURE_BYTES = 16 * 1024 * 1024
+TRUNCATION_MARKER = "\n[r4u: response truncated, {omitted} bytes omitted]"
+
+_max_capture_bytes: int | None = None
+
+
+def get_max_capture_bytes() -> int:
+    """Get the per-trace response capture cap in bytes.
+
+    Reads ``R4U_MAX_CAPTURE_BYTES`` on first use unless a cap was set with
+    :func:`set_max_capture_bytes`.
+    """
+    global _max_capture_bytes
+    if _max_capture_bytes is None:
+        _max_capture_bytes = int(
+            os.getenv("R4U_MAX_CAPTURE_BYTES", str(DEFAULT_MAX_CAPTURE_BYTES)),
+        )
+    return _max_capture_bytes
+
+
+def set_max_capture_bytes(max_bytes: int | None) -> None:
+    """Set the per-trace response capture cap in bytes.
+
+    Args:
+        max_bytes: Maximum number of response bytes captured per trace, or
+            None to fall back to ``R4U_MAX_CAPTURE_BYTES``
+
+    """
+    global _max_capture_bytes
+    if max_bytes is not None and max_bytes < 0:
+        raise ValueError("max_bytes must be non-negative")
+    _max_capture_bytes = max_bytes
+
+
+class BodyCapture:
+    """Accumulate response chunks up to a byte cap."""
+
+    __slots__ = ("max_bytes", "omitted", "_parts", "_size")
+
+    def __init__(self, max_bytes: int | None = None):
+        """Initialize an empty capture.
+
+        Args:
+            max_bytes: Maximum number of bytes to keep. Defaults to
+                :func:`get_max_capture_bytes`.
+
+        """
+        self.max_bytes = get_max_capture_bytes() if max_bytes is None else max_bytes
+        self.omitted = 0
+        self._parts: list[bytes | str] = []
+        self._size = 0
+
+    def append(self, chunk: bytes | str) -> None:
+        """Append a chunk, keeping at most ``max_bytes`` in total.
+
+        Text chunks are measured in characters, which never exceeds their
+        UTF-8 size; the exact cap is applied in :meth:`getvalue`.
+        """
+        length = len(chunk)
+        if not length:
+            return
+        room = self.max_bytes - self._size
+        if room <= 0:
+            self.omitted += length
+            return
+        if length > room:
+            self.omitted += length - room
+            chunk = chunk[:room]
+            length = room
+        self._parts.append(chunk)
+        self._size += length
+
+    def append_line(self, line: bytes | str) -> None:
+        """Append a line that was yielded without its line terminator."""
+        self.append(line)
+        self.append(b"\n" if isinstance(line, bytes) else "\n")
+
+    def replace(self, content: bytes | str) -> None:
+        """Replace everything captured so far with the full body."""
+        self._parts.clear()
+        self._size = 0
+        self.omitted = 0
+        self.append(content)
+
+    def getvalue(self) -> bytes:
+        """Return the captured body, with a truncation marker if it was capped."""
+        body = self._join()
+        if len(body) > self.max_bytes:
+            self.omitted += len(body) - self.max_bytes
+            body = body[: self.max_bytes]
+            self._parts = [body]
+            self._size = len(body)
+        if self.omitted:
+            body += TRUNCATION_MARKER.format(omitted=self.omitted).encode("utf-8")
+        return body
+
+    def _join(self) -> bytes:
+        """Join the parts, encoding each run of text chunks only once."""
+        parts = self._parts
+        if not parts:
+            return b""
+        if len(parts) == 1 and isinstance(parts[0], bytes):
+            return parts[0]
+
+        runs: list[bytes] = []
+        text: list[str] = []
+        for part in parts:
+            if isinstance(part, str):
+                text.append(part)
+                continue
+            if text:
+                runs.append("".join(text).encode("utf-8"))
+                text.clear()
+            runs.append(part)
+        if text:
+            runs.append("".join(text).encode("utf-8"))
+        return b"".join(runs)
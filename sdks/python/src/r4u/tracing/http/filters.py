@@ -2,11 +2,153 @@
 
 This module provides functionality to filter HTTP requests based on allow and deny patterns.
 It supports wildcard patterns and provides default patterns for common AI providers.
+Allowed URLs can additionally be sampled and rate limited per pattern.
 """
 
 import fnmatch
+import functools
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
 from urllib.parse import urlparse
 
+from r4u.utils import extract_call_path
+
+# Sampling decisions returned by URLFilter.sample
+TRACE = "trace"
+SKIP = "skip"
+ERRORS_ONLY = "errors_only"
+
+_MAX_SAMPLING_KEYS = 4096
+
+_GLOB_CHARS = re.compile(r"[*?\[]")
+_PATTERN_PARTS = re.compile(r"(?:(?P<scheme>[^:/]*)://)?(?P<host>[^/]*)(?P<path>/.*)?", re.DOTALL)
+_LITERAL_HOST = re.compile(r"[a-z0-9.\-]+(?::\d+)?")
+
+
+def _literal_host(pattern: str) -> str | None:
+    """Return the host a pattern is restricted to, or None if it has wildcards.
+
+    Only patterns with a literal scheme (or none) and a literal host can be
+    indexed by host; anything else may match across URL components.
+    """
+    parts = _PATTERN_PARTS.fullmatch(pattern)
+    scheme, host = parts["scheme"], parts["host"]
+    if scheme is not None and (not scheme or _GLOB_CHARS.search(scheme)):
+        return None
+    if not _LITERAL_HOST.fullmatch(host):
+        return None
+    return host
+
+
+def _compile_globs(patterns: Iterable[str]) -> Callable[[str], re.Match | None]:
+    """Combine fnmatch patterns into a single regex full-match function."""
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns)).fullmatch
+
+
+class _PatternIndex:
+    """Case-insensitive fnmatch patterns indexed by host.
+
+    Patterns with a literal host are grouped per host, so a URL is only
+    checked against the patterns for its own host plus one combined regex of
+    the wildcard-host patterns.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        by_host: dict[str, list[str]] = {}
+        wildcard: list[str] = []
+        for pattern in patterns:
+            pattern = pattern.lower()
+            host = _literal_host(pattern)
+            if host is None:
+                wildcard.append(pattern)
+            else:
+                by_host.setdefault(host, []).append(pattern)
+
+        self._by_host = {host: _compile_globs(group) for host, group in by_host.items()}
+        self._wildcard = _compile_globs(wildcard) if wildcard else None
+
+    def matches(self, host: str, url_variations: tuple[str, ...]) -> bool:
+        """Check if any lowercased URL variation matches a pattern."""
+        for match in (self._by_host.get(host), self._wildcard):
+            if match is not None and any(match(variation) for variation in url_variations):
+                return True
+        return False
+
+
+@dataclass(frozen=True)
+class SamplingRule:
+    """Sampling and rate limit for requests matching a URL pattern.
+
+    Attributes:
+        rate: Fraction of requests to trace, between 0 and 1. Sampling is
+            deterministic per call path: the first request from each call site
+            is traced and then every ``1 / rate``-th one.
+        rate_limit: Maximum number of traces per second, or None for no limit.
+        burst: Token bucket size for ``rate_limit``. Defaults to
+            ``max(1, rate_limit)``.
+
+    """
+
+    rate: float = 1.0
+    rate_limit: float | None = None
+    burst: float | None = None
+
+    def __post_init__(self):
+        if not 0.0 <= self.rate <= 1.0:
+            raise ValueError("rate must be between 0 and 1")
+        if self.rate_limit is not None and self.rate_limit < 0:
+            raise ValueError("rate_limit must be non-negative")
+
+
+class _Sampler:
+    """Sampling state of one rule: per call path credits and a token bucket."""
+
+    def __init__(self, rule: SamplingRule):
+        self.rule = rule
+        self._credits: dict[str | None, float] = {}
+        self._burst = rule.burst if rule.burst is not None else max(1.0, rule.rate_limit or 0.0)
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def admit(self, is_async: bool = False) -> bool:
+        """Decide whether the current request is traced."""
+        rate = self.rule.rate
+        key = None
+        if rate < 1.0:
+            if rate <= 0.0:
+                return False
+            call_path = extract_call_path(is_async=is_async)
+            key = call_path[0] if call_path else None
+
+        with self._lock:
+            if rate < 1.0:
+                if len(self._credits) >= _MAX_SAMPLING_KEYS and key not in self._credits:
+                    self._credits.clear()
+                credit = self._credits.get(key, 1.0)
+                sampled = credit >= 1.0 - 1e-9
+                if sampled:
+                    credit -= 1.0
+                self._credits[key] = credit + rate
+                if not sampled:
+                    return False
+
+            if self.rule.rate_limit is not None:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._burst,
+                    self._tokens + (now - self._updated) * self.rule.rate_limit,
+                )
+                self._updated = now
+                if self._tokens < 1.0:
+                    return False
+                self._tokens -= 1.0
+
+        return True
+
 
 class URLFilter:
     """Filter HTTP requests based on allow and deny patterns."""
@@ -16,6 +158,9 @@ class URLFilter:
         allow_urls: list[str] | None = None,
         deny_urls: list[str] | None = None,
         extend_defaults: bool = True,
+        decision_cache_size: int = 4096,
+        sampling: dict[str, SamplingRule | float] | None = None,
+        keep_errors: bool = True,
     ):
         """Initialize the URL filter.
         
@@ -23,6 +168,12 @@ class URLFilter:
             allow_urls: List of URL patterns to allow. If None, uses default AI provider patterns.
             deny_urls: List of URL patterns to deny. Takes precedence over allow patterns.
             extend_defaults: If True and allow_urls is provided, extends default patterns instead of replacing them.
+            decision_cache_size: Maximum number of per-URL decisions kept in an LRU cache.
+            sampling: Optional mapping of URL patterns to a SamplingRule or a sample rate
+                for allowed URLs. The first matching pattern applies; unmatched URLs are
+                always traced.
+            keep_errors: If True, requests that were not sampled are still traced when
+                they fail or return an error status.
 
         """
         if allow_urls is None:
@@ -36,10 +187,19 @@ class URLFilter:
             self.allow_patterns = allow_urls
 
         self.deny_patterns = deny_urls or []
-
-        # Convert to sets for faster lookup
-        self._allow_set = set(self.allow_patterns)
-        self._deny_set = set(self.deny_patterns)
+        self.sampling = {
+            pattern: rule if isinstance(rule, SamplingRule) else SamplingRule(rate=rule)
+            for pattern, rule in (sampling or {}).items()
+        }
+        self.keep_errors = keep_errors
+
+        # Compile the patterns once and memoize decisions per URL
+        self._allow_index = _PatternIndex(self.allow_patterns)
+        self._deny_index = _PatternIndex(self.deny_patterns)
+        self._samplers = [
+            (_PatternIndex([pattern]), _Sampler(rule)) for pattern, rule in self.sampling.items()
+        ]
+        self._decide = functools.lru_cache(maxsize=decision_cache_size)(self._evaluate)
 
     def _get_default_allow_patterns(self) -> list[str]:
         """Get default allow patterns for common AI providers."""
@@ -74,52 +234,55 @@ class URLFilter:
             True if the URL should be traced, False otherwise
 
         """
-        # First check deny patterns (they take precedence)
-        if self._matches_any_pattern(url, self._deny_set):
-            return False
+        return self._decide(url)[0]
 
-        # Then check allow patterns
-        if self._matches_any_pattern(url, self._allow_set):
-            return True
+    def sample(self, url: str, is_async: bool = False) -> str:
+        """Decide how a request to a URL is traced.
 
-        # If no patterns match, default to not tracing
-        return False
-
-    def _matches_any_pattern(self, url: str, patterns: set[str]) -> bool:
-        """Check if a URL matches any of the given patterns.
-        
         Args:
             url: The URL to check
-            patterns: Set of patterns to match against
-            
+            is_async: Whether the request is made from async code
+
         Returns:
-            True if the URL matches any pattern, False otherwise
+            TRACE to trace the request, SKIP to leave it untraced, or ERRORS_ONLY
+            to trace it only if it fails or returns an error status
 
         """
-        if not patterns:
-            return False
-
+        allowed, sampler = self._decide(url)
+        if not allowed:
+            return SKIP
+        if sampler is None or sampler.admit(is_async):
+            return TRACE
+        return ERRORS_ONLY if self.keep_errors else SKIP
+
+    def _evaluate(self, url: str) -> tuple[bool, _Sampler | None]:
+        """Match a URL against the compiled patterns and find its sampling rule."""
         # Parse the URL to extract components
         parsed = urlparse(url)
         host = parsed.netloc.lower()
         path = parsed.path
 
         # Create different variations of the URL to match against
-        url_variations = [
-            url,  # Full URL
-            f"{parsed.scheme}://{host}{path}",  # URL without query/fragment
+        url_variations = (
+            url.lower(),  # Full URL
+            f"{parsed.scheme}://{host}{path}".lower(),  # URL without query/fragment
             f"{parsed.scheme}://{host}/*",  # Host with wildcard path
             host,  # Just the host
             f"{host}/*",  # Host with wildcard path
-        ]
+        )
 
-        # Check each pattern against each URL variation
-        for pattern in patterns:
-            for variation in url_variations:
-                if fnmatch.fnmatch(variation.lower(), pattern.lower()):
-                    return True
+        # First check deny patterns (they take precedence)
+        if self._deny_index.matches(host, url_variations):
+            return False, None
 
-        return False
+        # Then check allow patterns; if no patterns match, default to not tracing
+        if not self._allow_index.matches(host, url_variations):
+            return False, None
+
+        for index, sampler in self._samplers:
+            if index.matches(host, url_variations):
+                return True, sampler
+        return True, None
 
     def get_allow_urls(self) -> list[str]:
         """Get a copy of the allow URL patterns.
@@ -139,6 +302,15 @@ class URLFilter:
         """
         return self.deny_patterns.copy()
 
+    def get_sampling(self) -> dict[str, SamplingRule]:
+        """Get a copy of the sampling rules.
+
+        Returns:
+            Mapping of URL patterns to sampling rules
+
+        """
+        return self.sampling.copy()
+
 
 # Global filter instance
 _global_filter: URLFilter | None = None
@@ -179,3 +351,22 @@ def should_trace_url(url: str) -> bool:
 
     """
     return get_global_filter().should_trace(url)
+
+
+def sample_url(url: str, is_async: bool = False) -> str:
+    """Decide how a request to a URL is traced using the global filter.
+
+    Args:
+        url: The URL to check
+        is_async: Whether the request is made from async code
+
+    Returns:
+        TRACE, SKIP or ERRORS_ONLY
+
+    """
+    return get_global_filter().sample(url, is_async=is_async)
+
+
+def is_error_status(status_code: int) -> bool:
+    """Check if a response status is kept by the errors-always-kept override."""
+    return status_code >= 400
@@ -8,11 +8,10 @@ from typing import TYPE_CHECKING
 
 import httpx
 
-from urllib.parse import urlparse
-
-from r4u.client import AbstractTracer, HTTPTrace
-from r4u.tracing.http.filters import should_trace_url
-from r4u.utils import extract_call_path, redact_headers
+from r4u.client import AbstractTracer, RawHTTPTrace
+from r4u.tracing.http.capture import BodyCapture
+from r4u.tracing.http.filters import SKIP, TRACE, is_error_status, sample_url
+from r4u.utils import extract_call_path
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +30,7 @@ class StreamingResponseWrapper:
     ):
         self._response = response
         self._trace_ctx = trace_ctx
-        self._content_collected = b""
+        self._capture = BodyCapture()
         self._is_streaming_complete = False
         self._error = None
         self._tracer = tracer
@@ -44,7 +43,7 @@ class StreamingResponseWrapper:
     def iter_bytes(self, chunk_size: int | None = None):
         try:
             for chunk in self._response.iter_bytes(chunk_size):
-                self._content_collected += chunk
+                self._capture.append(chunk)
                 yield chunk
         except Exception as e:
             self._error = str(e)
@@ -55,7 +54,7 @@ class StreamingResponseWrapper:
     def iter_text(self, chunk_size: int | None = None):
         try:
             for chunk in self._response.iter_text(chunk_size):
-                self._content_collected += chunk.encode("utf-8")
+                self._capture.append(chunk)
                 yield chunk
         except Exception as e:
             self._error = str(e)
@@ -66,7 +65,7 @@ class StreamingResponseWrapper:
     def iter_lines(self):
         try:
             for line in self._response.iter_lines():
-                self._content_collected += line.encode("utf-8") + b"\n"
+                self._capture.append_line(line)
                 yield line
         except Exception as e:
             self._error = str(e)
@@ -77,7 +76,7 @@ class StreamingResponseWrapper:
     def read(self):
         try:
             content = self._response.read()
-            self._content_collected = content
+            self._capture.replace(content)
             return content
         except Exception as e:
             self._error = str(e)
@@ -89,7 +88,7 @@ class StreamingResponseWrapper:
     async def aiter_bytes(self, chunk_size: int | None = None):
         try:
             async for chunk in self._response.aiter_bytes(chunk_size):
-                self._content_collected += chunk
+                self._capture.append(chunk)
                 yield chunk
         except Exception as e:
             self._error = str(e)
@@ -100,7 +99,7 @@ class StreamingResponseWrapper:
     async def aiter_text(self, chunk_size: int | None = None):
         try:
             async for chunk in self._response.aiter_text(chunk_size):
-                self._content_collected += chunk.encode("utf-8")
+                self._capture.append(chunk)
                 yield chunk
         except Exception as e:
             self._error = str(e)
@@ -111,7 +110,7 @@ class StreamingResponseWrapper:
     async def aiter_lines(self):
         try:
             async for line in self._response.aiter_lines():
-                self._content_collected += line.encode("utf-8") + b"\n"
+                self._capture.append_line(line)
                 yield line
         except Exception as e:
             self._error = str(e)
@@ -122,7 +121,7 @@ class StreamingResponseWrapper:
     async def aread(self):
         try:
             content = await self._response.aread()
-            self._content_collected = content
+            self._capture.replace(content)
             return content
         except Exception as e:
             self._error = str(e)
@@ -151,7 +150,7 @@ class StreamingResponseWrapper:
 
         self._is_streaming_complete = True
 
-        # Build and send final HTTPTrace
+        # Build and send final trace record
         self._finalize_and_send_trace()
 
     def _finalize_and_send_trace(self):
@@ -159,10 +158,10 @@ class StreamingResponseWrapper:
         self._trace_ctx["completed_at"] = completed_at
         self._trace_ctx["status_code"] = self._response.status_code
         self._trace_ctx["error"] = self._error
-        self._trace_ctx["response_bytes"] = self._content_collected
-        self._trace_ctx["response_headers"] = redact_headers(dict(self._response.headers))
+        self._trace_ctx["response_bytes"] = self._capture.getvalue()
+        self._trace_ctx["response_headers"] = self._response.headers
 
-        trace = HTTPTrace(
+        trace = RawHTTPTrace(
             url=self._trace_ctx.get("url", ""),
             method=self._trace_ctx.get("method", ""),
             path=self._trace_ctx.get("path"),
@@ -178,7 +177,7 @@ class StreamingResponseWrapper:
             response_headers=self._trace_ctx.get("response_headers", {}),
         )
         try:
-            self._tracer.log(trace)
+            self._tracer.log_raw(trace)
         except Exception:
             # Log error but don't fail the request
             logger.exception("Failed to create HTTP trace")
@@ -189,26 +188,27 @@ def _is_streaming_request(kwargs: dict) -> bool:
     return kwargs.get("stream", False)
 
 
-def _build_trace_context(request: httpx.Request, is_async=False) -> dict:
+def _build_trace_context(
+    request: httpx.Request,
+    is_async=False,
+    started_at: datetime | None = None,
+) -> dict:
     """Build initial trace context from httpx request."""
-    started_at = datetime.now(timezone.utc)
-    headers_dict = dict(request.headers)
+    started_at = started_at or datetime.now(timezone.utc)
 
     # Extract call path
     call_path_with_no = extract_call_path(is_async=is_async)
 
-    parsed_url = urlparse(str(request.url))
-    request_path = parsed_url.path
-
+    # Headers are redacted and the request path parsed when the trace is
+    # validated, off the request path
     return {
         "method": request.method.upper(),
         "url": str(request.url),
         "started_at": started_at,
         "request_bytes": request.content or b"",
-        "request_headers": redact_headers(headers_dict),
+        "request_headers": request.headers,
         "path": call_path_with_no[0] if call_path_with_no else None,
         "request_method": request.method.upper(),
-        "request_path": request_path,
     }
 
 
@@ -216,13 +216,13 @@ def _finalize_trace(
     trace_ctx: dict,
     response: httpx.Response,
     error: str | None,
-) -> HTTPTrace:
+) -> RawHTTPTrace:
     completed_at = datetime.now(timezone.utc)
     status_code = response.status_code if response else 0
     response_bytes = response.content or b"" if response else b""
-    response_headers = redact_headers(dict(response.headers)) if response else {}
+    response_headers = response.headers if response else {}
 
-    return HTTPTrace(
+    return RawHTTPTrace(
         url=trace_ctx.get("url", ""),
         method=trace_ctx.get("method", ""),
         path=trace_ctx.get("path"),
@@ -242,16 +242,25 @@ def _finalize_trace(
 def _create_async_wrapper(original: Callable, tracer: AbstractTracer):
     @functools.wraps(original)
     async def wrapper(self, *args, **kwargs):
-        # Check if we should trace this URL
-        if not should_trace_url(str(args[0].url)):
+        # Check if we should trace this URL and whether it is sampled
+        decision = sample_url(str(args[0].url), is_async=True)
+        if decision == SKIP:
             return await original(*args, **kwargs)
 
-        trace_ctx = _build_trace_context(args[0], is_async=True)
+        # Unsampled requests only build a trace context if they fail
+        started_at = datetime.now(timezone.utc)
+        trace_ctx = None
+        if decision == TRACE:
+            trace_ctx = _build_trace_context(args[0], is_async=True, started_at=started_at)
 
         response = None
         error = None
         try:
             response = await original(*args, **kwargs)
+            if trace_ctx is None:
+                if not is_error_status(response.status_code):
+                    return response
+                trace_ctx = _build_trace_context(args[0], is_async=True, started_at=started_at)
 
             # Check if this is a streaming request using httpx's stream parameter
             if _is_streaming_request(kwargs):
@@ -260,7 +269,7 @@ def _create_async_wrapper(original: Callable, tracer: AbstractTracer):
             # For non-streaming responses, trace immediately
             trace = _finalize_trace(trace_ctx, response, error)
             try:
-                tracer.log(trace)
+                tracer.log_raw(trace)
             except Exception:
                 # Log error but don't fail the request
                 logger.exception("Failed to create HTTP trace")
@@ -268,9 +277,11 @@ def _create_async_wrapper(original: Callable, tracer: AbstractTracer):
 
         except Exception as e:
             error = str(e)
+            if trace_ctx is None:
+                trace_ctx = _build_trace_context(args[0], is_async=True, started_at=started_at)
             trace = _finalize_trace(trace_ctx, response, error)
             try:
-                tracer.log(trace)
+                tracer.log_raw(trace)
             except Exception:
                 # Log error but don't fail the request
                 logger.exception("Failed to create HTTP trace")
@@ -282,15 +293,25 @@ def _create_async_wrapper(original: Callable, tracer: AbstractTracer):
 def _create_sync_wrapper(original: Callable, tracer: AbstractTracer):
     @functools.wraps(original)
     def wrapper(self, *args, **kwargs):
-        # Check if we should trace this URL
-        if not should_trace_url(str(args[0].url)):
+        # Check if we should trace this URL and whether it is sampled
+        decision = sample_url(str(args[0].url))
+        if decision == SKIP:
             return original(*args, **kwargs)
-        trace_ctx = _build_trace_context(args[0])
+
+        # Unsampled requests only build a trace context if they fail
+        started_at = datetime.now(timezone.utc)
+        trace_ctx = None
+        if decision == TRACE:
+            trace_ctx = _build_trace_context(args[0], started_at=started_at)
 
         response = None
         error = None
         try:
             response = original(*args, **kwargs)
+            if trace_ctx is None:
+                if not is_error_status(response.status_code):
+                    return response
+                trace_ctx = _build_trace_context(args[0], started_at=started_at)
 
             # Check if this is a streaming request using httpx's stream parameter
             if _is_streaming_request(kwargs):
@@ -299,7 +320,7 @@ def _create_sync_wrapper(original: Callable, tracer: AbstractTracer):
             # For non-streaming responses, trace immediately
             trace = _finalize_trace(trace_ctx, response, error)
             try:
-                tracer.log(trace)
+                tracer.log_raw(trace)
             except Exception:
                 # Log error but don't fail the request
                 logger.exception("Failed to create HTTP trace")
@@ -307,9 +328,11 @@ def _create_sync_wrapper(original: Callable, tracer: AbstractTracer):
 
         except Exception as e:
             error = str(e)
+            if trace_ctx is None:
+                trace_ctx = _build_trace_context(args[0], started_at=started_at)
             trace = _finalize_trace(trace_ctx, response, error)
             try:
-                tracer.log(trace)
+                tracer.log_raw(trace)
             except Exception:
                 # Log error but don't fail the request
                 logger.exception("Failed to create HTTP trace")
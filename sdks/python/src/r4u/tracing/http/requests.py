@@ -8,11 +8,10 @@ from datetime import datetime, timezone
 
 import requests
 
-from urllib.parse import urlparse
-
-from r4u.client import AbstractTracer, HTTPTrace
-from r4u.tracing.http.filters import should_trace_url
-from r4u.utils import extract_call_path, redact_headers
+from r4u.client import AbstractTracer, RawHTTPTrace
+from r4u.tracing.http.capture import BodyCapture
+from r4u.tracing.http.filters import SKIP, TRACE, is_error_status, sample_url
+from r4u.utils import extract_call_path
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +27,7 @@ class StreamingResponseWrapper:
     ):
         self._response = response
         self._trace_ctx = trace_ctx
-        self._content_collected = b""
+        self._capture = BodyCapture()
         self._is_streaming_complete = False
         self._error = None
         self._tracer = tracer
@@ -47,9 +46,9 @@ class StreamingResponseWrapper:
         try:
             for chunk in self._response.iter_content(chunk_size, decode_unicode):
                 if isinstance(chunk, str):
-                    self._content_collected += chunk.encode("utf-8")
+                    self._capture.append(chunk)
                 else:
-                    self._content_collected += chunk
+                    self._capture.append(chunk)
                 yield chunk
         except Exception as e:
             self._error = str(e)
@@ -71,9 +70,9 @@ class StreamingResponseWrapper:
                 delimiter,
             ):
                 if isinstance(line, str):
-                    self._content_collected += line.encode("utf-8") + b"\n"
+                    self._capture.append_line(line)
                 else:
-                    self._content_collected += line + b"\n"
+                    self._capture.append_line(line)
                 yield line
         except Exception as e:
             self._error = str(e)
@@ -88,7 +87,7 @@ class StreamingResponseWrapper:
             # If content is accessed directly, read it and complete streaming
             try:
                 content = self._response.content
-                self._content_collected = content
+                self._capture.replace(content)
                 self._complete_streaming()
                 return content
             except Exception as e:
@@ -104,7 +103,7 @@ class StreamingResponseWrapper:
             # If text is accessed directly, read it and complete streaming
             try:
                 text = self._response.text
-                self._content_collected = text.encode("utf-8")
+                self._capture.replace(text)
                 self._complete_streaming()
                 return text
             except Exception as e:
@@ -120,7 +119,7 @@ class StreamingResponseWrapper:
             try:
                 json_data = self._response.json(**kwargs)
                 # For JSON, we need to get the raw content
-                self._content_collected = self._response.content
+                self._capture.replace(self._response.content)
                 self._complete_streaming()
                 return json_data
             except Exception as e:
@@ -143,7 +142,7 @@ class StreamingResponseWrapper:
 
         self._is_streaming_complete = True
 
-        # Build and send final HTTPTrace
+        # Build and send final trace record
         self._finalize_and_send_trace()
 
     def _finalize_and_send_trace(self):
@@ -152,10 +151,10 @@ class StreamingResponseWrapper:
         self._trace_ctx["completed_at"] = completed_at
         self._trace_ctx["status_code"] = self._response.status_code
         self._trace_ctx["error"] = self._error
-        self._trace_ctx["response_bytes"] = self._content_collected
-        self._trace_ctx["response_headers"] = redact_headers(dict(self._response.headers))
+        self._trace_ctx["response_bytes"] = self._capture.getvalue()
+        self._trace_ctx["response_headers"] = self._response.headers
 
-        trace = HTTPTrace(
+        trace = RawHTTPTrace(
             url=self._trace_ctx.get("url", ""),
             method=self._trace_ctx.get("method", ""),
             path=self._trace_ctx.get("path"),
@@ -171,7 +170,7 @@ class StreamingResponseWrapper:
             response_headers=self._trace_ctx.get("response_headers", {}),
         )
         try:
-            self._tracer.log(trace)
+            self._tracer.log_raw(trace)
         except Exception:
             # Log error but don't fail the request
             logger.exception("Failed to create HTTP trace")
@@ -182,9 +181,12 @@ def _is_streaming_request(kwargs: dict) -> bool:
     return kwargs.get("stream", False)
 
 
-def _build_trace_context(request: requests.PreparedRequest) -> dict:
+def _build_trace_context(
+    request: requests.PreparedRequest,
+    started_at: datetime | None = None,
+) -> dict:
     """Build initial trace context from a requests PreparedRequest."""
-    started_at = datetime.now(timezone.utc)
+    started_at = started_at or datetime.now(timezone.utc)
     request_payload = request.body or b""
     if isinstance(request_payload, str):
         request_payload = request_payload.encode("utf-8")
@@ -192,18 +194,16 @@ def _build_trace_context(request: requests.PreparedRequest) -> dict:
     # Extract call path
     call_path_and_no = extract_call_path(is_async=False)
 
-    parsed_url = urlparse(request.url)
-    request_path = parsed_url.path
-
+    # Headers are redacted and the request path parsed when the trace is
+    # validated, off the request path
     return {
         "method": request.method.upper(),
         "url": request.url,
         "started_at": started_at,
         "request_bytes": request_payload,
-        "request_headers": redact_headers(dict(request.headers)),
+        "request_headers": request.headers,
         "path": call_path_and_no[0] if call_path_and_no else None,
         "request_method": request.method.upper(),
-        "request_path": request_path,
     }
 
 
@@ -211,14 +211,14 @@ def _finalize_trace(
     trace_ctx: dict,
     response: requests.Response,
     error: str = None,
-) -> HTTPTrace:
-    """Create final HTTPTrace from context and response."""
+) -> RawHTTPTrace:
+    """Create the final trace record from context and response."""
     completed_at = datetime.now(timezone.utc)
     status_code = response.status_code if response else 0
     response_bytes = response.content or b"" if response else b""
-    response_headers = redact_headers(dict(response.headers)) if response else {}
+    response_headers = response.headers if response else {}
 
-    return HTTPTrace(
+    return RawHTTPTrace(
         url=trace_ctx.get("url", ""),
         method=trace_ctx.get("method", ""),
         path=trace_ctx.get("path"),
@@ -240,16 +240,25 @@ def _create_send_wrapper(original: Callable, tracer: AbstractTracer | None = Non
 
     @functools.wraps(original)
     def wrapper(self, request, **kwargs):
-        # Check if we should trace this URL
-        if not should_trace_url(request.url):
+        # Check if we should trace this URL and whether it is sampled
+        decision = sample_url(request.url)
+        if decision == SKIP:
             return original(request, **kwargs)
 
-        trace_ctx = _build_trace_context(request)
+        # Unsampled requests only build a trace context if they fail
+        started_at = datetime.now(timezone.utc)
+        trace_ctx = None
+        if decision == TRACE:
+            trace_ctx = _build_trace_context(request, started_at=started_at)
 
         response = None
         error = None
         try:
             response = original(request, **kwargs)
+            if trace_ctx is None:
+                if not is_error_status(response.status_code):
+                    return response
+                trace_ctx = _build_trace_context(request, started_at=started_at)
 
             # Check if this is a streaming request
             if _is_streaming_request(kwargs):
@@ -258,7 +267,7 @@ def _create_send_wrapper(original: Callable, tracer: AbstractTracer | None = Non
             # For non-streaming responses, trace immediately
             trace = _finalize_trace(trace_ctx, response, error)
             try:
-                tracer.log(trace)
+                tracer.log_raw(trace)
             except Exception:
                 # Log error but don't fail the request
                 logger.exception("Failed to create HTTP trace")
@@ -266,9 +275,11 @@ def _create_send_wrapper(original: Callable, tracer: AbstractTracer | None = Non
 
         except Exception as e:
             error = str(e)
+            if trace_ctx is None:
+                trace_ctx = _build_trace_context(request, started_at=started_at)
             trace = _finalize_trace(trace_ctx, response, error)
             try:
-                tracer.log(trace)
+                tracer.log_raw(trace)
             except Exception:
                 # Log error but don't fail the request
                 logger.exception("Failed to create HTTP trace")
@@ -1,6 +1,8 @@
-import inspect
+import functools
 import os
-from dataclasses import dataclass
+import site
+import sys
+import sysconfig
 from pathlib import Path
 
 from async_trace import collect_async_trace
@@ -9,11 +11,44 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-@dataclass
-class FrameInfo:
-    filename: str
-    function: str
-    lineno: int
+def _library_prefixes() -> tuple[str, ...]:
+    """Return the resolved site-packages, stdlib and SDK package directories."""
+    paths = set(site.getsitepackages())
+    user_site = site.getusersitepackages()
+    if user_site:
+        paths.add(user_site)
+    paths.add(sysconfig.get_path("stdlib"))
+    # The SDK's own frames (tracing wrappers, filters) are never the call site
+    paths.add(os.path.dirname(__file__))
+    return tuple(os.path.join(os.path.realpath(path), "") for path in paths)
+
+
+# Library directories do not change while the process runs
+_LIBRARY_PREFIXES = _library_prefixes()
+
+_cwd = os.getcwd()
+
+
+@functools.lru_cache(maxsize=4096)
+def _frame_call_path(filename: str, function: str) -> str | None:
+    """Format the call path of a frame, or return None for library frames."""
+    # Skip internal Python files
+    if filename.startswith("<") or filename == "__main__":
+        return None
+
+    # Skip library files and files in site-packages
+    if "site-packages" in filename:
+        return None
+    if os.path.realpath(filename).startswith(_LIBRARY_PREFIXES):
+        return None
+
+    # Try to make the path relative to current working directory
+    try:
+        relative_path = Path(filename).relative_to(_cwd)
+        return f"{relative_path}::{function}"
+    except ValueError:
+        # If not relative to cwd, use the absolute path
+        return f"{filename}::{function}"
 
 
 def extract_call_path(
@@ -22,6 +57,10 @@ def extract_call_path(
 ) -> tuple[str, int] | None:
     """Extract the call path from the first non-library file in the call stack.
 
+    Walks frame objects directly instead of building ``inspect.stack()``, and
+    caches per ``(filename, function)`` whether a frame is library code and
+    its formatted call path.
+
     Args:
         max_depth: Maximum number of frames to inspect
 
@@ -30,90 +69,39 @@ def extract_call_path(
         "<file-path>::<function>" (e.g., "src/main.py::say_hi")
 
     """
+    global _cwd
+    cwd = os.getcwd()
+    if cwd != _cwd:
+        _cwd = cwd
+        _frame_call_path.cache_clear()
+
     if is_async:
-        frames = collect_async_trace().get("frames")
-        stack = (
-            [
-                FrameInfo(
-                    filename=frame.get("filename"),
-                    function=frame.get("name"),
-                    lineno=frame.get("line"),
-                )
-                for frame in frames
-                if frame.get("filename")
-            ]
-            if frames
-            else []
-        )
-    else:
-        stack = [
-            FrameInfo(frame.filename, frame.function, frame.lineno)
-            for frame in inspect.stack()
-            if frame.filename
-        ]
-
-    # Get site-packages and other library paths to filter out
-    import site
-
-    library_paths = set()
-
-    # Add site-packages directories
-    for path in site.getsitepackages():
-        library_paths.add(Path(path).resolve())
-
-    # Add user site-packages
-    user_site = site.getusersitepackages()
-    if user_site:
-        library_paths.add(Path(user_site).resolve())
-
-    # Add standard library path
-    import sysconfig
-
-    stdlib_path = Path(sysconfig.get_path("stdlib")).resolve()
-    library_paths.add(stdlib_path)
-
-    # Iterate through the stack frames
-    for frame_info in stack[1 : max_depth + 1]:  # Skip the current frame
-        file_path = frame_info.filename
-        function_name = frame_info.function
-        line_number = frame_info.lineno
-
-        # Resolve the file path
-        resolved_path = Path(file_path).resolve()
-
-        # Check if this is a library file
-        is_library = False
-        for lib_path in library_paths:
-            try:
-                resolved_path.relative_to(lib_path)
-                is_library = True
-                break
-            except ValueError:
+        frames = collect_async_trace().get("frames") or []
+        # Skip the current frame
+        for frame in frames[1 : max_depth + 1]:
+            filename = frame.get("filename")
+            if not filename:
                 continue
-
-        # Skip library files and files in site-packages
-        if is_library or "site-packages" in file_path:
-            continue
-
-        # Skip internal Python files
-        if file_path.startswith("<") or file_path == "__main__":
-            continue
-
-        # Found the first non-library file
-        # Try to make the path relative to current working directory
-        try:
-            relative_path = Path(file_path).relative_to(Path.cwd())
-            call_path = f"{relative_path}::{function_name}"
-        except ValueError:
-            # If not relative to cwd, use the absolute path
-            call_path = f"{file_path}::{function_name}"
-
-        return (call_path, line_number)
+            call_path = _frame_call_path(filename, frame.get("name"))
+            if call_path is not None:
+                return (call_path, frame.get("line"))
+        return None
+
+    # Skip the current frame
+    frame = sys._getframe(1)
+    for _ in range(max_depth):
+        if frame is None:
+            break
+        code = frame.f_code
+        if code.co_filename:
+            call_path = _frame_call_path(code.co_filename, code.co_name)
+            if call_path is not None:
+                return (call_path, frame.f_lineno)
+        frame = frame.f_back
 
     return None
 
 
-
 def get_project_name() -> str | None:
     """Get the project name from environment variables."""
     return os.getenv("PROJECT_NAME")
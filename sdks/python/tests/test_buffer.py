@@ -0,0 +1,145 @@
+"""Tests for the bounded trace buffer."""
+
+import queue
+import random
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from r4u.buffer import TraceBuffer, estimate_trace_size
+from r4u.client import R4UClient
+
+
+def _trace(name: str, body_size: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(name=name, request=b"x" * body_size, response=b"")
+
+
+def _names(buffer: TraceBuffer) -> list[str]:
+    return [trace.name for trace in buffer.drain()]
+
+
+class TestTraceBuffer:
+    """Tests for TraceBuffer."""
+
+    def test_fifo_order(self):
+        buffer = TraceBuffer(max_items=10)
+        for name in "abc":
+            assert buffer.put(_trace(name))
+
+        assert buffer.qsize() == 3
+        assert _names(buffer) == ["a", "b", "c"]
+        assert buffer.empty()
+
+    def test_get_nowait_raises_when_empty(self):
+        buffer = TraceBuffer()
+        with pytest.raises(queue.Empty):
+            buffer.get_nowait()
+
+    def test_drain_with_limit(self):
+        buffer = TraceBuffer()
+        for name in "abcd":
+            buffer.put(_trace(name))
+
+        assert [t.name for t in buffer.drain(max_items=3)] == ["a", "b", "c"]
+        assert buffer.qsize() == 1
+
+    def test_drop_oldest_by_count(self):
+        buffer = TraceBuffer(max_items=2, drop_policy="drop_oldest")
+        for name in "abcd":
+            assert buffer.put(_trace(name))
+
+        assert _names(buffer) == ["c", "d"]
+        assert buffer.dropped_count == 2
+
+    def test_drop_newest_by_count(self):
+        buffer = TraceBuffer(max_items=2, drop_policy="drop_newest")
+        results = [buffer.put(_trace(name)) for name in "abcd"]
+
+        assert results == [True, True, False, False]
+        assert _names(buffer) == ["a", "b"]
+        assert buffer.dropped_count == 2
+
+    def test_drop_oldest_by_bytes(self):
+        size = estimate_trace_size(_trace("a", 1000))
+        buffer = TraceBuffer(max_bytes=size * 2, drop_policy="drop_oldest")
+        for name in "abc":
+            buffer.put(_trace(name, 1000))
+
+        assert buffer.size_bytes == size * 2
+        assert _names(buffer) == ["b", "c"]
+        assert buffer.dropped_bytes == size
+
+    def test_trace_larger_than_limit_is_dropped(self):
+        buffer = TraceBuffer(max_bytes=1024)
+
+        assert not buffer.put(_trace("big", 10_000))
+        assert buffer.empty()
+        assert buffer.dropped_count == 1
+
+    def test_sample_keeps_bounded_uniform_sample(self):
+        random.seed(1234)
+        buffer = TraceBuffer(max_items=100, drop_policy="sample")
+        for i in range(10_000):
+            buffer.put(_trace(str(i)))
+
+        kept = [int(name) for name in _names(buffer)]
+        assert len(kept) == 100
+        assert buffer.dropped_count == 9_900
+        # A uniform sample spreads over the whole stream, not just its head or tail
+        assert min(kept) < 2_000
+        assert max(kept) > 8_000
+
+    def test_stats(self):
+        buffer = TraceBuffer(max_items=1, drop_policy="drop_newest")
+        buffer.put(_trace("a"))
+        buffer.put(_trace("b"))
+
+        stats = buffer.stats()
+        assert stats["queued"] == 1
+        assert stats["dropped"] == 1
+        assert stats["queued_bytes"] == estimate_trace_size(_trace("a"))
+
+    def test_rejects_unknown_policy(self):
+        with pytest.raises(ValueError, match="Unknown drop policy"):
+            TraceBuffer(drop_policy="drop_everything")
+
+    def test_rejects_non_positive_limits(self):
+        with pytest.raises(ValueError, match="positive"):
+            TraceBuffer(max_items=0)
+
+
+class TestR4UClientQueueLimits:
+    """Tests for R4UClient queue configuration."""
+
+    @patch("r4u.client.httpx.Client")
+    def test_client_drops_when_queue_full(self, mock_httpx_client):
+        client = R4UClient(
+            api_url="http://localhost:8000",
+            max_queue_size=2,
+            drop_policy="drop_newest",
+        )
+        client.stop_worker()
+
+        for name in "abc":
+            client.log(_trace(name))
+
+        assert client.dropped_traces == 1
+        assert client.stats()["queued"] == 2
+
+    @patch.dict(
+        "os.environ",
+        {
+            "R4U_MAX_QUEUE_SIZE": "5",
+            "R4U_MAX_QUEUE_BYTES": "4096",
+            "R4U_DROP_POLICY": "sample",
+        },
+    )
+    @patch("r4u.client.httpx.Client")
+    def test_client_reads_queue_limits_from_env(self, mock_httpx_client):
+        client = R4UClient(api_url="http://localhost:8000")
+        client.stop_worker()
+
+        assert client._trace_queue.max_items == 5
+        assert client._trace_queue.max_bytes == 4096
+        assert client._trace_queue.drop_policy == "sample"
@@ -0,0 +1,94 @@
+"""Tests for streaming response body capture."""
+
+import pytest
+
+from r4u.tracing.http import capture
+from r4u.tracing.http.capture import BodyCapture, get_max_capture_bytes, set_max_capture_bytes
+
+
+@pytest.fixture
+def reset_capture_cap():
+    """Restore the module-level capture cap after a test."""
+    yield
+    set_max_capture_bytes(None)
+    capture._max_capture_bytes = None
+
+
+class TestBodyCapture:
+    """Tests for BodyCapture."""
+
+    def test_joins_byte_chunks(self):
+        """Test byte chunks are joined in order."""
+        body = BodyCapture(max_bytes=1024)
+        for chunk in [b"data: 1\n\n", b"data: 2\n\n", b""]:
+            body.append(chunk)
+
+        assert body.getvalue() == b"data: 1\n\ndata: 2\n\n"
+        assert body.omitted == 0
+
+    def test_encodes_text_and_lines(self):
+        """Test text chunks and lines are encoded as UTF-8."""
+        body = BodyCapture(max_bytes=1024)
+        body.append("héllo ")
+        body.append_line("wörld")
+        body.append_line(b"raw")
+
+        assert body.getvalue() == "héllo wörld\nraw\n".encode()
+
+    def test_truncates_at_cap_with_marker(self):
+        """Test chunks beyond the cap are counted and marked."""
+        body = BodyCapture(max_bytes=10)
+        body.append(b"0123456")
+        body.append(b"789abc")
+        body.append(b"def")
+
+        value = body.getvalue()
+
+        assert value.startswith(b"0123456789")
+        assert body.omitted == 6
+        assert value.endswith(b"[r4u: response truncated, 6 bytes omitted]")
+
+    def test_truncates_multibyte_text_to_byte_cap(self):
+        """Test the byte cap applies to encoded text."""
+        body = BodyCapture(max_bytes=4)
+        body.append("éééé")
+
+        value = body.getvalue()
+
+        assert value.startswith("éé".encode())
+        assert body.omitted == 4
+        # Calling getvalue again does not count the truncation twice
+        assert body.getvalue() == value
+
+    def test_replace_resets_capture(self):
+        """Test replace discards streamed chunks."""
+        body = BodyCapture(max_bytes=4)
+        body.append(b"abcdef")
+        body.replace(b"xy")
+
+        assert body.getvalue() == b"xy"
+        assert body.omitted == 0
+
+
+class TestMaxCaptureBytes:
+    """Tests for the configurable capture cap."""
+
+    def test_reads_environment(self, monkeypatch, reset_capture_cap):
+        """Test the cap is read from R4U_MAX_CAPTURE_BYTES."""
+        capture._max_capture_bytes = None
+        monkeypatch.setenv("R4U_MAX_CAPTURE_BYTES", "2048")
+
+        assert get_max_capture_bytes() == 2048
+        assert BodyCapture().max_bytes == 2048
+
+    def test_set_overrides_environment(self, monkeypatch, reset_capture_cap):
+        """Test set_max_capture_bytes takes precedence."""
+        monkeypatch.setenv("R4U_MAX_CAPTURE_BYTES", "2048")
+        set_max_capture_bytes(16)
+
+        assert BodyCapture().max_bytes == 16
+
+    def test_rejects_negative_cap(self):
+        """Test a negative cap is rejected."""
+        with pytest.raises(ValueError):
+            set_max_capture_bytes(-1)
@@ -1,13 +1,19 @@
 """Tests for R4U client and HTTPTrace model."""
 
+import json
+import threading
 import time
 from datetime import datetime, timezone
 from unittest.mock import ANY, Mock, patch
 
+import httpx
+import pytest
+
 from r4u.client import (
     AbstractTracer,
     HTTPTrace,
     R4UClient,
+    RawHTTPTrace,
     get_r4u_client,
 )
 
@@ -291,8 +297,15 @@ class TestR4UClient:
 
         client._send_traces_batch(traces)
 
-        # Should have called post twice (once per trace)
-        assert mock_client_instance.post.call_count == 2
+        # Should have called post once with the whole batch
+        assert mock_client_instance.post.call_count == 1
+        args, kwargs = mock_client_instance.post.call_args
+        assert args[0] == "http://localhost:8000/v1/http-traces/batch"
+        assert kwargs["headers"]["Content-Type"] == "application/json"
+        assert [item["url"] for item in json.loads(kwargs["content"])] == [
+            "https://api.example.com/test1",
+            "https://api.example.com/test2",
+        ]
 
         client.stop_worker()
 
@@ -391,3 +404,229 @@ class TestGetR4UClient:
             api_key=ANY,
             timeout=60.0,
         )
+
+
+def _make_trace(url: str = "https://api.example.com/test") -> HTTPTrace:
+    return HTTPTrace(
+        url=url,
+        method="POST",
+        path=None,
+        error=None,
+        started_at=datetime.now(timezone.utc),
+        completed_at=datetime.now(timezone.utc),
+        status_code=200,
+        request=b"{}",
+        request_headers={},
+        response=b"{}",
+        response_headers={},
+    )
+
+
+def _status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://localhost:8000/v1/http-traces/batch")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+@patch("r4u.client._RETRY_BASE_DELAY", 0.0)
+class TestR4UClientSender:
+    """Tests for batching, parallel sending and retries in R4UClient."""
+
+    @patch("r4u.client.httpx.Client")
+    def test_retries_server_errors_then_succeeds(self, mock_httpx_client):
+        mock_client_instance = Mock()
+        failing = Mock()
+        failing.raise_for_status.side_effect = _status_error(503)
+        mock_client_instance.post.side_effect = [failing, failing, Mock()]
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(api_url="http://localhost:8000", max_retries=3)
+        client.stop_worker()
+        client._send_traces_batch([_make_trace()])
+
+        assert mock_client_instance.post.call_count == 3
+        assert client.stats()["sent"] == 1
+        assert client.stats()["failed"] == 0
+
+    @patch("r4u.client.httpx.Client")
+    def test_retries_connection_errors(self, mock_httpx_client):
+        mock_client_instance = Mock()
+        mock_client_instance.post.side_effect = httpx.ConnectError("refused")
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(api_url="http://localhost:8000", max_retries=2)
+        client.stop_worker()
+        client._send_traces_batch([_make_trace(), _make_trace()])
+
+        assert mock_client_instance.post.call_count == 3
+        assert client.stats()["failed"] == 2
+
+    @patch("r4u.client.httpx.Client")
+    def test_does_not_retry_client_errors(self, mock_httpx_client):
+        mock_client_instance = Mock()
+        rejected = Mock()
+        rejected.raise_for_status.side_effect = _status_error(422)
+        mock_client_instance.post.return_value = rejected
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(api_url="http://localhost:8000", max_retries=3)
+        client.stop_worker()
+        client._send_traces_batch([_make_trace()])
+
+        assert mock_client_instance.post.call_count == 1
+        assert client.stats()["failed"] == 1
+
+    @patch("r4u.client.httpx.Client")
+    def test_async_ingest_mode_posts_to_ingest(self, mock_httpx_client):
+        mock_client_instance = Mock()
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(api_url="http://localhost:8000", ingest_mode="async")
+        client.stop_worker()
+        client._send_traces_batch([_make_trace()])
+
+        args, _ = mock_client_instance.post.call_args
+        assert args[0] == "http://localhost:8000/v1/http-traces/ingest"
+        assert client.stats()["sent"] == 1
+
+    @patch.dict("os.environ", {"R4U_INGEST_MODE": "async"})
+    @patch("r4u.client.httpx.Client")
+    def test_ingest_mode_from_env(self, mock_httpx_client):
+        client = R4UClient(api_url="http://localhost:8000")
+        client.stop_worker()
+        assert client.ingest_mode == "async"
+
+        with pytest.raises(ValueError, match="ingest mode"):
+            R4UClient(api_url="http://localhost:8000", ingest_mode="later")
+
+    @patch("r4u.client.httpx.Client")
+    def test_flushes_when_batch_size_reached(self, mock_httpx_client):
+        mock_client_instance = Mock()
+        sent = threading.Event()
+        mock_client_instance.post.side_effect = lambda *a, **kw: sent.set() or Mock()
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(
+            api_url="http://localhost:8000",
+            batch_size=2,
+            flush_interval=60.0,
+        )
+        client.log(_make_trace())
+        client.log(_make_trace())
+
+        assert sent.wait(timeout=2.0)
+        _, kwargs = mock_client_instance.post.call_args
+        assert len(json.loads(kwargs["content"])) == 2
+        client.stop_worker()
+
+    @patch("r4u.client.httpx.Client")
+    def test_splits_queue_into_batches(self, mock_httpx_client):
+        mock_client_instance = Mock()
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(api_url="http://localhost:8000", batch_size=2)
+        client.stop_worker()
+        for _ in range(5):
+            client.log(_make_trace())
+        client._flush()
+
+        sizes = [
+            len(json.loads(call.kwargs["content"]))
+            for call in mock_client_instance.post.call_args_list
+        ]
+        assert sizes == [2, 2, 1]
+
+    @patch("r4u.client.httpx.Client")
+    def test_parallel_senders(self, mock_httpx_client):
+        mock_client_instance = Mock()
+        barrier = threading.Barrier(3, timeout=2.0)
+
+        def post(*args, **kwargs):
+            # Only completes if three batches are in flight at the same time
+            barrier.wait()
+            return Mock()
+
+        mock_client_instance.post.side_effect = post
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(
+            api_url="http://localhost:8000",
+            batch_size=1,
+            flush_interval=60.0,
+            max_concurrency=3,
+        )
+        for _ in range(3):
+            client.log(_make_trace())
+        client.stop_worker()
+
+        assert mock_client_instance.post.call_count == 3
+        assert client.stats()["sent"] == 3
+
+    @patch("r4u.client.httpx.Client")
+    def test_stop_worker_flushes_pending_traces(self, mock_httpx_client):
+        mock_client_instance = Mock()
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(api_url="http://localhost:8000", flush_interval=60.0)
+        client.log(_make_trace())
+        client.stop_worker()
+
+        assert mock_client_instance.post.call_count == 1
+        assert client._trace_queue.empty()
+
+
+def _make_raw_trace(**overrides) -> RawHTTPTrace:
+    fields = {
+        "url": "https://api.example.com/v1/chat?stream=true",
+        "method": "POST",
+        "started_at": datetime.now(timezone.utc),
+        "completed_at": datetime.now(timezone.utc),
+        "status_code": 200,
+        "request": b"{}",
+        "request_headers": httpx.Headers({"Authorization": "Bearer secret"}),
+        "response": b"{}",
+        "response_headers": httpx.Headers({"Content-Type": "application/json"}),
+    }
+    fields.update(overrides)
+    return RawHTTPTrace(**fields)
+
+
+class TestRawHTTPTrace:
+    """Tests for deferred validation of raw trace records."""
+
+    def test_to_http_trace_redacts_and_parses_path(self):
+        trace = _make_raw_trace().to_http_trace()
+
+        assert isinstance(trace, HTTPTrace)
+        assert trace.request_headers == {"authorization": "[REDACTED]"}
+        assert trace.response_headers == {"content-type": "application/json"}
+        assert trace.request_path == "/v1/chat"
+
+    def test_default_log_raw_validates_before_log(self):
+        tracer = Mock(spec=AbstractTracer)
+
+        AbstractTracer.log_raw(tracer, _make_raw_trace())
+
+        trace = tracer.log.call_args.args[0]
+        assert isinstance(trace, HTTPTrace)
+        assert trace.request_headers["authorization"] == "[REDACTED]"
+
+    @patch("r4u.client.httpx.Client")
+    def test_client_defers_validation_to_sender(self, mock_httpx_client):
+        mock_client_instance = Mock()
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(api_url="http://localhost:8000", flush_interval=60.0)
+        record = _make_raw_trace()
+        client.log_raw(record)
+
+        assert client._trace_queue.drain() == [record]
+
+        client.stop_worker()
+        client._send_traces_batch([record, _make_raw_trace(status_code="invalid")])
+
+        sent = json.loads(mock_client_instance.post.call_args.kwargs["content"])
+        assert len(sent) == 1
+        assert sent[0]["request_headers"] == {"authorization": "[REDACTED]"}
+        assert client.stats()["sent"] == 1
+        assert client.stats()["failed"] == 1
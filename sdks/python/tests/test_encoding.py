@@ -0,0 +1,136 @@
+"""Tests for trace wire formats."""
+
+import gzip
+import json
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+
+import msgpack
+import pytest
+import zstandard
+
+from r4u.client import HTTPTrace, R4UClient
+from r4u.encoding import encode_traces, validate_wire_options
+
+
+def _make_trace(response: bytes = b'{"result": "ok"}') -> HTTPTrace:
+    return HTTPTrace(
+        url="https://api.openai.com/v1/chat/completions",
+        method="POST",
+        path="app.py::main",
+        started_at=datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc),
+        completed_at=datetime(2024, 1, 1, 12, 0, 1, tzinfo=timezone.utc),
+        status_code=200,
+        request=b'{"model": "gpt-4"}',
+        request_headers={"content-type": "application/json"},
+        response=response,
+        response_headers={"content-type": "application/json"},
+    )
+
+
+class TestEncodeTraces:
+    """Tests for encode_traces."""
+
+    def test_json_is_default(self):
+        body, headers = encode_traces([_make_trace()])
+
+        assert headers == {"Content-Type": "application/json"}
+        decoded = json.loads(body)
+        assert decoded[0]["url"] == "https://api.openai.com/v1/chat/completions"
+        assert decoded[0]["request"] == '{"model": "gpt-4"}'
+
+    def test_msgpack_keeps_raw_bytes(self):
+        raw = b"data: {\"x\": 1}\n\n" * 100
+        body, headers = encode_traces([_make_trace(raw)], wire_format="msgpack")
+
+        assert headers == {"Content-Type": "application/msgpack"}
+        decoded = msgpack.unpackb(body, raw=False)
+        assert decoded[0]["response"] == raw
+        assert decoded[0]["request"] == b'{"model": "gpt-4"}'
+        assert decoded[0]["started_at"] == "2024-01-01T12:00:00+00:00"
+
+    def test_gzip_compression(self):
+        body, headers = encode_traces([_make_trace()], compression="gzip")
+
+        assert headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(body))[0]["status_code"] == 200
+
+    def test_zstd_compression(self):
+        body, headers = encode_traces(
+            [_make_trace()],
+            wire_format="msgpack",
+            compression="zstd",
+        )
+
+        assert headers["Content-Encoding"] == "zstd"
+        decompressed = zstandard.ZstdDecompressor().decompress(body)
+        assert msgpack.unpackb(decompressed, raw=False)[0]["status_code"] == 200
+
+    def test_msgpack_is_smaller_for_streamed_bodies(self):
+        trace = _make_trace(b'data: {"choices": [{"delta": "hi"}]}\n\n' * 500)
+
+        json_body, _ = encode_traces([trace])
+        msgpack_body, _ = encode_traces([trace], wire_format="msgpack")
+
+        assert len(msgpack_body) < len(json_body)
+
+
+class TestValidateWireOptions:
+    """Tests for validate_wire_options."""
+
+    def test_rejects_unknown_format(self):
+        with pytest.raises(ValueError, match="Unknown wire format"):
+            validate_wire_options("xml", None)
+
+    def test_rejects_unknown_compression(self):
+        with pytest.raises(ValueError, match="Unknown compression"):
+            validate_wire_options("json", "brotli")
+
+    def test_missing_msgpack_raises_import_error(self):
+        with patch.dict("sys.modules", {"msgpack": None}):
+            with pytest.raises(ImportError, match="r4u\\[msgpack\\]"):
+                validate_wire_options("msgpack", None)
+
+
+class TestR4UClientWireFormat:
+    """Tests for R4UClient wire format configuration."""
+
+    @patch("r4u.client.httpx.Client")
+    def test_sends_msgpack_gzip_batch(self, mock_httpx_client):
+        mock_client_instance = Mock()
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(
+            api_url="http://localhost:8000",
+            api_key="secret",
+            wire_format="msgpack",
+            compression="gzip",
+        )
+        client._send_traces_batch([_make_trace()])
+        client.stop_worker()
+
+        _, kwargs = mock_client_instance.post.call_args
+        assert kwargs["headers"] == {
+            "Content-Type": "application/msgpack",
+            "Content-Encoding": "gzip",
+            "X_API_KEY": "secret",
+        }
+        decoded = msgpack.unpackb(gzip.decompress(kwargs["content"]), raw=False)
+        assert decoded[0]["response"] == b'{"result": "ok"}'
+
+    @patch.dict(
+        "os.environ",
+        {"R4U_WIRE_FORMAT": "msgpack", "R4U_COMPRESSION": "zstd"},
+    )
+    @patch("r4u.client.httpx.Client")
+    def test_reads_wire_options_from_env(self, mock_httpx_client):
+        client = R4UClient(api_url="http://localhost:8000")
+        client.stop_worker()
+
+        assert client.wire_format == "msgpack"
+        assert client.compression == "zstd"
+
+    @patch("r4u.client.httpx.Client")
+    def test_rejects_invalid_wire_format(self, mock_httpx_client):
+        with pytest.raises(ValueError, match="Unknown wire format"):
+            R4UClient(api_url="http://localhost:8000", wire_format="xml")
@@ -0,0 +1,188 @@
+"""Tests for URL filtering."""
+
+import fnmatch
+from urllib.parse import urlparse
+
+import pytest
+
+from r4u.tracing.http import filters
+from r4u.tracing.http.auto import configure_url_filter, get_url_filter
+from r4u.tracing.http.filters import (
+    ERRORS_ONLY,
+    SKIP,
+    TRACE,
+    SamplingRule,
+    URLFilter,
+    _literal_host,
+)
+
+
+def _fnmatch_any(url: str, patterns: list[str]) -> bool:
+    """Reference implementation matching each pattern against URL variations."""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    variations = [
+        url,
+        f"{parsed.scheme}://{host}{parsed.path}",
+        f"{parsed.scheme}://{host}/*",
+        host,
+        f"{host}/*",
+    ]
+    return any(
+        fnmatch.fnmatch(variation.lower(), pattern.lower())
+        for pattern in patterns
+        for variation in variations
+    )
+
+
+PATTERNS = [
+    "https://api.openai.com/*",
+    "https://API.Anthropic.com/v1/messages",
+    "api.groq.com",
+    "api.mistral.ai/*",
+    "localhost:8000",
+    "*.googleapis.com/*",
+    "*://api.x.ai/*",
+    "https://*/v1/models",
+    "*stream=true*",
+    "https:/*",
+]
+
+URLS = [
+    "https://api.openai.com/v1/chat/completions",
+    "https://api.anthropic.com/v1/messages",
+    "https://api.anthropic.com/v1/complete",
+    "https://api.groq.com/openai/v1/chat/completions",
+    "http://api.mistral.ai/v1/chat",
+    "http://localhost:8000/v1/http-traces",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini:generateContent",
+    "https://api.x.ai/v1/chat/completions",
+    "https://example.com/v1/models",
+    "http://example.com/search?stream=true",
+    "http://example.com/other",
+]
+
+
+class TestURLFilter:
+    """Tests for URLFilter."""
+
+    def test_matches_like_fnmatch(self):
+        """Test the compiled index decides like fnmatch over URL variations."""
+        for pattern in PATTERNS:
+            url_filter = URLFilter(allow_urls=[pattern], extend_defaults=False)
+            for url in URLS:
+                expected = _fnmatch_any(url, [pattern])
+                assert url_filter.should_trace(url) == expected, (pattern, url)
+
+    def test_deny_takes_precedence(self):
+        """Test deny patterns override allow patterns."""
+        url_filter = URLFilter(deny_urls=["https://api.openai.com/v1/models"])
+
+        assert url_filter.should_trace("https://api.openai.com/v1/chat/completions")
+        assert not url_filter.should_trace("https://api.openai.com/v1/models")
+
+    def test_large_deny_list(self):
+        """Test many literal-host deny patterns are indexed by host."""
+        deny = [f"https://blocked-{i}.example.com/*" for i in range(500)]
+        url_filter = URLFilter(allow_urls=["*"], deny_urls=deny, extend_defaults=False)
+
+        assert not url_filter.should_trace("https://blocked-250.example.com/x")
+        assert url_filter.should_trace("https://allowed.example.com/x")
+        assert len(url_filter._deny_index._by_host) == 500
+        assert url_filter._deny_index._wildcard is None
+
+    def test_decisions_are_cached(self):
+        """Test repeated URLs are answered from the decision cache."""
+        url_filter = URLFilter(decision_cache_size=2)
+        url = "https://api.openai.com/v1/chat/completions"
+
+        url_filter.should_trace(url)
+        url_filter.should_trace(url)
+
+        info = url_filter._decide.cache_info()
+        assert info.hits == 1
+        assert info.maxsize == 2
+
+    @pytest.mark.parametrize(
+        ("pattern", "host"),
+        [
+            ("https://api.openai.com/*", "api.openai.com"),
+            ("api.groq.com", "api.groq.com"),
+            ("localhost:8000/*", "localhost:8000"),
+            ("*.googleapis.com/*", None),
+            ("*://api.x.ai/*", None),
+            ("https:/*", None),
+        ],
+    )
+    def test_literal_host(self, pattern, host):
+        """Test which patterns are indexed by host."""
+        assert _literal_host(pattern) == host
+
+
+class TestSampling:
+    """Tests for per-pattern sampling and rate limits."""
+
+    def test_unsampled_urls_are_always_traced(self):
+        """Test allowed URLs without a sampling rule are traced."""
+        url_filter = URLFilter(sampling={"https://api.openai.com/v1/embeddings": 0.0})
+
+        assert url_filter.sample("https://api.openai.com/v1/chat/completions") == TRACE
+        assert url_filter.sample("https://example.com/other") == SKIP
+
+    def test_rate_is_deterministic_per_call_path(self):
+        """Test each call site keeps its first request and then every 1/rate-th."""
+        url_filter = URLFilter(sampling={"https://api.openai.com/*": 0.25})
+        url = "https://api.openai.com/v1/chat/completions"
+
+        def call_site_a():
+            return url_filter.sample(url)
+
+        def call_site_b():
+            return url_filter.sample(url)
+
+        first = [call_site_a() for _ in range(8)]
+        second = [call_site_b() for _ in range(4)]
+
+        assert first == [TRACE, ERRORS_ONLY, ERRORS_ONLY, ERRORS_ONLY] * 2
+        assert second == [TRACE, ERRORS_ONLY, ERRORS_ONLY, ERRORS_ONLY]
+
+    def test_rate_limit_uses_token_bucket(self, monkeypatch):
+        """Test the token bucket admits a burst and then refills over time."""
+        now = [100.0]
+        monkeypatch.setattr(filters.time, "monotonic", lambda: now[0])
+        url_filter = URLFilter(
+            sampling={"https://api.openai.com/*": SamplingRule(rate_limit=2, burst=2)},
+            keep_errors=False,
+        )
+        url = "https://api.openai.com/v1/chat/completions"
+
+        assert [url_filter.sample(url) for _ in range(3)] == [TRACE, TRACE, SKIP]
+
+        now[0] += 0.5
+        assert [url_filter.sample(url) for _ in range(2)] == [TRACE, SKIP]
+
+    def test_first_matching_rule_applies(self):
+        """Test sampling rules are matched in order."""
+        url_filter = URLFilter(
+            sampling={
+                "https://api.openai.com/v1/embeddings": 0.0,
+                "https://api.openai.com/*": 1.0,
+            },
+        )
+
+        assert url_filter.sample("https://api.openai.com/v1/embeddings") == ERRORS_ONLY
+        assert url_filter.sample("https://api.openai.com/v1/responses") == TRACE
+
+    def test_invalid_rate(self):
+        """Test sampling rates outside [0, 1] are rejected."""
+        with pytest.raises(ValueError):
+            SamplingRule(rate=1.5)
+
+    def test_configure_url_filter_extends_sampling(self):
+        """Test configure_url_filter keeps existing rules and prefers new ones."""
+        configure_url_filter(sampling={"https://api.openai.com/*": 0.5})
+        configure_url_filter(sampling={"https://api.anthropic.com/*": 0.1})
+
+        sampling = get_url_filter().get_sampling()
+        assert list(sampling) == ["https://api.anthropic.com/*", "https://api.openai.com/*"]
+        assert sampling["https://api.openai.com/*"].rate == 0.5
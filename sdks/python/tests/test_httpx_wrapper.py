@@ -6,7 +6,8 @@ from unittest.mock import Mock
 import httpx
 import pytest
 
-from r4u.client import HTTPTrace
+from r4u.client import HTTPTrace, RawHTTPTrace
+from r4u.tracing.http.filters import URLFilter, set_global_filter
 from r4u.tracing.http.httpx import (
     StreamingResponseWrapper,
     _build_trace_context,
@@ -110,7 +111,8 @@ class TestFinalizeTrace:
 
         trace = _finalize_trace(trace_ctx, mock_httpx_response, None)
 
-        assert isinstance(trace, HTTPTrace)
+        assert isinstance(trace, RawHTTPTrace)
+        assert isinstance(trace.to_http_trace(), HTTPTrace)
         assert trace.url == "https://api.example.com/test"
         assert trace.method == "POST"
         assert trace.status_code == 200
@@ -236,6 +238,30 @@ class TestStreamingResponseWrapper:
         assert len(capturing_tracer.traces) == 1
         assert capturing_tracer.traces[0].response == b"chunk1chunk2chunk3"
 
+    def test_wrapper_iter_lines_truncates_at_cap(self, capturing_tracer, monkeypatch):
+        """Test wrapper.iter_lines() caps the captured body but yields every line."""
+        monkeypatch.setattr("r4u.tracing.http.capture._max_capture_bytes", 16)
+        response = Mock(spec=httpx.Response)
+        response.status_code = 200
+        response.headers = {}
+        lines = [f"data: {i}" for i in range(10)]
+        response.iter_lines = Mock(return_value=iter(lines))
+
+        trace_ctx = {
+            "url": "https://api.example.com/test",
+            "method": "GET",
+            "started_at": datetime.now(timezone.utc),
+            "request_bytes": b"",
+            "request_headers": {},
+        }
+
+        wrapper = StreamingResponseWrapper(response, trace_ctx, capturing_tracer)
+
+        assert list(wrapper.iter_lines()) == lines
+        captured = capturing_tracer.traces[0].response
+        assert captured.startswith(b"data: 0\ndata: 1\n")
+        assert b"[r4u: response truncated, 64 bytes omitted]" in captured
+
     def test_wrapper_handles_streaming_error(self, capturing_tracer, capsys):
         """Test wrapper handles errors during streaming."""
         response = Mock(spec=httpx.Response)
@@ -346,6 +372,69 @@ class TestTraceSyncClient:
         assert trace.status_code == 0
 
 
+class TestSampling:
+    """Tests for sampled tracing through the client wrapper."""
+
+    @staticmethod
+    def _client(capturing_tracer, status_codes):
+        statuses = iter(status_codes)
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(next(statuses), content=b"{}"),
+        )
+        client = httpx.Client(transport=transport)
+        trace_client(client, capturing_tracer)
+        return client
+
+    def test_unsampled_requests_skip_trace_context(self, capturing_tracer, monkeypatch):
+        """Test requests that are not sampled never build a trace context."""
+        set_global_filter(
+            URLFilter(
+                allow_urls=["https://api.example.com/*"],
+                sampling={"https://api.example.com/*": 0.0},
+            ),
+        )
+        build = Mock(side_effect=_build_trace_context)
+        monkeypatch.setattr("r4u.tracing.http.httpx._build_trace_context", build)
+        client = self._client(capturing_tracer, [200, 200])
+
+        client.get("https://api.example.com/test")
+        client.get("https://api.example.com/test")
+
+        build.assert_not_called()
+        assert capturing_tracer.traces == []
+
+    def test_unsampled_error_responses_are_kept(self, capturing_tracer):
+        """Test error responses are traced even when not sampled."""
+        set_global_filter(
+            URLFilter(
+                allow_urls=["https://api.example.com/*"],
+                sampling={"https://api.example.com/*": 0.0},
+            ),
+        )
+        client = self._client(capturing_tracer, [200, 500])
+
+        client.get("https://api.example.com/test")
+        client.get("https://api.example.com/test")
+
+        assert [trace.status_code for trace in capturing_tracer.traces] == [500]
+        assert capturing_tracer.traces[0].started_at <= capturing_tracer.traces[0].completed_at
+
+    def test_errors_dropped_without_keep_errors(self, capturing_tracer):
+        """Test keep_errors=False drops unsampled error responses."""
+        set_global_filter(
+            URLFilter(
+                allow_urls=["https://api.example.com/*"],
+                sampling={"https://api.example.com/*": 0.0},
+                keep_errors=False,
+            ),
+        )
+        client = self._client(capturing_tracer, [500])
+
+        client.get("https://api.example.com/test")
+
+        assert capturing_tracer.traces == []
+
+
 class TestTraceAsyncClient:
     """Tests for trace_async_client (async httpx.AsyncClient)."""
 
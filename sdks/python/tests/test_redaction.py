@@ -4,7 +4,9 @@ import pytest
 from unittest.mock import Mock
 from r4u.utils import redact_headers, SENSITIVE_HEADERS
 from r4u.tracing.http.requests import _build_trace_context as requests_build_context
+from r4u.tracing.http.requests import _finalize_trace as requests_finalize_trace
 from r4u.tracing.http.httpx import _build_trace_context as httpx_build_context
+from r4u.tracing.http.httpx import _finalize_trace as httpx_finalize_trace
 from r4u.tracing.http.aiohttp import _create_async_wrapper
 import requests
 import httpx
@@ -56,7 +58,7 @@ class TestRequestsRedaction:
     """Test redaction in requests wrapper."""
 
     def test_requests_headers_redaction(self):
-        """Test that requests headers are redacted in trace context."""
+        """Test that requests headers are redacted in the validated trace."""
         request = Mock(spec=requests.PreparedRequest)
         request.method = "GET"
         request.url = "https://api.example.com/"
@@ -67,18 +69,19 @@ class TestRequestsRedaction:
         request.body = None
 
         ctx = requests_build_context(request)
+        trace = requests_finalize_trace(ctx, None).to_http_trace()
         
-        assert ctx["request_headers"]["Authorization"] == "[REDACTED]"
-        assert ctx["request_headers"]["Content-Type"] == "application/json"
-        assert ctx["request_method"] == "GET"
-        assert ctx["request_path"] == "/"
+        assert trace.request_headers["Authorization"] == "[REDACTED]"
+        assert trace.request_headers["Content-Type"] == "application/json"
+        assert trace.request_method == "GET"
+        assert trace.request_path == "/"
 
 
 class TestHttpxRedaction:
     """Test redaction in httpx wrapper."""
 
     def test_httpx_headers_redaction(self):
-        """Test that httpx headers are redacted in trace context."""
+        """Test that httpx headers are redacted in the validated trace."""
         request = Mock(spec=httpx.Request)
         request.method = "GET"
         request.url = httpx.URL("https://api.example.com/")
@@ -89,7 +92,8 @@ class TestHttpxRedaction:
         request.content = b""
 
         ctx = httpx_build_context(request)
-        assert ctx["request_headers"]["authorization"] == "[REDACTED]"
-        assert ctx["request_headers"]["content-type"] == "application/json"
-        assert ctx["request_method"] == "GET"
-        assert ctx["request_path"] == "/"
+        trace = httpx_finalize_trace(ctx, None, None).to_http_trace()
+        assert trace.request_headers["authorization"] == "[REDACTED]"
+        assert trace.request_headers["content-type"] == "application/json"
+        assert trace.request_method == "GET"
+        assert trace.request_path == "/"
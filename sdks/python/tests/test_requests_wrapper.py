@@ -6,7 +6,7 @@ from unittest.mock import Mock
 import pytest
 import requests
 
-from r4u.client import HTTPTrace
+from r4u.client import HTTPTrace, RawHTTPTrace
 from r4u.tracing.http.requests import (
     StreamingResponseWrapper,
     _build_trace_context,
@@ -123,7 +123,8 @@ class TestFinalizeTrace:
 
         trace = _finalize_trace(trace_ctx, mock_requests_response, None)
 
-        assert isinstance(trace, HTTPTrace)
+        assert isinstance(trace, RawHTTPTrace)
+        assert isinstance(trace.to_http_trace(), HTTPTrace)
         assert trace.url == "https://api.example.com/test"
         assert trace.method == "POST"
         assert trace.status_code == 200
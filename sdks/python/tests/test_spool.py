@@ -0,0 +1,188 @@
+"""Tests for the disk-backed trace spool."""
+
+import os
+import time
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+
+import httpx
+
+from r4u.client import HTTPTrace, R4UClient
+from r4u.spool import TraceSpool
+
+HEADERS = {"Content-Type": "application/json"}
+
+
+def _collect(spool: TraceSpool) -> list[bytes]:
+    bodies = []
+    spool.replay(lambda body, headers, count: bodies.append(body) or True)
+    return bodies
+
+
+class TestTraceSpool:
+    """Tests for TraceSpool."""
+
+    def test_append_and_replay_in_order(self, tmp_path):
+        spool = TraceSpool(tmp_path)
+        spool.append(b"first", HEADERS, 1)
+        spool.append(b"second", HEADERS, 2)
+
+        assert spool.has_pending()
+        received = []
+
+        def send(body, headers, count):
+            received.append((body, headers, count))
+            return True
+
+        assert spool.replay(send) == 3
+        assert received == [(b"first", HEADERS, 1), (b"second", HEADERS, 2)]
+        assert not spool.has_pending()
+
+    def test_replay_stops_and_keeps_undelivered_records(self, tmp_path):
+        spool = TraceSpool(tmp_path)
+        for body in (b"a", b"b", b"c"):
+            spool.append(body, HEADERS, 1)
+
+        attempts = []
+
+        def send(body, headers, count):
+            attempts.append(body)
+            return body != b"b"
+
+        assert spool.replay(send) == 1
+        assert attempts == [b"a", b"b"]
+        # The delivered record is not replayed again
+        assert _collect(spool) == [b"b", b"c"]
+
+    def test_segments_rotate(self, tmp_path):
+        spool = TraceSpool(tmp_path, segment_bytes=100)
+        for _ in range(5):
+            spool.append(b"x" * 80, HEADERS, 1)
+
+        assert len(list(tmp_path.iterdir())) == 5
+        assert len(_collect(spool)) == 5
+
+    def test_survives_restart(self, tmp_path):
+        TraceSpool(tmp_path).append(b"persisted", HEADERS, 1)
+
+        assert _collect(TraceSpool(tmp_path)) == [b"persisted"]
+
+    def test_ignores_truncated_tail(self, tmp_path):
+        spool = TraceSpool(tmp_path)
+        spool.append(b"complete", HEADERS, 1)
+        segment = next(tmp_path.iterdir())
+        with segment.open("ab") as f:
+            f.write(b"\x00\x00\x00\x10\x00")
+
+        assert _collect(spool) == [b"complete"]
+
+    def test_size_cap_discards_oldest_segments(self, tmp_path):
+        spool = TraceSpool(tmp_path, max_bytes=450, segment_bytes=100)
+        for i in range(6):
+            spool.append(str(i).encode() * 80, HEADERS, 1)
+
+        bodies = _collect(spool)
+        assert spool.discarded_count == 3
+        assert [body[:1] for body in bodies] == [b"3", b"4", b"5"]
+
+    def test_age_cap_discards_old_segments(self, tmp_path):
+        spool = TraceSpool(tmp_path, max_age=60, segment_bytes=10)
+        spool.append(b"old", HEADERS, 2)
+        old_segment = next(tmp_path.iterdir())
+        old = time.time() - 3600
+        os.utime(old_segment, (old, old))
+        spool.append(b"new", HEADERS, 1)
+
+        assert _collect(spool) == [b"new"]
+        assert spool.discarded_count == 2
+
+
+def _make_trace() -> HTTPTrace:
+    return HTTPTrace(
+        url="https://api.example.com/test",
+        method="POST",
+        started_at=datetime.now(timezone.utc),
+        completed_at=datetime.now(timezone.utc),
+        status_code=200,
+        request=b"{}",
+        request_headers={},
+        response=b"{}",
+        response_headers={},
+    )
+
+
+@patch("r4u.client._RETRY_BASE_DELAY", 0.0)
+@patch("r4u.client._SPOOL_REPLAY_INTERVAL", 0.0)
+class TestR4UClientSpool:
+    """Tests for spooling in R4UClient."""
+
+    @patch("r4u.client.httpx.Client")
+    def test_spools_on_outage_and_replays_on_recovery(
+        self,
+        mock_httpx_client,
+        tmp_path,
+    ):
+        mock_client_instance = Mock()
+        mock_client_instance.post.side_effect = httpx.ConnectError("refused")
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(
+            api_url="http://localhost:8000",
+            api_key="secret",
+            max_retries=1,
+            spool_dir=str(tmp_path),
+        )
+        client.stop_worker()
+        client._send_traces_batch([_make_trace(), _make_trace()])
+
+        stats = client.stats()
+        assert stats["spooled"] == 2
+        assert stats["failed"] == 0
+        assert stats["spool_bytes"] > 0
+
+        # Backend comes back
+        mock_client_instance.post.side_effect = None
+        mock_client_instance.post.reset_mock()
+        client._replay_spool()
+
+        assert mock_client_instance.post.call_count == 1
+        _, kwargs = mock_client_instance.post.call_args
+        assert kwargs["headers"]["X_API_KEY"] == "secret"
+        stats = client.stats()
+        assert stats["replayed"] == 2
+        assert stats["spool_bytes"] == 0
+
+    @patch("r4u.client.httpx.Client")
+    def test_client_errors_are_not_spooled(self, mock_httpx_client, tmp_path):
+        request = httpx.Request("POST", "http://localhost:8000/v1/http-traces/batch")
+        rejected = Mock()
+        rejected.raise_for_status.side_effect = httpx.HTTPStatusError(
+            "invalid",
+            request=request,
+            response=httpx.Response(422, request=request),
+        )
+        mock_client_instance = Mock()
+        mock_client_instance.post.return_value = rejected
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(api_url="http://localhost:8000", spool_dir=str(tmp_path))
+        client.stop_worker()
+        client._send_traces_batch([_make_trace()])
+
+        assert client.stats()["failed"] == 1
+        assert client.stats()["spooled"] == 0
+        assert list(tmp_path.iterdir()) == []
+
+    @patch("r4u.client.httpx.Client")
+    def test_replay_keeps_spool_while_backend_down(self, mock_httpx_client, tmp_path):
+        TraceSpool(tmp_path).append(b"[]", HEADERS, 3)
+        mock_client_instance = Mock()
+        mock_client_instance.post.side_effect = httpx.ConnectError("refused")
+        mock_httpx_client.return_value = mock_client_instance
+
+        client = R4UClient(api_url="http://localhost:8000", spool_dir=str(tmp_path))
+        client.stop_worker()
+        client._replay_spool()
+
+        assert client.stats()["replayed"] == 0
+        assert client._spool.has_pending()
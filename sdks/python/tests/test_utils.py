@@ -1,4 +1,7 @@
-from r4u.utils import extract_call_path
+import os
+import sysconfig
+
+from r4u.utils import _frame_call_path, extract_call_path
 
 
 def test_extract_call_path_direct_call():
@@ -84,3 +87,30 @@ def test_extract_call_path_from_class_method():
     assert isinstance(line_number, int)
     assert line_number > 0
 
+
+
+def test_extract_call_path_skips_library_and_generated_frames():
+    """Test that stdlib and generated frames are skipped."""
+    namespace = {"extract_call_path": extract_call_path}
+    stdlib_file = os.path.join(sysconfig.get_path("stdlib"), "r4u_fake_module.py")
+    exec(compile("def library_call():\n    return extract_call_path()\n", stdlib_file, "exec"), namespace)
+    exec(compile("def generated_call():\n    return library_call()\n", "<string>", "exec"), namespace)
+
+    def caller():
+        return namespace["generated_call"]()
+
+    call_path, _ = caller()
+
+    assert "test_utils.py::caller" in call_path
+
+
+def test_extract_call_path_follows_cwd_changes(tmp_path, monkeypatch):
+    """Test that cached call paths are recomputed when the working directory changes."""
+    call_path, _ = extract_call_path()
+    assert not os.path.isabs(call_path.split("::")[0])
+    assert _frame_call_path.cache_info().currsize > 0
+
+    monkeypatch.chdir(tmp_path)
+    call_path, _ = extract_call_path()
+
+    assert os.path.isabs(call_path.split("::")[0])